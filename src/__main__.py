@@ -22,6 +22,7 @@ from src.config import setup
 from src.config.datamodel.auth import AuthenticationMethod
 from src.mechaclient import MechaClient
 from src.packages import cli_manager
+from src.packages.board import BoardServer
 # noinspection PyUnresolvedReferences
 from src.packages import ratmama  # pylint: disable=unused-import
 from src.packages.commands import command
@@ -90,6 +91,10 @@ async def start():
             config.telemetry.bind_port,
             f"{config.telemetry.bind_host}"
         )
+    if config.board.http_enabled:
+        await BoardServer(client.board).start(
+            f"{config.board.http_bind_host}", config.board.http_bind_port
+        )
 
 
 # entry point
@@ -5,24 +5,18 @@ from src.packages.commands import command
 from src.packages.context import Context
 from src.packages.permissions import require_permission, RAT
 
-from ..packages.parsing_rules import (
-    rescue_identifier,
-    irc_name,
-    suppress_first_word,
-    timer,
-    rest_of_line,
-    platform,
-    api_id,
-)
+from ..packages.parsing_rules.compiled import END, SKIP, Pattern, first_word, irc_name
 
-RATID_PATTERN = suppress_first_word + irc_name.setResultsName("subject")
+RATID_PATTERN = Pattern(
+    rf"{first_word}{SKIP}(?P<subject>{irc_name}){END}", subject=lambda token: [token]
+)
 
 
 @command("ratid", require_permission=RAT)
 async def cmd_ratid(context: Context):
-    if not RATID_PATTERN.matches(context.words_eol[0]):
+    tokens = RATID_PATTERN.parse(context.words_eol[0])
+    if tokens is None:
         return await context.reply("Usage: !ratid <irc_nickname>")
-    tokens = RATID_PATTERN.parseString(context.words_eol[0])
 
     results = await context.bot.api_handler.get_rat(
         key=tokens.subject[0], impersonation=context.user.account
@@ -17,20 +17,30 @@ import uuid
 import warnings
 import pendulum
 import humanfriendly
-import pyparsing
 from loguru import logger
 
-from ..templates import RescueRenderFlags, template_environment
+from ..templates import RescueRenderFlags, render_rescue, render_rescues
 from ..packages.commands import command
 from ..packages.context.context import Context
-from ..packages.parsing_rules import (
-    rescue_identifier,
+from ..packages.dispatch import Priority
+from ..packages.parsing_rules.compiled import (
+    END,
+    KEYWORD_END,
+    KEYWORD_START,
+    SKIP,
+    WORD_END,
+    Pattern,
+    api_id,
+    first_word,
     irc_name,
-    suppress_first_word,
-    timer,
-    rest_of_line,
     platform,
-    api_id,
+    rescue_identifier,
+    rest_of_line,
+    timer,
+    to_api_id,
+    to_rescue_identifier,
+    to_rest_of_line,
+    to_timer,
 )
 from ..packages.permissions.permissions import (
     RAT,
@@ -46,84 +56,108 @@ _TIME_RE = re.compile(r"(\d+)[: ](\d+)")
 Regex matcher used to find a time within a string. Used to determine
 if a newly-submitted case is code red or not.
 """
-ASSIGN_PATTERN = (
-    suppress_first_word
-    + rescue_identifier.setResultsName("subject")
-    + pyparsing.OneOrMore(irc_name).setResultsName("rats")
+_SUBJECT = rf"{first_word}{SKIP}(?P<subject>{rescue_identifier})"
+""" the command, then the rescue it concerns """
+_API_ID = re.compile(api_id)
+_ESCAPED = re.compile(r"\\(.)")
+_WHITESPACE_ESCAPES = {r"\t": "\t", r"\n": "\n", r"\f": "\f", r"\r": "\r"}
+
+
+def _subject(token: str) -> typing.List[typing.Any]:
+    return [to_rescue_identifier(token)]
+
+
+def _unquote(token: str) -> str:
+    """ Text quoted in slashes, with backslash escapes, like pyparsing's `QuotedString` """
+    text = token[1:-1]
+    if "\\" in text:
+        for escape, char in _WHITESPACE_ESCAPES.items():
+            text = text.replace(escape, char)
+        text = _ESCAPED.sub(r"\g<1>", text)
+    return text
+
+
+ASSIGN_PATTERN = Pattern(
+    rf"{_SUBJECT}(?P<rats>(?:{SKIP}{irc_name})+){END}", subject=_subject, rats=str.split
 )
 
-ACTIVE_PATTERN = (
-    suppress_first_word
-    + rescue_identifier.setResultsName("subject")
+ACTIVE_PATTERN = Pattern(
     # This comes positionally LAST or it catches the wrong things.
-    + rest_of_line.setResultsName("remainder")
+    rf"{_SUBJECT}(?P<remainder>{rest_of_line}){END}",
+    subject=_subject,
+    remainder=to_rest_of_line,
 )
 
-CLEAR_PATTERN = (
-    suppress_first_word
-    + rescue_identifier.setResultsName("subject")
-    + pyparsing.Optional(irc_name).setResultsName("first_limpet")
+CLEAR_PATTERN = Pattern(
+    rf"{_SUBJECT}(?:{SKIP}(?P<first_limpet>{irc_name}))?{END}",
+    subject=_subject,
+    first_limpet=lambda token: [token],
 )
-CMDR_PATTERN = (
-    suppress_first_word
-    + rescue_identifier.setResultsName("subject")
-    + rest_of_line.setResultsName("new_cmdr")
+CMDR_PATTERN = Pattern(
+    rf"{_SUBJECT}(?P<new_cmdr>{rest_of_line}){END}", subject=_subject, new_cmdr=to_rest_of_line
 )
 
-GRAB_PATTERN = suppress_first_word + rescue_identifier.setResultsName("subject")
-
-IRC_NICK_PATTERN = (
-    suppress_first_word
-    + rescue_identifier.setResultsName("subject")
-    + irc_name.setResultsName("new_nick")
+GRAB_PATTERN = Pattern(
+    rf"{_SUBJECT}(?:{SKIP}(?:(?P<count>[0-9]+){WORD_END}"
+    rf"|(?P<pattern>/(?:[^/\n\r\\]|\\.)*/)))?{END}",
+    subject=_subject,
+    count=int,
+    pattern=_unquote,
 )
-JUST_RESCUE_PATTERN = suppress_first_word + rescue_identifier.setResultsName("subject")
-
-SUB_CMD_PATTERN = (
-    suppress_first_word
-    + rescue_identifier.setResultsName("subject")
-    + (pyparsing.Word(pyparsing.nums, pyparsing.nums, min=1) + pyparsing.WordEnd())
-    .setParseAction(lambda token: int(token.quote_id[0]))
-    .setResultsName("quote_id")
-    + rest_of_line.setResultsName("remainder")
+
+IRC_NICK_PATTERN = Pattern(
+    rf"{_SUBJECT}{SKIP}(?P<new_nick>{irc_name}){END}",
+    subject=_subject,
+    new_nick=lambda token: [token],
 )
+JUST_RESCUE_PATTERN = Pattern(rf"{_SUBJECT}{END}", subject=_subject)
 
-SYS_PATTERN = (
-    suppress_first_word
-    + rescue_identifier.setResultsName("subject")
-    + rest_of_line.setResultsName("remainder")
+SUB_CMD_PATTERN = Pattern(
+    rf"{_SUBJECT}{SKIP}(?P<quote_id>[0-9]+){WORD_END}(?P<remainder>{rest_of_line}){END}",
+    subject=_subject,
+    quote_id=int,
+    remainder=to_rest_of_line,
 )
 
+SYS_PATTERN = ACTIVE_PATTERN
+
 TITLE_PATTERN = SYS_PATTERN
 
-UNASSIGN_PATTERN = (
-    suppress_first_word
-    + rescue_identifier.setResultsName("subject")
-    + pyparsing.OneOrMore(irc_name).setResultsName("rats")
-)
+UNASSIGN_PATTERN = ASSIGN_PATTERN
 
-INJECT_PATTERN = (
-    suppress_first_word
-    + rescue_identifier.setResultsName("subject")
-    # The following group captures in any order (&).
-    + (
-        pyparsing.Optional(
-            pyparsing.CaselessKeyword("cr") ^ pyparsing.CaselessKeyword("code red")
-        ).setResultsName("code_red")
-        & pyparsing.Optional(timer("timer"))
-        & pyparsing.Optional(platform).setResultsName("platform")
-    )
-    # This comes positionally LAST and OUTSIDE the above capture group or it
+INJECT_PATTERN = Pattern(
+    _SUBJECT,
+    # The following options are captured in any order.
+    rf"{KEYWORD_START}(?P<code_red>(?i:code red|cr)){KEYWORD_END}",
+    rf"(?P<timer>{timer})",
+    platform,
+    # This comes positionally LAST and AFTER the above options or it
     # catches the wrong things.
-    + rest_of_line.setResultsName("remainder")
+    tail=rf"(?P<remainder>{rest_of_line}){END}",
+    subject=_subject,
+    code_red=str.lower,
+    timer=to_timer,
+    platform=lambda token: [token.lower()],
+    pc=str.lower,
+    playstation=str.lower,
+    xbox=str.lower,
+    remainder=to_rest_of_line,
 )
 
-CODE_RED_PATTERN = suppress_first_word + rescue_identifier.setResultsName("subject")
+CODE_RED_PATTERN = JUST_RESCUE_PATTERN
+
+REOPEN_PATTERN = Pattern(
+    rf"{first_word}{SKIP}(?P<subject>{api_id}|(?!{api_id}){irc_name}){END}",
+    subject=lambda token: [to_api_id(token) if _API_ID.fullmatch(token) else token],
+)
 
-REOPEN_PATTERN = suppress_first_word + api_id.setResultsName("subject")
+CLOSED_PATTERN = REOPEN_PATTERN
 
 
-@command("active", "activate", "inactive", "deactivate", require_permission=RAT, require_channel=True)
+@command(
+    "active", "activate", "inactive", "deactivate",
+    require_permission=RAT, require_channel=True, priority=Priority.CASE,
+)
 async def cmd_case_management_active(ctx: Context):
     """
     Toggles the indicated case as active or inactive.  Requires an OPEN case.
@@ -136,10 +170,10 @@ async def cmd_case_management_active(ctx: Context):
     Channel Only: YES
     Permission: Rat
     """
-    if not ACTIVE_PATTERN.matches(ctx.words_eol[0]):
+    tokens = ACTIVE_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         await ctx.reply("Usage: !active <Client Name|Case Number> [Optional inject message]")
         return
-    tokens = ACTIVE_PATTERN.parseString(ctx.words_eol[0])
     rescue = ctx.bot.board.get(tokens.subject[0])
 
     if not rescue:
@@ -160,12 +194,15 @@ async def cmd_case_management_active(ctx: Context):
         await ctx.reply(f'{case.client}\'s case is now {"Active" if case.active else "Inactive"}.')
 
 
-@command("assign", "add", "go", require_channel=True, require_permission=RAT)
+@command(
+    "assign", "add", "go",
+    require_channel=True, require_permission=RAT, priority=Priority.CASE,
+)
 async def cmd_case_management_assign(ctx: Context):
-    if not ASSIGN_PATTERN.matches(ctx.words_eol[0]):
+    tokens = ASSIGN_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         await ctx.reply("Usage: !assign <Client Name|Case Number> <Rat 1> <Rat 2> <Rat 3>")
         return
-    tokens = ASSIGN_PATTERN.parseString(ctx.words_eol[0])
     logger.debug("parsed assign tokens::{}", tokens)
     # Pass case to validator, return a case if found or None
     rescue = ctx.bot.board.get(tokens.subject[0])
@@ -195,12 +232,12 @@ async def cmd_case_management_assign(ctx: Context):
     )
 
 
-@command("clear", "close", require_permission=RAT, require_channel=True)
+@command("clear", "close", require_permission=RAT, require_channel=True, priority=Priority.CASE)
 async def cmd_case_management_clear(ctx: Context):
-    if not CLEAR_PATTERN.matches(ctx.words_eol[0]):
+    tokens = CLEAR_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         await ctx.reply("Usage: !clear <Client Name|Board Index> [First Limpet Sender]")
         return
-    tokens = CLEAR_PATTERN.parseString(ctx.words_eol[0])
     # Pass case to validator, return a case if found or None
     rescue = ctx.bot.board.get(tokens.subject[0])
 
@@ -234,12 +271,49 @@ async def cmd_case_management_clear(ctx: Context):
     await ctx.reply(f"Case {case.client} was cleared!")
 
 
-@command("cmdr", "commander", require_channel=True, require_permission=RAT)
+@command("closed", require_channel=True, require_permission=RAT, priority=Priority.CASE)
+async def cmd_case_management_closed(ctx: Context):
+    """ Tells what happened to a recently closed case """
+    tokens = CLOSED_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
+        return await ctx.reply("Usage: !closed <API-ID|Client Name>")
+    subject = tokens.subject[0]
+
+    archived = ctx.bot.board.archive.get(subject)
+    if archived is not None:
+        rescue = archived.rescue
+        closed_at = pendulum.from_timestamp(archived.archived_at)
+    elif isinstance(subject, uuid.UUID) and ctx.bot.board.online:
+        rescue = await ctx.bot.board.api_handler.get_rescue(
+            key=subject, impersonation=ctx.user.account
+        )
+        closed_at = rescue.updated_at if rescue else None
+    else:
+        rescue = None
+    if not rescue:
+        return await ctx.reply("No recently closed case with that name or API ID.")
+    if rescue.open:
+        return await ctx.reply(f"{rescue.client}'s case (@{rescue.api_id}) is still open.")
+
+    platform_name = rescue.platform.value if rescue.platform else "an unknown platform"
+    outcome = f"was closed {closed_at.diff_for_humans()}"
+    if rescue.marked_for_deletion.marked:
+        outcome = (
+            f"{outcome}, marked for deletion by {rescue.marked_for_deletion.reporter}:"
+            f" {rescue.marked_for_deletion.reason}"
+        )
+    await ctx.reply(
+        f"{rescue.client}'s case #{rescue.board_index} (@{rescue.api_id}) in"
+        f" {rescue.system or 'an unspecified system'} on {platform_name} {outcome}."
+    )
+
+
+@command("cmdr", "commander", require_channel=True, require_permission=RAT, priority=Priority.CASE)
 async def cmd_case_management_cmdr(ctx: Context):
-    if not CMDR_PATTERN.matches(ctx.words_eol[0]):
+    tokens = CMDR_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         await ctx.reply("Usage: !cmdr <Client Name|Board Index> <CMDR name>")
         return
-    tokens = CMDR_PATTERN.parseString(ctx.words_eol[0])
     # Pass case to validator, return a case if found or None
     rescue = ctx.bot.board.get(tokens.subject[0])
 
@@ -252,14 +326,16 @@ async def cmd_case_management_cmdr(ctx: Context):
         await ctx.reply(f"Client for {case.board_index} is now CMDR {case.client}")
 
 
-@command("codered", "casered", "cr", require_channel=True, require_permission=RAT)
+@command(
+    "codered", "casered", "cr",
+    require_channel=True, require_permission=RAT, priority=Priority.CASE,
+)
 async def cmd_case_management_codered(ctx: Context):
-    if not CODE_RED_PATTERN.matches(ctx.words_eol[0]):
+    tokens = CODE_RED_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         await ctx.reply("Usage: !codered <Client Name|Board Index>")
         return
 
-    tokens = CODE_RED_PATTERN.parseString(ctx.words_eol[0])
-
     # Pass case to validator, return a case if found or None
     rescue = ctx.bot.board.get(tokens.subject[0])
 
@@ -282,7 +358,7 @@ async def cmd_case_management_codered(ctx: Context):
             await ctx.reply(f"{case.client} is no longer a Code Red.")
 
 
-@command("delete", require_channel=True, require_permission=OVERSEER)
+@command("delete", require_channel=True, require_permission=OVERSEER, priority=Priority.CASE)
 async def cmd_case_management_delete(ctx: Context):
     if len(ctx.words) < 2:
         await ctx.reply("Usage: !delete <API ID>")
@@ -304,7 +380,7 @@ async def cmd_case_management_delete(ctx: Context):
         await ctx.bot.board.remove_rescue(rescue)
 
 
-@command("epic", require_channel=True, require_permission=RAT)
+@command("epic", require_channel=True, require_permission=RAT, priority=Priority.CASE)
 async def cmd_case_management_epic(ctx: Context):
     # This command may be depreciated, and not used.  It's left in only as an artifact, or
     # if that changes.
@@ -315,20 +391,28 @@ async def cmd_case_management_epic(ctx: Context):
     warnings.warn("call to deprecated command", DeprecationWarning)
 
 
-@command("grab", require_channel=True, require_permission=RAT)
+@command("grab", require_channel=True, require_permission=RAT, priority=Priority.CASE)
 async def cmd_case_management_grab(ctx: Context):
-    if not GRAB_PATTERN.matches(ctx.words_eol[0]):
-        await ctx.reply("Usage: !grab <Client Name>")
+    tokens = GRAB_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
+        await ctx.reply("Usage: !grab <Client Name> [<number of lines> | /<text>/]")
         return
-    tokens = GRAB_PATTERN.parseString(ctx.words_eol[0])
     # Pass case to validator, return a case if found or None
     rescue: Rescue = ctx.bot.board.get(tokens.subject[0])
 
     subject = rescue.irc_nickname.casefold() if rescue else ctx.words[1].casefold()
-    logger.debug("checking for last message of irc nick {!r}...", subject)
-    last_message = ctx.bot.last_user_message.get(subject)
-    logger.debug("last_message = {!r}", last_message)
-    if not last_message:
+    logger.debug("checking for recent messages of irc nick {!r}...", subject)
+    if tokens.pattern:
+        lines = ctx.bot.history.search(subject, pattern=tokens.pattern)
+    else:
+        lines = ctx.bot.history.search(subject, count=tokens.count or 1)
+    logger.debug("lines = {!r}", lines)
+    if not lines:
+        if tokens.pattern:
+            return await ctx.reply(
+                f"Cannot comply: {ctx.words[1]} has not said anything matching "
+                f"{tokens.pattern!r} recently."
+            )
         return await ctx.reply(f"Cannot comply: {ctx.words[1]} has not spoken recently.")
 
     if not rescue:
@@ -337,33 +421,22 @@ async def cmd_case_management_grab(ctx: Context):
             f"Please first create one with '!inject {tokens.subject[0]} [CR] [PC/PS/XB]'"
         )
 
-    if ctx.words[1].casefold() in ctx.bot.last_user_message:
-        last_message = ctx.bot.last_user_message[ctx.words[1].casefold()]
-    elif int(ctx.words[1]) in ctx.bot.board:
-        if rescue.client.casefold() in ctx.bot.last_user_message:
-            last_message = ctx.bot.last_user_message[rescue.client.casefold()]
-
-        else:
-            await ctx.reply("Nothing to grab from that client.")
-            return
-    else:
-        await ctx.reply("Nothing to grab from that client.")
-        return
-
     async with ctx.bot.board.modify_rescue(rescue) as case:
-        case.add_quote(last_message, ctx.words[1].casefold())
+        for line in lines:
+            case.add_quote(line, ctx.words[1].casefold())
         await ctx.reply(
-            f"{case.client}'s case updated with " f"{last_message!r} (Case {case.board_index})"
+            f"{case.client}'s case updated with "
+            f"{', '.join(repr(line) for line in lines)} (Case {case.board_index})"
         )
 
 
-@command("inject", require_channel=True, require_permission=RAT)
+@command("inject", require_channel=True, require_permission=RAT, priority=Priority.CASE)
 async def cmd_case_management_inject(ctx: Context):
-    if not INJECT_PATTERN.matches(ctx.words_eol[0]):
+    tokens = INJECT_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         logger.debug("pattern match failed.")
         await ctx.reply("Usage: !inject <Client Name|Board Index> <Text to Add>")
         return
-    tokens = INJECT_PATTERN.parseString(ctx.words_eol[0])
     # Pass case to validator, return a case if found or None
     rescue = ctx.bot.board.get(tokens.subject[0])
 
@@ -415,11 +488,14 @@ async def cmd_case_management_inject(ctx: Context):
     )
 
 
-@command("ircnick", "nick", "nickname", require_channel=True, require_permission=RAT)
+@command(
+    "ircnick", "nick", "nickname",
+    require_channel=True, require_permission=RAT, priority=Priority.CASE,
+)
 async def cmd_case_management_ircnick(ctx: Context):
-    if not IRC_NICK_PATTERN.matches(ctx.words_eol[0]):
+    tokens = IRC_NICK_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         return await ctx.reply("Usage: !ircnick <Client Name|Board Index> <New Client Name>")
-    tokens = IRC_NICK_PATTERN.parseString(ctx.words_eol[0])
     # Pass case to validator, return a case if found or None
     rescue = ctx.bot.board.get(tokens.subject[0])
 
@@ -443,11 +519,11 @@ async def cmd_case_management_ircnick(ctx: Context):
         )
 
 
-@command("pc", "ps", "xb", require_channel=True, require_permission=RAT)
+@command("pc", "ps", "xb", require_channel=True, require_permission=RAT, priority=Priority.CASE)
 async def cmd_case_management_system(ctx: Context):
-    if not JUST_RESCUE_PATTERN.matches(ctx.words_eol[0]):
+    tokens = JUST_RESCUE_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         return await ctx.reply("Usage: !<pc|ps|xb> <Client Name|Board Index>")
-    tokens = JUST_RESCUE_PATTERN.parseString(ctx.words_eol[0])
     rescue = ctx.bot.board.get(tokens.subject[0])
 
     if not rescue:
@@ -459,7 +535,7 @@ async def cmd_case_management_system(ctx: Context):
         await ctx.reply(f"{case.client}'s platform set to {case.platform.value}.")
 
 
-@command("quiet", require_channel=True, require_permission=RAT)
+@command("quiet", require_channel=True, require_permission=RAT, priority=Priority.CASE)
 async def cmd_case_management_quiet(ctx: Context):
     # Check if there is an active rescue
     """
@@ -483,28 +559,26 @@ async def cmd_case_management_quiet(ctx: Context):
     await ctx.reply(f"The last case was created {human_delta.replace('after', 'ago')}.")
 
 
-@command("quote", require_channel=True, require_permission=RAT)
+@command("quote", require_channel=True, require_permission=RAT, priority=Priority.CASE)
 async def cmd_case_management_quote(ctx: Context):
-    if not JUST_RESCUE_PATTERN.matches(ctx.words_eol[0]):
+    tokens = JUST_RESCUE_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         await ctx.reply("Usage: !quote <Client Name|Board Index>")
         return
-
-    tokens = JUST_RESCUE_PATTERN.parseString(ctx.words_eol[0])
     rescue = ctx.bot.board.get(tokens.subject[0])
 
     if not rescue:
         await ctx.reply("No case with that name or number.")
         return
 
-    template = template_environment.get_template("rescue.jinja2")
     flags = RescueRenderFlags(
         show_assigned_rats=True, show_unidentified_rats=True, show_quotes=True, show_uuids=True
     )
-    output = await template.render_async(rescue=rescue, flags=flags)
+    output = await render_rescue(rescue, flags)
     return await ctx.reply(output.rstrip("\n"))
 
 
-@command("quoteid", require_channel=True, require_permission=OVERSEER)
+@command("quoteid", require_channel=True, require_permission=OVERSEER, priority=Priority.CASE)
 async def cmd_case_management_quoteid(ctx: Context):
     # TODO: Remove NYI Message when API capability is ready.
     await ctx.reply("Use !quote.  API is not available in offline mode.")
@@ -547,11 +621,11 @@ async def cmd_case_management_quoteid(ctx: Context):
             await ctx.reply(f"[{i}][{quote.author} ({quote_timestamp})] {quote.message}")
 
 
-@command("sub", require_channel=True, require_permission=OVERSEER)
+@command("sub", require_channel=True, require_permission=OVERSEER, priority=Priority.CASE)
 async def cmd_case_management_sub(ctx: Context):
-    if not SUB_CMD_PATTERN.matches(ctx.words_eol[0]):
+    tokens = SUB_CMD_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         return await ctx.reply("Usage: !sub <Client Name|Board Index> <Quote Number> [New Text]")
-    tokens = SUB_CMD_PATTERN.parseString(ctx.words_eol[0])
     rescue = ctx.bot.board.get(tokens.subject[0])
 
     if not rescue:
@@ -588,11 +662,14 @@ async def cmd_case_management_sub(ctx: Context):
         await ctx.reply(f"Deleted line {quote_id}.")
 
 
-@command("sys", "loc", "location", "system", require_channel=True, require_permission=RAT)
+@command(
+    "sys", "loc", "location", "system",
+    require_channel=True, require_permission=RAT, priority=Priority.CASE,
+)
 async def cmd_case_management_sys(ctx: Context):
-    if not SYS_PATTERN.matches(ctx.words_eol[0]):
+    tokens = SYS_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         return await ctx.reply("Usage: !sys <Client Name|Board Index> <New System>")
-    tokens = SYS_PATTERN.parseString(ctx.words_eol[0])
     rescue = ctx.bot.board.get(tokens.subject[0])
     if not tokens.remainder:
         return await ctx.reply("Usage: !sys <Client Name|Board Index> <New System>")
@@ -605,13 +682,12 @@ async def cmd_case_management_sys(ctx: Context):
         await ctx.reply(f"{case.client}'s system set to {tokens.remainder!r}")
 
 
-@command("title", require_channel=True, require_permission=RAT)
+@command("title", require_channel=True, require_permission=RAT, priority=Priority.CASE)
 async def cmd_case_management_title(ctx: Context):
-    if not TITLE_PATTERN.matches(ctx.words_eol[0]):
+    tokens = TITLE_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         await ctx.reply("Usage: !title <Client Name|Board Index> <Operation Title")
         return
-
-    tokens = TITLE_PATTERN.parseString(ctx.words_eol[0])
     rescue = ctx.bot.board.get(tokens.subject[0])
 
     if not rescue:
@@ -623,12 +699,14 @@ async def cmd_case_management_title(ctx: Context):
         await ctx.reply(f"{case.client}'s rescue title set to {tokens.remainder!r}")
 
 
-@command("unassign", "rm", "remove", "standdown", require_channel=True, require_permission=RAT)
+@command(
+    "unassign", "rm", "remove", "standdown",
+    require_channel=True, require_permission=RAT, priority=Priority.CASE,
+)
 async def cmd_case_management_unassign(ctx: Context):
-    if not UNASSIGN_PATTERN.matches(ctx.words_eol[0]):
+    tokens = UNASSIGN_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         return await ctx.reply("Usage: !unassign <Client Name|Case Number> <Rat 1> <Rat 2> <Rat 3>")
-
-    tokens = UNASSIGN_PATTERN.parseString(ctx.words_eol[0])
     rescue = ctx.bot.board.get(tokens.subject[0])
 
     if not rescue:
@@ -728,18 +806,14 @@ async def cmd_list(ctx: Context):
         await ctx.reply("No active rescues.")
     else:
 
-        output = await template_environment.get_template("list.jinja2").render_async(
-            rescues=active_rescues, flags=flags
-        )
+        output = await render_rescues(active_rescues, flags)
         if output:
             await ctx.reply(output.rstrip("\n"))
     if flags.show_inactive:
         if not inactive_rescues:
             return await ctx.reply("No inactive rescues.")
 
-        output = await template_environment.get_template("list.jinja2").render_async(
-            rescues=inactive_rescues, flags=flags
-        )
+        output = await render_rescues(inactive_rescues, flags)
         if output:
             await ctx.reply(output.rstrip("\n"))
 
@@ -781,22 +855,29 @@ def _rescue_filter(
     return not all(filters)
 
 
-@command("reopen", require_channel=True, require_permission=OVERSEER)
+@command("reopen", require_channel=True, require_permission=OVERSEER, priority=Priority.CASE)
 async def cmd_reopen(context: Context):
     """ Re-open a closed rescue """
-    if not REOPEN_PATTERN.matches(context.words_eol[0]):
-        return await context.reply("usage: !reopen <API-ID>")
-
-    tokens = REOPEN_PATTERN.parseString(context.words_eol[0])
+    tokens = REOPEN_PATTERN.parse(context.words_eol[0])
+    if tokens is None:
+        return await context.reply("usage: !reopen <API-ID|Client Name>")
+    subject = tokens.subject[0]
     # contextualize subsequent logging calls with the API ID of the request
-    with logger.contextualize(api_id=tokens.subject[0]):
-        logger.debug("attempting to reopen rescue by UUID {}...", tokens.subject[0])
-
-        rescue = await context.bot.board.api_handler.get_rescue(
-            key=tokens.subject[0], impersonation=context.user.account
-        )
+    with logger.contextualize(api_id=subject):
+        # recently closed rescues are still around locally, only go to the API for older ones
+        archived = context.bot.board.archive.get(subject)
+        if archived is not None:
+            logger.debug("reopening archived rescue {}...", archived.rescue.api_id)
+            rescue = archived.rescue
+        elif isinstance(subject, uuid.UUID):
+            logger.debug("attempting to reopen rescue by UUID {}...", subject)
+            rescue = await context.bot.board.api_handler.get_rescue(
+                key=subject, impersonation=context.user.account
+            )
+        else:
+            return await context.reply(f"no recently closed case for {subject!r}")
         if not rescue:
-            return await context.reply(f"no such rescue by id @{tokens.subject[0]}")
+            return await context.reply(f"no such rescue by id @{subject}")
 
         # We have a rescue, check that the board id / ircnick isn't already in use.
 
@@ -816,5 +897,6 @@ async def cmd_reopen(context: Context):
         async with context.bot.board.modify_rescue(rescue) as rescue:
             rescue.status = Status.OPEN
             rescue.unmark_delete()
+        context.bot.board.archive.discard(rescue.api_id)
 
         return await context.reply(f"reopened {rescue.client}'s case #{rescue.board_index}.")
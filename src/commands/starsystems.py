@@ -1,26 +1,45 @@
 import asyncio
 
 from ..packages.context import Context
+from ..packages.galaxy.circuit_breaker import CircuitOpenError
 from ..packages.commands import command
 from ..packages import permissions
-import pyparsing
 from loguru import logger
 
-from ..packages.parsing_rules import suppress_first_word
+from ..packages.parsing_rules.compiled import (
+    END,
+    KEYWORD_END,
+    KEYWORD_START,
+    SKIP,
+    Pattern,
+    first_word,
+    rest_of_line,
+    to_rest_of_line,
+)
 
-SEARCH_PATTERN = suppress_first_word + pyparsing.restOfLine.setResultsName("remainder")
+SEARCH_PATTERN = Pattern(
+    rf"{first_word}(?P<remainder>{rest_of_line}){END}", remainder=to_rest_of_line
+)
+
+LANDMARK_PATTERN = Pattern(
+    rf"{SKIP}landmark{SKIP}{KEYWORD_START}(?P<subcommand>near){KEYWORD_END}"
+    rf"{SKIP}(?P<system>[A-Za-z0-9-][A-Za-z0-9 -]*)"
+)
+""" matches casefolded landmark queries """
 
 
 @command("search", require_permission=permissions.RAT)
 async def cmd_search(ctx: Context):
-    if not SEARCH_PATTERN.matches(ctx.words_eol[0]):
+    tokens = SEARCH_PATTERN.parse(ctx.words_eol[0])
+    if tokens is None:
         return await ctx.reply("Usage: search <name of system>")
-    tokens = SEARCH_PATTERN.parseString(ctx.words_eol[0])
     try:
         results = await ctx.bot.galaxy.search_systems_by_name(tokens.remainder.strip())
     except asyncio.TimeoutError:
         return await ctx.reply(f"Been searching for {tokens.remainder.strip()!r} for too long... "
                                f"Giving up.")
+    except CircuitOpenError:
+        return await ctx.reply("The Systems API is currently unavailable, try again later.")
     return await ctx.reply(f"{results!r}")
 
 
@@ -38,15 +57,10 @@ async def cmd_landmark_near(ctx: Context, system_name: str):
 @command("landmark", require_permission=permissions.RAT)
 @logger.catch(level="DEBUG")
 async def cmd_landmark(ctx: Context):
-    keyword = pyparsing.oneOf("near", asKeyword=True).setResultsName("subcommand")
-    remainder = pyparsing.Word(pyparsing.alphanums + "- ").setResultsName("system")
-
-    pattern = pyparsing.Suppress("landmark") + keyword + remainder
-    try:
-        logger.debug("attempting to parse landmark query {!r}", ctx.words_eol[0])
-        result = pattern.parseString(ctx.words_eol[0].casefold())
-    except pyparsing.ParseException:
-        logger.exception("failed parse", level="DEBUG")
+    logger.debug("attempting to parse landmark query {!r}", ctx.words_eol[0])
+    result = LANDMARK_PATTERN.parse(ctx.words_eol[0].casefold())
+    if result is None:
+        logger.debug("failed parse")
         return await ctx.reply("Usage: `landmark near <system>")
     logger.debug("successfully parsed landmark query, result {!r}", result)
     return await cmd_landmark_near(ctx, result.system)
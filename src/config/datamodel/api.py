@@ -32,3 +32,19 @@ class StarsystemApiConfigRoot:
     url: str = attr.ib(
         validator=attr.validators.instance_of(str), default="https://system.api.fuelrats.com/"
     )
+    cache_ttl: int = attr.ib(validator=attr.validators.instance_of(int), default=86400)
+    """ Seconds a found system is considered fresh """
+    cache_negative_ttl: int = attr.ib(validator=attr.validators.instance_of(int), default=300)
+    """ Seconds a "not found" result is considered fresh """
+    cache_stale_ttl: int = attr.ib(validator=attr.validators.instance_of(int), default=3600)
+    """ Seconds past expiry an entry may still be served while it is refreshed """
+    cache_max_entries: int = attr.ib(validator=attr.validators.instance_of(int), default=4096)
+    """ Maximum number of cached lookups """
+    cache_file: Optional[str] = attr.ib(
+        validator=attr.validators.optional(attr.validators.instance_of(str)), default=None
+    )
+    """ File the lookup cache is persisted to, if any """
+    breaker_failure_threshold: int = attr.ib(validator=attr.validators.instance_of(int), default=5)
+    """ Consecutive failures before the circuit breaker opens """
+    breaker_reset_timeout: int = attr.ib(validator=attr.validators.instance_of(int), default=30)
+    """ Seconds the circuit breaker stays open before probing the API again """
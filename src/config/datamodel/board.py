@@ -10,9 +10,37 @@ See LICENSE.md
 """
 
 
+from ipaddress import IPv4Address, IPv6Address, ip_address
+from typing import Optional
+
 import attr
 
+from .prometheus import IPAddress
+
 
 @attr.dataclass
 class BoardConfigRoot:
     cycle_at: int = attr.ib(validator=attr.validators.instance_of(int))
+    index_cooldown: float = attr.ib(
+        validator=attr.validators.instance_of((int, float)), default=300
+    )
+    """ Seconds the index of a case that left the board is held back before it is reused """
+    archive_max_bytes: int = attr.ib(
+        validator=attr.validators.instance_of(int), default=4 * 1024 * 1024
+    )
+    """ Estimated memory budget of the closed case archive, in bytes """
+    archive_max_age: int = attr.ib(validator=attr.validators.instance_of(int), default=86400)
+    """ Seconds a closed case is kept in the archive """
+    archive_file: Optional[str] = attr.ib(
+        validator=attr.validators.optional(attr.validators.instance_of(str)), default=None
+    )
+    """ File the closed case archive is persisted to, if any """
+    http_enabled: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+    """ Whether the board is served read-only over HTTP """
+    http_bind_host: IPAddress = attr.ib(
+        validator=attr.validators.instance_of((IPv4Address, IPv6Address)),
+        default=ip_address("127.0.0.1"),
+    )
+    """ Address the board is served on """
+    http_bind_port: int = attr.ib(validator=attr.validators.instance_of(int), default=6821)
+    """ Port the board is served on """
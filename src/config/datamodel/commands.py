@@ -9,11 +9,49 @@ Licensed under the BSD 3-Clause License.
 See LICENSE.md
 """
 
+import typing
 
 import attr
 
+RATE_LIMIT_LEVELS = frozenset({"default", "recruit", "rat", "overseer", "techrat", "administrator"})
+""" Keys of :attr:`CommandsConfigRoot.rate_limits`, permission levels and the default """
+
+
+@attr.dataclass
+class RateLimitObj:
+    burst: int = attr.ib(validator=attr.validators.instance_of(int))
+    """ Invocations of a single command allowed at once, 0 to not rate limit """
+    rate: float = attr.ib(validator=attr.validators.instance_of((int, float)))
+    """ Invocations of a single command per second sustained after the burst """
+
+    def __attrs_post_init__(self):
+        if self.burst < 0 or (self.burst and self.rate <= 0):
+            raise ValueError("rate limits need a positive rate, or a burst of 0 to disable them")
+
+
+def _default_rate_limits() -> typing.Dict[str, RateLimitObj]:
+    return {
+        "default": RateLimitObj(burst=3, rate=0.2),
+        "recruit": RateLimitObj(burst=5, rate=0.5),
+        "overseer": RateLimitObj(burst=10, rate=1.0),
+    }
+
 
 @attr.dataclass
 class CommandsConfigRoot:
     prefix: str = attr.ib(validator=attr.validators.instance_of(str), default="!")
     drill_mode: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+    max_concurrency: int = attr.ib(validator=attr.validators.instance_of(int), default=8)
+    """ Maximum number of inbound messages handled at once """
+    max_pending_per_user: int = attr.ib(validator=attr.validators.instance_of(int), default=32)
+    """ Maximum number of inbound messages waiting to be handled per user """
+    max_pending_per_channel: int = attr.ib(validator=attr.validators.instance_of(int), default=256)
+    """ Maximum number of inbound messages waiting to be handled per channel """
+    rate_limits: typing.Dict[str, RateLimitObj] = attr.ib(
+        validator=attr.validators.deep_mapping(
+            key_validator=attr.validators.in_(RATE_LIMIT_LEVELS),
+            value_validator=attr.validators.instance_of(RateLimitObj),
+        ),
+        factory=_default_rate_limits,
+    )
+    """ Per user, per command rate limits by permission level """
@@ -27,3 +27,15 @@ class IRCConfigRoot:
             iterable_validator=attr.validators.instance_of(list),
         ),
     )
+    history_max_bytes: int = attr.ib(
+        validator=attr.validators.instance_of(int), default=4 * 1024 * 1024
+    )
+    """ Estimated memory budget of tracked user messages, in bytes """
+    history_max_age: int = attr.ib(validator=attr.validators.instance_of(int), default=86400)
+    """ Seconds a user's messages are tracked after they were said """
+    history_depth: int = attr.ib(validator=attr.validators.instance_of(int), default=10)
+    """ Number of recent messages tracked per user """
+    flood_burst: int = attr.ib(validator=attr.validators.instance_of(int), default=0)
+    """ Number of lines the server lets us send at once before throttling us, 0 to not throttle """
+    flood_rate: float = attr.ib(validator=attr.validators.instance_of((int, float)), default=0.5)
+    """ Lines per second the server lets us sustain """
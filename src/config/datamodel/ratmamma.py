@@ -29,6 +29,8 @@ class RatmamaConfigRoot:
         validator=attr.validators.instance_of(str), default="TESTSIGNAL"
     )
     """ The word to use as a trigger for non-announced clients """
+    dedup_window: float = attr.ib(validator=attr.validators.instance_of((int, float)), default=30)
+    """ Seconds within which announcements of a client are handled as repeats """
 
     def __attrs_post_init__(self):
         # Casefold nicks after instantiation
@@ -1,30 +1,364 @@
+"""
+message_history.py - bounded tracking of what users recently said
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import sys
+import time
 import typing
+from array import array
+from collections import OrderedDict, abc
 
+import prometheus_client
 from pydle.features.rfc1459.client import RFC1459Support
 
+if typing.TYPE_CHECKING:
+    from ..config.datamodel.irc import IRCConfigRoot
+
+HISTORY_BYTES = prometheus_client.Gauge(
+    namespace="client",
+    name="history_memory",
+    unit="bytes",
+    documentation="estimated memory held by tracked messages",
+)
+HISTORY_EVICTIONS = prometheus_client.Counter(
+    namespace="client",
+    name="history_evictions",
+    documentation="tracked messages evicted from history, by reason",
+    labelnames=["reason"],
+)
+_EXPIRED = HISTORY_EVICTIONS.labels(reason="expired")
+_OVER_BUDGET = HISTORY_EVICTIONS.labels(reason="memory")
+
+_RING_OVERHEAD = 200
+"""
+Approximate bytes of bookkeeping per tracked nick, on top of its ring's pre-allocated arrays.
+
+Covers the ring object itself and its slot in the store's index; nicks and channels are interned
+so they are shared rather than counted per message.
+"""
+
+
+class MessageRing:
+    """
+    Fixed-capacity ring buffer of the last messages a single nick said.
+
+    Storage is allocated up front: parallel lists of messages and channels, and an array of
+    timestamps, overwritten oldest first once full.
+    """
+
+    __slots__ = ["_messages", "_channels", "_said_at", "_head", "_count", "size"]
+
+    def __init__(self, depth: int):
+        """
+        Args:
+            depth (int): number of messages to keep
+        """
+        self._messages: typing.List[typing.Optional[str]] = [None] * depth
+        self._channels: typing.List[str] = [""] * depth
+        self._said_at = array("d", bytes(8 * depth))
+        self._head = 0
+        """ slot the next message is written to """
+        self._count = 0
+        self.size = (
+            _RING_OVERHEAD
+            + sys.getsizeof(self._messages)
+            + sys.getsizeof(self._channels)
+            + sys.getsizeof(self._said_at)
+        )
+        """ estimated memory held by this ring, in bytes """
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last_said(self) -> float:
+        """ When the newest message still held was said, -inf if none is """
+        for _, _, said_at in self:
+            return said_at
+        return float("-inf")
+
+    def append(self, channel: str, message: str, said_at: float) -> None:
+        """ Records a message, overwriting the oldest one if the ring is full """
+        head = self._head
+        previous = self._messages[head]
+        if previous is not None:
+            self.size -= sys.getsizeof(previous)
+        else:
+            self._count += 1
+        self._messages[head] = message
+        self._channels[head] = channel
+        self._said_at[head] = said_at
+        self.size += sys.getsizeof(message)
+        self._head = (head + 1) % len(self._messages)
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[str, str, float]]:
+        """ Yields ``(channel, message, said_at)``, newest first """
+        depth = len(self._messages)
+        for offset in range(1, depth + 1):
+            index = (self._head - offset) % depth
+            message = self._messages[index]
+            if message is not None:
+                yield self._channels[index], message, self._said_at[index]
+
+    def discard(self, channel: str) -> int:
+        """ Clears every message said in `channel`, returning how many were cleared """
+        cleared = 0
+        for index, message in enumerate(self._messages):
+            if message is not None and self._channels[index] == channel:
+                self.size -= sys.getsizeof(message)
+                self._messages[index] = None
+                cleared += 1
+        self._count -= cleared
+        return cleared
+
+
+class HistoryStore:
+    """
+    Memory-capped store of the last few messages each nick said.
+
+    Every nick gets a :class:`MessageRing` of the last `depth` messages it said, in any channel.
+    Nicks are evicted least recently spoken first, once they have been silent for longer than
+    `max_age` or whenever the estimated memory use exceeds `max_bytes`. Individual messages older
+    than `max_age` are never returned. Nicks and channels are casefolded and interned.
+    """
+
+    __slots__ = ["max_bytes", "max_age", "depth", "_clock", "_rings", "_bytes"]
+
+    def __init__(
+        self,
+        max_bytes: int = 4 * 1024 * 1024,
+        max_age: float = 86400,
+        depth: int = 10,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        """
+        Creates a history store
+
+        Args:
+            max_bytes (int): estimated memory budget, in bytes
+            max_age (float): seconds a message is kept after it was said
+            depth (int): number of messages kept per nick
+            clock (Callable): monotonic time source
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        if depth <= 0:
+            raise ValueError("depth must be positive")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.depth = depth
+        self._clock = clock
+        self._rings: typing.Dict[str, MessageRing] = OrderedDict()
+        """ message rings keyed by nick, least recently spoken first """
+        self._bytes = 0
+
+    @classmethod
+    def from_config(cls, config: IRCConfigRoot) -> HistoryStore:
+        """ Builds a store from the `irc` configuration section """
+        return cls(
+            max_bytes=config.history_max_bytes,
+            max_age=config.history_max_age,
+            depth=config.history_depth,
+        )
+
+    def __len__(self) -> int:
+        return sum(len(ring) for ring in self._rings.values())
+
+    @property
+    def memory(self) -> int:
+        """ Estimated memory held by tracked messages, in bytes """
+        return self._bytes
+
+    @staticmethod
+    def _normalize(name: typing.Optional[str]) -> str:
+        return sys.intern(name.casefold()) if name else ""
+
+    def _evict(self, nick: str) -> None:
+        self._bytes -= self._rings.pop(nick).size
+
+    def _prune(self) -> None:
+        """ Evicts expired nicks, then the least recently spoken until within the memory budget """
+        deadline = self._clock() - self.max_age
+        rings = self._rings
+        while rings:
+            nick, ring = next(iter(rings.items()))
+            if ring.last_said < deadline:
+                _EXPIRED.inc(len(ring))
+            elif self._bytes > self.max_bytes:
+                _OVER_BUDGET.inc(len(ring))
+            else:
+                break
+            self._evict(nick)
+
+    def record(self, channel: typing.Optional[str], nick: str, message: str) -> None:
+        """
+        Records `message` as the latest thing `nick` said in `channel`.
+
+        Args:
+            channel (str): channel the message was said in, or None if unknown
+            nick (str): nickname of the speaker
+            message (str): message to remember
+        """
+        nick = self._normalize(nick)
+        ring = self._rings.get(nick)
+        if ring is None:
+            ring = self._rings[nick] = MessageRing(self.depth)
+        else:
+            self._rings.move_to_end(nick)
+            self._bytes -= ring.size
+        ring.append(self._normalize(channel), message, self._clock())
+        self._bytes += ring.size
+        self._prune()
+
+    def search(
+        self,
+        nick: str,
+        pattern: typing.Optional[str] = None,
+        count: typing.Optional[int] = None,
+        max_age: typing.Optional[float] = None,
+        channel: typing.Optional[str] = None,
+    ) -> typing.List[str]:
+        """
+        Searches what `nick` said recently. Only that nick's own ring is scanned.
+
+        Args:
+            nick (str): nickname to search the messages of
+            pattern (str): only include messages containing this text, ignoring case
+            count (int): include at most this many of the newest matches
+            max_age (float): only include messages said within this many seconds, capped at
+                :attr:`max_age`
+            channel (str): only include messages said in this channel
+
+        Returns:
+            matching messages, oldest first
+        """
+        ring = self._rings.get(self._normalize(nick))
+        if ring is None:
+            return []
+        age = self.max_age if max_age is None else min(max_age, self.max_age)
+        deadline = self._clock() - age
+        channel = None if channel is None else self._normalize(channel)
+        needle = pattern.casefold() if pattern else None
+
+        found = []
+        for said_in, message, said_at in ring:
+            if said_at < deadline or (count is not None and len(found) >= count):
+                # newest first, so everything further along is older still.
+                break
+            if channel is not None and said_in != channel:
+                continue
+            if needle is not None and needle not in message.casefold():
+                continue
+            found.append(message)
+        found.reverse()
+        return found
+
+    def get(self, channel: typing.Optional[str], nick: str) -> typing.Optional[str]:
+        """
+        Fetches the last thing `nick` said, in `channel` or anywhere if `channel` is None.
+
+        Returns:
+            the message, or None if nothing is tracked for `nick`
+        """
+        found = self.search(nick, count=1, channel=channel)
+        return found[0] if found else None
+
+    def forget(self, nick: str, channel: typing.Optional[str] = None) -> bool:
+        """
+        Drops what `nick` said in `channel`, or everywhere if `channel` is None.
+
+        Returns:
+            bool: whether anything was dropped
+        """
+        nick = self._normalize(nick)
+        ring = self._rings.get(nick)
+        if ring is None:
+            return False
+        if channel is None:
+            self._evict(nick)
+            return True
+        self._bytes -= ring.size
+        cleared = ring.discard(self._normalize(channel))
+        self._bytes += ring.size
+        if not ring:
+            self._evict(nick)
+        return bool(cleared)
+
+    def nicks(self, channel: typing.Optional[str] = None) -> typing.Iterator[str]:
+        """ Nicks with tracked messages in `channel`, or anywhere if `channel` is None """
+        return iter([nick for nick in self._rings if self.get(channel, nick) is not None])
+
+    def view(self, channel: typing.Optional[str] = None) -> HistoryView:
+        """ Mapping of nick to last message in `channel`, or anywhere if `channel` is None """
+        return HistoryView(self, channel)
+
+
+class HistoryView(abc.MutableMapping):
+    """
+    Mapping of casefolded nick to the last message it said, backed by a :class:`HistoryStore`.
+
+    A view over a single channel only sees messages said in that channel, the global view sees the
+    latest message of each nick regardless of where it was said.
+    """
+
+    __slots__ = ["_store", "_channel"]
+
+    def __init__(self, store: HistoryStore, channel: typing.Optional[str] = None):
+        self._store = store
+        self._channel = channel
+
+    def __getitem__(self, nick: str) -> str:
+        message = self._store.get(self._channel, nick)
+        if message is None:
+            raise KeyError(nick)
+        return message
+
+    def __setitem__(self, nick: str, message: str) -> None:
+        self._store.record(self._channel, nick, message)
+
+    def __delitem__(self, nick: str) -> None:
+        if not self._store.forget(nick, self._channel):
+            raise KeyError(nick)
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return self._store.nicks(self._channel)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._store.nicks(self._channel))
+
 
 class MessageHistoryClient(RFC1459Support):
     __slots__ = [
-        "__channel_history"
+        "__history"
     ]
 
     def __init__(self, nickname, fallback_nicknames=[], username=None, realname=None, eventloop=None,
-                 **kwargs):
+                 history: typing.Optional[HistoryStore] = None, **kwargs):
         super().__init__(nickname, fallback_nicknames, username, realname, eventloop, **kwargs)
-        self.__channel_history: typing.Dict[str, typing.Dict[str, str]] = {}
+        self.__history = history if history is not None else HistoryStore()
+        HISTORY_BYTES.set_function(lambda: self.__history.memory)
 
     async def on_message(self, target: str, by: str, message: str):
         target = target.casefold()
-        # ensure target exists in tracking
-        if target not in self.__channel_history:
-            self.__channel_history[target] = {}
-        self.__channel_history[target][by] = message
+        self.__history.record(target, by, message)
 
         return await super().on_message(target, by, message)
 
+    @property
+    def history(self) -> HistoryStore:
+        """ Bounded store of what users recently said """
+        return self.__history
+
     def get_last_message(self, channel: str, user: str) -> typing.Optional[str]:
         """
         Fetches the last thing a specified user said in a specified channel the bot could see.
         """
-        users = self.__channel_history.get(channel, {})
-        return users.get(user)
+        return self.__history.get(channel, user)
@@ -0,0 +1,250 @@
+"""
+outbound.py - flood-control aware outbound message queue
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import typing
+from collections import deque
+
+import prometheus_client
+from loguru import logger
+from pydle.features.rfc1459 import protocol
+from pydle.features.rfc1459.client import RFC1459Support
+
+from ..packages.dispatch import Priority
+from ..packages.utils import TokenBucket
+
+OUTBOUND_DEPTH = prometheus_client.Gauge(
+    namespace="outbound",
+    name="queue_depth",
+    documentation="outbound lines waiting to be sent, by priority",
+    labelnames=["priority"],
+)
+OUTBOUND_DROPPED = prometheus_client.Counter(
+    namespace="outbound",
+    name="dropped",
+    documentation="outbound lines dropped for going stale, by priority",
+    labelnames=["priority"],
+)
+OUTBOUND_PACKED = prometheus_client.Counter(
+    namespace="outbound",
+    name="packed",
+    documentation="outbound lines saved by packing replies onto a single line",
+)
+
+_DEPTH = {priority: OUTBOUND_DEPTH.labels(priority=priority.name.lower()) for priority in Priority}
+_DROPPED = {
+    priority: OUTBOUND_DROPPED.labels(priority=priority.name.lower()) for priority in Priority
+}
+
+Sender = typing.Callable[[str, str], typing.Awaitable[typing.Any]]
+
+
+class _Line:
+    __slots__ = ["target", "text", "queued_at", "packable"]
+
+    def __init__(self, target: str, text: str, queued_at: float, packable: bool):
+        self.target = target
+        self.text = text
+        self.queued_at = queued_at
+        self.packable = packable
+        """ whether this line may share an IRC line with the one queued before it """
+
+
+class OutboundQueue:
+    """
+    Sends lines most urgent :class:`Priority` first, at the rate the server's flood limits allow.
+
+    The server's flood budget is modeled as a :class:`TokenBucket` of lines, unless throttling is
+    turned off with a `burst` of 0. Once more lines are queued than the budget allows, consecutive
+    replies to the same target are packed onto a single line, up to the line length limit. Low
+    priority lines left waiting for longer than :attr:`STALE_AFTER` are dropped, and the target
+    told how many were.
+    """
+
+    SEPARATOR = " | "
+
+    STALE_AFTER: typing.Dict[Priority, typing.Optional[float]] = {
+        Priority.ANNOUNCEMENT: None,
+        Priority.CASE: None,
+        Priority.COMMAND: 60,
+        Priority.CHATTER: 30,
+    }
+    """ seconds after which queued lines of each priority are dropped, None to never drop them """
+
+    __slots__ = ["_send", "_line_limit", "_bucket", "_clock", "_queues", "_drainer"]
+
+    def __init__(
+        self,
+        send: Sender,
+        line_limit: typing.Callable[[str], int],
+        burst: int = 5,
+        rate: float = 0.5,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        """
+        Creates an outbound queue
+
+        Args:
+            send (Callable): coroutine function sending a line to a target
+            line_limit (Callable): maximum length of a line to the given target, in bytes
+            burst (int): number of lines the server lets us send at once, 0 to send lines as
+                soon as possible
+            rate (float): lines per second the server lets us sustain
+            clock (Callable): monotonic time source
+        """
+        self._send = send
+        self._line_limit = line_limit
+        self._bucket: typing.Optional[TokenBucket] = (
+            TokenBucket(rate=rate, capacity=burst, clock=clock) if burst else None
+        )
+        self._clock = clock
+        self._queues: typing.Dict[Priority, typing.Deque[_Line]] = {
+            priority: deque() for priority in Priority
+        }
+        self._drainer: typing.Optional[asyncio.Future] = None
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def put(self, target: str, message: str, priority: Priority = Priority.COMMAND) -> None:
+        """
+        Queues `message` to be sent to `target`, a line at a time.
+
+        Args:
+            target (str): channel or nickname to send to
+            message (str): message to send, may span multiple lines
+            priority (Priority): how urgently to send it
+        """
+        queue = self._queues[priority]
+        now = self._clock()
+        lines = message.replace("\r", "").split("\n")
+        # lines of a single message are laid out by its author, only separate replies are packed.
+        for index, text in enumerate(lines):
+            queue.append(_Line(target, text, now, packable=index == 0))
+        _DEPTH[priority].inc(len(lines))
+
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.ensure_future(self._drain())
+
+    async def join(self) -> None:
+        """ Waits until every queued line has been sent or dropped """
+        while self._drainer is not None and not self._drainer.done():
+            await asyncio.shield(self._drainer)
+
+    def _next_queue(self) -> typing.Optional[typing.Tuple[Priority, typing.Deque[_Line]]]:
+        for priority, queue in self._queues.items():
+            self._drop_stale(priority, queue)
+            if queue:
+                return priority, queue
+        return None
+
+    def _drop_stale(self, priority: Priority, queue: typing.Deque[_Line]) -> None:
+        max_age = self.STALE_AFTER[priority]
+        if max_age is None or not queue:
+            return
+        deadline = self._clock() - max_age
+        dropped: typing.Dict[str, int] = {}
+        while queue and queue[0].queued_at < deadline:
+            line = queue.popleft()
+            dropped[line.target] = dropped.get(line.target, 0) + 1
+        if not dropped:
+            return
+        for target, count in reversed(list(dropped.items())):
+            logger.info("dropped {} stale outbound lines to {}", count, target)
+            queue.appendleft(_Line(
+                target, f"({count} older line{'s' if count > 1 else ''} dropped)", self._clock(),
+                packable=False,
+            ))
+            _DEPTH[priority].dec(count - 1)
+            _DROPPED[priority].inc(count)
+
+    def _pack(self, queue: typing.Deque[_Line]) -> typing.Tuple[str, str, int]:
+        """ Pops the next line, and as many replies following it that fit on the same line """
+        line = queue.popleft()
+        text = line.text
+        limit = self._line_limit(line.target)
+        size = len(text.encode())
+        separator = len(self.SEPARATOR.encode())
+        count = 1
+        # pack only once the backlog outgrows the flood budget
+        while queue and self._bucket is not None and len(self) >= self._bucket.tokens:
+            following = queue[0]
+            if following.target != line.target or not following.packable:
+                break
+            following_size = len(following.text.encode())
+            if size + separator + following_size > limit:
+                break
+            queue.popleft()
+            text = f"{text}{self.SEPARATOR}{following.text}"
+            size += separator + following_size
+            count += 1
+        return line.target, text, count
+
+    async def _drain(self) -> None:
+        while True:
+            delay = self._bucket.delay() if self._bucket is not None else 0
+            if delay:
+                await asyncio.sleep(delay)
+                # more urgent lines may have been queued meanwhile, so pick again.
+                continue
+            selected = self._next_queue()
+            if selected is None:
+                return
+            priority, queue = selected
+            target, text, count = self._pack(queue)
+            _DEPTH[priority].dec(count)
+            if count > 1:
+                OUTBOUND_PACKED.inc(count - 1)
+            if self._bucket is not None:
+                self._bucket.acquire()
+            try:
+                await self._send(target, text)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("failed to send outbound line to {}", target)
+
+
+class OutboundClient(RFC1459Support):
+    """
+    Routes :meth:`message` through an :class:`OutboundQueue`.
+
+    Notes:
+        Like :class:`UserCacheClient` this has no `__slots__`, so it can share bases with
+        another slotted feature.
+    """
+
+    def __init__(self, *args, flood_burst: int = 0, flood_rate: float = 0.5, **kwargs):
+        """
+        Args:
+            flood_burst (int): number of lines the server lets us send at once, 0 to not throttle
+            flood_rate (float): lines per second the server lets us sustain
+        """
+        self.__outbound = OutboundQueue(
+            super().message, self._line_limit, burst=flood_burst, rate=flood_rate
+        )
+        super().__init__(*args, **kwargs)
+
+    @property
+    def outbound(self) -> OutboundQueue:
+        """ Queue outbound messages are sent through """
+        return self.__outbound
+
+    def _line_limit(self, target: str) -> int:
+        """ Room for text in a PRIVMSG to `target`, with the same leeway pydle leaves """
+        hostmask = self._format_user_mask(self.nickname)
+        return protocol.MESSAGE_LENGTH_LIMIT - len(f"{hostmask} PRIVMSG {target} :".encode()) - 25
+
+    async def message(self, target: str, message: str, priority: Priority = Priority.COMMAND):
+        """
+        Queues a message to a channel or user, see :meth:`OutboundQueue.put`.
+        """
+        self.__outbound.put(target, message, priority)
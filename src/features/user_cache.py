@@ -0,0 +1,105 @@
+"""
+user_cache.py - caches User objects between messages
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import typing
+
+import prometheus_client
+from pydle.features.rfc1459.client import RFC1459Support
+
+from ..packages.user import User
+
+USER_CACHE_LOOKUPS = prometheus_client.Counter(
+    namespace="client",
+    name="user_cache_lookups",
+    documentation="User lookups by outcome",
+    labelnames=["outcome"],
+)
+_HIT = USER_CACHE_LOOKUPS.labels(outcome="hit")
+_MISS = USER_CACHE_LOOKUPS.labels(outcome="miss")
+
+
+class UserCacheClient(RFC1459Support):
+    """
+    Caches :class:`User` objects by casefolded nickname.
+
+    Entries are invalidated whenever IRC tells us something about the user changed: NICK, QUIT,
+    PART, KICK, CHGHOST, ACCOUNT and AWAY, or any other update pydle makes to its user record.
+
+    Notes:
+        This must come *before* pydle's `Client` in the bases, as pydle's IRCv3 handlers don't
+        call up the chain.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.__user_cache: typing.Dict[str, User] = {}
+        super().__init__(*args, **kwargs)
+
+    def get_user(self, nickname: str) -> typing.Optional[User]:
+        """
+        Fetches the user behind `nickname`, building it from pydle's records on a cache miss.
+
+        Returns:
+            User: found user
+            None: user not known to pydle
+        """
+        key = nickname.casefold()
+        user = self.__user_cache.get(key)
+        if user is not None:
+            _HIT.inc()
+            return user
+        _MISS.inc()
+        user = User.from_pydle_data(self.users.get(key))
+        if user is not None:
+            self.__user_cache[key] = user
+        return user
+
+    def invalidate_user(self, nickname: typing.Optional[str]) -> None:
+        """ Drops the cached user of `nickname`, if any """
+        if nickname:
+            self.__user_cache.pop(nickname.casefold(), None)
+
+    def _sync_user(self, nick, metadata):
+        # catch-all for updates pydle makes outside the events below, e.g. WHOIS and WHOX replies.
+        current = self.users.get(nick)
+        if current is None or any(current.get(key) != value for key, value in metadata.items()):
+            self.invalidate_user(nick)
+        super()._sync_user(nick, metadata)
+
+    async def _forward(self, handler: str, message) -> None:
+        """ Passes `message` up to pydle's `handler`, then invalidates its source """
+        upstream = getattr(super(), handler, None)
+        if upstream is not None:
+            await upstream(message)
+        nick, _ = self._parse_user(message.source)
+        self.invalidate_user(nick)
+
+    async def on_raw_nick(self, message):
+        await self._forward("on_raw_nick", message)
+        self.invalidate_user(message.params[0])
+
+    async def on_raw_quit(self, message):
+        await self._forward("on_raw_quit", message)
+
+    async def on_raw_part(self, message):
+        await self._forward("on_raw_part", message)
+
+    async def on_raw_kick(self, message):
+        await self._forward("on_raw_kick", message)
+        for target in message.params[1].split(","):
+            self.invalidate_user(target)
+
+    async def on_raw_chghost(self, message):
+        await self._forward("on_raw_chghost", message)
+
+    async def on_raw_account(self, message):
+        await self._forward("on_raw_account", message)
+
+    async def on_raw_away(self, message):
+        await self._forward("on_raw_away", message)
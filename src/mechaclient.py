@@ -21,18 +21,22 @@ from uuid import uuid4
 from pydle import Client
 
 from .config.datamodel import ConfigRoot
-from .packages.board import RatBoard
-from .packages.commands import trigger
+from .packages.board import CaseArchive, IndexAllocator, RatBoard
+from .packages.commands import RateLimiter, classify, trigger
+from .packages.commands.rat_command import RuleMatch
 from .packages.fuelrats_api.v3.interface import ApiV300WSS
 from .packages.permissions import require_permission, TECHRAT
 from .packages.context.context import Context
+from .packages.dispatch import DispatchScheduler
 from .packages.fact_manager.fact_manager import FactManager
 from .packages.galaxy import Galaxy
 from .packages.graceful_errors import graceful_errors
+from .packages.ratmama import SignalIngest
 from .packages.utils import sanitize
-from .features.message_history import MessageHistoryClient
+from .features.message_history import HistoryStore, HistoryView, MessageHistoryClient
+from .features.outbound import OutboundClient
+from .features.user_cache import UserCacheClient
 
-from typing import Dict
 import prometheus_client
 from prometheus_async.aio import time as aio_time
 import pendulum
@@ -64,7 +68,7 @@ async def _on_invite(ctx: Context):
     await ctx.bot.join(ctx.channel)
 
 
-class MechaClient(Client, MessageHistoryClient):
+class MechaClient(UserCacheClient, OutboundClient, Client, MessageHistoryClient):
     """
     MechaSqueak v3_tests
     """
@@ -84,15 +88,24 @@ class MechaClient(Client, MessageHistoryClient):
         """
         self._api_handler: Optional[ApiV300WSS] = None
         self._fact_manager = None  # Instantiate Global Fact Manager
-        self._last_user_message: Dict[str, str] = {}  # Holds last message from user, by irc nick
         self._rat_cache = None  # TODO: replace with ratcache once it exists
         self._rat_board = None  # Instantiate Rat Board
         self._config = mecha_config
         self._galaxy = None
         self._start_time = pendulum.now()
         self._on_invite = require_permission(TECHRAT)(functools.partial(self._on_invite))
-        TRACKED_MESSAGES.set_function(lambda: len(self._last_user_message))
+        self._dispatcher = DispatchScheduler(
+            max_concurrency=mecha_config.commands.max_concurrency,
+            max_per_user=mecha_config.commands.max_pending_per_user,
+            max_per_channel=mecha_config.commands.max_pending_per_channel,
+        )
+        self._rate_limiter = RateLimiter.from_config(mecha_config)
+        self._signal_ingest = SignalIngest.from_config(mecha_config.ratsignal_parser)
+        kwargs.setdefault("history", HistoryStore.from_config(mecha_config.irc))
+        kwargs.setdefault("flood_burst", mecha_config.irc.flood_burst)
+        kwargs.setdefault("flood_rate", mecha_config.irc.flood_rate)
         super().__init__(*args, **kwargs)
+        TRACKED_MESSAGES.set_function(lambda: len(self.history))
 
     async def on_connect(self):
         """
@@ -133,7 +146,8 @@ class MechaClient(Client, MessageHistoryClient):
         :param message: message body
         :return:
         """
-        await super().on_message(channel, user, message)
+        # sanitize input string headed to history and the command executor
+        sanitized_message = sanitize(message)
         logger.debug(f"{channel}: <{user}> {message}")
 
         if user == self._config.irc.nickname:
@@ -142,12 +156,10 @@ class MechaClient(Client, MessageHistoryClient):
             logger.debug(f"Ignored {message} (anti-loop)")
             IGNORED_MESSAGES.inc()
             return None
-        # await command execution
-        # sanitize input string headed to command executor
-        sanitized_message = sanitize(message)
+        # our own lines aren't history, or they would crowd out what users said
+        await super().on_message(channel, user, sanitized_message)
         logger.debug(f"Sanitized {sanitized_message}, Original: {message}")
         try:
-            self._last_user_message[user.casefold()] = sanitized_message  # Store sanitized message
             ctx = await Context.from_message(
                 self,
                 channel=channel,
@@ -160,16 +172,41 @@ class MechaClient(Client, MessageHistoryClient):
                 IGNORED_MESSAGES.inc()
                 return
 
-            await trigger(ctx)
+            # hand the command off, so slow commands don't hold up the lines behind them
+            priority, key, rule = classify(ctx)
+            ctx.priority = priority
 
         # Disable pylint's complaint here, as a broad catch is exactly what we want.
         except Exception as ex:  # pylint: disable=broad-except
-            ERRORS.inc()
-            ex_uuid = uuid4()
-            logger.exception(ex_uuid)
-            error_message = graceful_errors.make_graceful(ex, ex_uuid)
-            # and report it to the user
-            await self.message(channel, error_message)
+            return await self._report_error(channel, ex)
+
+        self._dispatcher.submit(
+            functools.partial(self._dispatch, ctx, rule),
+            priority=priority,
+            channel=channel,
+            user=user,
+            key=key,
+        )
+
+    async def _dispatch(self, ctx: Context, rule: Optional[RuleMatch] = None):
+        """
+        Executes the command in `ctx`, reporting any errors
+
+        `rule` is the rule matching it, as :func:`classify` found it.
+        """
+        try:
+            await trigger(ctx, rule)
+        # Disable pylint's complaint here, as a broad catch is exactly what we want.
+        except Exception as ex:  # pylint: disable=broad-except
+            await self._report_error(ctx.target, ex)
+
+    async def _report_error(self, channel: str, ex: Exception):
+        ERRORS.inc()
+        ex_uuid = uuid4()
+        logger.exception(ex_uuid)
+        error_message = graceful_errors.make_graceful(ex, ex_uuid)
+        # and report it to the user
+        await self.message(channel, error_message)
 
     # Vhost Handler
     async def on_raw_396(self, message):
@@ -179,6 +216,27 @@ class MechaClient(Client, MessageHistoryClient):
         """
         logger.info(f"{message.params[0]}@{message.params[1]} {message.params[2]}.")
 
+    @property
+    def dispatcher(self) -> DispatchScheduler:
+        """
+        Scheduler inbound messages are handled by
+        """
+        return self._dispatcher
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """
+        Per user, per command rate limits on inbound invocations
+        """
+        return self._rate_limiter
+
+    @property
+    def signal_ingest(self) -> SignalIngest:
+        """
+        De-duplication of RatMama announcements
+        """
+        return self._signal_ingest
+
     @property
     def rat_cache(self) -> object:
         """
@@ -236,7 +294,9 @@ class MechaClient(Client, MessageHistoryClient):
         """
         if self._rat_board is None:
             self._rat_board = RatBoard(
-                api_handler=self._api_handler if self._api_handler else None
+                api_handler=self._api_handler if self._api_handler else None,
+                archive=CaseArchive.from_config(self._config.board),
+                indexes=IndexAllocator.from_config(self._config.board),
             )  # Create Rat Board Object
         return self._rat_board
 
@@ -291,8 +351,11 @@ class MechaClient(Client, MessageHistoryClient):
         self._galaxy = None
 
     @property
-    def last_user_message(self) -> Dict[str, str]:
-        return self._last_user_message
+    def last_user_message(self) -> HistoryView:
+        """
+        Last message each user said in any channel, keyed by casefolded irc nick
+        """
+        return self.history.view()
 
     @property
     def start_time(self) -> pendulum.DateTime:
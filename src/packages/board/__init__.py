@@ -9,7 +9,19 @@ Licensed under the BSD 3-Clause License.
 See LICENSE.md
 """
 
+from .archive import ArchivedCase, CaseArchive
 from .board import RatBoard
+from .events import (
+    BoardEvent,
+    ChangeStream,
+    Policy,
+    RescueCreated,
+    RescueModified,
+    RescueRemoved,
+    Subscription,
+)
+from .index_allocator import IndexAllocator
+from .server import BoardServer
 from . import board as _board
 
 from src.config import PLUGIN_MANAGER
@@ -17,5 +29,15 @@ from src.config import PLUGIN_MANAGER
 PLUGIN_MANAGER.register(_board, "Rat Board")
 __all__ = [
     "RatBoard",
-
+    "ArchivedCase",
+    "CaseArchive",
+    "IndexAllocator",
+    "BoardEvent",
+    "ChangeStream",
+    "Policy",
+    "RescueCreated",
+    "RescueModified",
+    "RescueRemoved",
+    "Subscription",
+    "BoardServer",
 ]
@@ -0,0 +1,429 @@
+"""
+archive.py - bounded archive of recently closed rescues
+
+Keeps rescues cleared or marked for deletion around for a while after they leave the board, so
+they can be reopened or looked up without a round trip to the API.
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+import time
+import typing
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from uuid import UUID
+
+import attr
+import pendulum
+import prometheus_client
+from loguru import logger
+
+from ..mark_for_deletion import MarkForDeletion
+from ..quotation import Quotation
+from ..rat import Rat
+from ..rescue import Rescue
+from ..utils import Platforms, Status
+
+if typing.TYPE_CHECKING:
+    from ...config.datamodel.board import BoardConfigRoot
+
+ArchiveKey = typing.Union[UUID, str]
+
+ARCHIVE_BYTES = prometheus_client.Gauge(
+    namespace="board",
+    name="archive_memory",
+    unit="bytes",
+    documentation="estimated memory held by archived rescues, across archives",
+)
+ARCHIVE_EVICTIONS = prometheus_client.Counter(
+    namespace="board",
+    name="archive_evictions",
+    documentation="rescues evicted from the closed case archive, by reason",
+    labelnames=["reason"],
+)
+ARCHIVE_LOOKUPS = prometheus_client.Counter(
+    namespace="board",
+    name="archive_lookups",
+    documentation="closed case archive lookups by outcome",
+    labelnames=["outcome"],
+)
+_EXPIRED = ARCHIVE_EVICTIONS.labels(reason="expired")
+_OVER_BUDGET = ARCHIVE_EVICTIONS.labels(reason="memory")
+_HIT = ARCHIVE_LOOKUPS.labels(outcome="hit")
+_MISS = ARCHIVE_LOOKUPS.labels(outcome="miss")
+
+_CASE_OVERHEAD = 2048
+"""
+Approximate bytes held by an archived rescue, short of its strings.
+
+Covers the rescue object and its attributes, its change journal and its slots in the archive's
+indexes; names, quotes and reasons are counted on top of this, as they vary the most.
+"""
+
+_RAT_OVERHEAD = 200
+""" Approximate bytes held by each rat assigned to an archived rescue """
+
+
+@attr.dataclass(frozen=True, slots=True)
+class ArchivedCase:
+    """ A rescue, as it was when it left the board """
+
+    rescue: Rescue
+    archived_at: float
+    """ wall-clock time the rescue was archived, so cases survive a restart """
+    size: int
+    """ estimated memory held by the rescue, in bytes """
+
+
+def _estimate_size(rescue: Rescue) -> int:
+    size = _CASE_OVERHEAD + _RAT_OVERHEAD * (len(rescue.rats) + len(rescue.unidentified_rats))
+    for text in (rescue.client, rescue.irc_nickname, rescue.system, rescue.title):
+        if text:
+            size += sys.getsizeof(text)
+    for quote in rescue.quotes:
+        size += sys.getsizeof(quote.message)
+    if rescue.marked_for_deletion.reason:
+        size += sys.getsizeof(rescue.marked_for_deletion.reason)
+    return size
+
+
+def _encode_rat(rat: Rat) -> typing.Dict:
+    return {
+        "uuid": str(rat.uuid) if rat.uuid else None,
+        "name": rat.name,
+        "platform": rat.platform.value if rat.platform else None,
+    }
+
+
+def _decode_rat(data: typing.Dict) -> Rat:
+    return Rat(
+        uuid=UUID(data["uuid"]) if data["uuid"] else None,
+        name=data["name"],
+        platform=Platforms(data["platform"]) if data["platform"] else None,
+    )
+
+
+def encode_rescue(rescue: Rescue) -> typing.Dict:
+    """ Encodes `rescue` as JSON serialisable primitives, as :func:`decode_rescue` reads them """
+    return {
+        "uuid": str(rescue.api_id),
+        "client": rescue.client,
+        "irc_nickname": rescue.irc_nickname,
+        "system": rescue.system,
+        "platform": rescue.platform.value if rescue.platform else None,
+        "status": rescue.status.name,
+        "code_red": rescue.code_red,
+        "lang_id": rescue.lang_id,
+        "title": rescue.title,
+        "board_index": rescue.board_index,
+        "first_limpet": str(rescue.first_limpet) if rescue.first_limpet else None,
+        "created_at": rescue.created_at.isoformat(),
+        "updated_at": rescue.updated_at.isoformat(),
+        "rats": [_encode_rat(rat) for rat in rescue.rats.values()],
+        "unidentified_rats": [_encode_rat(rat) for rat in rescue.unidentified_rats.values()],
+        "quotes": [
+            {
+                "message": quote.message,
+                "author": quote.author,
+                "last_author": quote.last_author,
+                "created_at": quote.created_at.isoformat(),
+                "updated_at": quote.updated_at.isoformat(),
+            }
+            for quote in rescue.quotes
+        ],
+        "mark_for_deletion": {
+            "marked": rescue.marked_for_deletion.marked,
+            "reporter": rescue.marked_for_deletion.reporter,
+            "reason": rescue.marked_for_deletion.reason,
+        },
+    }
+
+
+def decode_rescue(data: typing.Dict) -> Rescue:
+    """ Restores a rescue encoded by :func:`encode_rescue` """
+    rats = (_decode_rat(rat) for rat in data["rats"])
+    unidentified_rats = (_decode_rat(rat) for rat in data["unidentified_rats"])
+    rescue = Rescue(
+        uuid=UUID(data["uuid"]),
+        client=data["client"],
+        irc_nickname=data["irc_nickname"],
+        system=data["system"],
+        platform=Platforms(data["platform"]) if data["platform"] else None,
+        code_red=data["code_red"],
+        lang_id=data["lang_id"],
+        title=data["title"],
+        board_index=data["board_index"],
+        first_limpet=UUID(data["first_limpet"]) if data["first_limpet"] else None,
+        created_at=pendulum.parse(data["created_at"]),
+        updated_at=pendulum.parse(data["updated_at"]),
+        rats={rat.name.casefold(): rat for rat in rats},
+        unidentified_rats={rat.name.casefold(): rat for rat in unidentified_rats},
+        quotes=[
+            Quotation(
+                message=quote["message"],
+                author=quote["author"],
+                last_author=quote["last_author"],
+                created_at=pendulum.parse(quote["created_at"]),
+                updated_at=pendulum.parse(quote["updated_at"]),
+            )
+            for quote in data["quotes"]
+        ],
+        mark_for_deletion=MarkForDeletion(**data["mark_for_deletion"]),
+    )
+    rescue.status = Status[data["status"]]
+    # restored as it was archived, there is nothing left to send to the API
+    rescue.modified.clear()
+    return rescue
+
+
+class CaseArchive:
+    """
+    Memory-capped LRU archive of recently closed rescues.
+
+    Rescues are indexed by API id, client name and IRC nickname, names casefolded; where several
+    archived rescues share a name, the latest archived is found. Rescues are evicted least recently
+    used first, once they have been archived for longer than `max_age` or whenever the estimated
+    memory use exceeds `max_bytes`.
+    """
+
+    __slots__ = [
+        "max_bytes",
+        "max_age",
+        "path",
+        "flush_interval",
+        "_clock",
+        "_cases",
+        "_names",
+        "_bytes",
+        "_flush_handle",
+        "__weakref__",
+    ]
+
+    def __init__(
+        self,
+        max_bytes: int = 4 * 1024 * 1024,
+        max_age: float = 86400,
+        path: typing.Optional[typing.Union[str, Path]] = None,
+        flush_interval: float = 30,
+        clock: typing.Callable[[], float] = time.time,
+    ):
+        """
+        Creates a case archive
+
+        Args:
+            max_bytes (int): estimated memory budget, in bytes
+            max_age (float): seconds a rescue is kept after it was archived
+            path (Path): file to persist the archive to, or None to keep it in memory only
+            flush_interval (float): delay between a modification and writing it to `path`
+            clock (Callable): wall-clock time source
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.path = Path(path) if path else None
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._cases: typing.Dict[UUID, ArchivedCase] = OrderedDict()
+        """ archived rescues keyed by API id, least recently used first """
+        self._names: typing.Dict[str, UUID] = {}
+        """ API ids keyed by casefolded client name and IRC nickname """
+        self._bytes = 0
+        self._flush_handle: typing.Optional[asyncio.TimerHandle] = None
+        _ARCHIVES.add(self)
+
+        if self.path:
+            self.load()
+
+    @classmethod
+    def from_config(cls, config: BoardConfigRoot) -> CaseArchive:
+        """ Builds an archive from the `board` configuration section """
+        return cls(
+            max_bytes=config.archive_max_bytes,
+            max_age=config.archive_max_age,
+            path=config.archive_file,
+        )
+
+    def __len__(self) -> int:
+        return len(self._cases)
+
+    def __contains__(self, key: ArchiveKey) -> bool:
+        case = self._cases.get(self._resolve(key))
+        return case is not None and not self._expired(case)
+
+    @property
+    def memory(self) -> int:
+        """ Estimated memory held by archived rescues, in bytes """
+        return self._bytes
+
+    @staticmethod
+    def _names_of(rescue: Rescue) -> typing.Set[str]:
+        return {name.casefold() for name in (rescue.client, rescue.irc_nickname) if name}
+
+    def _resolve(self, key: ArchiveKey) -> typing.Optional[UUID]:
+        if isinstance(key, UUID):
+            return key
+        return self._names.get(key.casefold())
+
+    def _insert(self, rescue: Rescue, archived_at: float) -> None:
+        self._remove(rescue.api_id)
+        case = ArchivedCase(rescue=rescue, archived_at=archived_at, size=_estimate_size(rescue))
+        self._cases[rescue.api_id] = case
+        self._bytes += case.size
+        for name in self._names_of(rescue):
+            self._names[name] = rescue.api_id
+
+    def _remove(self, api_id: UUID) -> typing.Optional[ArchivedCase]:
+        case = self._cases.pop(api_id, None)
+        if case is None:
+            return None
+        self._bytes -= case.size
+        for name in self._names_of(case.rescue):
+            # a later case of the same client may have taken the name over
+            if self._names.get(name) == api_id:
+                del self._names[name]
+        return case
+
+    def _expired(self, case: ArchivedCase) -> bool:
+        return case.archived_at < self._clock() - self.max_age
+
+    def _prune(self) -> None:
+        """ Evicts expired rescues, then the least recently used until within the memory budget """
+        deadline = self._clock() - self.max_age
+        cases = self._cases
+        while cases:
+            api_id, case = next(iter(cases.items()))
+            if case.archived_at < deadline:
+                _EXPIRED.inc()
+            elif self._bytes > self.max_bytes:
+                _OVER_BUDGET.inc()
+            else:
+                break
+            self._remove(api_id)
+
+    def add(self, rescue: Rescue) -> None:
+        """
+        Archives `rescue`, replacing any previous archived copy of it.
+
+        Args:
+            rescue (Rescue): rescue leaving the board
+        """
+        self._insert(rescue, self._clock())
+        self._prune()
+        self._schedule_flush()
+
+    def get(self, key: ArchiveKey) -> typing.Optional[ArchivedCase]:
+        """
+        Looks up an archived rescue
+
+        Args:
+            key (UUID or str): API id, client name or IRC nickname of the rescue
+
+        Returns:
+            ArchivedCase: the archived rescue
+            None: no such rescue was archived, or it was evicted since
+        """
+        self._prune()
+        api_id = self._resolve(key)
+        case = self._cases.get(api_id) if api_id is not None else None
+        if case is not None and self._expired(case):
+            # cases looked up before sit behind newer ones, where pruning doesn't reach them
+            self._remove(api_id)
+            _EXPIRED.inc()
+            self._schedule_flush()
+            case = None
+        if case is None:
+            _MISS.inc()
+            return None
+        _HIT.inc()
+        self._cases.move_to_end(api_id)
+        return case
+
+    def discard(self, key: ArchiveKey) -> typing.Optional[ArchivedCase]:
+        """
+        Drops a rescue from the archive, such as when it is reopened.
+
+        Args:
+            key (UUID or str): API id, client name or IRC nickname of the rescue
+
+        Returns:
+            ArchivedCase: the dropped rescue, or None if it wasn't archived
+        """
+        api_id = self._resolve(key)
+        case = self._remove(api_id) if api_id is not None else None
+        if case is not None:
+            self._schedule_flush()
+        return case
+
+    def _schedule_flush(self) -> None:
+        """ Writes the archive to disk after `flush_interval`, coalescing intermediate changes """
+        if not self.path or self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # not inside the event loop, nothing to defer to.
+            self.save()
+            return
+
+        def flush():
+            self._flush_handle = None
+            self.save()
+
+        self._flush_handle = loop.call_later(self.flush_interval, flush)
+
+    def save(self) -> None:
+        """ Atomically writes the archive to `path` """
+        if not self.path:
+            return
+        payload = [
+            {"rescue": encode_rescue(case.rescue), "archived_at": case.archived_at}
+            for case in self._cases.values()
+        ]
+        temporary = self.path.with_suffix(f"{self.path.suffix}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary.write_text(json.dumps(payload), encoding="utf8")
+            os.replace(temporary, self.path)
+        except OSError:
+            logger.exception("failed to persist case archive to {}", self.path)
+            return
+        logger.trace("persisted {} archived cases to {}", len(payload), self.path)
+
+    def load(self) -> None:
+        """
+        Loads previously persisted rescues from `path`.
+
+        Rescues archived longer than `max_age` ago are discarded.
+        """
+        if not self.path or not self.path.exists():
+            return
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf8"))
+        except (OSError, ValueError):
+            logger.exception("failed to load case archive from {}, starting empty", self.path)
+            return
+
+        for item in payload:
+            try:
+                self._insert(decode_rescue(item["rescue"]), item["archived_at"])
+            except (KeyError, TypeError, ValueError):
+                logger.warning("discarding malformed archived case {!r}", item)
+        self._prune()
+        logger.info("loaded {} archived cases from {}", len(self._cases), self.path)
+
+
+_ARCHIVES: "weakref.WeakSet[CaseArchive]" = weakref.WeakSet()
+""" live archives, which :data:`ARCHIVE_BYTES` adds up """
+ARCHIVE_BYTES.set_function(lambda: sum(archive.memory for archive in _ARCHIVES))
@@ -11,7 +11,7 @@ See LICENSE.md
 """
 from __future__ import annotations
 
-import itertools
+import asyncio
 import typing
 from asyncio import Lock
 from collections import abc
@@ -22,11 +22,20 @@ from uuid import UUID
 from loguru import logger
 
 from src.config import CONFIG_MARKER
+from .archive import CaseArchive
+from .events import ChangeStream, RescueCreated, RescueModified, RescueRemoved
+from .index_allocator import IndexAllocator
 from ..fuelrats_api import FuelratsApiABC, ApiException, Impersonation
 
+from ..galaxy import PositionTable, StarSystem
 from ..rescue import Rescue
+from ..rescue.journal import authored_by
+from ..utils import Status
 from ...config.datamodel import ConfigRoot
 
+if typing.TYPE_CHECKING:
+    from ..galaxy import Galaxy
+
 import pendulum
 cycle_at = 15
 """
@@ -35,6 +44,8 @@ Determines at what board index does mecha (attempt) to start over indexing
 Notes:
     mecha will still count beyond this value unrestricted, but will attempt
     to keep assigned case numbers below this value whenever possible.
+    As the lowest free index is always handed out, this holds without a
+    counter to reset, unless every lower index is in use or cooling down.
 """
 
 api_url = ""
@@ -92,14 +103,23 @@ class RatBoard(abc.Mapping):
         "_storage_by_client",
         "_handler",
         "_storage_by_index",
-        "_index_counter",
+        "_indexes",
         "_offline",
         "_modification_lock",
+        "_modifying",
         "_datetime_last_case",
+        "_archive",
+        "_changes",
         "__weakref__",
     ]
 
-    def __init__(self, api_handler: typing.Optional[FuelratsApiABC] = None, offline: bool = True):
+    def __init__(
+        self,
+        api_handler: typing.Optional[FuelratsApiABC] = None,
+        offline: bool = True,
+        archive: typing.Optional[CaseArchive] = None,
+        indexes: typing.Optional[IndexAllocator] = None,
+    ):
         self._handler: typing.Optional[FuelratsApiABC] = api_handler
         """
         fuelrats.com API handler
@@ -116,9 +136,9 @@ class RatBoard(abc.Mapping):
         """
         internal rescue storage keyed by board index
         """
-        self._index_counter = itertools.count()
+        self._indexes = indexes if indexes is not None else IndexAllocator()
         """
-        Internal counter for tracking used indexes
+        Allocator of board indexes, reserving those of tracked and in-flight rescues
         """
         self._offline = offline
 
@@ -127,11 +147,26 @@ class RatBoard(abc.Mapping):
         Modification lock to prevent concurrent modification of the board.
         """
 
+        self._modifying: typing.Dict[UUID, Rescue] = {}
+        """
+        Rescues dropped from storage while being modified, keyed by uuid
+        """
+
         self._datetime_last_case = None
         """
         Field used to calculate the time since the last case was created
         """
 
+        self._archive = archive if archive is not None else CaseArchive()
+        """
+        Recently closed rescues, kept after they left the board
+        """
+
+        self._changes = ChangeStream()
+        """
+        Stream of changes to the board, for in-process subscribers
+        """
+
         super(RatBoard, self).__init__()
 
     @property
@@ -149,6 +184,16 @@ class RatBoard(abc.Mapping):
     def api_handler(self):
         self._handler = None
 
+    @property
+    def archive(self) -> CaseArchive:
+        """ Archive of rescues recently closed on this board """
+        return self._archive
+
+    @property
+    def changes(self) -> ChangeStream:
+        """ Stream of rescues created, modified and removed on this board """
+        return self._changes
+
     async def on_online(self):
         logger.info("Rescue board online.")
         self._offline = False
@@ -178,18 +223,13 @@ class RatBoard(abc.Mapping):
     def __iter__(self) -> typing.Iterator[UUID]:
         return iter(self._storage_by_uuid)
 
-    @property
-    def _free_case_number(self) -> int:
+    def snapshot(self) -> typing.List[Rescue]:
         """
-        returns the next unused index in the series.
+        Every rescue on the board, including those being modified
 
-        Returns:
-            int: next free board index
+        Rescues are dropped from lookups while being modified, this is what the board shows.
         """
-        # this line is so magical it gets its own method.
-        # basically, this returns the next index from self._index_counter'
-        # that is not already in use (contains & filterfalse)
-        return next(itertools.filterfalse(self.__contains__, self._index_counter))
+        return [*self._storage_by_uuid.values(), *self._modifying.values()]
 
     @property
     def free_case_number(self) -> int:
@@ -200,21 +240,10 @@ class RatBoard(abc.Mapping):
             int: unused case number
 
         Notes:
-            This method will attempt to return values smaller than the defined
-            :obj:`CYCLE_AT` whenever possible, though will return values
-            in excess of :obj:`CYCLE_AT` as necessary.
+            This is the lowest index neither in use nor recently released, it is not
+            reserved until a rescue holding it is appended.
         """
-        next_free = self._free_case_number
-
-        # if we are larger or equal to the CYCLE_AT point, reset the counter
-        overflow = next_free >= cycle_at
-        if overflow:
-            self._index_counter = itertools.count()
-            # get the next free index from the underlying magic
-            return self._free_case_number
-
-        # return the next index from the magic
-        return next_free
+        return self._indexes.peek()
 
     async def append(self, rescue: Rescue, overwrite: bool = False) -> None:
         """
@@ -228,18 +257,25 @@ class RatBoard(abc.Mapping):
         """
         logger.trace("acquiring modification lock...")
         async with self._modification_lock:
-            # ensure the rescue has a board index, because if this is null it breaks all the things.
-            if rescue.board_index is None:
-                rescue.board_index = self.free_case_number
             logger.trace("acquired modification lock.")
-            if (rescue.api_id in self or rescue.board_index in self) and not overwrite:
-                raise ValueError("Attempted to append a rescue that already exists to the board")
-            self._storage_by_uuid[rescue.api_id] = rescue
-            self._storage_by_index[rescue.board_index] = rescue
-
-            if rescue.irc_nickname:
-                self._storage_by_client[rescue.irc_nickname.casefold()] = rescue
+            self._track(rescue, overwrite)
         logger.trace("released modification lock.")
+        self._changes.publish(RescueCreated(rescue, rescue.revision))
+
+    def _track(self, rescue: Rescue, overwrite: bool = False) -> None:
+        """ Adds `rescue` to storage, the modification lock must be held """
+        # ensure the rescue has a board index, because if this is null it breaks all the things.
+        # it is only reserved below, so a rejected rescue doesn't hold one
+        if rescue.board_index is None:
+            rescue.board_index = self._indexes.peek()
+        if (rescue.api_id in self or rescue.board_index in self) and not overwrite:
+            raise ValueError("Attempted to append a rescue that already exists to the board")
+        self._indexes.claim(rescue.board_index)
+        self._storage_by_uuid[rescue.api_id] = rescue
+        self._storage_by_index[rescue.board_index] = rescue
+
+        if rescue.irc_nickname:
+            self._storage_by_client[rescue.irc_nickname.casefold()] = rescue
 
     @property
     def online(self):
@@ -259,7 +295,11 @@ class RatBoard(abc.Mapping):
             raise RuntimeError("attempted to delete a rescue without acquiring the lock first!")
         # Get the target.
         target = self[key]
+        self._untrack(target)
+        self._indexes.release(target.board_index)
 
+    def _untrack(self, target: Rescue) -> None:
+        """ Drops `target` from storage, leaving its board index reserved """
         # Purge it key by key.
         del self._storage_by_uuid[target.api_id]
         del self._storage_by_index[target.board_index]
@@ -287,24 +327,34 @@ class RatBoard(abc.Mapping):
                 key = key.board_index
 
             target = self[key]
+            index = target.board_index
+            revision = target.revision
 
             # most tracked attributes may be modified in here, so we pop the rescue
-            # from tracking and append it after
+            # from tracking and append it after, keeping its index reserved meanwhile
 
-            del self[key]
+            self._untrack(target)
+            self._modifying[target.api_id] = target
 
             self._modification_lock.release()
             try:
-                # Yield so the caller can modify the rescue
-                yield target
+                # Yield so the caller can modify the rescue, journaling changes as theirs,
+                # including those made to its containers in place
+                with authored_by(impersonation), target.in_place():
+                    yield target
 
             finally:
                 # we need to be sure to re-append the rescue upon completion
-                # (so errors don't drop cases)
-                await self.append(target)
-                # append will reacquire the lock, so don;t reacquire it ourselves (damn no rlocks),
-                # but the context manger is gunna freak out if we don't re-acquire it though.
+                # (so errors don't drop cases), the context manager expects the lock held again
                 await self._modification_lock.acquire()
+                del self._modifying[target.api_id]
+                self._track(target)
+                if target.board_index != index:
+                    self._indexes.release(index)
+                changes = target.journal.since(revision)
+                if changes is None or changes:
+                    fields = None if changes is None else frozenset(change.field for change in changes)
+                    self._changes.publish(RescueModified(target, target.revision, fields))
             # If we are in online mode, emit update event to API.
             if self.online:
                 logger.trace("updating API...")
@@ -331,9 +381,11 @@ class RatBoard(abc.Mapping):
         Raises:
             ApiError: Something went wrong in API creation, rescue has been created locally.
         """
-        index = self.free_case_number
         logger.trace("instantiating local rescue object...")
-        rescue = Rescue(*args, board_index=index, **kwargs)
+        rescue = Rescue(*args, **kwargs)
+        # reserved right away, so concurrent creations can't pick the same index
+        index = self._indexes.allocate()
+        rescue.board_index = index
 
         try:
             if not self.online:
@@ -351,22 +403,85 @@ class RatBoard(abc.Mapping):
             rescue.board_index = index
             self._datetime_last_case = pendulum.now()
             # Always append it to ourselves, regardless of API errors
-            await self.append(rescue, overwrite=ovewrite)
+            try:
+                await self.append(rescue, overwrite=ovewrite)
+            except ValueError:
+                # the rescue never made it onto the board, its index may be handed out again
+                self._indexes.release(index, cool=False)
+                raise
 
         return rescue
 
     async def remove_rescue(self, target: BoardKey):
-        """ removes a rescue from active tracking """
+        """
+        removes a rescue from active tracking
+
+        Closed rescues are kept in the :attr:`archive`.
+        """
         if isinstance(target, Rescue):
             target = target.board_index
         logger.trace("Acquiring modification lock...")
         async with self._modification_lock:
             logger.trace("Acquired modification lock.")
+            rescue = self[target]
             # TODO: add to internal deck in offline mode so we can push to the API when we eventually
             del self[target]
+            if rescue.status is Status.CLOSED:
+                self._archive.add(rescue)
+            self._changes.publish(RescueRemoved(rescue, rescue.revision))
         logger.trace("Released modification lock.")
 
     @property
     def last_case_datetime(self) -> Optional[pendulum.DateTime]:
         """ Return the last case datetime (timezone-aware) """
         return self._datetime_last_case
+
+    async def rescues_by_distance(
+        self, galaxy: Galaxy, origin: StarSystem
+    ) -> typing.List[typing.Tuple[Rescue, Optional[float]]]:
+        """
+        Ranks the open rescues on the board by their distance from `origin`, nearest first.
+
+        Rescue systems are resolved through `galaxy`, concurrently, and measured against `origin`
+        in a single vectorised pass.
+
+        Args:
+            galaxy (Galaxy): galaxy used to resolve rescue systems to coordinates
+            origin (StarSystem): system to measure from, with its position populated
+
+        Returns:
+            list of ``(rescue, distance)`` tuples. Rescues whose system is unset or could not be
+            located follow the ranked ones, in board order, with a distance of ``None``.
+        """
+        candidates = sorted(
+            (rescue for rescue in self._storage_by_uuid.values() if rescue.open),
+            key=lambda rescue: rescue.board_index,
+        )
+        systems = await asyncio.gather(
+            *(
+                galaxy.find_system_by_name(rescue.system, full_details=True)
+                for rescue in candidates
+                if rescue.system
+            ),
+            return_exceptions=True,
+        )
+        systems = iter(systems)
+
+        located: typing.List[typing.Tuple[Rescue, StarSystem]] = []
+        unlocated: typing.List[typing.Tuple[Rescue, Optional[float]]] = []
+        for rescue in candidates:
+            system = next(systems) if rescue.system else None
+            if isinstance(system, BaseException):
+                logger.warning("unable to locate {!r}: {!r}", rescue.system, system)
+                system = None
+            if system is None:
+                unlocated.append((rescue, None))
+            else:
+                located.append((rescue, system))
+
+        distances = PositionTable(system for _, system in located).distances_from(origin)
+        ranked = [
+            (located[index][0], float(distances[index]))
+            for index in distances.argsort(kind="stable")
+        ]
+        return ranked + unlocated
@@ -0,0 +1,258 @@
+"""
+events.py - board change events and their in-process subscribers
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import typing
+from collections import OrderedDict
+from enum import Enum
+
+import attr
+import prometheus_client
+
+from ..rescue import Rescue
+
+BOARD_EVENTS = prometheus_client.Counter(
+    namespace="board",
+    name="events",
+    documentation="board change events published, by kind",
+    labelnames=["kind"],
+)
+DROPPED_EVENTS = prometheus_client.Counter(
+    namespace="board",
+    name="dropped_events",
+    documentation="board change events dropped by full subscriber queues",
+)
+
+
+@attr.dataclass(frozen=True, slots=True)
+class BoardEvent:
+    """ Something happened to a rescue on the board """
+
+    rescue: Rescue
+    """ the rescue, as it is now rather than as it was when the event was published """
+    revision: int
+    """ revision of the rescue when the event was published """
+
+    kind: typing.ClassVar[str] = "event"
+
+    def coalesce(self, later: BoardEvent) -> BoardEvent:
+        """
+        A single event standing for this event, followed by `later` of the same rescue
+
+        Args:
+            later (BoardEvent): the following event
+
+        Returns:
+            BoardEvent: the event to deliver in place of both
+        """
+        return later
+
+
+@attr.dataclass(frozen=True, slots=True)
+class RescueCreated(BoardEvent):
+    """ A rescue was added to the board """
+
+    kind: typing.ClassVar[str] = "created"
+
+    def coalesce(self, later: BoardEvent) -> BoardEvent:
+        # a rescue not seen yet is seen as it is, modifications and all
+        if isinstance(later, RescueModified):
+            return attr.evolve(self, revision=later.revision)
+        return later
+
+
+@attr.dataclass(frozen=True, slots=True)
+class RescueModified(BoardEvent):
+    """ A rescue on the board was modified """
+
+    fields: typing.Optional[typing.FrozenSet[str]] = None
+    """ names of the fields that changed, None if the rescue can't tell """
+
+    kind: typing.ClassVar[str] = "modified"
+
+    def coalesce(self, later: BoardEvent) -> BoardEvent:
+        if isinstance(later, RescueModified):
+            if self.fields is None or later.fields is None:
+                return attr.evolve(later, fields=None)
+            return attr.evolve(later, fields=self.fields | later.fields)
+        return later
+
+
+@attr.dataclass(frozen=True, slots=True)
+class RescueRemoved(BoardEvent):
+    """ A rescue left the board """
+
+    kind: typing.ClassVar[str] = "removed"
+
+
+_PUBLISHED = {
+    event.kind: BOARD_EVENTS.labels(kind=event.kind)
+    for event in (RescueCreated, RescueModified, RescueRemoved)
+}
+
+
+class Policy(Enum):
+    """ What a subscription does with events it has no room left for """
+
+    DROP = "drop"
+    """ drop the oldest pending event """
+    COALESCE = "coalesce"
+    """
+    merge events of the same rescue into one, dropping the oldest pending event only once
+    as many rescues as there is room for have pending events
+    """
+
+
+class Subscription:
+    """
+    A subscriber's bounded queue of board events, iterated asynchronously.
+
+    Publishing never waits on the subscriber: once `maxsize` events are pending, the subscription
+    makes room according to its :class:`Policy`. Iteration ends once the subscription is closed
+    and drained.
+    """
+
+    __slots__ = ["maxsize", "policy", "dropped", "_stream", "_pending", "_sequence", "_ready",
+                 "_closed"]
+
+    def __init__(self, stream: ChangeStream, maxsize: int, policy: Policy):
+        """
+        Creates a subscription, use :meth:`ChangeStream.subscribe` instead.
+
+        Args:
+            stream (ChangeStream): stream subscribed to
+            maxsize (int): most events kept pending
+            policy (Policy): what to do once `maxsize` events are pending
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        """ number of events dropped for lack of room """
+        self._stream = stream
+        self._pending: typing.Dict[typing.Hashable, BoardEvent] = OrderedDict()
+        """ pending events, oldest first, keyed by rescue when coalescing """
+        self._sequence = itertools.count()
+        self._ready = asyncio.Event()
+        """ set while events are pending, or the subscription is closed """
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @property
+    def closed(self) -> bool:
+        """ Whether the subscription no longer receives events """
+        return self._closed
+
+    def put(self, event: BoardEvent) -> None:
+        """ Queues `event` without waiting, making room by the subscription's policy """
+        if self._closed:
+            return
+        pending = self._pending
+        if self.policy is Policy.COALESCE:
+            key = event.rescue.api_id
+            earlier = pending.pop(key, None)
+            if earlier is not None:
+                event = earlier.coalesce(event)
+        else:
+            key = next(self._sequence)
+        if len(pending) >= self.maxsize:
+            pending.popitem(last=False)
+            self.dropped += 1
+            DROPPED_EVENTS.inc()
+        pending[key] = event
+        self._ready.set()
+
+    def get_nowait(self) -> BoardEvent:
+        """
+        Takes the oldest pending event
+
+        Raises:
+            asyncio.QueueEmpty: no event is pending
+        """
+        if not self._pending:
+            raise asyncio.QueueEmpty
+        _, event = self._pending.popitem(last=False)
+        if not self._pending and not self._closed:
+            self._ready.clear()
+        return event
+
+    def close(self) -> None:
+        """ Stops receiving events, events already pending are still delivered """
+        if self._closed:
+            return
+        self._closed = True
+        self._stream.unsubscribe(self)
+        self._ready.set()
+
+    def __enter__(self) -> Subscription:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __aiter__(self) -> Subscription:
+        return self
+
+    async def __anext__(self) -> BoardEvent:
+        while not self._pending:
+            if self._closed:
+                raise StopAsyncIteration
+            await self._ready.wait()
+        return self.get_nowait()
+
+
+class ChangeStream:
+    """
+    Publishes board events to in-process subscribers.
+
+    Every subscriber gets its own :class:`Subscription`, so a slow one only ever loses or merges
+    its own events and never holds up the board or the other subscribers.
+    """
+
+    __slots__ = ["_subscriptions"]
+
+    def __init__(self):
+        self._subscriptions: typing.List[Subscription] = []
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, maxsize: int = 256, policy: Policy = Policy.COALESCE) -> Subscription:
+        """
+        Subscribes to board events published from now on
+
+        Args:
+            maxsize (int): most events kept pending for the subscriber
+            policy (Policy): what to do once `maxsize` events are pending
+
+        Returns:
+            Subscription: the subscription, close it once done with it
+        """
+        subscription = Subscription(self, maxsize, policy)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """ Stops delivering events to `subscription` """
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+            subscription.close()
+
+    def publish(self, event: BoardEvent) -> None:
+        """ Delivers `event` to every subscriber, without waiting on any of them """
+        _PUBLISHED[event.kind].inc()
+        for subscription in self._subscriptions:
+            subscription.put(event)
@@ -0,0 +1,132 @@
+"""
+index_allocator.py - board index allocation
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import heapq
+import time
+import typing
+from collections import OrderedDict
+
+if typing.TYPE_CHECKING:
+    from ...config.datamodel.board import BoardConfigRoot
+
+
+class IndexAllocator:
+    """
+    Hands out board indexes, lowest free first, in O(log n).
+
+    Free indexes are kept in a min-heap, lazily: entries for indexes claimed or released since
+    they were pushed are skipped once they surface. A released index cools down for `cooldown`
+    seconds before it is handed out again, so dispatch doesn't confuse a new case with one just
+    closed under the same number. Indexes beyond the highest ever used are free without being
+    in the heap.
+    """
+
+    __slots__ = ["cooldown", "_clock", "_used", "_free", "_cooling", "_end"]
+
+    def __init__(self, cooldown: float = 300, clock: typing.Callable[[], float] = time.monotonic):
+        """
+        Creates an index allocator
+
+        Args:
+            cooldown (float): seconds a released index is held back before it is reused
+            clock (Callable): monotonic time source
+        """
+        self.cooldown = cooldown
+        self._clock = clock
+        self._used: typing.Set[int] = set()
+        self._free: typing.List[int] = []
+        """ min-heap of free indexes below :attr:`_end`, possibly stale """
+        self._cooling: typing.Dict[int, float] = OrderedDict()
+        """ release time of cooling indexes, least recently released first """
+        self._end = 0
+        """ lowest index never used """
+
+    @classmethod
+    def from_config(cls, config: BoardConfigRoot, **kwargs) -> IndexAllocator:
+        """ Builds an allocator from the `board` configuration section """
+        return cls(cooldown=config.index_cooldown, **kwargs)
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._used
+
+    def __len__(self) -> int:
+        return len(self._used)
+
+    def cooling(self, index: int) -> bool:
+        """ Whether `index` was released too recently to be handed out again """
+        self._thaw()
+        return index in self._cooling
+
+    def _thaw(self) -> None:
+        """ Returns indexes that have cooled down to the free heap """
+        horizon = self._clock() - self.cooldown
+        cooling = self._cooling
+        while cooling:
+            index, released_at = next(iter(cooling.items()))
+            if released_at > horizon:
+                break
+            del cooling[index]
+            heapq.heappush(self._free, index)
+
+    def peek(self) -> int:
+        """ The index :meth:`allocate` would hand out next, without reserving it """
+        self._thaw()
+        free = self._free
+        while free and (free[0] in self._used or free[0] in self._cooling):
+            heapq.heappop(free)
+        return free[0] if free else self._end
+
+    def allocate(self) -> int:
+        """
+        Reserves the lowest free index that isn't cooling down.
+
+        Returns:
+            int: the reserved index
+        """
+        index = self.peek()
+        if self._free:
+            heapq.heappop(self._free)
+        else:
+            self._end += 1
+        self._used.add(index)
+        return index
+
+    def claim(self, index: int) -> None:
+        """
+        Reserves `index` specifically, such as for a rescue that already has one.
+
+        Claiming an index already reserved does nothing.
+        """
+        if index >= self._end:
+            for skipped in range(self._end, index):
+                heapq.heappush(self._free, skipped)
+            self._end = index + 1
+        self._cooling.pop(index, None)
+        self._used.add(index)
+
+    def release(self, index: int, cool: bool = True) -> None:
+        """
+        Frees `index`
+
+        Args:
+            index (int): index to free
+            cool (bool): hold the index back for :attr:`cooldown` seconds, as its case was on the
+                board; otherwise it may be handed out again right away
+        """
+        if index not in self._used:
+            return
+        self._used.discard(index)
+        if cool and self.cooldown > 0:
+            self._cooling[index] = self._clock()
+            self._cooling.move_to_end(index)
+        else:
+            heapq.heappush(self._free, index)
@@ -0,0 +1,198 @@
+"""
+server.py - read-only HTTP view of the rescue board
+
+Serves the board as JSON, with ETags so pollers only download changes, and as a stream of
+server-sent events. Each rescue is encoded once per revision, however often it is served.
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import secrets
+import typing
+from uuid import UUID
+
+import prometheus_client
+from aiohttp import web
+from loguru import logger
+
+from .archive import encode_rescue
+from .events import BoardEvent, Policy, RescueModified
+from ..rescue import Rescue
+
+if typing.TYPE_CHECKING:
+    from .board import RatBoard
+
+BOARD_RESPONSES = prometheus_client.Counter(
+    namespace="board",
+    name="http_responses",
+    documentation="board endpoint responses, by outcome",
+    labelnames=["outcome"],
+)
+RESCUE_ENCODES = prometheus_client.Counter(
+    namespace="board",
+    name="http_encodes",
+    documentation="rescues encoded for the board endpoint, rather than served from cache",
+)
+EVENT_STREAMS = prometheus_client.Gauge(
+    namespace="board",
+    name="http_event_streams",
+    documentation="clients streaming board events",
+)
+_FULL = BOARD_RESPONSES.labels(outcome="full")
+_NOT_MODIFIED = BOARD_RESPONSES.labels(outcome="not_modified")
+
+
+class BoardServer:
+    """
+    Read-only HTTP endpoint serving a :class:`RatBoard`.
+
+    ``GET /board`` answers with every rescue on the board, by board index, and an ETag;
+    ``If-None-Match`` requests for an unchanged board are answered ``304 Not Modified``.
+    ``GET /board/events`` streams the board as server-sent events: a ``board`` event with the
+    whole board, then a ``created``, ``modified`` or ``removed`` event per change.
+    """
+
+    __slots__ = ["board", "heartbeat", "max_pending", "_encoded", "_state", "_body", "_etag",
+                 "_epoch", "_runner"]
+
+    def __init__(self, board: RatBoard, heartbeat: float = 15, max_pending: int = 256):
+        """
+        Creates a board server
+
+        Args:
+            board (RatBoard): board to serve
+            heartbeat (float): seconds between keep-alive comments on idle event streams
+            max_pending (int): events kept for a slow event stream client, see :class:`Policy`
+        """
+        self.board = board
+        self.heartbeat = heartbeat
+        self.max_pending = max_pending
+        self._encoded: typing.Dict[UUID, typing.Tuple[int, bytes]] = {}
+        """ encoded rescues and the revision they were encoded at, keyed by API id """
+        self._state: typing.Optional[typing.Tuple[typing.Tuple[UUID, int], ...]] = None
+        """ API id and revision of each rescue in the last rendered body, in order """
+        self._body = b""
+        self._etag = ""
+        self._epoch = secrets.token_hex(4)
+        """ distinguishes ETags across restarts, as revisions start over """
+        self._runner: typing.Optional[web.AppRunner] = None
+
+    def encode(self, rescue: Rescue) -> bytes:
+        """ `rescue` as JSON, encoded again only if it changed since it was last encoded """
+        cached = self._encoded.get(rescue.api_id)
+        if cached is not None and cached[0] == rescue.revision:
+            return cached[1]
+        RESCUE_ENCODES.inc()
+        encoded = json.dumps(encode_rescue(rescue), separators=(",", ":")).encode()
+        self._encoded[rescue.api_id] = (rescue.revision, encoded)
+        return encoded
+
+    def render(self) -> typing.Tuple[str, bytes]:
+        """
+        The board as JSON, including rescues being modified
+
+        Returns:
+            Tuple[str, bytes]: ETag and body
+        """
+        rescues = sorted(self.board.snapshot(), key=lambda rescue: rescue.board_index)
+        state = tuple((rescue.api_id, rescue.revision) for rescue in rescues)
+        if state == self._state:
+            return self._etag, self._body
+
+        body = b'{"rescues":[' + b",".join(self.encode(rescue) for rescue in rescues) + b"]}"
+        digest = hashlib.blake2b(digest_size=12)
+        for api_id, revision in state:
+            digest.update(api_id.bytes)
+            digest.update(revision.to_bytes(8, "big"))
+        # rescues that left the board needn't stay cached
+        on_board = {api_id for api_id, _ in state}
+        for api_id in [api_id for api_id in self._encoded if api_id not in on_board]:
+            del self._encoded[api_id]
+
+        self._state = state
+        self._body = body
+        self._etag = f'"{self._epoch}-{digest.hexdigest()}"'
+        return self._etag, self._body
+
+    @staticmethod
+    def _matches(etag: str, if_none_match: typing.Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    async def handle_board(self, request: web.Request) -> web.Response:
+        """ Serves the board, or ``304 Not Modified`` if the client has it already """
+        etag, body = self.render()
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if self._matches(etag, request.headers.get("If-None-Match")):
+            _NOT_MODIFIED.inc()
+            return web.Response(status=304, headers=headers)
+        _FULL.inc()
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    def _event_data(self, event: BoardEvent) -> bytes:
+        data = b'{"rescue":' + self.encode(event.rescue)
+        if isinstance(event, RescueModified):
+            fields = sorted(event.fields) if event.fields is not None else None
+            data += b',"fields":' + json.dumps(fields).encode()
+        return data + b"}"
+
+    async def handle_events(self, request: web.Request) -> web.StreamResponse:
+        """ Streams the board, then its changes, as server-sent events """
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+        EVENT_STREAMS.inc()
+        try:
+            with self.board.changes.subscribe(self.max_pending, Policy.COALESCE) as subscription:
+                etag, body = self.render()
+                await response.write(b"event: board\nid: " + etag.encode() + b"\ndata: " + body
+                                     + b"\n\n")
+                while True:
+                    try:
+                        event = await asyncio.wait_for(subscription.__anext__(), self.heartbeat)
+                    except asyncio.TimeoutError:
+                        await response.write(b": keep-alive\n\n")
+                        continue
+                    except StopAsyncIteration:
+                        break
+                    await response.write(
+                        b"event: " + event.kind.encode() + b"\ndata: " + self._event_data(event)
+                        + b"\n\n"
+                    )
+        except ConnectionResetError:
+            logger.debug("board event stream client went away")
+        finally:
+            EVENT_STREAMS.dec()
+        return response
+
+    def application(self) -> web.Application:
+        """ The aiohttp application serving the board """
+        app = web.Application()
+        app.router.add_get("/board", self.handle_board)
+        app.router.add_get("/board/events", self.handle_events)
+        return app
+
+    async def start(self, host: str, port: int) -> None:
+        """ Starts serving on `host`:`port` """
+        self._runner = web.AppRunner(self.application())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info("serving the board on http://{}:{}/board", host, port)
+
+    async def stop(self) -> None:
+        """ Stops serving, closing any event streams """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -12,6 +12,7 @@ See LICENSE.md
 """
 
 from . import rat_command
-from .rat_command import command, trigger
+from .rat_command import CommandRegistry, classify, command, registry, trigger
+from .rate_limiter import RateLimiter
 
-__all__ = ["command", "trigger"]
+__all__ = ["CommandRegistry", "RateLimiter", "classify", "command", "registry", "trigger"]
@@ -12,21 +12,26 @@ This module is built on top of the Pydle system.
 
 """
 
+import functools
+import time
 import typing
+from collections import abc
 from typing import Any, Callable, Tuple, Optional
 
 import attr
 import prometheus_client
 import psycopg2
-import pyparsing
 from loguru import logger
 from prometheus_async.aio import time as aio_time
-from pyparsing import Word, Suppress, alphanums, alphas, ZeroOrMore
 
-from src.packages.permissions import Permission, has_required_permission
+from src.packages.parsing_rules import compiled
+from src.packages.permissions import Permission
+from src.packages.permissions.permissions import Guard, compile_guard
 from src.packages.rules.rules import get_rule
 from ..context import Context
-from ..ratmama.ratmama_parser import handle_ratmama_announcement
+from ..dispatch import Priority
+from ..ratmama.announcement import is_announcement
+from ..ratmama.ratmama_parser import handle_ratmama_announcement, handle_ratsignal, is_announcer
 
 TRIGGER_TIME = prometheus_client.Histogram(
     namespace="commands", name="trigger", unit="seconds", documentation="time spent in trigger"
@@ -82,7 +87,14 @@ class NameCollisionException(CommandException):
     """
 
 
-_registered_commands = {}  # pylint: disable=invalid-name
+PreHook = Callable[["Command", Context], Optional[str]]
+"""
+Runs before a command, returning None to let it run or a message to reject it with.
+
+An empty message rejects the invocation without replying.
+"""
+PostHook = Callable[["Command", Context, Optional[BaseException]], None]
+""" Runs after a command that was let run, with the exception it raised if any """
 
 
 def truthy_validator(inst, attribute, value):
@@ -121,48 +133,213 @@ class Command:
         validator=attr.validators.optional(truthy_validator), default=None
     )
     func: typing.Optional[typing.Callable] = attr.ib(default=None)
+    priority: Priority = attr.ib(
+        default=Priority.COMMAND, validator=attr.validators.instance_of(Priority)
+    )
+    """ how urgently invocations are dispatched """
+    _guard: typing.Optional[Guard] = attr.ib(init=False, default=None, repr=False, eq=False)
+    """ the invocation requirements above, compiled into a single check """
+
+    _time_in_command: Any = attr.ib(init=False, default=None, repr=False, eq=False)
+    _time_in_prexecute: Any = attr.ib(init=False, default=None, repr=False, eq=False)
+    _chain: Callable[..., typing.Awaitable] = attr.ib(init=False, default=None, repr=False, eq=False)
+    """ the guard, hooks and underlying, compiled by :meth:`compile` """
+
+    def __attrs_post_init__(self):
+        guard_kwargs = {}
+        if self.override_channel_message is not None:
+            guard_kwargs["channel_message"] = self.override_channel_message
+        if self.override_dm_message is not None:
+            guard_kwargs["dm_message"] = self.override_dm_message
+        self._guard = compile_guard(
+            permission=self.require_permission,
+            permission_message=self.override_permission_message,
+            require_channel=self.require_channel,
+            require_dm=self.require_direct_message,
+            **guard_kwargs,
+        )
+        self._time_in_command = TIME_IN_COMMAND.labels(command=self.aliases[0])
+        self._time_in_prexecute = TIME_IN_PREXECUTE.labels(command=self.aliases[0])
+        self.compile()
+
+    def compile(
+        self,
+        pre_hooks: typing.Sequence[PreHook] = (),
+        post_hooks: typing.Sequence[PostHook] = (),
+    ) -> None:
+        """
+        Compiles the invocation requirements, hooks and underlying into a single call chain.
+
+        Rejected invocations stop at the first check rejecting them, and never reach the logging
+        context or command timer.
+
+        Args:
+            pre_hooks (Sequence[PreHook]): run in order after the invocation requirements
+            post_hooks (Sequence[PostHook]): run in order after the underlying
+        """
+        underlying = self.underlying
+        time_in_command = self._time_in_command
+        time_in_prexecute = self._time_in_prexecute
+        checks = tuple(functools.partial(hook, self) for hook in pre_hooks)
+        if self._guard is not None:
+            checks = (self._guard,) + checks
+        finalizers = tuple(functools.partial(hook, self) for hook in post_hooks)
+
+        async def execute(context: Context, *args, **kwargs):
+            user = context.user
+            with logger.contextualize(invoking_nick=user.nickname, invoking_account=user.account):
+                with time_in_command.time():
+                    return await underlying(context, *args, **kwargs)
+
+        async def finalize(context: Context, *args, **kwargs):
+            error = None
+            try:
+                return await execute(context, *args, **kwargs)
+            except BaseException as ex:
+                error = ex
+                raise
+            finally:
+                for finalizer in finalizers:
+                    try:
+                        finalizer(context, error)
+                    except Exception:  # pylint: disable=broad-except
+                        logger.exception("post-execution hook of {} failed", self.aliases[0])
+
+        run = finalize if finalizers else execute
+
+        async def check(context: Context, *args, **kwargs):
+            started = time.perf_counter()
+            for check_fun in checks:
+                denial = check_fun(context)
+                if denial is not None:
+                    time_in_prexecute.observe(time.perf_counter() - started)
+                    if denial:
+                        await context.reply(denial)
+                    return None
+            time_in_prexecute.observe(time.perf_counter() - started)
+            return await run(context, *args, **kwargs)
+
+        self._chain = check if checks else run
 
     async def __call__(self, context: Context, *args, **kwargs):
-        # TODO: pre-execution hooks would go here
-        with logger.contextualize(
-            invoking_nick=context.user.nickname, invoking_account=context.user.account
-        ):
-            with TIME_IN_PREXECUTE.labels(command=self.aliases[0]).time():
-                if self.require_permission:
-                    if not has_required_permission(context.user, self.require_permission):
-                        logger.warning("A user tried to invoke a command they aren't allowed.")
-                        return await context.reply(
-                            self.override_permission_message
-                            if self.override_permission_message is not None
-                            else self.require_permission.denied_message
-                        )
-                if self.require_channel:
-                    if context.channel is None:
-                        logger.warning("A user tried to invoke a channel message in a direct message.")
-                        return await context.reply(
-                            "Cannot comply: This command must be invoked in a channel."
-                            if self.override_channel_message is None
-                            else self.override_channel_message
-                        )
-
-                if self.require_direct_message:
-                    if context.channel is not None:
-                        logger.warning("A user tried to invoke a DM only message in a channel.")
-                        return await context.reply(
-                            "Cannot comply: this command must be invoked in a direct message."
-                            if self.override_dm_message is None
-                            else self.override_dm_message
-                        )
-            with TIME_IN_COMMAND.labels(command=self.aliases[0]).time():
-                return await self.underlying(context, *args, **kwargs)
+        return await self._chain(context, *args, **kwargs)
+
+
+class CommandRegistry(abc.MutableMapping):
+    """
+    Commands by casefolded alias, and the hooks run around them.
+
+    Hooks are compiled into each command's call chain when it is registered, and again whenever
+    the hooks change, so invoking a command never has to look them up.
+    """
+
+    __slots__ = ["_commands", "_pre_hooks", "_post_hooks"]
+
+    def __init__(self):
+        self._commands: typing.Dict[str, Callable] = {}
+        self._pre_hooks: typing.List[Tuple[PreHook, Optional[typing.FrozenSet[str]]]] = []
+        self._post_hooks: typing.List[Tuple[PostHook, Optional[typing.FrozenSet[str]]]] = []
+
+    def __getitem__(self, alias: str) -> Callable:
+        return self._commands[alias]
+
+    def __setitem__(self, alias: str, cmd: Callable) -> None:
+        self._commands[alias] = cmd
+        self._compile(cmd)
+
+    def __delitem__(self, alias: str) -> None:
+        del self._commands[alias]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._commands)
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def __contains__(self, alias: object) -> bool:
+        return alias in self._commands
+
+    def get(self, alias: str, default: Optional[Callable] = None) -> Optional[Callable]:
+        return self._commands.get(alias, default)
+
+    def register(self, cmd: Callable, aliases: typing.Iterable[str]) -> None:
+        """
+        Registers `cmd` under each of `aliases`.
+
+        Raises:
+            NameCollisionException: one of the aliases is already registered
+        """
+        aliases = [alias.casefold() for alias in aliases]
+        for alias in aliases:
+            if alias in self._commands:
+                raise NameCollisionException(f"attempted to re-register command(s) {alias}")
+        for alias in aliases:
+            self._commands[alias] = cmd
+        self._compile(cmd)
+
+    def add_pre_hook(self, hook: PreHook, *aliases: str) -> PreHook:
+        """
+        Runs `hook` before every command, or only the commands registered under `aliases`.
+
+        Returns:
+            `hook`, unmodified.
+        """
+        self._pre_hooks.append((hook, self._scope(aliases)))
+        self._recompile()
+        return hook
+
+    def add_post_hook(self, hook: PostHook, *aliases: str) -> PostHook:
+        """
+        Runs `hook` after every command, or only the commands registered under `aliases`.
+
+        Returns:
+            `hook`, unmodified.
+        """
+        self._post_hooks.append((hook, self._scope(aliases)))
+        self._recompile()
+        return hook
+
+    def remove_hook(self, hook: typing.Union[PreHook, PostHook]) -> None:
+        """ Stops running `hook` around commands """
+        self._pre_hooks = [entry for entry in self._pre_hooks if entry[0] is not hook]
+        self._post_hooks = [entry for entry in self._post_hooks if entry[0] is not hook]
+        self._recompile()
+
+    @staticmethod
+    def _scope(aliases: typing.Tuple[str, ...]) -> Optional[typing.FrozenSet[str]]:
+        return frozenset(alias.casefold() for alias in aliases) if aliases else None
+
+    def _compile(self, cmd: Callable) -> None:
+        if not isinstance(cmd, Command):
+            return
+        names = {alias.casefold() for alias in cmd.aliases}
+        cmd.compile(
+            [hook for hook, scope in self._pre_hooks if scope is None or scope & names],
+            [hook for hook, scope in self._post_hooks if scope is None or scope & names],
+        )
+
+    def _recompile(self) -> None:
+        # a command is registered once per alias, compile each just once.
+        for cmd in {id(cmd): cmd for cmd in self._commands.values()}.values():
+            self._compile(cmd)
+
+
+registry = CommandRegistry()
+""" the commands the bot responds to """
+_registered_commands = registry  # pylint: disable=invalid-name
+
+
+RuleMatch = Tuple[Optional[Callable], tuple]
+""" a rule matching a message, or None, and the extra args to call it with, see :func:`get_rule` """
 
 
 @aio_time(TRIGGER_TIME)
-async def trigger(ctx) -> Any:
+async def trigger(ctx, rule: Optional[RuleMatch] = None) -> Any:
     """
 
     Args:
         ctx (Context): Invocation context
+        rule (RuleMatch): the rule matching the message, if :func:`classify` looked it up already
 
     Returns:
         result of command execution
@@ -171,60 +348,139 @@ async def trigger(ctx) -> Any:
     if ctx.words_eol[0] == "":
         return  # empty message, bail out
 
+    # announcements are frequent and never commands, don't bother looking them up
+    if is_announcement(ctx.words_eol[0]):
+        if is_announcer(_sender(ctx)):
+            return await handle_ratmama_announcement(ctx)
+        # anyone else saying so is just chatter
+        TRIGGER_MISS.inc()
+        logger.debug(f"Ignoring announcement by {_sender(ctx)}, not an announcer.")
+        return None
+
     if ctx.prefixed:
-        if ctx.words[0].casefold() in _registered_commands:
+        command_fun = _registered_commands.get(ctx.words[0].casefold())
+        if command_fun is not None:
             # A regular command
-            command_fun = _registered_commands[ctx.words[0].casefold()]
             extra_args = ()
             logger.debug(f"Regular command {ctx.words[0]} invoked.")
+            name = command_fun.aliases[0] if isinstance(command_fun, Command) else ctx.words[0]
+            if not _within_rate_limit(ctx, name.casefold(), "command"):
+                return None
         else:
             # Might be a regular rule
-            command_fun, extra_args = get_rule(ctx.words, ctx.words_eol, prefixless=False)
+            if rule is None:
+                rule = get_rule(ctx.words, ctx.words_eol, prefixless=False)
+            command_fun, extra_args = rule
             if command_fun:
                 logger.debug(
                     f"Rule {getattr(command_fun, '__name__', '')} matching {ctx.words[0]} found."
                 )
+                if not _within_rate_limit(ctx, getattr(command_fun, "__name__", ""), "rule"):
+                    return None
             else:
                 logger.debug(f"Could not find command or rule for {ctx.words[0]}.")
     else:
         # Might still be a prefixless rule
-        command_fun, extra_args = get_rule(ctx.words, ctx.words_eol, prefixless=True)
+        if rule is None:
+            rule = get_rule(ctx.words, ctx.words_eol, prefixless=True)
+        command_fun, extra_args = rule
         if command_fun:
             logger.debug(
                 f"Prefixless rule {getattr(command_fun, '__name__', '')} matching {ctx.words[0]} "
                 f"found."
             )
 
-    if ctx.words_eol[0].startswith("Incoming Client:"):
-        command_fun = handle_ratmama_announcement
-
     if command_fun:
         return await command_fun(ctx, *extra_args)
 
     # neither a rule nor a command, possibly a fact
     result = False
     if ctx.prefixed:
+        if not _within_rate_limit(ctx, "facts", "fact"):
+            return None
         result = await handle_fact(ctx)
     if not result:
         TRIGGER_MISS.inc()
         logger.debug(f"Ignoring message '{ctx.words_eol[0]}'. Not a command or rule.")
 
 
+def _sender(ctx: Context) -> Optional[str]:
+    """ Nickname of the invoking user, None for anonymous contexts """
+    if ctx.sender:
+        return ctx.sender
+    user = ctx.user
+    return user.nickname if user is not None else None
+
+
+def _within_rate_limit(ctx: Context, name: str, kind: str) -> bool:
+    """ Whether the invoking user is within their budget for `name`, anonymous contexts always are """
+    nickname = _sender(ctx)
+    if nickname is None:
+        return True
+    return ctx.bot.rate_limiter.allow(ctx.user, nickname, name, kind)
+
+
+def classify(
+    ctx: Context,
+) -> Tuple[Priority, Optional[typing.Hashable], Optional[RuleMatch]]:
+    """
+    Works out how urgently a message should be handled, without handling it.
+
+    Args:
+        ctx (Context): Invocation context
+
+    Returns:
+        the message's priority, the key of the case it concerns if its handling must be ordered
+        with other messages about that case, else None, and the rule matching the message if it
+        was looked up, else None; pass the latter on to :func:`trigger`.
+    """
+    if is_announcement(ctx.words_eol[0]):
+        if is_announcer(_sender(ctx)):
+            return Priority.ANNOUNCEMENT, None, None
+        return Priority.CHATTER, None, None
+
+    if ctx.prefixed:
+        cmd = _registered_commands.get(ctx.words[0].casefold())
+        if isinstance(cmd, Command):
+            if cmd.priority is Priority.CASE and len(ctx.words) > 1:
+                return cmd.priority, _case_key(ctx, ctx.words[1]), None
+            return cmd.priority, None, None
+
+    match = get_rule(ctx.words, ctx.words_eol, prefixless=not ctx.prefixed)
+    rule = match[0]
+    if rule is handle_ratmama_announcement.underlying and not is_announcer(_sender(ctx)):
+        return Priority.CHATTER, None, match
+    if rule in (handle_ratmama_announcement.underlying, handle_ratsignal.underlying):
+        return Priority.ANNOUNCEMENT, None, match
+    return (Priority.COMMAND if rule else Priority.CHATTER), None, match
+
+
+def _case_key(ctx: Context, reference: str) -> typing.Hashable:
+    """ Keys a case by its API id where possible, so its index and client name share a key """
+    target: typing.Union[int, str] = int(reference) if reference.isdigit() else reference
+    if target in ctx.bot.board:
+        return ctx.bot.board[target].api_id
+    return "case", reference.casefold()
+
+
+FACT_PATTERN = compiled.Pattern(
+    rf"{compiled.SKIP}(?P<name>[A-Za-z0-9]+)"
+    rf"(?:{compiled.SKIP}-{compiled.SKIP}(?P<lang>[A-Za-z]+))?"
+    rf"(?P<subjects>(?:{compiled.SKIP}[A-Za-z0-9_\[\]|?.<>{{}}\-=]+)*)",
+    subjects=str.split,
+)
+""" matches a fact invocation, `name[-lang] [subjects...]` """
+
+
 @aio_time(FACT_TIME)
 async def handle_fact(context: Context):
     """
     Handles potential facts
     """
     logger.trace("entering fact handler")
-    pattern = (
-        Word(alphanums).setResultsName("name")
-        + pyparsing.Optional(Suppress("-") + Word(alphas).setResultsName("lang"))
-        + ZeroOrMore(Word(alphanums + "_[]|?.<>{}-=")).setResultsName("subjects")
-    )
     logger.debug("parsing {!r} for facts...", context.words_eol[0])
-    try:
-        result = pattern.parseString(context.words_eol[0])
-    except pyparsing.ParseException:
+    result = FACT_PATTERN.parse(context.words_eol[0])
+    if result is None:
         logger.debug("failed to parse {!r} as a fact", context.words_eol[0])
         return
 
@@ -256,21 +512,11 @@ def _register(func, names: typing.Union[typing.Iterable[str], str]) -> bool:
     if isinstance(names, str):
         names = [names]  # idiot proofing
 
-    # transform commands to lowercase
-    names = [name.casefold() for name in names]
-
     if func is None or not callable(func):
         # command not callable
         return False
 
-    for alias in names:
-        if alias in _registered_commands:
-            # command already registered
-            raise NameCollisionException(f"attempted to re-register command(s) {alias}")
-        else:
-            formed_dict = {alias: func}
-            _registered_commands.update(formed_dict)
-
+    _registered_commands.register(func, names)
     return True
 
 
@@ -282,6 +528,7 @@ def command(
     override_channel_message: Optional[str] = None,
     require_channel: bool = False,
     require_direct_message: bool = False,
+    priority: Priority = Priority.COMMAND,
     **kwargs,
 ):
     """
@@ -294,6 +541,7 @@ def command(
         require_permission: permission level required to invoke this command.
         require_channel: require this command to be invoked in a channel
         require_direct_message: require this command to be invoked via a direct message
+        priority: how urgently invocations are dispatched
         *aliases ([str]): aliases to register
 
     """
@@ -319,6 +567,7 @@ def command(
             override_permission_message=require_permission_message,
             override_dm_message=override_dm_message,
             override_channel_message=override_channel_message,
+            priority=priority,
             **kwargs,
         )
         if not _register(cmd, aliases):
@@ -0,0 +1,167 @@
+"""
+rate_limiter.py - Per user, per command rate limiting
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import time
+import typing
+from collections import OrderedDict
+
+import prometheus_client
+from loguru import logger
+
+from ..permissions import ADMIN, OVERSEER, RAT, RECRUIT, TECHRAT, Permission
+from ..permissions.permissions import effective_level, level_table
+from ..utils import TokenBucket
+
+if typing.TYPE_CHECKING:
+    from ..user import User
+    from ...config.datamodel import ConfigRoot
+
+RATE_LIMITED = prometheus_client.Counter(
+    namespace="commands",
+    name="rate_limited",
+    documentation="invocations ignored for exceeding their rate limit, by kind",
+    labelnames=["kind"],
+)
+KINDS = ("command", "rule", "fact")
+_RATE_LIMITED = {kind: RATE_LIMITED.labels(kind=kind) for kind in KINDS}
+
+Budget = typing.Tuple[int, float]
+""" ``(burst, rate)`` of a token bucket, a burst of 0 means unlimited """
+
+_CONFIG_LEVELS: typing.Dict[str, Permission] = {
+    "recruit": RECRUIT,
+    "rat": RAT,
+    "overseer": OVERSEER,
+    "techrat": TECHRAT,
+    "administrator": ADMIN,
+}
+
+
+class RateLimiter:
+    """
+    Token bucket rate limits keyed by ``(account or nick, command)``.
+
+    Facts are looked up from the database whether they exist or not, so they share a single
+    budget per user rather than getting one each.
+
+    Budgets are given per :class:`Permission`, and users get the budget of the highest permission
+    at or below their own level, or the default budget if they have no level. Buckets are kept
+    for the `max_buckets` most recently limited keys; forgetting a bucket only ever refills it.
+    """
+
+    __slots__ = ["_budgets", "_default", "_exempt", "max_buckets", "_clock", "_buckets", "_table",
+                 "_table_source"]
+
+    def __init__(
+        self,
+        budgets: typing.Iterable[typing.Tuple[Permission, Budget]] = (),
+        default: typing.Optional[Budget] = None,
+        exempt: typing.Iterable[str] = (),
+        max_buckets: int = 4096,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        """
+        Creates a rate limiter
+
+        Args:
+            budgets (Iterable): ``(permission, budget)`` pairs, the budget of users with each
+                permission
+            default (Budget): budget of users without a permission level, None for unlimited
+            exempt (Iterable[str]): nicknames never rate limited
+            max_buckets (int): number of buckets to keep
+            clock (Callable): monotonic time source
+        """
+        self._budgets = list(budgets)
+        self._default = default
+        self._exempt = frozenset(nick.casefold() for nick in exempt)
+        self.max_buckets = max_buckets
+        self._clock = clock
+        self._buckets: typing.Dict[typing.Tuple[str, str, str], TokenBucket] = OrderedDict()
+        """ buckets by key, least recently used first """
+        self._table: typing.List[typing.Tuple[int, Budget]] = []
+        self._table_source: typing.Optional[typing.Dict[str, int]] = None
+
+    @classmethod
+    def from_config(cls, config: ConfigRoot) -> RateLimiter:
+        """ Builds a rate limiter from the `commands` configuration, exempting ratmama announcers """
+        limits = config.commands.rate_limits
+        default = limits.get("default")
+        return cls(
+            budgets=[
+                (_CONFIG_LEVELS[name], (limit.burst, limit.rate))
+                for name, limit in limits.items()
+                if name != "default"
+            ],
+            default=(default.burst, default.rate) if default is not None else None,
+            exempt=config.ratsignal_parser.announcer_nicks,
+        )
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self) -> None:
+        """ Forgets every bucket, refilling them all """
+        self._buckets.clear()
+
+    def _budget(self, user: typing.Optional[User]) -> typing.Optional[Budget]:
+        level = effective_level(user) if user is not None else None
+        if level is None:
+            return self._default
+        levels = level_table()
+        if levels is not self._table_source:
+            # permission levels changed since the table was sorted
+            self._table = sorted(
+                ((permission.level, budget) for permission, budget in self._budgets),
+                key=lambda entry: entry[0],
+                reverse=True,
+            )
+            self._table_source = levels
+        for required, budget in self._table:
+            if level >= required:
+                return budget
+        return self._default
+
+    def allow(self, user: typing.Optional[User], nickname: str, name: str,
+              kind: str = "command") -> bool:
+        """
+        Takes a token from the bucket of `user` invoking `name`.
+
+        Args:
+            user (User): invoking user, if known
+            nickname (str): nickname of the invoking user
+            name (str): what was invoked
+            kind (str): one of :data:`KINDS`, for metrics
+
+        Returns:
+            bool: whether the invocation is within its budget
+        """
+        if nickname.casefold() in self._exempt:
+            return True
+        budget = self._budget(user)
+        if budget is None or not budget[0]:
+            return True
+
+        identity = user.account if user is not None and user.account else nickname
+        key = (identity.casefold(), kind, name)
+        burst, rate = budget
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.capacity != burst or bucket.rate != rate:
+            bucket = self._buckets[key] = TokenBucket(rate=rate, capacity=burst, clock=self._clock)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(key)
+
+        if bucket.try_acquire():
+            return True
+        _RATE_LIMITED[kind].inc()
+        logger.debug("rate limited {} invoking {} {!r}", identity, kind, name)
+        return False
@@ -13,12 +13,13 @@ See LICENSE.md
 from __future__ import annotations  # for forward references standard in >=3.8
 
 import typing
+from collections import abc
 from typing import List, ClassVar
 
-import attr
 from loguru import logger
 
 from src.config import CONFIG_MARKER
+from ..dispatch import Priority
 from ..user import User
 from ...config.datamodel import ConfigRoot
 
@@ -51,31 +52,130 @@ def rehash_handler(data: ConfigRoot):
     logger.debug(f"in rehash handler, using new prefix {Context.PREFIX}")
 
 
-@attr.dataclass
+class WordsEol(abc.Sequence):
+    """
+    Lazy `words_eol` of a message: item ``i`` is word ``i`` and everything after it.
+
+    Only the normalised message and the offset each word starts at are stored, the suffixes are
+    sliced out on access.
+
+    >>> WordsEol("pink fluffy unicorns", [0, 5, 12])[1]
+    'fluffy unicorns'
+    """
+
+    __slots__ = ["_text", "_offsets"]
+
+    def __init__(self, text: str, offsets: typing.Sequence[int]):
+        """
+        Args:
+            text (str): the message, words separated by single spaces
+            offsets (Sequence[int]): index of the first character of each word in `text`
+        """
+        self._text = text
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._text[offset:] for offset in self._offsets[index]]
+        return self._text[self._offsets[index]:]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (WordsEol, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
 class Context:
     """
     Command context, stores the context of a command's invocation
     """
 
-    bot: MechaClient
-    user: User = attr.ib(validator=attr.validators.instance_of(User))
-    target: str = attr.ib(validator=attr.validators.instance_of(str))
-    words: List[str] = attr.ib(
-        validator=attr.validators.deep_iterable(
-            member_validator=attr.validators.instance_of(str),
-            iterable_validator=attr.validators.instance_of(list),
-        )
-    )
-    words_eol: List[str] = attr.ib(
-        validator=attr.validators.deep_iterable(
-            member_validator=attr.validators.instance_of(str),
-            iterable_validator=attr.validators.instance_of(list),
-        )
-    )
-    prefixed: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+    __slots__ = [
+        "bot", "_user", "target", "words", "words_eol", "prefixed", "sender", "priority",
+    ]
+
     PREFIX: ClassVar[str] = "<!!NOTSET!!>"
     DRILL_MODE: ClassVar[bool] = False
 
+    def __init__(
+        self,
+        bot: MechaClient,
+        user: typing.Optional[User],
+        target: str,
+        words: List[str],
+        words_eol: typing.Sequence[str],
+        prefixed: bool = False,
+        sender: typing.Optional[str] = None,
+    ):
+        """
+        Creates a context.
+
+        Arguments are type checked only when running with assertions enabled, i.e. not under
+        ``python -O``.
+
+        Args:
+            bot (MechaClient): the client the message arrived on
+            user (User): the invoking user, or None to resolve it from `sender` when needed
+            target (str): channel or nickname the message was sent to
+            words (list of str): words of the message, prefix removed
+            words_eol (Sequence of str): each word of the message to the end of the message
+            prefixed (bool): whether the message started with the command prefix
+            sender (str): IRC nickname of the invoking user
+        """
+        self.bot = bot
+        self._user = user
+        self.target = target
+        self.words = words
+        self.words_eol = words_eol
+        self.prefixed = prefixed
+        self.sender = sender
+        """ IRC nickname of the invoking user, resolved into :attr:`user` on first use """
+        self.priority = Priority.COMMAND
+        """ how urgently this invocation is handled, and its replies sent """
+        if __debug__:
+            self._validate()
+
+    def _validate(self):
+        if self._user is not None and not isinstance(self._user, User):
+            raise TypeError(f"user must be a User, not {type(self._user)!r}")
+        if not isinstance(self.target, str):
+            raise TypeError(f"target must be a str, not {type(self.target)!r}")
+        if not isinstance(self.words, list) or not all(isinstance(w, str) for w in self.words):
+            raise TypeError("words must be a list of str")
+        if not isinstance(self.words_eol, WordsEol) and (
+            not isinstance(self.words_eol, list)
+            or not all(isinstance(w, str) for w in self.words_eol)
+        ):
+            raise TypeError("words_eol must be a list of str")
+        if not isinstance(self.prefixed, bool):
+            raise TypeError(f"prefixed must be a bool, not {type(self.prefixed)!r}")
+        if self.sender is not None and not isinstance(self.sender, str):
+            raise TypeError(f"sender must be a str, not {type(self.sender)!r}")
+
+    def __repr__(self) -> str:
+        return (
+            f"Context(bot={self.bot!r}, user={self._user!r}, target={self.target!r}, "
+            f"words={self.words!r}, words_eol={self.words_eol!r}, prefixed={self.prefixed!r}, "
+            f"sender={self.sender!r})"
+        )
+
+    @property
+    def user(self) -> User:
+        """
+        The invoking user, looked up only once something needs it.
+        """
+        if self._user is None and self.sender is not None:
+            self._user = self.bot.get_user(self.sender)
+        return self._user
+
     @property
     def channel(self) -> typing.Optional[str]:
         """
@@ -106,26 +206,26 @@ class Context:
 
         # build the words and words_eol lists
         words, words_eol = _split_message(message)
-        # get the user from a WHOIS query
-        user = await User.from_pydle(bot, sender)
 
-        # return a built context object
-        return cls(bot, user, channel, words, words_eol, prefixed=prefixed)
+        # return a built context object, the user is resolved lazily from the sender.
+        return cls(bot, None, channel, words, words_eol, prefixed=prefixed, sender=sender)
 
-    async def reply(self, msg: str):
+    async def reply(self, msg: str, priority: typing.Optional[Priority] = None):
         """
         Sends a message in the same channel or query window as the command was sent.
 
         Arguments:
             msg (str): Message to send.
+            priority (Priority): how urgently to send it, defaults to :attr:`priority`
         """
+        priority = self.priority if priority is None else priority
         if self.channel is not None:
-            await self.bot.message(self.channel, msg)
+            await self.bot.message(self.channel, msg, priority=priority)
         else:
-            await self.bot.message(self.user.nickname, msg)
+            await self.bot.message(self.user.nickname, msg, priority=priority)
 
 
-def _split_message(string: str) -> typing.Tuple[typing.List[str], typing.List[str]]:
+def _split_message(string: str) -> typing.Tuple[typing.List[str], WordsEol]:
     """
     Split up a string into words and words_eol
 
@@ -135,8 +235,8 @@ def _split_message(string: str) -> typing.Tuple[typing.List[str], typing.List[st
     Returns:
         (list of str, list of str):
             A 2-tuple of (words, words_eol), where words is a list of the words of *string*,
-            seperated by whitespace, and words_eol is a list of the same length, with each element
-            including the word and everything up to the end of *string*
+            seperated by whitespace, and words_eol is a lazy sequence of the same length, with each
+            element including the word and everything up to the end of *string*
 
     Example:
         >>> _split_message("pink fluffy unicorns")
@@ -145,7 +245,11 @@ def _split_message(string: str) -> typing.Tuple[typing.List[str], typing.List[st
     # get the words
     words = string.split()
 
-    # reconstruct the original phrase EOL style, through clever usage of slice
-    words_eol = [" ".join(words[i:]) for i, _ in enumerate(words)]
+    # words_eol slices the single-spaced phrase at the offset each word starts at
+    offsets = []
+    offset = 0
+    for word in words:
+        offsets.append(offset)
+        offset += len(word) + 1
 
-    return words, words_eol
+    return words, WordsEol(" ".join(words), offsets)
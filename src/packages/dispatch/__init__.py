@@ -0,0 +1,14 @@
+"""
+__init__.py
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+
+from .scheduler import DispatchScheduler, Priority
+
+__all__ = ["DispatchScheduler", "Priority"]
@@ -0,0 +1,300 @@
+"""
+scheduler.py - Prioritised, fair scheduling of inbound message handling.
+
+Runs the handling of inbound IRC lines as tasks with bounded concurrency, so a slow command no
+longer holds up every line pydle delivers after it.
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import typing
+from collections import OrderedDict, deque
+from enum import IntEnum
+
+import prometheus_client
+from loguru import logger
+
+Job = typing.Callable[[], typing.Awaitable[typing.Any]]
+
+QUEUE_DEPTH = prometheus_client.Gauge(
+    namespace="dispatch",
+    name="queue_depth",
+    documentation="inbound messages waiting to be handled, by priority",
+    labelnames=["priority"],
+)
+QUEUE_WAIT = prometheus_client.Histogram(
+    namespace="dispatch",
+    name="queue_wait",
+    unit="seconds",
+    documentation="time inbound messages waited before being handled, by priority",
+    labelnames=["priority"],
+)
+DROPPED = prometheus_client.Counter(
+    namespace="dispatch",
+    name="dropped",
+    documentation="inbound messages dropped as their user or channel had too many waiting",
+    labelnames=["reason"],
+)
+
+
+class Priority(IntEnum):
+    """ Inbound message priorities, most urgent first """
+
+    ANNOUNCEMENT = 0
+    """ Ratmama announcements and ratsignals """
+    CASE = 1
+    """ Case management commands """
+    COMMAND = 2
+    """ Any other command """
+    CHATTER = 3
+    """ Facts and anything that may not be a command at all """
+
+
+_DEPTH = {priority: QUEUE_DEPTH.labels(priority=priority.name.lower()) for priority in Priority}
+_WAIT = {priority: QUEUE_WAIT.labels(priority=priority.name.lower()) for priority in Priority}
+_DROPPED = {reason: DROPPED.labels(reason=reason) for reason in ("user", "channel")}
+
+
+class _Entry:
+    __slots__ = ["job", "priority", "channel", "user", "key", "submitted_at"]
+
+    def __init__(self, job: Job, priority: Priority, channel: str, user: str,
+                 key: typing.Optional[typing.Hashable], submitted_at: float):
+        self.job = job
+        self.priority = priority
+        self.channel = channel
+        self.user = user
+        self.key = key
+        self.submitted_at = submitted_at
+
+
+class DispatchScheduler:
+    """
+    Runs jobs with bounded concurrency, most urgent :class:`Priority` first.
+
+    Within a priority, channels take turns, and within a channel so do users, so one busy channel
+    or user can't starve the others. Jobs sharing a `key` run one at a time, in the order they
+    were submitted, regardless of their priorities.
+
+    A user or channel with too many jobs waiting loses one: the oldest of its least urgent
+    queued jobs, unless that is more urgent than the new job, which is then dropped instead.
+    """
+
+    __slots__ = ["max_concurrency", "max_per_user", "max_per_channel", "_clock", "_levels",
+                 "_serial", "_running", "_user_pending", "_channel_pending"]
+
+    def __init__(self, max_concurrency: int = 8, max_per_user: int = 32,
+                 max_per_channel: int = 256,
+                 clock: typing.Callable[[], float] = time.monotonic):
+        """
+        Creates a scheduler
+
+        Args:
+            max_concurrency (int): maximum number of jobs to run at once
+            max_per_user (int): maximum number of jobs waiting to run per user
+            max_per_channel (int): maximum number of jobs waiting to run per channel
+            clock (Callable): monotonic time source
+        """
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        if max_per_user <= 0 or max_per_channel <= 0:
+            raise ValueError("max_per_user and max_per_channel must be positive")
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self.max_per_channel = max_per_channel
+        self._clock = clock
+        self._levels: typing.Dict[
+            Priority, typing.Dict[str, typing.Dict[str, typing.Deque[_Entry]]]
+        ] = {priority: OrderedDict() for priority in Priority}
+        """ per priority, queued jobs by channel then user, both in turn order """
+        self._serial: typing.Dict[typing.Hashable, typing.Deque[_Entry]] = {}
+        """ keys with a job queued or running, mapped to the jobs held back behind it """
+        self._running: typing.Set[asyncio.Future] = set()
+        self._user_pending: typing.Dict[str, int] = {}
+        self._channel_pending: typing.Dict[str, int] = {}
+        """ jobs waiting to run, queued or held back, by user and by channel """
+
+    def __len__(self) -> int:
+        """ Number of jobs waiting to run """
+        queued = sum(
+            len(jobs)
+            for level in self._levels.values()
+            for users in level.values()
+            for jobs in users.values()
+        )
+        return queued + sum(len(held) for held in self._serial.values())
+
+    @property
+    def running(self) -> int:
+        """ Number of jobs currently running """
+        return len(self._running)
+
+    def submit(
+        self,
+        job: Job,
+        priority: Priority = Priority.CHATTER,
+        channel: str = "",
+        user: str = "",
+        key: typing.Optional[typing.Hashable] = None,
+    ) -> None:
+        """
+        Schedules `job` to be run.
+
+        Args:
+            job (Callable): coroutine function to run, exceptions it raises are logged and dropped
+            priority (Priority): how urgently to run it
+            channel (str): channel the job originates from, for fairness
+            user (str): user the job originates from, for fairness
+            key (Hashable): if given, the job runs only after every job previously submitted with
+                the same key has finished
+        """
+        entry = _Entry(job, priority, channel.casefold(), user.casefold(), key, self._clock())
+        if not self._make_room(entry):
+            return
+        _DEPTH[priority].inc()
+        self._count(entry, 1)
+        if key is not None:
+            held = self._serial.get(key)
+            if held is not None:
+                held.append(entry)
+                return
+            self._serial[key] = deque()
+        self._enqueue(entry)
+        self._fill()
+
+    async def join(self) -> None:
+        """ Waits until every submitted job, including those submitted meanwhile, has finished """
+        while self._running:
+            await asyncio.wait(set(self._running))
+
+    def _count(self, entry: _Entry, delta: int) -> None:
+        for pending, origin in ((self._user_pending, entry.user),
+                                (self._channel_pending, entry.channel)):
+            if not origin:
+                continue
+            count = pending.get(origin, 0) + delta
+            if count:
+                pending[origin] = count
+            else:
+                del pending[origin]
+
+    def _make_room(self, entry: _Entry) -> bool:
+        """ Drops a job if `entry`'s user or channel is full, False if it should be `entry` """
+        for reason, origin, pending, limit in (
+            ("user", entry.user, self._user_pending, self.max_per_user),
+            ("channel", entry.channel, self._channel_pending, self.max_per_channel),
+        ):
+            if not origin or pending.get(origin, 0) < limit:
+                continue
+            _DROPPED[reason].inc()
+            victim = self._victim(reason, origin, entry.priority)
+            if victim is None:
+                logger.warning("dropping a job from {} {!r}, too many are waiting", reason, origin)
+                return False
+            logger.warning("dropping an older job from {} {!r}, too many are waiting",
+                           reason, origin)
+            self._drop(*victim)
+        return True
+
+    def _victim(
+        self, reason: str, origin: str, priority: Priority
+    ) -> typing.Optional[typing.Tuple[Priority, str, str]]:
+        """ Priority, channel and user of the job to drop for `origin`, if any may be """
+        for level_priority in reversed(Priority):
+            if level_priority < priority:
+                return None
+            level = self._levels[level_priority]
+            if reason == "channel":
+                users = level.get(origin)
+                if users:
+                    # the user with the most jobs waiting loses one
+                    return level_priority, origin, max(users, key=lambda user: len(users[user]))
+            else:
+                waiting = [
+                    (users[origin][0].submitted_at, channel)
+                    for channel, users in level.items()
+                    if origin in users
+                ]
+                if waiting:
+                    return level_priority, min(waiting)[1], origin
+        return None
+
+    def _drop(self, priority: Priority, channel: str, user: str) -> None:
+        level = self._levels[priority]
+        users = level[channel]
+        jobs = users[user]
+        entry = jobs.popleft()
+        if not jobs:
+            del users[user]
+            if not users:
+                del level[channel]
+        self._dequeued(entry)
+        if entry.key is not None:
+            self._release(entry.key)
+
+    def _dequeued(self, entry: _Entry) -> None:
+        _DEPTH[entry.priority].dec()
+        self._count(entry, -1)
+
+    def _release(self, key: typing.Hashable) -> None:
+        """ Queues the next job held back behind `key`, if there is one """
+        held = self._serial[key]
+        if held:
+            self._enqueue(held.popleft())
+        else:
+            del self._serial[key]
+
+    def _enqueue(self, entry: _Entry) -> None:
+        users = self._levels[entry.priority].setdefault(entry.channel, OrderedDict())
+        users.setdefault(entry.user, deque()).append(entry)
+
+    def _next(self) -> typing.Optional[_Entry]:
+        for level in self._levels.values():
+            if not level:
+                continue
+            channel, users = next(iter(level.items()))
+            user, jobs = next(iter(users.items()))
+            entry = jobs.popleft()
+            # whoever just had a turn goes to the back of the line
+            if jobs:
+                users.move_to_end(user)
+            else:
+                del users[user]
+            if users:
+                level.move_to_end(channel)
+            else:
+                del level[channel]
+            return entry
+        return None
+
+    def _fill(self) -> None:
+        while len(self._running) < self.max_concurrency:
+            entry = self._next()
+            if entry is None:
+                return
+            self._dequeued(entry)
+            task = asyncio.ensure_future(self._run(entry))
+            self._running.add(task)
+            task.add_done_callback(self._finished)
+
+    async def _run(self, entry: _Entry) -> None:
+        _WAIT[entry.priority].observe(self._clock() - entry.submitted_at)
+        try:
+            await entry.job()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("dispatched job failed")
+        finally:
+            if entry.key is not None:
+                self._release(entry.key)
+
+    def _finished(self, task: asyncio.Future) -> None:
+        self._running.discard(task)
+        self._fill()
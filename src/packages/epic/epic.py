@@ -24,6 +24,8 @@ class Epic:
     Epic rescue data
     """
 
+    __slots__ = ["_hash", "_uuid", "_notes", "_rescue", "_rat"]
+
     def __init__(self,
                  uuid: UUID,
                  notes: str,
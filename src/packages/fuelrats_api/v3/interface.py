@@ -1,5 +1,6 @@
 import asyncio
 import typing
+from collections import OrderedDict
 from typing import Optional, List, Dict, Union, Iterator
 from uuid import UUID
 
@@ -36,6 +37,9 @@ class ApiV300WSS(FuelratsApiABC):
     connection: Optional[Connection] = attr.ib(default=None)
     """ underlying websocket """
     connected_event: asyncio.Event = attr.ib(factory=asyncio.Event)
+    pushed_revisions: typing.Dict[UUID, int] = attr.ib(factory=OrderedDict)
+    """ revision of each rescue last pushed to the API, least recently pushed first """
+    max_pushed_revisions: int = attr.ib(default=256)
 
     def __attrs_post_init__(self):
         PLUGIN_MANAGER.register(self)
@@ -104,8 +108,15 @@ class ApiV300WSS(FuelratsApiABC):
         await self.ensure_connection()
         if not rescue.api_id:
             raise ValueError("Rescue cannot have a null API ID at this point.")
+        # only push what changed since the last push, if the rescue's journal can tell
+        revision = rescue.revision
+        changes = None
+        if rescue.api_id in self.pushed_revisions:
+            changes = rescue.journal.fields_since(self.pushed_revisions[rescue.api_id])
+        if changes is None:
+            changes = rescue.modified.copy()
         payload = {
-            "data": ApiRescue.from_internal(rescue).to_delta(rescue.modified.copy()),
+            "data": ApiRescue.from_internal(rescue).to_delta(changes),
         }
         # Purge attributes we are not supposed to send.
         del payload["data"]["links"]
@@ -118,6 +129,10 @@ class ApiV300WSS(FuelratsApiABC):
         if not Impersonation:
             del work.query["representing"]
         response = await self.execute(work)
+        self.pushed_revisions[rescue.api_id] = revision
+        self.pushed_revisions.move_to_end(rescue.api_id)
+        if len(self.pushed_revisions) > self.max_pushed_revisions:
+            self.pushed_revisions.popitem(last=False)
         return response
 
     async def _get_rescue(self, key: UUID, impersonation: Impersonation) -> Optional[ApiRescue]:
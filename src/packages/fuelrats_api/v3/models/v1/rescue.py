@@ -141,9 +141,7 @@ class Rescue(Resource):
         """
         Converts this API rescue object to a dictionary blob delta based on changed fields from
         an internal rescue object. `changes` should contain only attribute names on the **internal**
-        rescue object.
-
-
+        rescue object, those the API doesn't take are ignored.
 
         Args:
             changes: set of changed InternalRescue attributes
@@ -165,7 +163,7 @@ class Rescue(Resource):
             "platform": "platform",
         }
         # translate internal datamodel names to the APIs datamodel names
-        keep = {field_map[field] for field in changes if field != "mark_for_deletion"}
+        keep = {field_map[field] for field in changes if field in field_map}
 
         if "mark_for_deletion" in changes:
             keep |= {"outcome"}
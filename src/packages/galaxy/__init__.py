@@ -14,8 +14,9 @@ See LICENSE.md
 
 from src.config import PLUGIN_MANAGER
 from .galaxy import Galaxy
+from .position_table import PositionTable
 from .star_system import StarSystem
 
-__all__ = ["Galaxy", "StarSystem"]
+__all__ = ["Galaxy", "PositionTable", "StarSystem"]
 
 PLUGIN_MANAGER.register(Galaxy, "galaxy")
@@ -0,0 +1,281 @@
+"""
+circuit_breaker.py - Circuit breaker and adaptive timeouts for the Systems API.
+
+Stops Galaxy from hammering the Systems API while it is down, and derives request timeouts from
+the latencies it actually observes rather than a fixed worst case.
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import typing
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+
+import aiohttp
+import prometheus_client
+from loguru import logger
+
+if typing.TYPE_CHECKING:
+    from ...config.datamodel.api import StarsystemApiConfigRoot
+
+BREAKER_STATE = prometheus_client.Gauge(
+    namespace="galaxy",
+    name="breaker_state",
+    documentation="Systems API circuit breaker state (0 closed, 1 half-open, 2 open)",
+)
+BREAKER_TRANSITIONS = prometheus_client.Counter(
+    namespace="galaxy",
+    name="breaker_transitions",
+    documentation="Systems API circuit breaker state changes, by new state",
+    labelnames=["state"],
+)
+BREAKER_REJECTIONS = prometheus_client.Counter(
+    namespace="galaxy",
+    name="breaker_rejections",
+    documentation="Systems API calls failed fast by an open circuit breaker",
+)
+REQUEST_TIMEOUT = prometheus_client.Gauge(
+    namespace="galaxy",
+    name="request_timeout",
+    unit="seconds",
+    documentation="current adaptive Systems API request timeout, by endpoint",
+    labelnames=["endpoint"],
+)
+
+
+class BreakerState(Enum):
+    """ Circuit breaker states """
+
+    CLOSED = 0
+    """ Requests flow normally """
+    HALF_OPEN = 1
+    """ A limited number of probe requests are let through to test recovery """
+    OPEN = 2
+    """ Requests fail fast without touching the network """
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """
+    Raised instead of performing a request while the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with latency-derived timeouts.
+
+    After `failure_threshold` consecutive failures the breaker opens and every call fails fast
+    with :class:`CircuitOpenError`. Once `reset_timeout` has elapsed it lets up to
+    `half_open_probes` requests through; a successful probe closes the breaker again, a failed one
+    re-opens it.
+
+    Each endpoint gets its own timeout, as some are much slower than others. A request timing
+    out before `max_timeout` doesn't count as a failure, it widens its endpoint's timeout instead.
+    """
+
+    __slots__ = [
+        "failure_threshold",
+        "reset_timeout",
+        "half_open_probes",
+        "min_timeout",
+        "max_timeout",
+        "percentile",
+        "headroom",
+        "min_samples",
+        "window",
+        "_clock",
+        "_state",
+        "_failures",
+        "_opened_at",
+        "_probes",
+        "_latencies",
+        "_timeouts",
+    ]
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        half_open_probes: int = 1,
+        min_timeout: float = 0.5,
+        max_timeout: float = 10,
+        percentile: float = 0.99,
+        headroom: float = 2.0,
+        window: int = 100,
+        min_samples: int = 10,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        """
+        Creates a circuit breaker
+
+        Args:
+            failure_threshold (int): consecutive failures before the breaker opens
+            reset_timeout (float): seconds the breaker stays open before probing
+            half_open_probes (int): concurrent probe requests allowed while half-open
+            min_timeout (float): lower bound of the adaptive request timeout, in seconds
+            max_timeout (float): upper bound of the adaptive request timeout, in seconds
+            percentile (float): latency percentile the timeout is derived from
+            headroom (float): multiplier applied to the observed percentile
+            window (int): number of recent latencies to consider, per endpoint
+            min_samples (int): samples required before `max_timeout` is tightened
+            clock (Callable): monotonic time source
+        """
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be positive")
+        if not 0 < min_timeout <= max_timeout:
+            raise ValueError("timeouts must satisfy 0 < min_timeout <= max_timeout")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.window = window
+        self._clock = clock
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._latencies: typing.Dict[str, typing.Deque[float]] = {}
+        """ recent latencies, by endpoint """
+        self._timeouts: typing.Dict[str, float] = {}
+        """ adaptive timeouts, by endpoint, for those with enough latencies observed """
+
+        BREAKER_STATE.set(self._state.value)
+
+    @classmethod
+    def from_config(cls, config: StarsystemApiConfigRoot, **kwargs) -> CircuitBreaker:
+        """ Builds a breaker from the `system_api` configuration section """
+        return cls(
+            failure_threshold=config.breaker_failure_threshold,
+            reset_timeout=config.breaker_reset_timeout,
+            **kwargs,
+        )
+
+    @property
+    def state(self) -> BreakerState:
+        """ Current breaker state, moving from OPEN to HALF_OPEN once the reset timeout passes """
+        if (
+            self._state is BreakerState.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._transition(BreakerState.HALF_OPEN)
+        return self._state
+
+    def timeout(self, endpoint: str = "") -> float:
+        """ Request timeout for `endpoint` in seconds, derived from its observed latencies """
+        return self._timeouts.get(endpoint, self.max_timeout)
+
+    def _transition(self, state: BreakerState) -> None:
+        if state is self._state:
+            return
+        logger.warning("Systems API circuit breaker {} -> {}", self._state.name, state.name)
+        self._state = state
+        if state is BreakerState.OPEN:
+            self._opened_at = self._clock()
+        self._probes = 0
+        BREAKER_STATE.set(state.value)
+        BREAKER_TRANSITIONS.labels(state=state.name.casefold()).inc()
+
+    def _observe(self, endpoint: str, latency: float) -> None:
+        latencies = self._latencies.get(endpoint)
+        if latencies is None:
+            latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+        latencies.append(latency)
+        if len(latencies) < self.min_samples:
+            return
+        ordered = sorted(latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+        timeout = min(self.max_timeout, max(self.min_timeout, ordered[index] * self.headroom))
+        self._timeouts[endpoint] = timeout
+        REQUEST_TIMEOUT.labels(endpoint=endpoint).set(timeout)
+
+    def acquire(self) -> None:
+        """
+        Claims permission to perform a request.
+
+        Raises:
+            CircuitOpenError: the breaker is open, or half-open with all probes in flight.
+        """
+        state = self.state
+        if state is BreakerState.OPEN:
+            BREAKER_REJECTIONS.inc()
+            raise CircuitOpenError("Systems API circuit breaker is open")
+        if state is BreakerState.HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                BREAKER_REJECTIONS.inc()
+                raise CircuitOpenError("Systems API circuit breaker is probing")
+            self._probes += 1
+
+    def record_success(self, latency: typing.Optional[float] = None, endpoint: str = "") -> None:
+        """ Records a request the Systems API answered, optionally with its latency """
+        self._failures = 0
+        if latency is not None:
+            self._observe(endpoint, latency)
+        if self._state is not BreakerState.CLOSED:
+            self._transition(BreakerState.CLOSED)
+
+    def record_failure(self) -> None:
+        """ Records a request that failed due to the Systems API being unavailable """
+        self._failures += 1
+        if self._state is BreakerState.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._transition(BreakerState.OPEN)
+
+    def release(self) -> None:
+        """ Releases a claimed request slot without recording an outcome """
+        if self._state is BreakerState.HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    @asynccontextmanager
+    async def attempt(self, endpoint: str = "") -> typing.AsyncIterator[aiohttp.ClientTimeout]:
+        """
+        Guards a single request.
+
+        Yields the ClientTimeout to use. Connection errors, timeouts at `max_timeout` and 5xx
+        responses count as failures; any other response counts as success. Timeouts before
+        `max_timeout` and cancellation record no outcome.
+
+        Args:
+            endpoint (str): endpoint requested, whose latencies the timeout is derived from
+
+        Raises:
+            CircuitOpenError: the breaker refused the request.
+        """
+        self.acquire()
+        started = self._clock()
+        timeout = self.timeout(endpoint)
+        try:
+            yield aiohttp.ClientTimeout(total=timeout)
+        except asyncio.TimeoutError:
+            if timeout < self.max_timeout:
+                # too tight a timeout says nothing about the API being down, loosen it
+                self.release()
+                self._observe(endpoint, timeout)
+            else:
+                self.record_failure()
+            raise
+        except aiohttp.ClientResponseError as ex:
+            if ex.status >= 500:
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except aiohttp.ClientError:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        else:
+            self.record_success(self._clock() - started, endpoint)
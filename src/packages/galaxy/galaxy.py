@@ -16,14 +16,22 @@ import typing
 from urllib.parse import urlencode
 
 import aiohttp
-from async_lru import alru_cache
+import prometheus_client
 from loguru import logger
 
 from src.config import CONFIG_MARKER
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .galaxy_cache import GalaxyCache
 from .star_system import StarSystem
 from ..utils import Vector
 from ...config.datamodel import ConfigRoot
 
+COALESCED_REQUESTS = prometheus_client.Counter(
+    namespace="galaxy",
+    name="coalesced_requests",
+    documentation="Systems API calls served by joining an identical request already in flight",
+)
+
 
 class Galaxy:
     """
@@ -49,18 +57,33 @@ class Galaxy:
     "The maximum number of times to retry a failed HTTP request before failing permanently."
 
     TIMEOUT = aiohttp.ClientTimeout(total=10)
-    "A ClientTimeout object representing the total time an HTTP request can take before failing."
+    """
+    A ClientTimeout object representing the longest an HTTP request can take before failing.
+    The effective timeout adapts to observed latencies, see :class:`CircuitBreaker`.
+    """
 
-    def __init__(self, url: str = None):
+    def __init__(self,
+                 url: str = None,
+                 cache: typing.Optional[GalaxyCache] = None,
+                 breaker: typing.Optional[CircuitBreaker] = None):
         self.url = url or self._config.system_api.url
+        self.cache = cache if cache is not None else GalaxyCache.from_config(
+            self._config.system_api
+        )
+        self.breaker = breaker if breaker is not None else CircuitBreaker.from_config(
+            self._config.system_api, max_timeout=self.TIMEOUT.total
+        )
+        self._in_flight: typing.Dict[typing.Tuple, asyncio.Future] = {}
+        """ upstream requests currently in flight, keyed by endpoint and parameters """
 
-    @alru_cache()
     async def find_system_by_name(self,
                                   name: str,
                                   full_details: bool = False) -> typing.Optional[StarSystem]:
         """
         Finds a single system by its name and return its StarSystem object
 
+        Results are served from :attr:`cache` where possible.
+
         Args:
             name (str): The name of the system to search for.
             full_details (bool): Specify whether to simply find the correct system name
@@ -70,7 +93,15 @@ class Galaxy:
         Returns:
             A ``StarSystem`` object representing the found system, or ``None`` if none was found.
         """
-
+        return await self.cache.get_or_fetch(
+            ("name", name.casefold(), full_details),
+            lambda: self._find_system_by_name(name, full_details),
+        )
+
+    async def _find_system_by_name(self,
+                                   name: str,
+                                   full_details: bool) -> typing.Optional[StarSystem]:
+        """ Uncached implementation of :meth:`find_system_by_name` """
         data = await self._call("api/systems", {
             "filter[name:ilike]": name,
             "sort": "name",
@@ -83,26 +114,32 @@ class Galaxy:
             else:
                 return StarSystem(name=data['data'][0]['attributes']['name'])
 
-    @alru_cache()
     async def find_system_by_id(self, system_id: int) -> typing.Optional[StarSystem]:
         """
         Finds a single system by its ID and returns its StarSystem object.
 
+        Results are served from :attr:`cache` where possible.
+
         Args:
             system_id (int): The ID of the system to search for.
 
         Returns:
             A ``StarSystem`` object representing the found system, or ``None`` if none was found.
         """
+        return await self.cache.get_or_fetch(
+            ("id", int(system_id)), lambda: self._find_system_by_id(system_id)
+        )
 
+    async def _find_system_by_id(self, system_id: int) -> typing.Optional[StarSystem]:
+        """ Uncached implementation of :meth:`find_system_by_id` """
         data = await self._call(f"api/systems/{system_id}")
         if 'data' in data and data['data']:
             sys = data['data']['attributes']
             main_star = await self._find_main_star(system_id)
-            sys['spectral_class'] = main_star['spectral_class'] if main_star is not None else None
+            spectral_class = main_star['spectral_class'] if main_star is not None else None
             return StarSystem(position=Vector(**sys['coords']),
                               name=sys['name'],
-                              spectral_class=sys['spectral_class'])
+                              spectral_class=spectral_class)
 
     async def _find_main_star(self, system_id: int) -> typing.Optional[typing.Dict]:
         """
@@ -120,7 +157,8 @@ class Galaxy:
         stars = await self._call("api/stars", {"filter[systemId64:eq]": system_id})
         for star in stars['data']:
             if star['attributes']['isMainStar']:
-                result = star['attributes']
+                # copy, the response may be shared with coalesced callers.
+                result = dict(star['attributes'])
                 result['id'] = star['id']
                 result['spectral_class'] = star['attributes']['subType'][0]
                 return result
@@ -176,14 +214,43 @@ class Galaxy:
         """
         Perform an API call on the Fuel Rats Systems API.
 
+        Concurrent calls with the same endpoint and parameters share a single upstream request
+        and the same parsed result, which callers must therefore treat as read-only.
+
         Args:
             endpoint (str): The API endpoint to request.
             params (typing.Dict): A dictionary of key-value pairs that will make up the query string.
 
         Returns:
             A dict or list object representing the parsed JSON data returned from the API endpoint.
-        """
 
+        Raises:
+            CircuitOpenError: the Systems API is considered down, no request was made.
+        """
+        key = (endpoint, tuple(sorted(params.items())) if params else ())
+        request = self._in_flight.get(key)
+        if request is not None:
+            COALESCED_REQUESTS.inc()
+        else:
+            request = asyncio.ensure_future(self._request(endpoint, params))
+            self._in_flight[key] = request
+            request.add_done_callback(lambda done: self._request_done(key, done))
+        # shielded, so one caller giving up doesn't cancel the request for everyone else.
+        return await asyncio.shield(request)
+
+    def _request_done(self, key: typing.Tuple, request: asyncio.Future) -> None:
+        """ Forgets a completed in-flight request """
+        if self._in_flight.get(key) is request:
+            del self._in_flight[key]
+        if not request.cancelled():
+            # retrieve the exception, in case every caller was cancelled before it was raised.
+            request.exception()
+
+    async def _request(self,
+                       endpoint: str,
+                       params: typing.Optional[typing.Dict[str, str]] = None
+                       ) -> typing.Union[dict, list]:
+        """ Uncoalesced implementation of :meth:`_call`, performing the request with retries """
         base_url = self.url
         param_string = ""
         if params:
@@ -193,14 +260,18 @@ class Galaxy:
         url = f"{base_url}{endpoint}?{param_string}"
         for retry in range(self.MAX_RETRIES):
             try:
-                async with aiohttp.ClientSession(raise_for_status=True,
-                                                 timeout=self.TIMEOUT) as session:
+                # ids in the path don't make for a different endpoint
+                async with self.breaker.attempt(endpoint.rstrip("/0123456789")) as timeout, \
+                        aiohttp.ClientSession(raise_for_status=True, timeout=timeout) as session:
                     logger.debug("CALL < {} >", url)
                     async with session.get(url) as response:
                         data = json.loads(await response.text())
                         logger.trace("done with call")
                         return data
-            except aiohttp.ClientError:
+            except CircuitOpenError:
+                # Retrying against an open breaker is pointless, fail fast.
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
                 # If we've used our last retry, re-raise the offending exception.
                 if retry == (self.MAX_RETRIES - 1):
                     raise
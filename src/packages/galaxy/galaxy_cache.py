@@ -0,0 +1,348 @@
+"""
+galaxy_cache.py - TTL-aware, persistent lookup cache for the Systems API.
+
+Provides a bounded cache for Galaxy lookups with separate lifetimes for positive and negative
+results, stale-while-revalidate semantics and optional persistence to a local file, so the bot
+starts warm after a restart.
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+import typing
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+import attr
+import prometheus_client
+from loguru import logger
+
+from .star_system import StarSystem
+from ..utils import Vector
+
+if typing.TYPE_CHECKING:
+    from ...config.datamodel.api import StarsystemApiConfigRoot
+
+CacheKey = typing.Tuple[typing.Union[str, int, bool], ...]
+Fetcher = typing.Callable[[], typing.Awaitable[typing.Optional[StarSystem]]]
+
+CACHE_LOOKUPS = prometheus_client.Counter(
+    namespace="galaxy",
+    name="cache_lookups",
+    documentation="galaxy cache lookups by outcome",
+    labelnames=["outcome"],
+)
+CACHE_HIT_RATIO = prometheus_client.Gauge(
+    namespace="galaxy",
+    name="cache_hit_ratio",
+    documentation="ratio of galaxy lookups served from cache (fresh or stale), across caches",
+)
+CACHE_ENTRIES = prometheus_client.Gauge(
+    namespace="galaxy",
+    name="cache_entries",
+    documentation="number of cached galaxy lookups, across caches",
+)
+CACHE_STALENESS = prometheus_client.Histogram(
+    namespace="galaxy",
+    name="cache_staleness",
+    unit="seconds",
+    documentation="how far past expiry stale galaxy entries were when served",
+)
+
+_HIT = CACHE_LOOKUPS.labels(outcome="hit")
+_STALE = CACHE_LOOKUPS.labels(outcome="stale")
+_MISS = CACHE_LOOKUPS.labels(outcome="miss")
+
+
+@attr.dataclass(frozen=True)
+class CacheEntry:
+    """ A single cached lookup result """
+
+    value: typing.Optional[StarSystem]
+    stored_at: float
+    """ wall-clock time the value was stored, so entries survive a restart """
+
+    @property
+    def negative(self) -> bool:
+        """ Whether this entry caches the absence of a result """
+        return self.value is None
+
+
+def _encode_system(system: typing.Optional[StarSystem]) -> typing.Optional[typing.Dict]:
+    if system is None:
+        return None
+    return {
+        "name": system.name,
+        "position": [system.position.x, system.position.y, system.position.z],
+        "spectral_class": system.spectral_class,
+    }
+
+
+def _decode_system(data: typing.Optional[typing.Dict]) -> typing.Optional[StarSystem]:
+    if data is None:
+        return None
+    return StarSystem(
+        name=data["name"],
+        position=Vector(*data["position"]),
+        spectral_class=data["spectral_class"],
+    )
+
+
+class GalaxyCache:
+    """
+    LRU cache of galaxy lookups with TTLs separated by result type.
+
+    Fresh entries are served directly. Entries past their TTL but within the stale window are
+    served immediately while a refresh is scheduled in the background. Anything older is treated
+    as a miss and fetched inline.
+    """
+
+    __slots__ = [
+        "ttl",
+        "negative_ttl",
+        "stale_ttl",
+        "max_entries",
+        "path",
+        "flush_interval",
+        "_clock",
+        "_entries",
+        "_refreshing",
+        "_flush_handle",
+        "_hits",
+        "_lookups",
+        "__weakref__",
+    ]
+
+    def __init__(
+        self,
+        ttl: float = 86400,
+        negative_ttl: float = 300,
+        stale_ttl: float = 3600,
+        max_entries: int = 4096,
+        path: typing.Optional[typing.Union[str, Path]] = None,
+        flush_interval: float = 30,
+        clock: typing.Callable[[], float] = time.time,
+    ):
+        """
+        Creates a galaxy cache
+
+        Args:
+            ttl (float): lifetime of a found system, in seconds
+            negative_ttl (float): lifetime of a "not found" result, in seconds
+            stale_ttl (float): how long past expiry an entry may still be served while it is
+                refreshed in the background, in seconds
+            max_entries (int): maximum number of entries before the least recently used are evicted
+            path (Path): file to persist the cache to, or None to keep it in memory only
+            flush_interval (float): delay between a modification and writing it to `path`
+            clock (Callable): wall-clock time source
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._entries: typing.Dict[CacheKey, CacheEntry] = OrderedDict()
+        self._refreshing: typing.Dict[CacheKey, asyncio.Task] = {}
+        self._flush_handle: typing.Optional[asyncio.TimerHandle] = None
+        self._hits = 0
+        self._lookups = 0
+        _CACHES.add(self)
+
+        if self.path:
+            self.load()
+
+    @classmethod
+    def from_config(cls, config: StarsystemApiConfigRoot) -> GalaxyCache:
+        """ Builds a cache from the `system_api` configuration section """
+        return cls(
+            ttl=config.cache_ttl,
+            negative_ttl=config.cache_negative_ttl,
+            stale_ttl=config.cache_stale_ttl,
+            max_entries=config.cache_max_entries,
+            path=config.cache_file,
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self._entries
+
+    @property
+    def hit_ratio(self) -> float:
+        """ Fraction of lookups served from the cache, fresh or stale """
+        return self._hits / self._lookups if self._lookups else 0.0
+
+    def _ttl_for(self, entry: CacheEntry) -> float:
+        return self.negative_ttl if entry.negative else self.ttl
+
+    def age_past_expiry(self, key: CacheKey) -> typing.Optional[float]:
+        """
+        How many seconds `key` is past its expiry. Negative while still fresh.
+
+        Returns:
+            float: seconds past expiry, or None if `key` is not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return self._clock() - entry.stored_at - self._ttl_for(entry)
+
+    def put(self, key: CacheKey, value: typing.Optional[StarSystem]) -> None:
+        """ Stores `value` under `key`, evicting the least recently used entries if full """
+        self._entries[key] = CacheEntry(value=value, stored_at=self._clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._schedule_flush()
+
+    def invalidate(self, key: CacheKey) -> None:
+        """ Drops `key` from the cache, if present """
+        if self._entries.pop(key, None) is not None:
+            self._schedule_flush()
+
+    def clear(self) -> None:
+        """ Drops every cached entry """
+        self._entries.clear()
+        self._schedule_flush()
+
+    async def get_or_fetch(self, key: CacheKey, fetch: Fetcher) -> typing.Optional[StarSystem]:
+        """
+        Serves `key` from the cache, calling `fetch` to (re)populate it as required.
+
+        Args:
+            key (CacheKey): cache key of the lookup
+            fetch (Fetcher): zero-argument coroutine function performing the actual lookup
+
+        Returns:
+            the cached or freshly fetched result
+        """
+        self._lookups += 1
+        entry = self._entries.get(key)
+        if entry is not None:
+            overdue = self._clock() - entry.stored_at - self._ttl_for(entry)
+            if overdue <= 0:
+                self._hits += 1
+                _HIT.inc()
+                self._entries.move_to_end(key)
+                return entry.value
+            if overdue <= self.stale_ttl:
+                self._hits += 1
+                _STALE.inc()
+                CACHE_STALENESS.observe(overdue)
+                self._entries.move_to_end(key)
+                self._revalidate(key, fetch)
+                return entry.value
+
+        _MISS.inc()
+        value = await fetch()
+        self.put(key, value)
+        return value
+
+    def _revalidate(self, key: CacheKey, fetch: Fetcher) -> None:
+        """ Refreshes `key` in the background, unless a refresh is already running """
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                self.put(key, await fetch())
+            except Exception:  # pylint: disable=broad-except
+                # keep serving the stale value, the next lookup will try again.
+                logger.exception("background refresh of galaxy cache key {!r} failed", key)
+            finally:
+                del self._refreshing[key]
+
+        self._refreshing[key] = asyncio.ensure_future(refresh())
+
+    def _schedule_flush(self) -> None:
+        """ Writes the cache to disk after `flush_interval`, coalescing intermediate changes """
+        if not self.path or self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # not inside the event loop, nothing to defer to.
+            self.save()
+            return
+
+        def flush():
+            self._flush_handle = None
+            self.save()
+
+        self._flush_handle = loop.call_later(self.flush_interval, flush)
+
+    def save(self) -> None:
+        """ Atomically writes the cache to `path` """
+        if not self.path:
+            return
+        payload = [
+            {"key": list(key), "value": _encode_system(entry.value), "stored_at": entry.stored_at}
+            for key, entry in self._entries.items()
+        ]
+        temporary = self.path.with_suffix(f"{self.path.suffix}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary.write_text(json.dumps(payload), encoding="utf8")
+            os.replace(temporary, self.path)
+        except OSError:
+            logger.exception("failed to persist galaxy cache to {}", self.path)
+            return
+        logger.trace("persisted {} galaxy cache entries to {}", len(payload), self.path)
+
+    def load(self) -> None:
+        """
+        Loads previously persisted entries from `path`.
+
+        Entries that are already too old to be served, even stale, are discarded.
+        """
+        if not self.path or not self.path.exists():
+            return
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf8"))
+        except (OSError, ValueError):
+            logger.exception("failed to load galaxy cache from {}, starting cold", self.path)
+            return
+
+        now = self._clock()
+        for item in payload[-self.max_entries:]:
+            try:
+                entry = CacheEntry(value=_decode_system(item["value"]), stored_at=item["stored_at"])
+                key = tuple(item["key"])
+            except (KeyError, TypeError, ValueError):
+                logger.warning("discarding malformed galaxy cache entry {!r}", item)
+                continue
+            if now - entry.stored_at - self._ttl_for(entry) > self.stale_ttl:
+                continue
+            self._entries[key] = entry
+        logger.info("loaded {} galaxy cache entries from {}", len(self._entries), self.path)
+
+
+_CACHES: "weakref.WeakSet[GalaxyCache]" = weakref.WeakSet()
+""" live caches, which the gauges add up """
+
+
+def _hit_ratio() -> float:
+    hits = lookups = 0
+    for cache in _CACHES:
+        hits += cache._hits  # pylint: disable=protected-access
+        lookups += cache._lookups  # pylint: disable=protected-access
+    return hits / lookups if lookups else 0.0
+
+
+CACHE_HIT_RATIO.set_function(_hit_ratio)
+CACHE_ENTRIES.set_function(lambda: sum(len(cache) for cache in _CACHES))
@@ -0,0 +1,115 @@
+"""
+position_table.py - Vectorised distance calculations between many star systems.
+
+Holds the coordinates of a set of star systems in a single contiguous NumPy array so distances
+between many systems can be computed in one call, rather than one :class:`Vector` pair at a time.
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import typing
+
+import numpy
+
+from .star_system import StarSystem
+from ..utils import Vector
+
+
+class PositionTable:
+    """
+    Immutable, ordered table of star system positions.
+
+    Row ``i`` of :attr:`positions` holds the ``(x, y, z)`` coordinates of ``systems[i]``.
+
+    >>> fuelum = StarSystem("Fuelum", Vector(52, -52.65625, 49.8125))
+    >>> table = PositionTable([StarSystem("Sol"), fuelum])
+    >>> table.distances_from(StarSystem("Sol")).tolist()
+    [0.0, 89.21]
+    """
+
+    __slots__ = ["systems", "positions"]
+
+    def __init__(self, systems: typing.Iterable[StarSystem]):
+        """
+        Creates a position table
+
+        Args:
+            systems (Iterable[StarSystem]): systems to include, in order
+        """
+        self.systems: typing.Tuple[StarSystem, ...] = tuple(systems)
+        """ the tabulated systems, in row order """
+        positions = numpy.array(
+            [(sys.position.x, sys.position.y, sys.position.z) for sys in self.systems],
+            dtype=numpy.float64,
+        ).reshape(-1, 3)
+        positions.setflags(write=False)
+        self.positions: numpy.ndarray = positions
+        """ C-contiguous ``(len(systems), 3)`` float64 array of coordinates """
+
+    def __len__(self) -> int:
+        return len(self.systems)
+
+    def __iter__(self) -> typing.Iterator[StarSystem]:
+        return iter(self.systems)
+
+    def distance_matrix(self, other: PositionTable) -> numpy.ndarray:
+        """
+        Computes the distance between every system in this table and every system in `other`.
+
+        Args:
+            other (PositionTable): the systems to measure against
+
+        Returns:
+            a ``(len(self), len(other))`` array, where ``[i, j]`` is the distance in light years
+            between ``self.systems[i]`` and ``other.systems[j]``, rounded like
+            :meth:`StarSystem.distance`.
+        """
+        # Accumulating per axis keeps the temporaries at (n, m) rather than (n, m, 3), and avoids
+        # the cancellation error the |a|² + |b|² - 2ab expansion suffers far from the origin.
+        result = numpy.zeros((len(self), len(other)), dtype=numpy.float64)
+        for axis in range(3):
+            delta = numpy.subtract.outer(self.positions[:, axis], other.positions[:, axis])
+            numpy.multiply(delta, delta, out=delta)
+            result += delta
+        numpy.sqrt(result, out=result)
+        return numpy.round(result, 2, out=result)
+
+    def distances_from(self, origin: typing.Union[StarSystem, Vector]) -> numpy.ndarray:
+        """
+        Computes the distance from `origin` to every system in this table.
+
+        Args:
+            origin (StarSystem or Vector): the point to measure from
+
+        Returns:
+            a ``(len(self),)`` array of distances in light years, in row order.
+        """
+        if isinstance(origin, StarSystem):
+            origin = origin.position
+        return PositionTable([StarSystem(name="", position=origin)]).distance_matrix(self)[0]
+
+    def nearest(self,
+                origin: typing.Union[StarSystem, Vector],
+                limit: typing.Optional[int] = None,
+                ) -> typing.List[typing.Tuple[StarSystem, float]]:
+        """
+        Ranks the systems in this table by distance from `origin`, nearest first.
+
+        Args:
+            origin (StarSystem or Vector): the point to measure from
+            limit (int): maximum number of results to return, or None for all of them
+
+        Returns:
+            list of ``(system, distance)`` tuples. Ties keep their table order.
+        """
+        distances = self.distances_from(origin)
+        order = numpy.argsort(distances, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return [(self.systems[i], float(distances[i])) for i in order]
@@ -0,0 +1,227 @@
+"""
+compiled.py - Regular expression counterparts of the pyparsing rules in this package
+
+Each rule here is the source of a regular expression matching exactly what its pyparsing
+namesake matches, for use in a :class:`Pattern`, which matches a whole command line with a
+single expression compiled once, at import. Rules match after any leading whitespace, as
+pyparsing does, and never backtrack into a shorter match, as pyparsing doesn't.
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import re
+import typing
+from uuid import UUID
+
+import pyparsing
+
+WHITESPACE = " \n\t\r"
+""" characters pyparsing skips before each element """
+SKIP = f"[{re.escape(WHITESPACE)}]*"
+WORD_END = "(?![!-~])"
+""" no printable character follows, as pyparsing's `WordEnd` """
+KEYWORD_START = "(?<![A-Za-z0-9_$])"
+KEYWORD_END = "(?![A-Za-z0-9_$])"
+""" no keyword character borders, as pyparsing's `Keyword` """
+END = rf"{SKIP}\Z"
+""" nothing but whitespace follows """
+
+first_word = rf"{SKIP}[!-~]+{WORD_END}"
+""" the first word in the string, usually the command invoked """
+
+rest_of_line = ".*"
+""" all remaining text on the line, see :func:`to_rest_of_line` """
+
+irc_name = rf"[A-Za-z][A-Za-z0-9\[\]{{}}|:\-_<>\\/]*{WORD_END}"
+"""
+Matches a valid IRC nickname.
+ Token MUST start with a letter but MAY contain numerics and some special chars
+"""
+
+_HEX = "[0-9a-fA-F]"
+api_id = (
+    rf"(?:@{SKIP})?{_HEX}{{8}}{SKIP}-{SKIP}{_HEX}{{4}}{SKIP}-{SKIP}{_HEX}{{4}}{SKIP}-{SKIP}"
+    rf"{_HEX}{{4}}{SKIP}-{SKIP}{_HEX}{{12}}{WORD_END}"
+)
+""" matches a well formed UUID4, pyparsing skips whitespace between its parts so we do too """
+
+case_number = rf"(?:{api_id}|(?!{api_id})(?:#{SKIP})?[0-9]+{WORD_END})"
+"""Matches a case number"""
+
+rescue_identifier = rf"(?:{irc_name}|(?!{irc_name}){case_number})"
+"""Matches any valid rescue identifier, see :func:`to_rescue_identifier`. """
+
+timer = rf"[0-9]+{SKIP}:{SKIP}[0-9]+{WORD_END}"
+""" matches something that looks like a timer. `d:d` """
+
+# pyparsing tries only the longest literal matching against what follows it, the lookaheads
+# stop us from backtracking into a shorter one.
+platform = (
+    rf"(?P<platform>(?i:{KEYWORD_START}(?P<pc>pc){KEYWORD_END}"
+    rf"|{KEYWORD_START}(?=(?P<playstation>playstation 4|playstation4|playstation|ps4|ps)"
+    rf"{KEYWORD_END})(?P=playstation)"
+    rf"|(?=(?P<xbox>xbox one|xboxone|xbox|xb1|xb))(?P=xbox)){WORD_END})"
+)
+"""
+Matches a platform specifier, into the `platform` group and one of `pc`, `playstation` or `xbox`
+"""
+
+_SKIP = re.compile(SKIP)
+_IRC_NAME = re.compile(irc_name)
+_API_ID = re.compile(api_id)
+_NOT_HEX = re.compile("[^0-9a-fA-F]")
+_TIMER_PARTS = re.compile("[0-9]+|:")
+
+
+def to_api_id(token: str) -> UUID:
+    """ The UUID matched by :data:`api_id` """
+    return UUID(_NOT_HEX.sub("", token))
+
+
+def to_case_number(token: str) -> typing.Union[int, UUID]:
+    """ The case number or UUID matched by :data:`case_number` """
+    if _API_ID.fullmatch(token):
+        return to_api_id(token)
+    return int(token.lstrip("#" + WHITESPACE))
+
+
+def to_rescue_identifier(token: str) -> typing.Union[str, int, UUID]:
+    """ The nickname, case number or UUID matched by :data:`rescue_identifier` """
+    if _IRC_NAME.fullmatch(token):
+        return token
+    return to_case_number(token)
+
+
+def to_timer(token: str) -> typing.List[str]:
+    """ The parts of a :data:`timer`, as pyparsing has them: ``["12", ":", "30"]`` """
+    return _TIMER_PARTS.findall(token)
+
+
+def to_rest_of_line(token: str) -> str:
+    """ The text matched by :data:`rest_of_line`, stripped of surrounding whitespace """
+    return token.strip()
+
+
+class TokenList(list):
+    """ List of tokens bound to a single result name """
+
+    def asList(self) -> list:  # pylint: disable=invalid-name
+        """ The tokens as a plain list, like :meth:`pyparsing.ParseResults.asList` """
+        return list(self)
+
+
+class Tokens:
+    """
+    Named results of a successful parse.
+
+    Results are available as attributes, and are the empty string if the pattern didn't match
+    them, just like :class:`pyparsing.ParseResults`.
+    """
+
+    __slots__ = ["_named"]
+
+    def __init__(self, named: typing.Dict[str, typing.Any]):
+        self._named = named
+
+    def __getattr__(self, name: str) -> typing.Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self._named.get(name, "")
+
+    def asDict(self) -> typing.Dict[str, typing.Any]:  # pylint: disable=invalid-name
+        """ The named results as a plain dict """
+        return dict(self._named)
+
+    def __repr__(self) -> str:
+        return f"Tokens({self._named!r})"
+
+
+class Pattern:
+    """
+    A command line, matched by a single regular expression compiled once.
+
+    Each named group of `regex` is a result, turned into its value by the callable of the same
+    name in `convert`, if any. Lists become :class:`TokenList` s. Groups that didn't match, or
+    matched nothing, are left out, as pyparsing leaves out empty results.
+
+    `options` are matched after `regex`, each at most once and in any order, like pyparsing's
+    `Each`, and `tail` after them. The whitespace before `tail` is skipped unless every option
+    matched, as pyparsing does.
+    """
+
+    __slots__ = ["_regex", "_options", "_tail", "_convert"]
+
+    def __init__(self, regex: str, *options: str, tail: typing.Optional[str] = None,
+                 **convert: typing.Callable[[str], typing.Any]):
+        self._regex = re.compile(regex)
+        self._options = tuple(re.compile(f"{SKIP}{option}") for option in options)
+        self._tail = re.compile(tail) if tail is not None else None
+        self._convert = convert
+
+    def _results(self, match: typing.Match, named: typing.Dict[str, typing.Any]) -> None:
+        for name, token in match.groupdict().items():
+            if not token:
+                continue
+            convert = self._convert.get(name)
+            value = token if convert is None else convert(token)
+            if value == "":
+                continue
+            named[name] = TokenList(value) if isinstance(value, list) else value
+
+    def parse(self, text: str) -> typing.Optional[Tokens]:
+        """
+        Parses `text`.
+
+        Returns:
+            Tokens: parse results, or None if `text` doesn't match this pattern
+        """
+        if "\t" in text:
+            # pyparsing expands tabs before parsing, which shows in the rest of line
+            text = text.expandtabs()
+        match = self._regex.match(text)
+        if match is None:
+            return None
+        named: typing.Dict[str, typing.Any] = {}
+        self._results(match, named)
+        if self._tail is None:
+            return Tokens(named)
+
+        pos = match.end()
+        pending = list(self._options)
+        found = True
+        while found and pending:
+            found = False
+            for option in list(pending):
+                match = option.match(text, pos)
+                if match is not None:
+                    self._results(match, named)
+                    pos = match.end()
+                    pending.remove(option)
+                    found = True
+        if pending:
+            pos = _SKIP.match(text, pos).end()
+        match = self._tail.match(text, pos)
+        if match is None:
+            return None
+        self._results(match, named)
+        return Tokens(named)
+
+    def matches(self, text: str) -> bool:
+        """ Whether `text` matches this pattern """
+        return self.parse(text) is not None
+
+    def parseString(self, text: str) -> Tokens:  # pylint: disable=invalid-name
+        """
+        Parses `text`, raising like pyparsing does if it doesn't match.
+
+        Raises:
+            pyparsing.ParseException: `text` doesn't match this pattern
+        """
+        tokens = self.parse(text)
+        if tokens is None:
+            raise pyparsing.ParseException(text, 0, "text does not match pattern")
+        return tokens
@@ -14,7 +14,7 @@ This module is built on top of the Pydle system.
 import cattr
 from loguru import logger
 from functools import wraps
-from typing import Any, Union, Callable, Dict, Set, TYPE_CHECKING
+from typing import Any, Union, Callable, Dict, Optional, Set, Tuple, TYPE_CHECKING
 
 from src.config import CONFIG_MARKER
 from ..context import Context
@@ -81,6 +81,7 @@ def rehash_handler(data: ConfigRoot):
     OVERSEER.update(cattr.unstructure(data.permissions.overseer))
     TECHRAT.update(cattr.unstructure(data.permissions.techrat))
     ADMIN.update(cattr.unstructure(data.permissions.administrator))
+    level_table()
 
 
 class Permission:
@@ -107,6 +108,7 @@ class Permission:
         self._denied_message = deny_message
 
         _by_vhost.update({vhost: self for vhost in self._vhosts})
+        _changed()
 
     def update(self, data: Dict) -> None:
         """
@@ -122,6 +124,7 @@ class Permission:
 
         self.vhosts = vhosts
         self.level = level
+        _changed()
 
     @property
     def vhosts(self) -> Set[str]:
@@ -176,6 +179,7 @@ class Permission:
 
         # oh and update our set whilst we are here <3
         self._vhosts = value
+        _changed()
 
     @classmethod
     def from_dict(cls, data: Dict):
@@ -253,6 +257,51 @@ class Permission:
 # mapping between vhosts and permissions
 _by_vhost: Dict[str, Permission] = {}
 
+# bumped whenever a permission's level or vhosts change
+_generation = 0
+
+# vhost -> level, compiled from _by_vhost, and the (_by_vhost, _generation) it was compiled from
+_levels: Dict[str, int] = {}
+_levels_source: Tuple[int, int] = (0, -1)
+
+
+def _changed() -> None:
+    global _generation  # pylint: disable=global-statement
+    _generation += 1
+
+
+def level_table() -> Dict[str, int]:
+    """
+    The vhost -> level table, recompiled only if permissions changed since it was last compiled.
+
+    A new table is a new object, so anything cached against the old one can tell it is stale:
+    compare tables by identity to find out whether permission levels changed. The table must
+    not be modified.
+    """
+    global _levels, _levels_source  # pylint: disable=global-statement
+    source = (id(_by_vhost), _generation)
+    if source != _levels_source:
+        _levels = {vhost: permission.level for vhost, permission in _by_vhost.items()}
+        _levels_source = source
+    return _levels
+
+
+def effective_level(user: User) -> Optional[int]:
+    """
+    The permission level `user` has through their vhost, or None if they have none.
+
+    The level is cached on `user` until permissions next change.
+    """
+    levels = level_table()
+    cached = user.permission_cache
+    if cached is not None and cached[0] is levels:
+        return cached[1]
+    level = levels.get(user.hostname)
+    # users are frozen, their cache slot is the one field meant to be written after creation.
+    object.__setattr__(user, "permission_cache", (levels, level))
+    return level
+
+
 # TODO: implement null constructor, populate fields in post.
 _PERMISSIONS_DICT = {}
 # the uninitiated
@@ -293,12 +342,15 @@ def require_permission(permission: Permission,
         logger.debug("Inside the real_decorator")
         logger.debug(f"Wrapping a command with permission {permission}")
 
+        guard = compile_guard(permission, override_message or None)
+
         @wraps(func)
         async def guarded(context: Context, *args):
-            if has_required_permission(context.user, permission):
+            denial = guard(context)
+            if denial is None:
                 return await func(context, *args)
 
-            await context.reply(override_message if override_message else permission.denied_message)
+            await context.reply(denial)
 
         return aio_time(REQUIRE_PERMISSION_TIME)(guarded)
 
@@ -307,10 +359,77 @@ def require_permission(permission: Permission,
 
 def has_required_permission(user: User, permission: Permission):
     """ asserts whether the user specified in Context"""
-    effective_permissions = _by_vhost.get(user.hostname)
-    if not effective_permissions:
-        return False
-    return effective_permissions >= permission
+    level = effective_level(user)
+    return level is not None and level >= permission.level
+
+
+Guard = Callable[[Context], Optional[str]]
+
+
+def compile_guard(permission: Optional[Permission] = None,
+                  permission_message: Optional[str] = None,
+                  require_channel: bool = False,  # pylint: disable=redefined-outer-name
+                  channel_message: str = "Cannot comply: This command must be invoked in a channel.",
+                  require_dm: bool = False,  # pylint: disable=redefined-outer-name
+                  dm_message: str = "Cannot comply: this command must be invoked in a direct message.",
+                  ) -> Optional[Guard]:
+    """
+    Compiles a command's permission, channel and direct message requirements into a single check.
+
+    Args:
+        permission (Permission): minimum permission level required
+        permission_message (str): message to deny with instead of the permission's own
+        require_channel (bool): require the command to be invoked in a channel
+        channel_message (str): message to deny with when not invoked in a channel
+        require_dm (bool): require the command to be invoked in a direct message
+        dm_message (str): message to deny with when not invoked in a direct message
+
+    Returns:
+        None if nothing is required, otherwise a plain function taking the invocation context and
+        returning the message to deny it with, or None to allow it.
+    """
+    checks = []
+    if permission is not None:
+        def check_permission(context: Context) -> Optional[str]:
+            if has_required_permission(context.user, permission):
+                return None
+            logger.warning("A user tried to invoke a command they aren't allowed.")
+            return permission_message if permission_message is not None else \
+                permission.denied_message
+
+        checks.append(check_permission)
+
+    if require_channel:
+        def check_channel(context: Context) -> Optional[str]:
+            if context.channel is not None:
+                return None
+            logger.warning("A user tried to invoke a channel message in a direct message.")
+            return channel_message
+
+        checks.append(check_channel)
+
+    if require_dm:
+        def check_dm(context: Context) -> Optional[str]:
+            if context.channel is None:
+                return None
+            logger.warning("A user tried to invoke a DM only message in a channel.")
+            return dm_message
+
+        checks.append(check_dm)
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+
+    def guard(context: Context) -> Optional[str]:
+        for check in checks:
+            denial = check(context)
+            if denial is not None:
+                return denial
+        return None
+
+    return guard
 
 
 def require_channel(func: Union[str, Callable] = None,
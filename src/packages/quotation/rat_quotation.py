@@ -20,7 +20,7 @@ from loguru import logger
 from ..context import Context
 
 
-@attr.dataclass
+@attr.dataclass(slots=True)
 class Quotation:
     """
     A quotes object, element of Rescue
@@ -48,7 +48,8 @@ class Quotation:
     """ Initial creation time """
     updated_at: pendulum.DateTime = attr.ib(
         validator=attr.validators.instance_of(pendulum.DateTime),
-        factory=functools.partial(pendulum.now, tz=pendulum.tz.UTC)
+        # a new quote was last modified as it was created
+        default=attr.Factory(lambda self: self.created_at, takes_self=True)
     )
     """ Last modification time """
 
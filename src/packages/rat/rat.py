@@ -27,7 +27,7 @@ def _name_converter(raw):
     return raw
 
 
-@attr.dataclass(frozen=True, hash=True)
+@attr.dataclass(frozen=True, hash=True, slots=True)
 class Rat:
     uuid: UUID = attr.ib(
         validator=attr.validators.optional(attr.validators.instance_of(UUID))
@@ -0,0 +1,189 @@
+"""
+announcement.py - RatMama announcement parsing
+
+Splits the announcements RatMama makes of incoming clients into their fields in a single pass.
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from typing import Optional
+
+import attr
+
+from ..utils import Platforms
+
+ANNOUNCEMENT_PREFIX = "Incoming Client:"
+""" how every announcement starts """
+
+SEPARATOR = " - "
+""" separates the fields of an announcement """
+
+_NICK_LABEL = "IRC Nickname:"
+
+_PLATFORMS = {"pc": Platforms.PC, "ps": Platforms.PS, "ps4": Platforms.PS, "xb": Platforms.XB}
+
+
+@attr.dataclass(frozen=True, slots=True)
+class Announcement:
+    """
+    An incoming client, as announced by RatMama
+
+    Values are stripped of surrounding whitespace.
+    """
+
+    cmdr: str
+    """ commander name of the client """
+    system: str
+    """ system the client reported, without any trailing " system" """
+    platform: str
+    """ platform name as announced """
+    o2: str
+    """ oxygen status, "OK" unless the client is on emergency oxygen """
+    full_language: str
+    """ language as announced, such as "English (en-US)" """
+    language: str
+    """ name of the language """
+    language_code: str
+    """ language code, such as "en" """
+    language_country: Optional[str] = None
+    """ country of the language, such as "US", if announced """
+    nick: Optional[str] = None
+    """ IRC nickname of the client, if announced """
+
+    @property
+    def code_red(self) -> bool:
+        """ Whether the client is on emergency oxygen """
+        return self.o2 != "OK"
+
+    @property
+    def lang_id(self) -> str:
+        """ Language ID of the client, such as "en-US" """
+        if self.language_country is None:
+            return self.language_code
+        return f"{self.language_code}-{self.language_country.upper()}"
+
+    @property
+    def platforms(self) -> Optional[Platforms]:
+        """ The announced platform, None if it isn't one we know of """
+        return _PLATFORMS.get(self.platform.casefold())
+
+
+def is_announcement(message: str) -> bool:
+    """
+    Cheaply tells whether `message` looks like an announcement, without parsing it.
+
+    Args:
+        message (str): message to check
+
+    Returns:
+        bool: whether `message` starts like an announcement
+    """
+    return message.startswith(ANNOUNCEMENT_PREFIX)
+
+
+def _find_label(parts, label: str, start: int) -> int:
+    for index in range(start, len(parts)):
+        if parts[index].lstrip().startswith(label):
+            return index
+    return -1
+
+
+def _is_platform(part: str) -> bool:
+    """ Whether `part` is a platform field, whose value is a single word """
+    part = part.lstrip()
+    if not part.startswith("Platform:"):
+        return False
+    name = part[len("Platform:"):].strip()
+    return name.isalnum() or bool(name) and all(char.isalnum() or char == "_" for char in name)
+
+
+def _field(parts, start: int, stop: int, label: str) -> str:
+    """ Joins `parts[start:stop]` back together, dropping the leading `label` """
+    if stop - start == 1:
+        return parts[start].lstrip()[len(label):].strip()
+    return SEPARATOR.join(parts[start:stop]).lstrip()[len(label):].strip()
+
+
+def parse_announcement(message: str) -> Optional[Announcement]:
+    """
+    Parses an announcement, in a single pass over its fields.
+
+    Announcements take the form
+    ``Incoming Client: <cmdr> - System: <system> - Platform: <platform> - O2: <o2>
+    - Language: <language> (<code>[-<country>])[ - IRC Nickname: <nick>]``
+
+    Args:
+        message (str): message to parse
+
+    Returns:
+        Announcement: the parsed announcement
+        None: `message` isn't a well formed announcement
+    """
+    message = message.strip()
+    if not is_announcement(message):
+        return None
+    parts = message[len(ANNOUNCEMENT_PREFIX):].split(SEPARATOR)
+
+    # Each field runs from its label up to the next field's label, the commander name has none.
+    # The platform is a single word directly followed by the oxygen status, so the system may
+    # hold what looks like a label; the other fields may not.
+    system_at = _find_label(parts, "System:", 1)
+    if system_at == -1:
+        return None
+    platform_at = system_at + 1
+    while platform_at < len(parts) - 1 and not (
+        _is_platform(parts[platform_at]) and parts[platform_at + 1].lstrip().startswith("O2:")
+    ):
+        platform_at += 1
+    language_at = _find_label(parts, "Language:", platform_at + 2)
+    if language_at == -1:
+        return None
+    nick_at = len(parts)
+    nick = None
+    if nick_at - 1 > language_at and parts[-1].lstrip().startswith(_NICK_LABEL):
+        nick_at -= 1
+        nick = parts[nick_at].lstrip()[len(_NICK_LABEL):].strip()
+        if not nick or any(char.isspace() for char in nick):
+            return None
+
+    cmdr = _field(parts, 0, system_at, "")
+    system = _field(parts, system_at, platform_at, "System:")
+    platform = _field(parts, platform_at, platform_at + 1, "Platform:")
+    o2 = _field(parts, platform_at + 1, language_at, "O2:")
+    full_language = _field(parts, language_at, nick_at, "Language:")
+    if not (cmdr and o2):
+        return None
+
+    # strip " system" from the end, if present (case insensitive)
+    if len(system) > 6 and system[-7].isspace() and system[-6:].lower() == "system":
+        system = system[:-7].rstrip()
+
+    # "English (en-US)"
+    opening = full_language.find("(", 1)
+    if opening == -1 or not full_language.endswith(")"):
+        return None
+    language = full_language[:opening].strip()
+    code = full_language[opening + 1:-1]
+    if not code:
+        return None
+    country = None
+    dash = code.find("-", 1)
+    if 0 < dash < len(code) - 1:
+        code, country = code[:dash], code[dash + 1:].strip()
+    code = code.strip()
+
+    return Announcement(
+        cmdr=cmdr,
+        system=system,
+        platform=platform,
+        o2=o2,
+        full_language=full_language,
+        language=language,
+        language_code=code,
+        language_country=country,
+        nick=nick,
+    )
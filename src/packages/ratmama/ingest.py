@@ -0,0 +1,149 @@
+"""
+ingest.py - De-duplication of RatMama announcements
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import typing
+from collections import OrderedDict
+
+import prometheus_client
+
+from .announcement import Announcement
+
+if typing.TYPE_CHECKING:
+    from ...config.datamodel.ratmamma import RatmamaConfigRoot
+
+DUPLICATE_SIGNALS = prometheus_client.Counter(
+    namespace="ratmama",
+    name="duplicate_signals",
+    documentation="announcements dropped as repeats of one made moments before",
+)
+
+
+class Burst:
+    """
+    Announcements of a single client, each made within the window of the one before.
+
+    Handling the burst's announcements is serialised by :attr:`lock`.
+    """
+
+    __slots__ = ["lock", "announcement", "seen_at", "repeated", "reported"]
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        """ held while an announcement of this client is handled """
+        self.announcement: typing.Optional[Announcement] = None
+        """ the latest announcement handled to completion """
+        self.seen_at = 0.0
+        """ when the latest announcement was made """
+        self.repeated = False
+        """ whether the latest announcement continued the burst, rather than started it """
+        self.reported: typing.Set[str] = set()
+        """ changed fields dispatch was told of during the burst """
+
+
+class SignalIngest:
+    """
+    Tracks announcements per client, so a client whose connection flaps gets a single case and a
+    single reconnection notice rather than one per announcement.
+
+    Announcements of a client made within `window` seconds of the previous one continue its
+    :class:`Burst`. Clients are forgotten once their burst is over.
+    """
+
+    __slots__ = ["window", "_clock", "_bursts"]
+
+    def __init__(self, window: float = 30, clock: typing.Callable[[], float] = time.monotonic):
+        """
+        Creates a signal ingest
+
+        Args:
+            window (float): seconds within which announcements of a client are a burst
+            clock (Callable): monotonic time source
+        """
+        self.window = window
+        self._clock = clock
+        self._bursts: typing.Dict[str, Burst] = OrderedDict()
+        """ bursts by casefolded client name, least recently announced first """
+
+    @classmethod
+    def from_config(cls, config: RatmamaConfigRoot, **kwargs) -> SignalIngest:
+        """ Builds an ingest from the `ratsignal_parser` configuration section """
+        return cls(window=config.dedup_window, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._bursts)
+
+    def burst(self, cmdr: str) -> Burst:
+        """
+        The burst of `cmdr`, which the caller must lock before calling :meth:`admit`.
+
+        Args:
+            cmdr (str): client name
+
+        Returns:
+            Burst: the client's burst
+        """
+        self._expire()
+        key = cmdr.casefold()
+        burst = self._bursts.get(key)
+        if burst is None:
+            burst = self._bursts[key] = Burst()
+        return burst
+
+    def admit(self, burst: Burst, announcement: Announcement, on_board: bool) -> bool:
+        """
+        Records that `announcement` was made, continuing or starting `burst`.
+
+        Only an announcement repeating one that was handled, of a client that still has a case,
+        may be dropped; one whose handling failed, or whose case was closed since, must be
+        handled again. Call :meth:`handled` once it was.
+
+        Args:
+            burst (Burst): the announced client's burst, locked
+            announcement (Announcement): the announcement
+            on_board (bool): whether the client has a case on the board
+
+        Returns:
+            bool: False if `announcement` repeats the previous one of the burst and may be
+            dropped, True if it must be handled.
+        """
+        now = self._clock()
+        burst.repeated = burst.announcement is not None and now - burst.seen_at < self.window
+        if not burst.repeated:
+            burst.reported = set()
+        duplicate = burst.repeated and on_board and announcement == burst.announcement
+        burst.seen_at = now
+        self._bursts.move_to_end(announcement.cmdr.casefold())
+        if duplicate:
+            DUPLICATE_SIGNALS.inc()
+        return not duplicate
+
+    @staticmethod
+    def handled(burst: Burst, announcement: Announcement) -> None:
+        """
+        Records that `announcement`, admitted to `burst`, was handled to completion
+
+        Args:
+            burst (Burst): the announced client's burst, locked
+            announcement (Announcement): the announcement
+        """
+        burst.announcement = announcement
+
+    def _expire(self) -> None:
+        """ Forgets clients whose burst is over """
+        horizon = self._clock() - self.window
+        while self._bursts:
+            burst = next(iter(self._bursts.values()))
+            if burst.seen_at >= horizon or burst.lock.locked():
+                break
+            self._bursts.popitem(last=False)
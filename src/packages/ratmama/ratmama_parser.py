@@ -19,6 +19,9 @@ from typing import Optional, Dict, Any, List
 from src.config import CONFIG_MARKER
 from io import StringIO
 from ..context import Context
+from ..galaxy.circuit_breaker import CircuitOpenError
+from .announcement import Announcement, parse_announcement
+from .ingest import Burst
 from ..rescue import Rescue
 from ..rules import rule
 from ..user import User
@@ -46,6 +49,17 @@ def rehash_handler(data: ConfigRoot):
     _config = data.ratsignal_parser
 
 
+def is_announcer(nickname: Optional[str]) -> bool:
+    """
+    Whether `nickname` is one of the configured announcers, whose announcements are acted on.
+
+    Args:
+        nickname (str): IRC nickname of a message's sender, if known
+    """
+    return nickname is not None and nickname.casefold() in _config.announcer_nicks
+
+
+# superseded by `parse_announcement`, kept as the reference it is tested against
 RATMAMA_REGEX = re.compile(
     r"""(?x)
     # The above makes whitespace and comments in the pattern ignored.
@@ -105,17 +119,32 @@ async def handle_ratmama_announcement(ctx: Context) -> None:
     """
 
     # If the user isn't one that is allowed to trigger this code,
-    if ctx.user.nickname.casefold() not in _config.announcer_nicks:
+    if not is_announcer(ctx.user.nickname):
         return  # then SKIP!
 
-    message: str = ctx.words_eol[0]
-    result = re.fullmatch(RATMAMA_REGEX, message)
-    client_name: str = result.group("cmdr")
-    system_name: str = result.group("system")
-    platform_name: str = result.group("platform")
-    o2_status: bool = result.group("o2") == "OK"  # false is CR
-    lang_code: str = f"{result.group('language_code')}-{result.group('language_country').upper()}"
-    nickname: Optional[str] = result.group("nick")
+    announcement = parse_announcement(ctx.words_eol[0])
+    if announcement is None:
+        logger.warning(f"Got malformed announcement from {ctx.user.nickname}: {ctx.words_eol[0]!r}")
+        return
+
+    # a client whose connection flaps is announced over and over, handle them one at a time
+    ingest = ctx.bot.signal_ingest
+    burst = ingest.burst(announcement.cmdr)
+    async with burst.lock:
+        if not ingest.admit(burst, announcement, announcement.cmdr in ctx.bot.board):
+            logger.debug(f"Dropping repeated announcement of {announcement.cmdr}")
+            return
+        await _handle_announcement(ctx, announcement, burst)
+        ingest.handled(burst, announcement)
+
+
+async def _handle_announcement(ctx: Context, announcement: Announcement, burst: Burst) -> None:
+    client_name: str = announcement.cmdr
+    system_name: str = announcement.system
+    platform_name: str = announcement.platform
+    o2_status: bool = not announcement.code_red
+    lang_code: str = announcement.lang_id
+    nickname: Optional[str] = announcement.nick
 
     client = await User.from_pydle(ctx.bot, client_name)
 
@@ -137,10 +166,12 @@ async def handle_ratmama_announcement(ctx: Context) -> None:
     )
 
     if exist_rescue:
-        # we got a case already!
-        await ctx.reply(
-            f"{client_name} has reconnected! Case #{exist_rescue.board_index} " f"(RETURN_SIGNAL)"
-        )
+        # we got a case already! Say so once per burst of reconnections
+        if not burst.repeated:
+            await ctx.reply(
+                f"{client_name} has reconnected! Case #{exist_rescue.board_index} "
+                f"(RETURN_SIGNAL)"
+            )
         # now let's make it more visible if stuff changed
         changed = []
         message = (
@@ -170,18 +201,17 @@ async def handle_ratmama_announcement(ctx: Context) -> None:
                 else f", O2 Status changed, rescue is now {color('CODE RED', Colors.RED)}!"
             )
 
-        if changed:
+        # during a burst, only notify again once more fields changed, naming all of them
+        notify = {*changed, "o2"} if cr_message else set(changed)
+        if changed and not notify <= burst.reported:
+            burst.reported |= notify
             # SPARK-46: Warn when a client reconnects with different settings, but differ to dispatch
             # to overwrite existing data instead of doing it ourselves.
             await ctx.reply(f"{message}{', '.join(changed)}{cr_message}")
         return
 
-    platform = None
-    if platform_name.casefold() in ("pc", "ps", "xb"):
-        platform = Platforms[platform_name.upper()]
-    elif platform_name.casefold() == "ps4":
-        platform = Platforms.PS
-    else:
+    platform = announcement.platforms
+    if platform is None:
         logger.warning(f"Got unknown platform from {ctx.user.nickname}: {platform_name}")
     # no case for that name, we have to make our own
     rescue = await ctx.bot.board.create_rescue(
@@ -215,13 +245,15 @@ async def handle_ratmama_announcement(ctx: Context) -> None:
                 distance_str = f"no landmark found for system {system.name}"
     except (asyncio.TimeoutError, aiohttp.ServerTimeoutError):
         distance_str = "<timeout requesting system data>"
+    except CircuitOpenError:
+        distance_str = "<system data unavailable>"
 
     await ctx.reply(
         f"{_config.trigger_keyword.upper()} - CMDR {rescue.client} - "
         f"Reported System: {rescue.system} ({distance_str}) - "
         f"Platform: {rescue.platform.value if rescue.platform else ''} - "
         f"O2: {'NOT OK' if rescue.code_red else 'OK'} - "
-        f"Language: {result.group('full_language')}"
+        f"Language: {announcement.full_language}"
         f" (Case #{rescue.board_index}) {platform_signal}"
     )
 
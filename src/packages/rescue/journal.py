@@ -0,0 +1,176 @@
+"""
+journal.py - field level change journal of a rescue
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import contextlib
+import contextvars
+import typing
+from uuid import UUID
+
+import attr
+import pendulum
+
+Author = typing.Union[str, UUID]
+""" who made a change, usually a nickname or API user ID """
+
+_AUTHOR: contextvars.ContextVar = contextvars.ContextVar("rescue_change_author", default=None)
+
+
+@contextlib.contextmanager
+def authored_by(author: typing.Optional[Author]) -> typing.Iterator[None]:
+    """
+    Attributes changes made to rescues within this context to `author`.
+
+    Args:
+        author: who is making the changes, None if unknown
+    """
+    token = _AUTHOR.set(author)
+    try:
+        yield
+    finally:
+        _AUTHOR.reset(token)
+
+
+@attr.dataclass(frozen=True, slots=True)
+class Change:
+    """
+    A single change to a field of a rescue
+    """
+
+    version: int
+    """ version of the rescue this change produced """
+    field: str
+    """ name of the changed field """
+    old: typing.Any
+    """ value before the change """
+    new: typing.Any
+    """ value after the change """
+    author: typing.Optional[Author] = None
+    """ who made the change, if known """
+    at: pendulum.DateTime = attr.ib(factory=lambda: pendulum.now(tz=pendulum.tz.UTC))
+    """ when the change was made """
+    item: bool = False
+    """ whether `old` and `new` are an item removed from and added to the field, not its value """
+
+
+class ChangeJournal:
+    """
+    The most recent changes made to a rescue, each a :class:`Change`.
+
+    Every change moves the journal's :attr:`version` on. Consumers remember the version they
+    last looked at and ask for what happened :meth:`since`. Only the :attr:`MAX_ENTRIES` most
+    recent changes are kept, and changes the rescue can't describe field by field are marked
+    without an entry; in either case the journal can't tell what happened since earlier
+    versions, and consumers must look at the rescue itself instead.
+    """
+
+    MAX_ENTRIES = 32
+    """ number of changes kept """
+
+    __slots__ = ["_entries", "_version", "_horizon"]
+
+    def __init__(self):
+        self._entries: typing.Optional[typing.List[Change]] = None
+        """ changes oldest first, allocated on the first change """
+        self._version = 0
+        self._horizon = 0
+        """ oldest version the journal can tell every change since """
+
+    @property
+    def version(self) -> int:
+        """
+        Version of the rescue, moved on by every change
+
+        Returns:
+            int: current version
+        """
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._entries) if self._entries else 0
+
+    def __iter__(self) -> typing.Iterator[Change]:
+        return iter(self._entries or ())
+
+    def record(self, field: str, old: typing.Any, new: typing.Any, item: bool = False) -> Change:
+        """
+        Records a change of `field` from `old` to `new`, by the current :func:`authored_by`
+        author.
+
+        Args:
+            field: name of the changed field
+            old: value before the change
+            new: value after the change
+            item: `field` is a container, `old` is an item removed from it and `new` an item
+                added to it, either None if there isn't one
+
+        Returns:
+            Change: the recorded change
+        """
+        self._version += 1
+        change = Change(self._version, field, old, new, _AUTHOR.get(), item=item)
+        if self._entries is None:
+            self._entries = []
+        self._entries.append(change)
+        if len(self._entries) > self.MAX_ENTRIES:
+            dropped = len(self._entries) - self.MAX_ENTRIES
+            self._horizon = self._entries[dropped - 1].version
+            del self._entries[:dropped]
+        return change
+
+    def mark(self) -> int:
+        """
+        Records a change that can't be described field by field.
+
+        Returns:
+            int: the new version
+        """
+        self._version += 1
+        self._horizon = self._version
+        return self._version
+
+    def since(self, version: int) -> typing.Optional[typing.List[Change]]:
+        """
+        Changes made after `version`, oldest first.
+
+        Returns:
+            List[Change]: the changes
+            None: the journal can't tell what changed since `version`
+        """
+        if version < self._horizon:
+            return None
+        if version >= self._version:
+            return []
+        # versions of kept entries are consecutive, ending at the current version
+        return self._entries[len(self._entries) - (self._version - version):]
+
+    def fields_since(self, version: int) -> typing.Optional[typing.Set[str]]:
+        """
+        Fields whose value differs from what it was at `version`.
+
+        A field changed and then changed back isn't included, unless its items changed: those
+        fields are included whatever their items add up to.
+
+        Returns:
+            Set[str]: names of the changed fields
+            None: the journal can't tell what changed since `version`
+        """
+        changes = self.since(version)
+        if changes is None:
+            return None
+        first: typing.Dict[str, typing.Any] = {}
+        last: typing.Dict[str, typing.Any] = {}
+        items: typing.Set[str] = set()
+        for change in changes:
+            if change.item:
+                items.add(change.field)
+                continue
+            first.setdefault(change.field, change.old)
+            last[change.field] = change.new
+        return items | {field for field, old in first.items() if last[field] != old}
@@ -10,15 +10,19 @@ See LICENSE.md
 
 This module is built on top of the Pydle system.
 """
+import copy
+import sys
+from collections import abc
 from contextlib import contextmanager
 import pendulum
 from io import StringIO
-from typing import Union, Optional, List, TYPE_CHECKING, Dict, Set
+from typing import Union, Optional, List, TYPE_CHECKING, Dict, Iterator, Set
 from uuid import UUID, uuid4
 
 from dateutil.tz import tzutc
 from loguru import logger
 
+from .journal import Author, ChangeJournal, authored_by
 from ..epic import Epic
 from ..mark_for_deletion import MarkForDeletion
 from ..quotation import Quotation
@@ -28,12 +32,115 @@ from ..utils import Platforms, Status, Colors, color, bold
 if TYPE_CHECKING:
     from ..board import RatBoard
 
+MODIFIABLE_FIELDS = (
+    "status",
+    "irc_nick",
+    "lang_id",
+    "platform",
+    "first_limpet",
+    "board_index",
+    "client",
+    "system",
+    "quotes",
+    "updated_at",
+    "code_red",
+    "title",
+    "mark_for_deletion",
+    "rats",
+)
+""" fields tracked by :attr:`Rescue.modified` """
+_MODIFIED_BITS = {field: 1 << index for index, field in enumerate(MODIFIABLE_FIELDS)}
+_SLOTS = {field: f"_{field}" for field in MODIFIABLE_FIELDS}
+_CONTAINERS = {"rats": "_rats", "unidentified_rats": "_unidentified_rats", "quotes": "_quotes"}
+""" containers of a rescue, which callers may change in place, by their slot """
+
+
+class ModifiedFields(abc.MutableSet):
+    """
+    Names of the fields of a rescue modified since it was last sent to the API.
+
+    This is a view over a bitset kept by the rescue, so tracking modifications costs each rescue a
+    single int rather than a set. Only :data:`MODIFIABLE_FIELDS` may be added.
+    """
+
+    __slots__ = ["_rescue"]
+
+    def __init__(self, rescue: 'Rescue'):
+        self._rescue = rescue
+
+    def __contains__(self, field: object) -> bool:
+        # pylint: disable=protected-access
+        return bool(self._rescue._modified & _MODIFIED_BITS.get(field, 0))
+
+    def __iter__(self) -> Iterator[str]:
+        bits = self._rescue._modified  # pylint: disable=protected-access
+        return (field for field, bit in _MODIFIED_BITS.items() if bits & bit)
+
+    def __len__(self) -> int:
+        return bin(self._rescue._modified).count("1")  # pylint: disable=protected-access
+
+    def add(self, field: str) -> None:
+        """
+        Marks `field` modified
+
+        Raises:
+            KeyError: `field` isn't tracked
+        """
+        self._rescue._modified |= _MODIFIED_BITS[field]  # pylint: disable=protected-access
+
+    def discard(self, field: str) -> None:
+        """ Marks `field` unmodified """
+        self._rescue._modified &= ~_MODIFIED_BITS.get(field, 0)  # pylint: disable=protected-access
+
+    def clear(self) -> None:
+        """ Marks every field unmodified """
+        self._rescue._modified = 0  # pylint: disable=protected-access
+
+    def copy(self) -> Set[str]:
+        """ The modified fields, as a set that doesn't follow further modifications """
+        return set(self)
+
+    def __repr__(self) -> str:
+        return f"ModifiedFields({set(self)!r})"
+
 
 class Rescue:  # pylint: disable=too-many-public-methods
     """
     A unique rescue
+
+    Rescues are slotted, since boards and archives hold a lot of them. Language IDs are
+    interned, platforms and statuses are enum members, and modified fields are tracked as a
+    bitset, see :class:`ModifiedFields`.
     """
 
+    __slots__ = [
+        "_modified",
+        "_journal",
+        "_watched",
+        "_platform",
+        "rat_board",
+        "_rats",
+        "_created_at",
+        "_updated_at",
+        "_api_id",
+        "_client",
+        "_irc_nick",
+        "_unidentified_rats",
+        "_system",
+        "_quotes",
+        "_epic",
+        "_code_red",
+        "_title",
+        "_first_limpet",
+        "_board_index",
+        "_mark_for_deletion",
+        "_lang_id",
+        "_status",
+        "_hash",
+    ]
+
+    _outcome: None = None
+
     def __init__(self,  # pylint: disable=too-many-locals
                  uuid: UUID = None,
                  client: Optional[str] = None,
@@ -86,13 +193,17 @@ class Rescue:  # pylint: disable=too-many-public-methods
             rats (list): identified Rat(s) assigned to rescue.
             platform(Platforms): Platform for rescue
         """
-        self.modified: Set[str] = set()
+        self._modified = 0
+        self._journal = ChangeJournal()
+        self._watched: Optional[Dict[str, object]] = None
+        """ copies of the containers read while journaling in place, see :meth:`in_place` """
 
         self._platform: Platforms = platform
         self.rat_board: 'RatBoard' = board
         self._rats = rats if rats else {}
         self._created_at: pendulum.DateTime = created_at if created_at else pendulum.now()
-        self._updated_at: pendulum.DateTime = updated_at if updated_at else pendulum.now()
+        # a new rescue was last updated as it was created
+        self._updated_at: pendulum.DateTime = updated_at if updated_at else self._created_at
         self._api_id: UUID = uuid if uuid else uuid4()
         self._client: str = client
         self._irc_nick: str = irc_nickname if irc_nickname else client
@@ -101,16 +212,17 @@ class Rescue:  # pylint: disable=too-many-public-methods
         self._quotes: list = quotes if quotes else []
         self._epic: List[Epic] = epic if epic is not None else []
         self._code_red: bool = code_red
-        self._outcome: None = None
         self._title: Union[str, None] = title
         self._first_limpet: UUID = first_limpet
         self._board_index = board_index
         self._mark_for_deletion = mark_for_deletion
-        self._board_index = board_index
-        self._lang_id = lang_id
-        self._status = status
+        self._lang_id = sys.intern(lang_id) if lang_id is not None else None
         self._hash = None
-        self.active: bool = active
+        if not isinstance(active, bool):
+            raise ValueError(f"expected bool, got type {type(active)}")
+        # as the `active` setter would, short of journaling the rescue's creation
+        self._status = Status.OPEN if active else Status.INACTIVE
+        self._modified |= _MODIFIED_BITS["status"]
 
     def __eq__(self, other) -> bool:
         """
@@ -136,10 +248,89 @@ class Rescue:  # pylint: disable=too-many-public-methods
     async def add_rat(self, rat: Rat):
         if rat.unidentified:
             # unidentified rat
-            self.unidentified_rats[rat.name.casefold()] = rat
+            old = self._unidentified_rats.get(rat.name.casefold())
+            self._unidentified_rats[rat.name.casefold()] = rat
+            self._journal.record("unidentified_rats", old, rat, item=True)
 
         else:
-            self.rats[rat.name.casefold()] = rat
+            old = self._rats.get(rat.name.casefold())
+            self._rats[rat.name.casefold()] = rat
+            self._journal.record("rats", old, rat, item=True)
+
+    @property
+    def journal(self) -> ChangeJournal:
+        """
+        Recent changes to this rescue, field by field
+
+        Returns:
+            ChangeJournal: journal of this rescue
+        """
+        return self._journal
+
+    @property
+    def revision(self) -> int:
+        """
+        Counts changes made to this rescue, so anything derived from it can tell it went stale.
+
+        This is the version of its :attr:`journal`.
+
+        Returns:
+            int: revision
+        """
+        return self._journal.version
+
+    def mark_changed(self) -> None:
+        """
+        Records a change to this rescue that can't be journaled field by field, such as changes
+        made directly to its `rats`.
+        """
+        self._journal.mark()
+
+    @property
+    def modified(self) -> ModifiedFields:
+        """
+        Fields modified since this rescue was last sent to the API
+
+        Returns:
+            ModifiedFields: modified field names
+        """
+        return ModifiedFields(self)
+
+    @contextmanager
+    def in_place(self) -> Iterator[None]:
+        """
+        Journals changes made within to the rescue's containers in place, such as
+        ``rescue.quotes[0] = quote``, which the rescue can't see as they are made.
+
+        Containers are copied when first read within, to compare with on the way out, so
+        those left alone cost nothing.
+        """
+        if self._watched is not None:
+            # already journaling
+            yield
+            return
+        self._watched = {}
+        try:
+            yield
+        finally:
+            watched, self._watched = self._watched, None
+            for field, before in watched.items():
+                after = getattr(self, _CONTAINERS[field])
+                if after != before:
+                    self._journal.record(field, before, copy.copy(after))
+
+    def _watch(self, field: str) -> None:
+        """ Copies container `field` before it is first handed out within :meth:`in_place` """
+        if self._watched is not None and field not in self._watched:
+            self._watched[field] = copy.copy(getattr(self, _CONTAINERS[field]))
+
+    def _assign(self, field: str, value) -> None:
+        """ Sets `field` to `value`, marking it modified and journaling the change """
+        slot = _SLOTS[field]
+        old = getattr(self, slot)
+        setattr(self, slot, value)
+        self._modified |= _MODIFIED_BITS[field]
+        self._journal.record(field, old, value)
 
     @property
     def status(self) -> Status:
@@ -163,9 +354,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
             TypeError: invalid `value` type
         """
         if isinstance(value, Status):
-            self._status = value
-
-            self.modified.add("status")
+            self._assign("status", value)
         else:
             raise TypeError
 
@@ -191,9 +380,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
              TypeError : value was not a string.
         """
         if isinstance(value, str):
-            self._irc_nick = value
-
-            self.modified.add("irc_nick")
+            self._assign("irc_nick", value)
         else:
             raise TypeError
 
@@ -215,9 +402,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
             value (str): new lagnuage code
         """
         if isinstance(value, str):
-            self._lang_id = value
-
-            self.modified.add("lang_id")
+            self._assign("lang_id", sys.intern(value))
         else:
             raise TypeError
 
@@ -235,9 +420,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
             value (Platforms): new platform
         """
         if isinstance(value, Platforms):
-            self._platform = value
-
-            self.modified.add("platform")
+            self._assign("platform", value)
         else:
             raise TypeError(f"expected a Platforms, got type {type(value)}")
 
@@ -268,9 +451,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
             ValueError: The value was not a UUID and could not be parsed into a valid one.
         """
         if isinstance(value, UUID):
-            self._first_limpet = value
-
-            self.modified.add("first_limpet")
+            self._assign("first_limpet", value)
         else:
             # the value wasn't a uuid, but lets try and coerce it into one.
             try:
@@ -281,9 +462,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
                 raise TypeError(f"expected UUID, got type {type(value)}")
             else:
                 # the attempt succeeded, lets assign it.
-                self._first_limpet = guid
-
-                self.modified.add("first_limpet")
+                self._assign("first_limpet", guid)
 
     @property
     def board_index(self) -> int or None:
@@ -311,9 +490,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
         # negative board indexes should not be possible, right?
         if isinstance(value, int) or value is None:
             if value is None or value >= 0:
-                self._board_index = value
-
-                self.modified.add("board_index")
+                self._assign("board_index", value)
             else:
                 raise ValueError("Value must be greater than or equal to zero,"
                                  " or None.")
@@ -353,9 +530,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
         Returns:
             None
         """
-        self._client = value
-
-        self.modified.add("client")
+        self._assign("client", value)
 
     @property
     def created_at(self) -> pendulum.DateTime:
@@ -407,14 +582,10 @@ class Rescue:  # pylint: disable=too-many-public-methods
 
         if value is None:
             # System must be nullable, so we specifically check for it
-            self._system = None
-
-            self.modified.add("system")
+            self._assign("system", None)
             return
         # for API v2.1 compatibility reasons we cast to upper case
-        self._system = value.upper()
-
-        self.modified.add("system")
+        self._assign("system", value.upper())
 
     @property
     def active(self) -> bool:
@@ -457,6 +628,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
         Returns:
             list: list of Quotation objects
         """
+        self._watch("quotes")
         return self._quotes
 
     @quotes.setter
@@ -474,9 +646,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
             None
         """
         if isinstance(value, list):
-            self._quotes = value
-
-            self.modified.add("quotes")
+            self._assign("quotes", value)
         else:
             raise ValueError(f"expected type list, got {type(value)}")
 
@@ -494,13 +664,15 @@ class Rescue:  # pylint: disable=too-many-public-methods
         Returns:
             None
         """
-        self.modified.add("quotes")
         if author:
             # set the author of the quote
-            self.quotes.append(Quotation(author=author, message=message))
+            quotation = Quotation(author=author, message=message)
         else:
             # otherwise use default
-            self.quotes.append(Quotation(message=message))
+            quotation = Quotation(message=message)
+        self._quotes.append(quotation)
+        self._modified |= _MODIFIED_BITS["quotes"]
+        self._journal.record("quotes", None, quotation, item=True)
 
     @property
     def updated_at(self):
@@ -532,9 +704,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
             raise TypeError(f"Expected pendulum.DateTime, got {type(value)}")
         if value < self.created_at:
             raise ValueError(f"{value} is older than the cases creation date!")
-        self._updated_at = value
-
-        self.modified.add("updated_at")
+        self._assign("updated_at", value)
 
     @property
     def unidentified_rats(self) -> Dict[str, Rat]:
@@ -544,6 +714,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
         Returns:
             list: unidentified rats by IRC nickname
         """
+        self._watch("unidentified_rats")
         return self._unidentified_rats
 
     @unidentified_rats.setter
@@ -562,7 +733,9 @@ class Rescue:  # pylint: disable=too-many-public-methods
         if isinstance(value, dict):
             for name, rat in value.items():
                 if isinstance(name, str) and isinstance(rat, Rat):
+                    old = self._unidentified_rats.get(name.casefold())
                     self._unidentified_rats[name.casefold()] = rat
+                    self._journal.record("unidentified_rats", old, rat, item=True)
                 else:
                     raise TypeError(f"Element '{name}' expected to be of type str"
                                     f"str, got {type(name)}")
@@ -628,9 +801,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
     @code_red.setter
     def code_red(self, value: bool):
         if isinstance(value, bool):
-            self._code_red = value
-
-            self.modified.add("code_red")
+            self._assign("code_red", value)
         else:
             raise TypeError(f"expected type bool, got {type(value)}")
 
@@ -671,9 +842,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
             TypeError: bad value type
         """
         if value is None or isinstance(value, str):
-            self._title = value
-
-            self.modified.add("title")
+            self._assign("title", value)
         else:
             raise TypeError(f"expected type None or str, got {type(value)}")
 
@@ -702,9 +871,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
             TypeError: bad value type
         """
         if isinstance(value, MarkForDeletion):
-            self._mark_for_deletion = value
-
-            self.modified.add("mark_for_deletion")
+            self._assign("mark_for_deletion", value)
         else:
             raise TypeError(f"got {type(value)} expected MarkForDeletion object")
 
@@ -716,6 +883,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
         Returns:
             list: identified rats by UUID
         """
+        self._watch("rats")
         return self._rats
 
     @rats.setter
@@ -731,9 +899,7 @@ class Rescue:  # pylint: disable=too-many-public-methods
 
         """
         if isinstance(value, dict):
-            self._rats = value
-
-            self.modified.add("rats")
+            self._assign("rats", value)
 
         else:
             raise TypeError(f"expected type list got {type(value)}")
@@ -754,10 +920,12 @@ class Rescue:  # pylint: disable=too-many-public-methods
         """
         if isinstance(rat, Rat):
             # If the rats not there let it burn.
-            del self.rats[rat.name.casefold()]
+            removed = self._rats.pop(rat.name.casefold())
+            self._journal.record("rats", removed, None, item=True)
 
         elif isinstance(rat, str):
-            del self.unidentified_rats[rat.casefold()]
+            removed = self._unidentified_rats.pop(rat.casefold())
+            self._journal.record("unidentified_rats", removed, None, item=True)
         else:
             raise TypeError("expected Union[Rat,str] got type {}", type(rat))
 
@@ -791,10 +959,12 @@ class Rescue:  # pylint: disable=too-many-public-methods
         self.marked_for_deletion = MarkForDeletion()
 
     @contextmanager
-    def change(self):
+    def change(self, author: Optional[Author] = None):
         """
         Convenience method for making safe attribute changes.
 
+        Changes made within are journaled as made by `author`.
+
         FIXME: currently just ensures rescue.updated_at is updated.
 
         TODO: replace with Board context manager once its implemented
@@ -816,8 +986,9 @@ class Rescue:  # pylint: disable=too-many-public-methods
 
             ```
         """
-        yield
-        self.updated_at = pendulum.DateTime.now()
+        with authored_by(author):
+            yield
+            self.updated_at = pendulum.DateTime.now()
 
     # TODO: to/from json
     # TODO: track changes
@@ -14,7 +14,7 @@ from __future__ import annotations  # enable forward-references
 
 import attr
 import cattr
-from typing import Union, Optional
+from typing import Any, Dict, Union, Optional, Tuple
 
 from pydle import BasicClient
 
@@ -32,6 +32,10 @@ class User:
     identified: bool
     account: Optional[str]
     nickname: str
+    permission_cache: Optional[Tuple[Any, Optional[int]]] = attr.field(
+        init=False, default=None, eq=False, repr=False
+    )
+    """ effective permission level, cached by the permissions module with the table it came from """
 
     @classmethod
     async def from_pydle(cls, bot: BasicClient, nickname: str) -> Optional[User]:
@@ -47,19 +51,24 @@ class User:
             None: user not found
         """
         # fetch the user object from pydle
-        data = bot.users.get(nickname.casefold(), None)
+        return cls.from_pydle_data(bot.users.get(nickname.casefold(), None))
 
-        # if we got a object back
-        if data:
-            result = cls(**data)
+    @classmethod
+    def from_pydle_data(cls, data: Optional[Dict[str, Any]]) -> Optional[User]:
+        """
+        Builds a user object from a pydle user record
 
-            # This needs to be an evolve as the cls is frozen.
-            # That and wanting to avoid a converter on the class itself.
+        Args:
+            data (dict): pydle's record of the user
 
-            # Inspection false-positive. suppress.
-            # noinspection PyDataclass
-            result = attr.evolve(inst=result, hostname=cls.process_vhost(result.hostname))
-            return result
+        Returns:
+            User: the user
+            None: no record was given
+        """
+        # if we got a object back
+        if data:
+            # process the vhost up front, as the cls is frozen.
+            return cls(**{**data, "hostname": cls.process_vhost(data["hostname"])})
 
     @classmethod
     def process_vhost(cls, vhost: Union[str, None]) -> Optional[str]:
@@ -12,6 +12,7 @@ See LICENSE.md
 from .autocorrect import correct_system_name
 from .ratlib import sanitize, Vector, Colors, color, bold, underline, italic, reverse, Platforms, \
     Singleton, Status, Formatting
+from .token_bucket import TokenBucket
 
 __all__ = [
     "autocorrect",
@@ -26,5 +27,6 @@ __all__ = [
     "sanitize",
     "Platforms",
     "Formatting",
-    "Status"
+    "Status",
+    "TokenBucket",
 ]
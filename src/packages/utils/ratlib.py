@@ -24,6 +24,13 @@ import humanfriendly
 
 STRIPPED_CHARS = "\t"
 
+_STRIPPED_PATTERN = re.compile(
+    r"[\x02\x1D\x1F\x1E\x11\x16\x0F" + re.escape(STRIPPED_CHARS) + r"]"
+    r"|\x03(?:[0-9]{1,2}(?:,[0-9]{1,2})?)?"
+    r"|\x04(?:[0-9a-fA-F]{6}(?:,[0-9a-fA-F]{6})?)?"
+)
+""" IRC control codes for color, bold, underline, etc. and :data:`STRIPPED_CHARS` """
+
 
 class Platforms(Enum):
     """
@@ -145,24 +152,9 @@ def sanitize(message: str) -> str:
     Returns:
         str: sanitized text string.
     """
-    sanitized_string = message
-
-    # Remove IRC control codes for color, bold, underline, etc.
-    control_code_regex = re.compile(
-        r"([\x02\x1D\x1F\x1E\x11\x16\x0F]|"
-        r"(\x03([0-9]{1,2}(,[0-9]{1,2})?)?)|"
-        r"(\x04([0-9a-fA-F]{6}(,[0-9a-fA-F]{6})?)?))"
-    )
-    sanitized_string = control_code_regex.sub("", sanitized_string)
-
-    # Remove stripped characters. (e.g. Tabs)
-    for character in sanitized_string:
-        if character in STRIPPED_CHARS:
-            sanitized_string = sanitized_string.replace(character, "")
-
-    sanitized_string = " ".join(sanitized_string.split())
-
-    return sanitized_string
+    # Control codes and stripped characters are removed in a single pass, as no control code can
+    # contain a stripped character, then whitespace is collapsed.
+    return " ".join(_STRIPPED_PATTERN.sub("", message).split())
 
 
 def strip_name(nickname: str) -> str:
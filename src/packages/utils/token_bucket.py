@@ -0,0 +1,81 @@
+"""
+token_bucket.py - Token bucket rate limiting
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import time
+import typing
+
+
+class TokenBucket:
+    """
+    Token bucket, holding up to `capacity` tokens and refilling at `rate` tokens per second.
+
+    >>> clock = iter([0.0, 0.0, 0.0, 0.0, 1.0]).__next__
+    >>> bucket = TokenBucket(rate=0.5, capacity=2, clock=clock)
+    >>> bucket.try_acquire(), bucket.try_acquire(), bucket.try_acquire()
+    (True, True, False)
+    >>> bucket.delay()
+    1.0
+    """
+
+    __slots__ = ["rate", "capacity", "_clock", "_tokens", "_updated"]
+
+    def __init__(self, rate: float, capacity: float,
+                 clock: typing.Callable[[], float] = time.monotonic):
+        """
+        Creates a full bucket
+
+        Args:
+            rate (float): tokens added per second
+            capacity (float): maximum number of tokens held, i.e. the largest burst allowed
+            clock (Callable): monotonic time source
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """ Tokens currently available """
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """
+        Takes `tokens` from the bucket, if it holds that many.
+
+        Returns:
+            bool: whether the tokens were taken
+        """
+        self._refill()
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+
+    def acquire(self, tokens: float = 1) -> None:
+        """ Takes `tokens` from the bucket, going into debt if it holds fewer """
+        self._refill()
+        self._tokens -= tokens
+
+    def delay(self, tokens: float = 1) -> float:
+        """ Seconds until the bucket holds `tokens`, 0 if it already does """
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
@@ -8,6 +8,7 @@ Licensed under the BSD 3-Clause License.
 
 See LICENSE.md
 """
+import typing
 
 import pendulum
 from jinja2 import Environment, PackageLoader, select_autoescape
@@ -16,24 +17,34 @@ from loguru import logger
 from src.packages.board import RatBoard
 from src.packages.rescue import Rescue
 from src.packages.utils.ratlib import Platforms, Status, Colors, color, bold, italic
+from .render_cache import RescueRenderCache
 from .render_flags import RescueRenderFlags
 
 
-async def render_rescue(rescue: Rescue, flags: RescueRenderFlags):
-    template = template_environment.get_template("rescue.jinja2")
+async def _render_rescue(rescue: Rescue, flags: RescueRenderFlags) -> str:
+    return await RESCUE_TEMPLATE.render_async(rescue=rescue, show_id=flags.show_uuids, flags=flags)
 
-    return await template.render_async(rescue=rescue, show_id=flags.show_uuids, flags=flags)
+
+async def render_rescue(rescue: Rescue, flags: RescueRenderFlags) -> str:
+    return await rescue_renders.render(rescue, flags)
+
+
+async def render_rescues(rescues: typing.Iterable[Rescue], flags: RescueRenderFlags) -> str:
+    """
+    Renders `rescues` a line each, as the ``!list`` command shows them.
+
+    Unchanged rescues come from the render cache, so listing an unchanged board is a join.
+    """
+    lines = [f"{await rescue_renders.render(rescue, flags)}\n" for rescue in rescues]
+    return "".join(lines)
 
 
 async def render_board(board: RatBoard, **kwargs) -> str:
-    template = template_environment.get_template("board.jinja2")
-    return await (template.render_async(board=board, **kwargs))
+    return await BOARD_TEMPLATE.render_async(board=board, **kwargs)
 
 
 async def render_quotes(rescue: Rescue) -> str:
-    template = template_environment.get_template("quotation.jinja2")
-
-    return await template.render_async(rescue=rescue)
+    return await QUOTATION_TEMPLATE.render_async(rescue=rescue)
 
 
 logger.debug("loading environment...")
@@ -42,6 +53,8 @@ template_environment = Environment(
     loader=PackageLoader("src", "templates"),
     autoescape=select_autoescape(default=False),
     enable_async=True,
+    # templates are compiled once below, rather than checked for changes on every render
+    auto_reload=False,
 )
 # inject some objects into the environment so it can be accessed within the templates
 template_environment.globals["Colors"] = Colors
@@ -55,3 +68,10 @@ template_environment.globals["render_quotes"] = render_quotes
 template_environment.globals["Platforms"] = Platforms
 template_environment.globals["now"] = pendulum.now
 template_environment.globals["tz"] = pendulum.tz
+
+RESCUE_TEMPLATE = template_environment.get_template("rescue.jinja2")
+BOARD_TEMPLATE = template_environment.get_template("board.jinja2")
+QUOTATION_TEMPLATE = template_environment.get_template("quotation.jinja2")
+
+rescue_renders = RescueRenderCache(_render_rescue)
+""" rendered rescues, see :class:`RescueRenderCache` """
@@ -0,0 +1,115 @@
+"""
+render_cache.py - memoised rescue renders
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import typing
+from collections import OrderedDict
+from uuid import UUID
+
+import prometheus_client
+
+from src.packages.rescue import Rescue
+from .render_flags import RescueRenderFlags
+
+RENDER_CACHE_LOOKUPS = prometheus_client.Counter(
+    namespace="templates",
+    name="render_cache_lookups",
+    documentation="rescue render lookups by outcome",
+    labelnames=["outcome"],
+)
+_HIT = RENDER_CACHE_LOOKUPS.labels(outcome="hit")
+_MISS = RENDER_CACHE_LOOKUPS.labels(outcome="miss")
+
+UNRENDERED_FIELDS = frozenset(
+    {"irc_nick", "lang_id", "first_limpet", "updated_at", "title", "mark_for_deletion"}
+)
+""" rescue fields no cached render shows, changing them keeps the renders """
+
+Renderer = typing.Callable[[Rescue, RescueRenderFlags], typing.Awaitable[str]]
+
+
+class _Entry:
+    __slots__ = ["rescue", "revision", "renders"]
+
+    def __init__(self, rescue: Rescue):
+        self.rescue = rescue
+        self.revision = rescue.revision
+        self.renders: typing.Dict[RescueRenderFlags, str] = {}
+
+
+class RescueRenderCache:
+    """
+    Rendered rescues, memoised per :class:`RescueRenderFlags` until the rescue changes.
+
+    A rescue's renders are dropped once its :attr:`Rescue.revision` moves on, unless its
+    :attr:`Rescue.journal` shows only :data:`UNRENDERED_FIELDS` changed since. Renders showing
+    quotes aren't cached, as quotes are rendered relative to the current time. Renders are kept
+    for the `max_rescues` most recently rendered rescues.
+    """
+
+    __slots__ = ["_render", "max_rescues", "_entries"]
+
+    def __init__(self, render: Renderer, max_rescues: int = 256):
+        """
+        Creates a render cache
+
+        Args:
+            render (Callable): coroutine function rendering a rescue with the given flags
+            max_rescues (int): number of rescues to keep renders for
+        """
+        self._render = render
+        self.max_rescues = max_rescues
+        self._entries: typing.Dict[UUID, _Entry] = OrderedDict()
+        """ entries by rescue API id, least recently used first """
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """ Forgets every render """
+        self._entries.clear()
+
+    async def render(self, rescue: Rescue, flags: RescueRenderFlags) -> str:
+        """
+        Renders `rescue` with `flags`, from the cache if it hasn't changed since.
+
+        Args:
+            rescue (Rescue): rescue to render
+            flags (RescueRenderFlags): how to render it
+
+        Returns:
+            str: rendered rescue
+        """
+        if flags.show_quotes:
+            return await self._render(rescue, flags)
+
+        key = rescue.api_id
+        entry = self._entries.get(key)
+        # the board may replace a rescue with another object for the same case
+        if entry is None or entry.rescue is not rescue:
+            entry = self._entries[key] = _Entry(rescue)
+            if len(self._entries) > self.max_rescues:
+                self._entries.popitem(last=False)
+        elif entry.revision != rescue.revision:
+            changes = rescue.journal.since(entry.revision)
+            if changes is None or any(change.field not in UNRENDERED_FIELDS for change in changes):
+                entry.renders.clear()
+            entry.revision = rescue.revision
+        self._entries.move_to_end(key)
+
+        text = entry.renders.get(flags)
+        if text is not None:
+            _HIT.inc()
+            return text
+        _MISS.inc()
+        text = await self._render(rescue, flags)
+        # don't keep a render of a rescue that changed while rendering
+        if entry.revision == rescue.revision:
+            entry.renders[flags] = text
+        return text
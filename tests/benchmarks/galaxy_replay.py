@@ -0,0 +1,298 @@
+"""
+galaxy_replay.py - Systems API replay server and Galaxy workload driver.
+
+Serves a recorded corpus of Systems API responses from a local HTTP server with configurable
+latency, and drives ratsignal-shaped workloads through :class:`Galaxy` against it, reporting
+throughput, latency percentiles and the number of upstream requests and connections made.
+
+Run directly to benchmark with custom parameters::
+
+    python -m tests.benchmarks.galaxy_replay --latency 0.05 --rate 20 --signals 500
+
+or with ``--record URL`` to refresh the corpus from a live Systems API.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import argparse
+import asyncio
+import collections
+import json
+import math
+import random
+import time
+import typing
+from pathlib import Path
+
+import aiohttp
+import attr
+from aiohttp import web
+
+from src.packages.galaxy import Galaxy
+from src.packages.galaxy.circuit_breaker import CircuitBreaker
+from src.packages.galaxy.galaxy_cache import GalaxyCache
+
+CORPUS = Path(__file__).with_name("galaxy_corpus.json")
+
+SYSTEMS = (
+    "Fuelum",
+    "Angrbonii",
+    "Beagle Point",
+    "Eorld Pri QI-Z d1-4302",
+    "Prae Flyi RO-I b29-113",
+    "Chua Eohn CT-F d12-2",
+    "Fualun",
+)
+""" systems signalled in from by the default workload, the last one is unknown to the API """
+
+
+class ReplayServer:
+    """
+    Local HTTP server answering requests from a recorded response corpus.
+
+    Corpus entries match on path and decoded query parameters. An entry with a ``null`` query
+    matches any request to its path not matched more specifically. Unmatched requests are
+    answered with a 404, or forwarded to and recorded from `upstream` if one is given.
+    """
+
+    def __init__(
+        self,
+        corpus: typing.List[typing.Dict],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        upstream: typing.Optional[str] = None,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            corpus (list): recorded entries, see :data:`CORPUS`
+            latency (float): mean time to hold each response, in seconds
+            jitter (float): maximum deviation from `latency`, in seconds
+            upstream (str): base url of a Systems API to record unmatched requests from
+            seed (int): latency jitter seed
+        """
+        self.corpus = list(corpus)
+        self.latency = latency
+        self.jitter = jitter
+        self.upstream = upstream
+        self._rng = random.Random(seed)
+        self._exact: typing.Dict[typing.Tuple, typing.Dict] = {}
+        self._fallback: typing.Dict[str, typing.Dict] = {}
+        for entry in self.corpus:
+            self._index(entry)
+        self._runner: typing.Optional[web.AppRunner] = None
+        self.url = ""
+        self.requests = 0
+        self.paths: typing.Counter[str] = collections.Counter()
+        self.peers: typing.Set[typing.Tuple] = set()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    @classmethod
+    def from_file(cls, path: Path = CORPUS, **kwargs) -> "ReplayServer":
+        """ Creates a server replaying the corpus stored at `path` """
+        return cls(json.loads(path.read_text(encoding="utf8")), **kwargs)
+
+    def save(self, path: Path = CORPUS) -> None:
+        """ Writes the corpus, including anything recorded, to `path` """
+        path.write_text(
+            "[\n" + ",\n".join(json.dumps(entry) for entry in self.corpus) + "\n]\n",
+            encoding="utf8",
+        )
+
+    @property
+    def connections(self) -> int:
+        """ Number of distinct client connections accepted """
+        return len(self.peers)
+
+    def reset_stats(self) -> None:
+        """ Zeroes the request and connection counters """
+        self.requests = 0
+        self.paths.clear()
+        self.peers.clear()
+        self.peak_in_flight = 0
+
+    def _index(self, entry: typing.Dict) -> None:
+        if entry["query"] is None:
+            self._fallback[entry["path"]] = entry
+        else:
+            self._exact[(entry["path"], frozenset(entry["query"].items()))] = entry
+
+    async def __aenter__(self) -> "ReplayServer":
+        app = web.Application()
+        app.router.add_route("GET", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}/"
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.paths[request.path] += 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.latency or self.jitter:
+                delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+                await asyncio.sleep(max(0.0, delay))
+            query = dict(request.query)
+            entry = self._exact.get((request.path, frozenset(query.items())))
+            if entry is None and self.upstream:
+                entry = await self._record(request.path, query)
+            if entry is None:
+                entry = self._fallback.get(request.path)
+            if entry is None:
+                return web.json_response({"errors": ["not in corpus"]}, status=404)
+            return web.json_response(entry["body"], status=entry["status"])
+        finally:
+            self.in_flight -= 1
+
+    async def _record(self, path: str, query: typing.Dict[str, str]) -> typing.Dict:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{self.upstream.rstrip('/')}{path}", params=query) as response:
+                entry = {
+                    "path": path,
+                    "query": query,
+                    "status": response.status,
+                    "body": json.loads(await response.text()),
+                }
+        self.corpus.append(entry)
+        self._index(entry)
+        return entry
+
+
+@attr.dataclass
+class WorkloadReport:
+    """ Outcome of a single :func:`run_workload` """
+
+    signals: int
+    elapsed: float
+    latencies: typing.List[float]
+    errors: int
+    upstream_requests: int
+    connections: int
+    peak_concurrency: int
+
+    @property
+    def throughput(self) -> float:
+        """ Completed signals per second """
+        return self.signals / self.elapsed if self.elapsed else math.inf
+
+    def percentile(self, percentile: float) -> float:
+        """ Nearest-rank latency percentile, in seconds """
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(percentile * len(ordered)) - 1)]
+
+    def __str__(self) -> str:
+        return (
+            f"{self.signals} signals in {self.elapsed:.2f}s ({self.throughput:.1f}/s), "
+            f"p50 {self.percentile(0.5) * 1000:.1f}ms, p99 {self.percentile(0.99) * 1000:.1f}ms, "
+            f"{self.errors} errors, {self.upstream_requests} upstream requests over "
+            f"{self.connections} connections, peak {self.peak_concurrency} concurrent"
+        )
+
+
+async def handle_signal(galaxy: Galaxy, system_name: str) -> None:
+    """ The galaxy lookups ratmama performs for a single incoming signal """
+    system = await galaxy.find_system_by_name(system_name, full_details=True)
+    if system is not None:
+        await galaxy.find_nearest_landmark(system)
+
+
+async def run_workload(
+    galaxy: Galaxy,
+    server: ReplayServer,
+    signals: int,
+    rate: float,
+    systems: typing.Sequence[str] = SYSTEMS,
+    seed: int = 0,
+) -> WorkloadReport:
+    """
+    Drives `signals` ratsignals through `galaxy`, arriving as a Poisson process.
+
+    Args:
+        galaxy (Galaxy): galaxy under test, pointed at `server`
+        server (ReplayServer): the server `galaxy` talks to, for request accounting
+        signals (int): number of signals to send
+        rate (float): mean signals per second
+        systems (Sequence[str]): systems to signal in from, chosen uniformly
+        seed (int): seed for arrival times and system choice
+
+    Returns:
+        WorkloadReport: the measured outcome
+    """
+    rng = random.Random(seed)
+    latencies: typing.List[float] = []
+    errors = 0
+
+    async def signal(name: str) -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            await handle_signal(galaxy, name)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+
+    server.reset_stats()
+    started = time.perf_counter()
+    tasks = []
+    for _ in range(signals):
+        tasks.append(asyncio.ensure_future(signal(rng.choice(systems))))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+
+    return WorkloadReport(
+        signals=signals,
+        elapsed=time.perf_counter() - started,
+        latencies=latencies,
+        errors=errors,
+        upstream_requests=server.requests,
+        connections=server.connections,
+        peak_concurrency=server.peak_in_flight,
+    )
+
+
+def make_galaxy(server: ReplayServer, **cache_kwargs) -> Galaxy:
+    """ Creates a Galaxy with a fresh, in-memory cache pointed at `server` """
+    return Galaxy(server.url, cache=GalaxyCache(**cache_kwargs), breaker=CircuitBreaker())
+
+
+async def main(arguments: argparse.Namespace) -> None:
+    """ Runs a cold and a warm workload and prints their reports """
+    server = ReplayServer.from_file(
+        arguments.corpus,
+        latency=arguments.latency,
+        jitter=arguments.jitter,
+        upstream=arguments.record,
+    )
+    async with server:
+        galaxy = make_galaxy(server)
+        print("cold:", await run_workload(galaxy, server, arguments.signals, arguments.rate))
+        print("warm:", await run_workload(galaxy, server, arguments.signals, arguments.rate))
+    if arguments.record:
+        server.save(arguments.corpus)
+
+
+if __name__ == "__main__":
+    PARSER = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    PARSER.add_argument("--latency", type=float, default=0.05, help="mean response latency (s)")
+    PARSER.add_argument("--jitter", type=float, default=0.02, help="latency jitter (s)")
+    PARSER.add_argument("--rate", type=float, default=20, help="mean signals per second")
+    PARSER.add_argument("--signals", type=int, default=200, help="signals per workload")
+    PARSER.add_argument("--corpus", type=Path, default=CORPUS, help="response corpus to replay")
+    PARSER.add_argument("--record", metavar="URL", help="record unmatched requests from URL")
+    asyncio.get_event_loop().run_until_complete(main(PARSER.parse_args()))
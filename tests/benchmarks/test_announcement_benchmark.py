@@ -0,0 +1,58 @@
+"""
+test_announcement_benchmark.py - benchmarks parsing RatMama announcements, splitter vs regex.
+
+Benchmarks are not part of the default test paths, run them explicitly with
+``pytest tests/benchmarks -s``.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import time
+
+import pytest
+
+from src.packages.ratmama.announcement import parse_announcement
+from src.packages.ratmama.ratmama_parser import RATMAMA_REGEX
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.ratsignal_parse]
+
+PARSES = 5000
+
+MESSAGES = {
+    "plain": "Incoming Client: SomeClient - System: Fuelum - Platform: PC - O2: OK"
+             " - Language: English (en-US)",
+    "nickname": "Incoming Client: Some Client - System: Col 285 Sector AB-C D1-23 system"
+                " - Platform: XB - O2: NOT OK - Language: German (de-DE) - IRC Nickname: Some_Client",
+    "malformed": "Incoming Client: SomeClient - System: Fuelum - Platform: Play Station - O2: OK"
+                 " - Language: English (en-US)",
+    "separators": "Incoming Client: " + " - ".join(["a"] * 60),
+    # near the most IRC carries in a message, and the worst of it for the regex
+    "labels": "Incoming Client: a" + " - System: a - Platform: a" * 18 + " - O2: a",
+}
+
+
+@pytest.mark.parametrize("name", sorted(MESSAGES))
+def test_parse(name):
+    message = MESSAGES[name]
+
+    started = time.perf_counter()
+    for _ in range(PARSES):
+        result = RATMAMA_REGEX.fullmatch(message)
+        if result is not None:
+            result.groupdict()
+    regex_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(PARSES):
+        parse_announcement(message)
+    splitter_elapsed = time.perf_counter() - started
+
+    print(
+        f"\n{name}: regex {regex_elapsed / PARSES * 1e6:.1f}us, "
+        f"splitter {splitter_elapsed / PARSES * 1e6:.1f}us per parse "
+        f"({regex_elapsed / splitter_elapsed:.1f}x)"
+    )
@@ -0,0 +1,48 @@
+"""
+test_case_archive_benchmark.py - benchmarks looking up closed cases in the archive.
+
+Benchmarks are not part of the default test paths, run them explicitly with
+``pytest tests/benchmarks -s``.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import time
+from uuid import uuid4
+
+import pytest
+
+from src.packages.board import CaseArchive
+from src.packages.rescue import Rescue
+from src.packages.utils import Status
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.ratboard]
+
+CASES = 2000
+LOOKUPS = 20000
+
+
+def test_lookup():
+    archive = CaseArchive(max_bytes=64 * 1024 * 1024)
+    rescues = []
+    for index in range(CASES):
+        rescue = Rescue(uuid4(), client=f"client_{index}", system="Sol", board_index=index % 15)
+        rescue.status = Status.CLOSED
+        archive.add(rescue)
+        rescues.append(rescue)
+
+    for name, keys in (
+        ("api id", [rescue.api_id for rescue in rescues]),
+        ("client", [rescue.client.upper() for rescue in rescues]),
+    ):
+        started = time.perf_counter()
+        for lookup in range(LOOKUPS):
+            archive.get(keys[lookup % CASES])
+        elapsed = time.perf_counter() - started
+        print(f"\n{name}: {elapsed / LOOKUPS * 1e6:.2f}us per lookup of {CASES} cases")
+
+    print(f"{CASES} cases take an estimated {archive.memory / 1024:.0f}KiB")
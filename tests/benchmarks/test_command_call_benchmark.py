@@ -0,0 +1,50 @@
+"""
+test_command_call_benchmark.py - benchmarks invoking registered commands through their hooks.
+
+Benchmarks are not part of the default test paths, run them explicitly with
+``pytest tests/benchmarks -s``.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import time
+
+import pytest
+
+from src.packages.commands.rat_command import Command, CommandRegistry
+from src.packages.context import Context
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.commands, pytest.mark.asyncio]
+
+CALLS = 20000
+
+
+async def _noop(context: Context):
+    return None
+
+
+@pytest.mark.parametrize("hooks", (0, 1, 4))
+async def test_command_call(bot_fx, hooks):
+    registry = CommandRegistry()
+    registry.register(Command(underlying=_noop, aliases=("noop",)), ["noop"])
+    registry.register(
+        Command(underlying=_noop, aliases=("dm",), require_direct_message=True), ["dm"]
+    )
+    for _ in range(hooks):
+        registry.add_pre_hook(lambda cmd, context: None)
+    if hooks:
+        registry.add_post_hook(lambda cmd, context, error: None, "noop")
+
+    for alias in ("noop", "dm"):
+        ctx = await Context.from_message(bot_fx, "#unit_test", "unit_test", f"!{alias}")
+        cmd = registry[alias]
+        started = time.perf_counter()
+        for _ in range(CALLS):
+            await cmd(ctx)
+        elapsed = time.perf_counter() - started
+        # denied calls stop at the guard and only pay for the reply
+        print(f"\n{alias} with {hooks} hooks: {elapsed / CALLS * 1e6:.1f}us per call")
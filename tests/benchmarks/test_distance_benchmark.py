@@ -0,0 +1,59 @@
+"""
+test_distance_benchmark.py - benchmarks vectorised star system distances.
+
+Benchmarks are not part of the default test paths, run them explicitly with
+``pytest tests/benchmarks -s``.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import random
+import time
+
+import numpy
+import pytest
+
+from src.packages.galaxy import PositionTable, StarSystem
+from src.packages.utils import Vector
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.galaxy]
+
+SIZE = 1000
+
+
+def _random_systems(rng: random.Random, count: int):
+    return [
+        StarSystem(
+            name=f"system {index}",
+            position=Vector(
+                rng.uniform(-42000, 42000), rng.uniform(-3000, 3000), rng.uniform(-20000, 70000)
+            ),
+        )
+        for index in range(count)
+    ]
+
+
+def test_distance_matrix_1000x1000():
+    rng = random.Random(3)
+    origins = _random_systems(rng, SIZE)
+    destinations = _random_systems(rng, SIZE)
+
+    started = time.perf_counter()
+    pairwise = [[origin.distance(other) for other in destinations] for origin in origins]
+    pairwise_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matrix = PositionTable(origins).distance_matrix(PositionTable(destinations))
+    vectorised_elapsed = time.perf_counter() - started
+
+    print(
+        f"\n{SIZE}x{SIZE} distances: pairwise {pairwise_elapsed * 1000:.1f}ms, "
+        f"vectorised {vectorised_elapsed * 1000:.1f}ms "
+        f"({pairwise_elapsed / vectorised_elapsed:.0f}x)"
+    )
+    assert numpy.allclose(matrix, pairwise, rtol=0, atol=0.01)
+    assert vectorised_elapsed < pairwise_elapsed
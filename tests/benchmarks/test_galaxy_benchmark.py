@@ -0,0 +1,36 @@
+"""
+test_galaxy_benchmark.py - benchmarks Galaxy lookups against replayed Systems API responses.
+
+Benchmarks are not part of the default test paths, run them explicitly with
+``pytest tests/benchmarks -s``. See :mod:`galaxy_replay` for custom workloads.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import pytest
+
+from .galaxy_replay import ReplayServer, make_galaxy, run_workload
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.galaxy]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("latency", (0.0, 0.05))
+async def test_ratsignal_workload(latency: float):
+    async with ReplayServer.from_file(latency=latency, jitter=latency / 2) as server:
+        galaxy = make_galaxy(server)
+
+        cold = await run_workload(galaxy, server, signals=100, rate=50)
+        print(f"\nlatency {latency * 1000:.0f}ms, cold: {cold}")
+        assert not cold.errors
+        assert cold.upstream_requests
+
+        warm = await run_workload(galaxy, server, signals=100, rate=50, seed=1)
+        print(f"latency {latency * 1000:.0f}ms, warm: {warm}")
+        assert not warm.errors
+        # landmark searches are not cached, everything else should be.
+        assert set(server.paths) <= {"/landmark"}, "a warm cache should not look systems up"
@@ -0,0 +1,114 @@
+"""
+test_on_message_benchmark.py - benchmarks the client's handling of non-command chatter.
+
+Benchmarks are not part of the default test paths, run them explicitly with
+``pytest tests/benchmarks -s``.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import random
+import time
+import typing
+
+import attr
+import pytest
+
+from src.packages.context import Context
+from src.packages.context.context import _split_message
+from src.packages.user import User
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.user, pytest.mark.asyncio]
+
+MESSAGES = 5000
+CHATTER = (
+    "o7 all, quiet evening so far",
+    "anyone up for a wing in Fuelum?",
+    "my carrier is parked at Beagle Point again",
+)
+
+
+async def test_on_message_chatter(bot_fx, monkeypatch):
+    lookups = []
+    get_user = bot_fx.get_user
+    monkeypatch.setattr(
+        bot_fx, "get_user", lambda nickname: lookups.append(nickname) or get_user(nickname)
+    )
+
+    started = time.perf_counter()
+    for index in range(MESSAGES):
+        await bot_fx.on_message("#unit_test", "unit_test", CHATTER[index % len(CHATTER)])
+    elapsed = time.perf_counter() - started
+
+    # what every message used to pay before users were resolved lazily
+    started = time.perf_counter()
+    for _ in range(MESSAGES):
+        await User.from_pydle(bot_fx, "unit_test")
+    eager_elapsed = time.perf_counter() - started
+
+    print(
+        f"\n{MESSAGES} chatter messages: {elapsed / MESSAGES * 1e6:.1f}us per message, "
+        f"eager User construction would add {eager_elapsed / MESSAGES * 1e6:.1f}us "
+        f"({eager_elapsed / elapsed:.0%})"
+    )
+    assert not lookups, "chatter must not resolve its sender"
+
+
+@attr.dataclass
+class _ValidatedContext:
+    """ The attrs context messages were parsed into before, kept here as the baseline """
+
+    bot: typing.Any
+    user: typing.Any
+    target: str = attr.ib(validator=attr.validators.instance_of(str))
+    words: typing.List[str] = attr.ib(
+        validator=attr.validators.deep_iterable(
+            member_validator=attr.validators.instance_of(str),
+            iterable_validator=attr.validators.instance_of(list),
+        )
+    )
+    words_eol: typing.List[str] = attr.ib(
+        validator=attr.validators.deep_iterable(
+            member_validator=attr.validators.instance_of(str),
+            iterable_validator=attr.validators.instance_of(list),
+        )
+    )
+    prefixed: bool = attr.ib(validator=attr.validators.instance_of(bool), default=False)
+    sender: typing.Optional[str] = None
+
+
+def _eager_split(string: str):
+    words = string.split()
+    return words, [" ".join(words[i:]) for i, _ in enumerate(words)]
+
+
+def _chatter_corpus(count: int) -> typing.List[str]:
+    rng = random.Random(34)
+    vocabulary = "o7 fuel rats carrier jump range wing beacon friend plz thanks lol ok".split()
+    return [" ".join(rng.choices(vocabulary, k=rng.randint(1, 40))) for _ in range(count)]
+
+
+async def test_context_construction(bot_fx):
+    corpus = _chatter_corpus(MESSAGES)
+
+    started = time.perf_counter()
+    for message in corpus:
+        words, words_eol = _eager_split(message)
+        _ValidatedContext(bot_fx, None, "#unit_test", words, words_eol, sender="unit_test")
+    before = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for message in corpus:
+        await Context.from_message(bot_fx, "#unit_test", "unit_test", message)
+    after = time.perf_counter() - started
+
+    print(
+        f"\n{MESSAGES} chatter contexts: validated {before / MESSAGES * 1e6:.1f}us, "
+        f"lazy {after / MESSAGES * 1e6:.1f}us per message ({before / after:.1f}x)"
+    )
+    for message in corpus[:100]:
+        assert list(_split_message(message)[1]) == _eager_split(message)[1]
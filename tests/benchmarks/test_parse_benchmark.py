@@ -0,0 +1,58 @@
+"""
+test_parse_benchmark.py - benchmarks parsing command arguments, compiled grammars vs pyparsing.
+
+Benchmarks are not part of the default test paths, run them explicitly with
+``pytest tests/benchmarks -s``.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import time
+
+import pytest
+
+from src.commands import case_management
+from ..unit.test_grammar import REFERENCE
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.patterns]
+
+PARSES = 5000
+
+COMMANDS = {
+    "ASSIGN_PATTERN": "!assign 12 SomeRat Some[Other]Rat yet_another",
+    "ACTIVE_PATTERN": "!active @bb0a1dc6-3bc5-4d09-b3cd-b17cd50f3a16 because reasons",
+    "CLEAR_PATTERN": "!clear SomeClient SomeRat",
+    "GRAB_PATTERN": "!grab #4 /fuel \\/ low/",
+    "SUB_CMD_PATTERN": "!sub 4 2 replacement quote text",
+    "INJECT_PATTERN": "!inject SomeClient xbox one cr 12:45 out of fuel near Sol",
+    "REOPEN_PATTERN": "!reopen bb0a1dc6-3bc5-4d09-b3cd-b17cd50f3a16",
+}
+
+
+@pytest.mark.parametrize("name", sorted(COMMANDS))
+def test_parse(name):
+    text = COMMANDS[name]
+    reference = REFERENCE[name]
+    compiled = getattr(case_management, name)
+
+    # commands used to match, then parse again
+    started = time.perf_counter()
+    for _ in range(PARSES):
+        assert reference.matches(text)
+        reference.parseString(text)
+    pyparsing_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(PARSES):
+        assert compiled.parse(text) is not None
+    compiled_elapsed = time.perf_counter() - started
+
+    print(
+        f"\n{name}: pyparsing {pyparsing_elapsed / PARSES * 1e6:.1f}us, "
+        f"compiled {compiled_elapsed / PARSES * 1e6:.1f}us per parse "
+        f"({pyparsing_elapsed / compiled_elapsed:.0f}x)"
+    )
@@ -0,0 +1,74 @@
+"""
+test_render_benchmark.py - benchmarks rendering `!list` for a full board.
+
+Benchmarks are not part of the default test paths, run them explicitly with
+``pytest tests/benchmarks -s``.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import time
+from uuid import uuid4
+
+import pytest
+
+from src.packages.rat import Rat
+from src.packages.rescue import Rescue
+from src.packages.utils import Platforms
+from src.templates import RESCUE_TEMPLATE, RescueRenderFlags, render_rescues, rescue_renders
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.templates, pytest.mark.asyncio]
+
+CASES = 30
+RENDERS = 200
+
+
+async def _board():
+    rescues = []
+    for index in range(CASES):
+        rescue = Rescue(
+            uuid4(),
+            client=f"client{index}",
+            system="col 285 sector ab-c d1-23",
+            board_index=index,
+            platform=list(Platforms)[index % 3],
+            code_red=index % 4 == 0,
+        )
+        for rat in range(index % 4):
+            await rescue.add_rat(Rat(uuid4(), name=f"rat{index}_{rat}"))
+        rescues.append(rescue)
+    return rescues
+
+
+@pytest.mark.parametrize("word", ("-", "-r@"))
+async def test_list_render(word):
+    rescues = await _board()
+    flags = RescueRenderFlags.from_word(word)
+
+    # rendering every rescue through the template, as `!list` used to
+    started = time.perf_counter()
+    for _ in range(RENDERS):
+        "".join([f"{await RESCUE_TEMPLATE.render_async(rescue=rescue, flags=flags)}\n"
+                 for rescue in rescues])
+    template_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(RENDERS):
+        rescue_renders.clear()
+        await render_rescues(rescues, flags)
+    cold_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(RENDERS):
+        await render_rescues(rescues, flags)
+    cached_elapsed = time.perf_counter() - started
+
+    print(
+        f"\n{CASES} cases, !list {word}: template {template_elapsed / RENDERS * 1e3:.2f}ms, "
+        f"cold cache {cold_elapsed / RENDERS * 1e3:.2f}ms, "
+        f"unchanged board {cached_elapsed / RENDERS * 1e3:.3f}ms per render"
+    )
@@ -0,0 +1,63 @@
+"""
+test_rescue_memory_benchmark.py - benchmarks the memory held by a large board of rescues.
+
+Benchmarks are not part of the default test paths, run them explicitly with
+``pytest tests/benchmarks -s``.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import tracemalloc
+from uuid import uuid4
+
+import pytest
+
+from src.packages.epic import Epic
+from src.packages.rat import Rat
+from src.packages.rescue import Rescue
+from src.packages.utils import Platforms, Status
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.rescue]
+
+RESCUES = 10_000
+
+
+def _rescues():
+    platforms = list(Platforms)
+    rescues = []
+    for index in range(RESCUES):
+        rescue = Rescue(
+            uuid4(),
+            client=f"client{index}",
+            system="col 285 sector ab-c d1-23",
+            board_index=index,
+            platform=platforms[index % len(platforms)],
+            lang_id="en-US",
+            status=Status.OPEN,
+        )
+        rescue.add_quote(f"client{index} is out of fuel", author="RatMama[BOT]")
+        rescue.rats[f"rat{index}"] = Rat(uuid4(), name=f"rat{index}", platform=rescue.platform)
+        if index % 100 == 0:
+            rescue.epic.append(Epic(uuid4(), "epic save", rescue, None))
+        rescues.append(rescue)
+    return rescues
+
+
+def test_rescue_memory():
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        rescues = _rescues()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(rescues) == RESCUES
+    print(
+        f"\n{RESCUES} rescues: {(after - before) / 2 ** 20:.2f}MiB, "
+        f"{(after - before) / RESCUES:.0f} bytes per rescue"
+    )
@@ -0,0 +1,44 @@
+"""
+test_sanitize_benchmark.py - benchmarks sanitizing inbound IRC lines.
+
+Benchmarks are not part of the default test paths, run them explicitly with
+``pytest tests/benchmarks -s``.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import random
+import time
+
+import pytest
+
+from src.packages.utils import sanitize
+from ..unit.test_ratlib import _reference_sanitize
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.ratlib]
+
+LINES = 20000
+
+
+def _irc_lines(count: int):
+    rng = random.Random(35)
+    pieces = ("o7", "fuel", "rats", "\x0304red\x03", "\x02bold\x02", "\t", "   ", "\x0412ab3F",
+              "carrier", "jump", "\x1Ditalic\x1D", "Fuelum")
+    return ["".join(rng.choices(pieces, k=rng.randint(1, 30))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("name, implementation", (("reference", _reference_sanitize),
+                                                  ("precompiled", sanitize)))
+def test_sanitize_throughput(name, implementation):
+    lines = _irc_lines(LINES)
+
+    started = time.perf_counter()
+    for line in lines:
+        implementation(line)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{name} sanitize: {LINES / elapsed:,.0f} lines/s")
@@ -106,10 +106,17 @@ class MockBot(MechaClient):
             }
         }
 
-    async def message(self, target: str, message: str):
+    async def on_message(self, channel, user, message: str):
+        """Handles the message to completion, rather than just dispatching it"""
+        result = await super().on_message(channel, user, message)
+        await self.dispatcher.join()
+        return result
+
+    async def message(self, target: str, message: str, priority=None):
         self.sent_messages.append({
             "target": target,
-            "message": message
+            "message": message,
+            "priority": priority,
         })
 
     async def whois(self, name: str) -> dict:
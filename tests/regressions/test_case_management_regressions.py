@@ -2,6 +2,7 @@ import pytest
 
 from src.packages.commands import trigger
 from src.packages.context import Context
+from src.packages.dispatch import Priority
 
 pytestmark = [pytest.mark.regressions, pytest.mark.asyncio]
 
@@ -44,8 +45,8 @@ async def test_spark_239(bot_fx, rescue_sop_fx, monkeypatch):
     context = await Context.from_message(bot=bot_fx, channel="#fuelrats", sender="some_ov",
                                          message=assign_payload)
     # since this test is against an unidentified rat, this is only gunna work in drill mode.
-    # drill mode can be faked by setting DRILL_MODE on context.
-    monkeypatch.setattr(context, "DRILL_MODE", True)
+    # drill mode can be faked by setting DRILL_MODE on Context.
+    monkeypatch.setattr(Context, "DRILL_MODE", True)
 
     await trigger(context)
 
@@ -70,3 +71,16 @@ async def test_spark_242(bot_fx):
     # created when the inject is repeated.
     await trigger(ctx=ctx)
     assert len(bot_fx.board) == pre_len + 1, "That wasn't supposed to create *another* rescue."
+
+
+async def test_list_output_is_not_droppable(bot_fx, rescue_sop_fx):
+    """
+    Verifies `!list` replies aren't sent as chatter, which a throttled bot drops once stale.
+    """
+    await bot_fx.board.append(rescue_sop_fx)
+    context = await Context.from_message(bot=bot_fx, channel="#fuelrats", sender="some_ov",
+                                         message="!list")
+    await trigger(context)
+
+    assert bot_fx.sent_messages
+    assert all(sent["priority"] is Priority.COMMAND for sent in bot_fx.sent_messages)
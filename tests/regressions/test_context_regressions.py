@@ -9,26 +9,23 @@ from src.commands.case_management import ASSIGN_PATTERN
 from src.packages.commands import rat_command
 from src.packages.context.context import Context
 from src.packages.commands import command
-from src.packages.user.user import User
 from loguru import logger
 pytestmark = [mark.regressions, mark.asyncio]
 
 
-async def test_on_command_double_prefix(bot_fx, monkeypatch, context_fx, async_callable_fx):
+async def test_on_command_double_prefix(bot_fx, monkeypatch, context_fx):
     """
     Verifies that when commands are prefixed with the command prefix during registration,
     they remain invokable during runtime.
     """
-    async_callable_fx.return_value = context_fx.user
-
-    # patch the whois lookup as its outside the scope of our test.
-    monkeypatch.setattr(User, "from_pydle", async_callable_fx)
+    # patch the user lookup as its outside the scope of our test.
+    monkeypatch.setattr(bot_fx, "get_user", lambda nickname: context_fx.user)
 
     ctx = await Context.from_message(bot_fx, "#unit_test", context_fx.user.nickname,
 
                                      f"{Context.PREFIX}{Context.PREFIX}boom")
 
-    monkeypatch.setattr(rat_command, "_registered_commands", dict())
+    monkeypatch.setattr(rat_command, "_registered_commands", rat_command.CommandRegistry())
 
     @command(f"{Context.PREFIX}boom")
     async def cmd_boom(context: Context):
@@ -1,8 +1,13 @@
+import json
+from pathlib import Path
+
 import pytest
 
+from src.packages.ratmama.announcement import parse_announcement
 from src.packages.utils import Platforms
 
 from src.packages.context import Context
+from ..unit.test_announcement import reference_parse
 
 pytestmark = [pytest.mark.asyncio, pytest.mark.regressions]
 
@@ -13,3 +18,15 @@ async def test_spark_277(bot_fx):
     payload = "Incoming Client: FalsePotato - System: Avici - Platform: PC - O2: OK - Language: English (en-US)"
     await bot_fx.on_message(channel="#ratchat", user="some_announcer", message=payload)
 
+
+CORPUS = json.loads(Path(__file__).with_name("announcement_corpus.json").read_text("utf-8"))
+""" announcements, odd and malformed, RatMama has sent or might """
+
+
+@pytest.mark.parametrize("payload", CORPUS)
+async def test_announcement_corpus(bot_fx, payload: str):
+    # parses just as the regex the announcement handler used to, if at all
+    assert parse_announcement(payload) == reference_parse(payload)
+
+    # and the bot takes it in its stride
+    await bot_fx.on_message(channel="#ratchat", user="some_announcer", message=payload)
@@ -168,6 +168,37 @@ async def test_grab_create(bot_fx, random_string_fx):
     assert len(bot_fx.board) == starting_rescue_len, "case was unexpectedly created."
 
 
+async def test_grab_multiple_lines(bot_fx, rescue_sop_fx):
+    await bot_fx.board.append(rescue_sop_fx)
+    for line in ("hi", "i am in fuelum", "on pc"):
+        await bot_fx.on_message("#fuelrats", rescue_sop_fx.irc_nickname, line)
+
+    ctx = await Context.from_message(
+        bot_fx, "#ratchat", "some_ov", f"!grab {rescue_sop_fx.client} 2"
+    )
+    await trigger(ctx)
+    quotes = [quote.message for quote in bot_fx.board[rescue_sop_fx.api_id].quotes]
+    assert quotes[-2:] == ["i am in fuelum", "on pc"]
+
+
+async def test_grab_pattern(bot_fx, rescue_sop_fx):
+    await bot_fx.board.append(rescue_sop_fx)
+    for line in ("I'm in Fuelum", "on pc", "please hurry"):
+        await bot_fx.on_message("#fuelrats", rescue_sop_fx.irc_nickname, line)
+
+    ctx = await Context.from_message(
+        bot_fx, "#ratchat", "some_ov", f"!grab {rescue_sop_fx.client} /fuelum/"
+    )
+    await trigger(ctx)
+    assert bot_fx.board[rescue_sop_fx.api_id].quotes[-1].message == "I'm in Fuelum"
+
+    ctx = await Context.from_message(
+        bot_fx, "#ratchat", "some_ov", f"!grab {rescue_sop_fx.client} /xbox/"
+    )
+    await trigger(ctx)
+    assert "cannot comply" in bot_fx.sent_messages[-1]["message"].casefold()
+
+
 @pytest.mark.parametrize("platform_str", ("pc", "xb", "ps"))
 async def test_platform(bot_fx, rescue_sop_fx, platform_str):
     await bot_fx.board.append(rescue_sop_fx)
@@ -239,6 +270,7 @@ async def test_inject_creates_rescue(bot_fx, cr_state: bool, platform: Platforms
                                      payload: str):
     hypothesis.assume(client not in bot_fx.board)  # new rescue
     bot_fx.sent_messages.clear()  # hypothesis cleanup.
+    bot_fx.rate_limiter.clear()
     starting_rescue_count = len(bot_fx.board)
     await bot_fx.on_message("#ratchat", "some_ov",
                             f"!inject {client} {platform.value} {'cr' if cr_state else ''} {payload}",
@@ -361,7 +393,7 @@ async def test_clear_rescue_unident_drill_mode(bot_fx, rat_board_fx, rescue_sop_
         message=f"!clear {rescue_sop_fx.board_index} {rat_no_id_fx.name}"
     )
 
-    monkeypatch.setattr(context, "DRILL_MODE", True)
+    monkeypatch.setattr(Context, "DRILL_MODE", True)
     await trigger(ctx=context)
     assert rescue_sop_fx not in rat_board_fx, "failed to clear rescue."
 
@@ -377,6 +409,45 @@ async def test_clear_rescue_unident_prod_mode(bot_fx, rat_board_fx, rescue_sop_f
         message=f"!clear {rescue_sop_fx.board_index} {rat_no_id_fx.name}"
     )
 
-    monkeypatch.setattr(context, "DRILL_MODE", False)
+    monkeypatch.setattr(Context, "DRILL_MODE", False)
     await trigger(ctx=context)
     assert rescue_sop_fx.client in rat_board_fx, "unexpectedly cleared rescue."
+
+
+async def test_closed_lookup(bot_fx, rescue_sop_fx):
+    await bot_fx.board.append(rescue_sop_fx)
+    for message in (f"!md {rescue_sop_fx.board_index} troll", f"!closed {rescue_sop_fx.client}"):
+        ctx = await Context.from_message(bot_fx, "#unkn0wndev", "some_ov", message)
+        await trigger(ctx)
+
+    reply = bot_fx.sent_messages[-1]["message"]
+    assert f"@{rescue_sop_fx.api_id}" in reply
+    assert "marked for deletion by some_ov: troll" in reply
+
+
+async def test_closed_lookup_unknown(bot_fx):
+    ctx = await Context.from_message(bot_fx, "#unkn0wndev", "some_ov", "!closed some_client")
+    await trigger(ctx)
+
+    assert "no recently closed case" in bot_fx.sent_messages[-1]["message"].casefold()
+
+
+@pytest.mark.parametrize("key", ("client", "api_id"))
+async def test_reopen_archived(bot_fx, rescue_sop_fx, key):
+    await bot_fx.board.append(rescue_sop_fx)
+    ctx = await Context.from_message(
+        bot_fx, "#unkn0wndev", "some_ov", f"!clear {rescue_sop_fx.board_index}"
+    )
+    await trigger(ctx)
+    assert rescue_sop_fx.api_id in bot_fx.board.archive
+
+    # served from the archive, there is no API to fall back to
+    del bot_fx.board.api_handler
+    ctx = await Context.from_message(
+        bot_fx, "#unkn0wndev", "some_ov", f"!reopen {getattr(rescue_sop_fx, key)}"
+    )
+    await trigger(ctx)
+
+    assert bot_fx.board[rescue_sop_fx.api_id] is rescue_sop_fx
+    assert rescue_sop_fx.open
+    assert rescue_sop_fx.api_id not in bot_fx.board.archive
@@ -0,0 +1,136 @@
+"""
+test_announcement.py - RatMama announcement parser tests
+
+Checks `parse_announcement` parses announcements as `RATMAMA_REGEX`, which it replaced, did.
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import typing
+
+import pytest
+from hypothesis import given, strategies
+
+from src.packages.ratmama.announcement import Announcement, is_announcement, parse_announcement
+from src.packages.ratmama.ratmama_parser import RATMAMA_REGEX
+from src.packages.utils import Platforms
+
+pytestmark = [pytest.mark.unit, pytest.mark.ratsignal_parse, pytest.mark.hypothesis]
+
+
+def reference_parse(message: str) -> typing.Optional[Announcement]:
+    """ Parses `message` with `RATMAMA_REGEX`, as the announcement handler used to """
+    result = RATMAMA_REGEX.fullmatch(message)
+    if result is None:
+        return None
+    groups = {
+        name: value.strip() if value is not None else None
+        for name, value in result.groupdict().items()
+    }
+    del groups["all"]
+    return Announcement(**groups)
+
+
+# free text fields, including the odd dash and "system" but never a field separator
+_text = strategies.text(
+    strategies.sampled_from("abcXYZ019 _-()'.:"), min_size=1, max_size=16
+).filter(
+    lambda text: " - " not in f" {text} " and text.strip() and "(" not in text.strip()[1:]
+)
+_field_text = strategies.one_of(
+    _text, strategies.builds(lambda text: f"{text} system", _text)
+)
+
+announcements = strategies.builds(
+    lambda cmdr, system, platform, o2, language, code, country, nick: (
+        f"Incoming Client: {cmdr} - System: {system} - Platform: {platform} - O2: {o2}"
+        f" - Language: {language} ({code}{'-' + country if country else ''})"
+        f"{' - IRC Nickname: ' + nick if nick else ''}"
+    ),
+    cmdr=_text,
+    system=_field_text,
+    platform=strategies.sampled_from(["PC", "XB", "PS", "PS4", "NES", "Switch 2"]),
+    o2=strategies.sampled_from(["OK", "NOT OK"]),
+    language=strategies.sampled_from(["English", "German", "Pig Latin"]),
+    code=strategies.sampled_from(["en", "de", "x"]),
+    country=strategies.sampled_from([None, "US", "de", "x-y"]),
+    nick=strategies.sampled_from([None, "some_nick", "[BOT]nick"]),
+)
+
+
+@given(announcements)
+def test_parses_as_regex(announcement: str):
+    assert parse_announcement(announcement) == reference_parse(announcement)
+
+
+@given(announcements, strategies.data())
+def test_mangled_parses_as_regex(announcement: str, data):
+    """ Announcements with a slice cut out, or doubled, mostly aren't announcements anymore """
+    start = data.draw(strategies.integers(0, len(announcement)))
+    stop = data.draw(strategies.integers(start, len(announcement)))
+    for mangled in (
+        announcement[:start] + announcement[stop:],
+        announcement[:stop] + announcement[start:],
+    ):
+        # the regex accepts a few manglings the splitter doesn't, such as labels run together
+        # with their values; the splitter must never accept what the regex rejects
+        parsed = parse_announcement(mangled)
+        if parsed is not None:
+            assert parsed == reference_parse(mangled)
+
+
+def test_parse_announcement():
+    announcement = parse_announcement(
+        "Incoming Client: Some Client - System: Col 285 Sector AB-C D1-23 system - Platform: PS4"
+        " - O2: NOT OK - Language: German (de-DE) - IRC Nickname: Some_Client"
+    )
+
+    assert announcement == Announcement(
+        cmdr="Some Client",
+        system="Col 285 Sector AB-C D1-23",
+        platform="PS4",
+        o2="NOT OK",
+        full_language="German (de-DE)",
+        language="German",
+        language_code="de",
+        language_country="DE",
+        nick="Some_Client",
+    )
+    assert announcement.code_red
+    assert announcement.lang_id == "de-DE"
+    assert announcement.platforms is Platforms.PS
+
+
+def test_parse_announcement_without_country():
+    announcement = parse_announcement(
+        "Incoming Client: SomeClient - System: Sol - Platform: PC - O2: OK - Language: Klingon (tlh)"
+    )
+
+    assert announcement.lang_id == "tlh"
+    assert announcement.nick is None
+    assert not announcement.code_red
+
+
+@pytest.mark.parametrize("message", [
+    "",
+    "Incoming Client:",
+    "incoming client: SomeClient - System: Sol - Platform: PC - O2: OK - Language: English (en)",
+    "Incoming Client: SomeClient - System: Sol - Platform: PC - O2: OK",
+    "Incoming Client: SomeClient - Platform: PC - System: Sol - O2: OK - Language: English (en)",
+    "Incoming Client: SomeClient - System: Sol - Platform: P C - O2: OK - Language: English (en)",
+    "Incoming Client: SomeClient - System: Sol - Platform: PC - O2: OK - Language: English",
+    "Incoming Client: SomeClient - System: Sol - Platform: PC - O2: OK - Language: English (en)"
+    " - IRC Nickname: some nick",
+])
+def test_malformed_announcements(message: str):
+    assert parse_announcement(message) is None
+    assert reference_parse(message) is None
+
+
+def test_is_announcement():
+    assert is_announcement("Incoming Client: SomeClient")
+    assert not is_announcement("ratsignal Incoming Client: SomeClient")
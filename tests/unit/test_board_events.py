@@ -0,0 +1,128 @@
+"""
+test_board_events.py - board change stream tests
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from src.packages.board import Policy, RescueCreated, RescueModified, RescueRemoved
+from src.packages.rescue import Rescue
+from src.packages.utils import Status
+
+pytestmark = [pytest.mark.unit, pytest.mark.ratboard, pytest.mark.asyncio]
+
+
+def drain(subscription):
+    events = []
+    while len(subscription):
+        events.append(subscription.get_nowait())
+    return events
+
+
+async def test_board_publishes_changes(rat_board_fx):
+    with rat_board_fx.changes.subscribe(policy=Policy.DROP) as subscription:
+        rescue = await rat_board_fx.create_rescue(client="some_client")
+        async with rat_board_fx.modify_rescue(rescue) as case:
+            case.system = "Sol"
+            case.code_red = True
+        async with rat_board_fx.modify_rescue(rescue):
+            pass
+        async with rat_board_fx.modify_rescue(rescue) as case:
+            case.status = Status.CLOSED
+        await rat_board_fx.remove_rescue(rescue)
+
+        events = drain(subscription)
+
+    assert [type(event) for event in events] == [
+        RescueCreated, RescueModified, RescueModified, RescueRemoved
+    ]
+    assert all(event.rescue is rescue for event in events)
+    assert events[1].fields == {"system", "code_red"}
+    assert events[2].fields == {"status"}
+    assert events[-1].revision == rescue.revision
+
+
+async def test_coalesce_per_rescue(rat_board_fx):
+    second = Rescue(uuid4(), client="second")
+    await rat_board_fx.append(second)
+    subscription = rat_board_fx.changes.subscribe()
+    first = await rat_board_fx.create_rescue(client="first")
+    for system in ("Sol", "Fuelum"):
+        async with rat_board_fx.modify_rescue(second) as case:
+            case.system = system
+    async with rat_board_fx.modify_rescue(second) as case:
+        case.code_red = True
+    async with rat_board_fx.modify_rescue(first) as case:
+        case.title = "Operation Unit Test"
+
+    modified, created = drain(subscription)
+
+    assert type(modified) is RescueModified and modified.rescue is second
+    assert modified.fields == {"system", "code_red"}
+    # a rescue not seen yet is only announced once, as it is now
+    assert type(created) is RescueCreated and created.rescue is first
+    assert created.revision == first.revision
+    assert subscription.dropped == 0
+
+
+async def test_full_subscriptions_drop_oldest(rat_board_fx):
+    dropping = rat_board_fx.changes.subscribe(maxsize=2, policy=Policy.DROP)
+    coalescing = rat_board_fx.changes.subscribe(maxsize=2)
+    rescues = [await rat_board_fx.create_rescue(client=f"client_{index}") for index in range(3)]
+
+    assert [event.rescue for event in drain(dropping)] == rescues[1:]
+    assert [event.rescue for event in drain(coalescing)] == rescues[1:]
+    assert dropping.dropped == coalescing.dropped == 1
+
+
+async def test_slow_subscriber_never_blocks_board(rat_board_fx):
+    slow = rat_board_fx.changes.subscribe(maxsize=1, policy=Policy.DROP)
+    received = []
+
+    async def consume():
+        async for event in slow:
+            received.append(event)
+            await asyncio.sleep(1)
+
+    consumer = asyncio.ensure_future(consume())
+    await asyncio.wait_for(
+        asyncio.gather(*(rat_board_fx.create_rescue(client=f"c{index}") for index in range(50))),
+        timeout=0.5,
+    )
+    consumer.cancel()
+
+    assert len(rat_board_fx) == 50
+    assert received
+    assert len(received) + slow.dropped == 50
+
+
+async def test_iteration_wakes_and_ends(rat_board_fx):
+    subscription = rat_board_fx.changes.subscribe()
+
+    async def collect():
+        return [event async for event in subscription]
+
+    collector = asyncio.ensure_future(collect())
+    await asyncio.sleep(0)
+    rescue = await rat_board_fx.create_rescue(client="some_client")
+    await asyncio.sleep(0)
+    await rat_board_fx.remove_rescue(rescue)
+    subscription.close()
+
+    events = await asyncio.wait_for(collector, timeout=1)
+    assert [type(event) for event in events] == [RescueCreated, RescueRemoved]
+    assert len(rat_board_fx.changes) == 0
+
+    # closed subscriptions receive nothing more
+    await rat_board_fx.create_rescue(client="other_client")
+    assert not len(subscription)
+    with pytest.raises(asyncio.QueueEmpty):
+        subscription.get_nowait()
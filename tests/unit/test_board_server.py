@@ -0,0 +1,153 @@
+"""
+test_board_server.py - BoardServer tests
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import asyncio
+import contextlib
+import json
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.packages.board import BoardServer
+from src.packages.board.server import RESCUE_ENCODES
+
+pytestmark = [pytest.mark.unit, pytest.mark.ratboard, pytest.mark.asyncio]
+
+
+@contextlib.asynccontextmanager
+async def serving(board):
+    server = BoardServer(board, heartbeat=0.05)
+    client = TestClient(TestServer(server.application()))
+    await client.start_server()
+    try:
+        yield client
+    finally:
+        await client.close()
+
+
+def encodes() -> float:
+    return RESCUE_ENCODES._value.get()  # pylint: disable=protected-access
+
+
+async def read_event(response) -> dict:
+    """ Reads the next server-sent event, skipping keep-alive comments """
+    event = {}
+    while True:
+        line = (await asyncio.wait_for(response.content.readline(), timeout=1)).decode().rstrip()
+        if not line:
+            if event:
+                return event
+            continue
+        if line.startswith(":"):
+            continue
+        name, _, value = line.partition(": ")
+        event[name] = value
+
+
+async def test_board_as_json(rat_board_fx):
+    second = await rat_board_fx.create_rescue(client="second")
+    first = await rat_board_fx.create_rescue(client="first")
+    await rat_board_fx.remove_rescue(second)
+    third = await rat_board_fx.create_rescue(client="third", system="Sol")
+
+    async with serving(rat_board_fx) as client:
+        response = await client.get("/board")
+        assert response.status == 200
+        assert response.headers["Content-Type"].startswith("application/json")
+        rescues = (await response.json())["rescues"]
+
+    assert [rescue["client"] for rescue in rescues] == ["first", "third"]
+    assert rescues[0]["board_index"] == first.board_index
+    assert rescues[1]["system"] == third.system
+
+
+async def test_etag(rat_board_fx):
+    rescue = await rat_board_fx.create_rescue(client="some_client")
+
+    async with serving(rat_board_fx) as client:
+        etag = (await client.get("/board")).headers["ETag"]
+        for if_none_match, status in ((etag, 304), (f'"x", W/{etag}', 304), ('"x"', 200)):
+            response = await client.get("/board", headers={"If-None-Match": if_none_match})
+            assert response.status == status
+
+        async with rat_board_fx.modify_rescue(rescue) as case:
+            case.code_red = True
+        response = await client.get("/board", headers={"If-None-Match": etag})
+        assert response.status == 200
+        assert response.headers["ETag"] != etag
+        assert (await response.json())["rescues"][0]["code_red"] is True
+
+
+async def test_only_changed_rescues_are_encoded(rat_board_fx):
+    server = BoardServer(rat_board_fx)
+    rescues = [await rat_board_fx.create_rescue(client=f"client_{index}") for index in range(3)]
+
+    before = encodes()
+    server.render()
+    assert encodes() - before == 3
+
+    async with rat_board_fx.modify_rescue(rescues[1]) as case:
+        case.system = "Fuelum"
+    before = encodes()
+    _, body = server.render()
+    server.render()
+    assert encodes() - before == 1
+    assert json.loads(body)["rescues"][1]["system"] == "FUELUM"
+
+    await rat_board_fx.remove_rescue(rescues[0])
+    before = encodes()
+    _, body = server.render()
+    assert encodes() == before
+    assert len(json.loads(body)["rescues"]) == 2
+    assert rescues[0].api_id not in server._encoded  # pylint: disable=protected-access
+
+
+async def test_event_stream(rat_board_fx):
+    existing = await rat_board_fx.create_rescue(client="existing")
+
+    async with serving(rat_board_fx) as client:
+        response = await client.get("/board/events")
+        assert response.headers["Content-Type"] == "text/event-stream"
+        board = await read_event(response)
+        assert board["event"] == "board"
+        assert [case["client"] for case in json.loads(board["data"])["rescues"]] == ["existing"]
+
+        created = await rat_board_fx.create_rescue(client="created")
+        event = await read_event(response)
+        assert event["event"] == "created"
+        assert json.loads(event["data"])["rescue"]["client"] == "created"
+
+        async with rat_board_fx.modify_rescue(existing) as case:
+            case.code_red = True
+        event = await read_event(response)
+        assert event["event"] == "modified"
+        assert json.loads(event["data"])["fields"] == ["code_red"]
+
+        await rat_board_fx.remove_rescue(created)
+        event = await read_event(response)
+        assert event["event"] == "removed"
+        assert json.loads(event["data"])["rescue"]["uuid"] == str(created.api_id)
+        response.close()
+
+
+async def test_rescues_being_modified_are_served(rat_board_fx):
+    rescue = await rat_board_fx.create_rescue(client="modified")
+    await rat_board_fx.create_rescue(client="other")
+
+    async with serving(rat_board_fx) as client:
+        async with rat_board_fx.modify_rescue(rescue):
+            response = await client.get("/board")
+            rescues = (await response.json())["rescues"]
+            assert [case["client"] for case in rescues] == ["modified", "other"]
+
+            events = await client.get("/board/events")
+            board = json.loads((await read_event(events))["data"])
+            assert [case["client"] for case in board["rescues"]] == ["modified", "other"]
+            events.close()
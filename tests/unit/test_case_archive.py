@@ -0,0 +1,195 @@
+"""
+test_case_archive.py - CaseArchive tests
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from uuid import uuid4
+
+import pendulum
+import pytest
+
+from src.packages.board import CaseArchive, RatBoard
+from src.packages.board.archive import ARCHIVE_BYTES
+from src.packages.mark_for_deletion import MarkForDeletion
+from src.packages.quotation import Quotation
+from src.packages.rat import Rat
+from src.packages.rescue import Rescue
+from src.packages.utils import Platforms, Status
+
+pytestmark = [pytest.mark.unit, pytest.mark.ratboard]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock_fx() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def archive_fx(clock_fx) -> CaseArchive:
+    return CaseArchive(max_age=3600, clock=clock_fx)
+
+
+def closed_rescue(client: str, irc_nickname=None) -> Rescue:
+    rescue = Rescue(uuid4(), client=client, system="Sol", irc_nickname=irc_nickname, board_index=3)
+    rescue.status = Status.CLOSED
+    return rescue
+
+
+def test_lookup_by_id_client_and_nick(archive_fx):
+    rescue = closed_rescue("Some Client", irc_nickname="some_client")
+    archive_fx.add(rescue)
+
+    assert archive_fx.get(rescue.api_id).rescue is rescue
+    assert archive_fx.get("some client").rescue is rescue
+    assert archive_fx.get("Some_Client").rescue is rescue
+    assert archive_fx.get("other_client") is None
+    assert archive_fx.get(uuid4()) is None
+
+
+def test_latest_case_of_client_wins(archive_fx):
+    first = closed_rescue("SomeClient")
+    second = closed_rescue("SomeClient")
+    archive_fx.add(first)
+    archive_fx.add(second)
+
+    assert archive_fx.get("someclient").rescue is second
+    archive_fx.discard(first.api_id)
+    assert archive_fx.get("someclient").rescue is second
+    archive_fx.discard(second.api_id)
+    assert archive_fx.get("someclient") is None
+    assert not archive_fx.memory
+
+
+def test_expired_cases_are_evicted(archive_fx, clock_fx):
+    rescue = closed_rescue("SomeClient")
+    archive_fx.add(rescue)
+
+    clock_fx.now += 3599
+    assert rescue.api_id in archive_fx
+    clock_fx.now += 2
+    assert archive_fx.get(rescue.api_id) is None
+    assert len(archive_fx) == 0
+
+
+def test_looked_up_cases_still_expire(archive_fx, clock_fx):
+    looked_up = closed_rescue("SomeClient")
+    archive_fx.add(looked_up)
+    clock_fx.now += 1800
+    newer = closed_rescue("OtherClient")
+    archive_fx.add(newer)
+    # moves the older case behind the newer one
+    assert archive_fx.get("someclient") is not None
+
+    clock_fx.now += 1801
+    assert "someclient" not in archive_fx
+    assert archive_fx.get("someclient") is None
+    assert archive_fx.get("otherclient").rescue is newer
+    assert len(archive_fx) == 1
+
+
+def test_least_recently_used_are_evicted_over_budget(clock_fx):
+    rescues = [closed_rescue(f"client_{index}") for index in range(3)]
+    archive = CaseArchive(max_bytes=1, clock=clock_fx)
+    archive.add(rescues[0])
+    # every case is over this budget, so none outlasts the next
+    assert len(archive) == 0
+
+    archive.max_bytes = archive.memory + 3 * 4096
+    for rescue in rescues:
+        archive.add(rescue)
+    archive.get(rescues[0].api_id)
+    archive.max_bytes = archive.memory - 1
+    archive.add(rescues[1])
+
+    assert rescues[0].api_id in archive
+    assert rescues[1].api_id in archive
+    assert rescues[2].api_id not in archive
+
+
+def archive_bytes() -> float:
+    return ARCHIVE_BYTES.collect()[0].samples[0].value
+
+
+def test_memory_gauge_covers_every_archive(archive_fx, clock_fx):
+    other = CaseArchive(clock=clock_fx)
+    before = archive_bytes()
+
+    archive_fx.add(closed_rescue("SomeClient"))
+    other.add(closed_rescue("OtherClient"))
+    assert archive_bytes() == before + archive_fx.memory + other.memory
+
+    del other
+    assert archive_bytes() == before + archive_fx.memory
+
+
+def test_persistence(tmp_path, clock_fx):
+    path = tmp_path / "archive.json"
+    rescue = closed_rescue("Some Client", irc_nickname="some_client")
+    rescue.platform = Platforms.PS
+    rescue.code_red = True
+    rescue.marked_for_deletion = MarkForDeletion(marked=True, reporter="some_ov", reason="troll")
+    rescue.quotes.append(Quotation("help", author="some_ov", created_at=pendulum.now()))
+    rescue.rats["some_rat"] = Rat(uuid=uuid4(), name="some_rat", platform=Platforms.PS)
+    rescue.unidentified_rats["other_rat"] = Rat(uuid=None, name="other_rat")
+
+    archive = CaseArchive(path=path, clock=clock_fx)
+    archive.add(rescue)
+    expired = closed_rescue("expired")
+    archive.add(expired)
+    assert path.exists()
+
+    clock_fx.now += 10
+    archive = CaseArchive(max_age=5, path=path, clock=clock_fx)
+    assert len(archive) == 0
+    archive = CaseArchive(path=path, clock=clock_fx)
+    restored = archive.get("some_client").rescue
+
+    assert restored == rescue
+    assert restored.client == "Some Client"
+    assert restored.system == "SOL"
+    assert restored.platform is Platforms.PS
+    assert restored.status is Status.CLOSED
+    assert restored.code_red
+    assert restored.marked_for_deletion == rescue.marked_for_deletion
+    assert restored.quotes == rescue.quotes
+    assert restored.rats == rescue.rats
+    assert restored.unidentified_rats == rescue.unidentified_rats
+    assert not restored.modified
+    assert archive.get("expired").rescue == expired
+
+
+def test_load_discards_malformed(tmp_path):
+    path = tmp_path / "archive.json"
+    path.write_text('[{"rescue": {"uuid": "nope"}, "archived_at": 0}]', encoding="utf8")
+
+    assert len(CaseArchive(path=path)) == 0
+
+
+@pytest.mark.asyncio
+async def test_board_archives_closed_rescues(rescue_sop_fx):
+    board = RatBoard()
+    other = Rescue(uuid4(), client="other_client", board_index=1)
+    await board.append(rescue_sop_fx)
+    await board.append(other)
+
+    async with board.modify_rescue(rescue_sop_fx) as rescue:
+        rescue.status = Status.CLOSED
+    await board.remove_rescue(rescue_sop_fx)
+    await board.remove_rescue(other)
+
+    assert board.archive.get(rescue_sop_fx.client).rescue is rescue_sop_fx
+    # still open, only dropped from the board
+    assert other.api_id not in board.archive
@@ -0,0 +1,244 @@
+"""
+test_change_journal.py - ChangeJournal tests
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+from uuid import uuid4
+
+import attr
+import pytest
+
+from src.packages.fuelrats_api.v3.websocket.protocol import Request, Response
+from src.packages.rat import Rat
+from src.packages.rescue import Rescue
+from src.packages.rescue.journal import ChangeJournal, authored_by
+from src.templates import RescueRenderFlags
+from src.templates.render_cache import RescueRenderCache
+
+pytestmark = [pytest.mark.unit, pytest.mark.rescue]
+
+
+def test_new_rescue_has_empty_journal():
+    rescue = Rescue(uuid4(), client="someClient", system="sol", board_index=3, active=False)
+
+    assert rescue.revision == 0
+    assert not rescue.journal
+    assert rescue.journal.since(0) == []
+    assert "status" in rescue.modified
+
+
+def test_changes_are_journaled(rescue_plain_fx):
+    old_client, old_system = rescue_plain_fx.client, rescue_plain_fx.system
+    version = rescue_plain_fx.revision
+
+    rescue_plain_fx.client = "other"
+    rescue_plain_fx.system = "beagle point"
+
+    changes = rescue_plain_fx.journal.since(version)
+    assert [(change.field, change.old, change.new) for change in changes] == [
+        ("client", old_client, "other"),
+        ("system", old_system, "BEAGLE POINT"),
+    ]
+    assert [change.version for change in changes] == [version + 1, version + 2]
+    assert rescue_plain_fx.revision == version + 2
+    assert rescue_plain_fx.journal.since(version + 1) == changes[1:]
+    assert rescue_plain_fx.journal.since(rescue_plain_fx.revision) == []
+
+
+@pytest.mark.asyncio
+async def test_rats_and_quotes_are_journaled(rescue_plain_fx, rat_good_fx):
+    version = rescue_plain_fx.revision
+
+    await rescue_plain_fx.add_rat(rat_good_fx)
+    rescue_plain_fx.add_quote("out of fuel", author="someRat")
+    rescue_plain_fx.remove_rat(rat_good_fx)
+
+    assert [
+        (change.field, change.old, change.new, change.item)
+        for change in rescue_plain_fx.journal.since(version)
+    ] == [
+        ("rats", None, rat_good_fx, True),
+        ("quotes", None, rescue_plain_fx.quotes[0], True),
+        ("rats", rat_good_fx, None, True),
+    ]
+    # the rats are as they were, but items can't tell
+    assert rescue_plain_fx.journal.fields_since(version) == {"rats", "quotes"}
+
+
+@pytest.mark.asyncio
+async def test_rat_swaps_are_net_changes(rescue_plain_fx, rat_good_fx):
+    assigned = Rat(uuid4(), name="assignedRat")
+    await rescue_plain_fx.add_rat(assigned)
+    version = rescue_plain_fx.revision
+
+    await rescue_plain_fx.add_rat(rat_good_fx)
+    rescue_plain_fx.remove_rat(assigned)
+
+    assert rescue_plain_fx.journal.fields_since(version) == {"rats"}
+
+
+@pytest.mark.asyncio
+async def test_board_journals_containers_read(rat_board_fx, rescue_sop_fx, rat_good_fx):
+    await rat_board_fx.append(rescue_sop_fx)
+    version = rescue_sop_fx.revision
+
+    async with rat_board_fx.modify_rescue(rescue_sop_fx) as case:
+        assert not case.rats
+        await case.add_rat(rat_good_fx)
+        case.add_quote("in place")
+        case.unidentified_rats.clear()
+
+    changes = rescue_sop_fx.journal.since(version)
+    assert [(change.field, change.item) for change in changes] == [
+        ("rats", True),
+        ("quotes", True),
+        ("rats", False),
+    ]
+    assert changes[2].old == {}
+    assert rescue_sop_fx.journal.fields_since(version) == {"rats", "quotes"}
+
+
+def test_changes_are_attributed(rescue_plain_fx):
+    rescue_plain_fx.title = "anonymous"
+    with authored_by("someRat"):
+        rescue_plain_fx.code_red = True
+    with rescue_plain_fx.change(author="otherRat"):
+        rescue_plain_fx.client = "other"
+
+    assert [(change.field, change.author) for change in rescue_plain_fx.journal] == [
+        ("title", None),
+        ("code_red", "someRat"),
+        ("client", "otherRat"),
+        ("updated_at", "otherRat"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_board_changes_are_attributed(rat_board_fx, rescue_sop_fx, rat_good_fx):
+    await rat_board_fx.append(rescue_sop_fx)
+    version = rescue_sop_fx.revision
+
+    async with rat_board_fx.modify_rescue(rescue_sop_fx, impersonation="someRat") as case:
+        case.code_red = True
+        case.rats[rat_good_fx.name.casefold()] = rat_good_fx
+
+    changes = rescue_sop_fx.journal.since(version)
+    assert [(change.field, change.author) for change in changes] == [
+        ("code_red", "someRat"),
+        ("rats", "someRat"),
+    ]
+    assert changes[1].old == {}
+    assert changes[1].new == {rat_good_fx.name.casefold(): rat_good_fx}
+
+
+@pytest.mark.asyncio
+async def test_board_journals_quotes_changed_in_place(rat_board_fx, rescue_sop_fx):
+    rescue_sop_fx.add_quote("first")
+    rescue_sop_fx.add_quote("second")
+    await rat_board_fx.append(rescue_sop_fx)
+    version = rescue_sop_fx.revision
+    quotes = list(rescue_sop_fx.quotes)
+
+    async with rat_board_fx.modify_rescue(rescue_sop_fx) as case:
+        case.quotes[0] = attr.evolve(case.quotes[0], message="edited")
+        del case.quotes[1]
+
+    (change,) = rescue_sop_fx.journal.since(version)
+    assert change.field == "quotes"
+    assert change.old == quotes
+    assert [quote.message for quote in change.new] == ["edited"]
+    assert rescue_sop_fx.journal.fields_since(version) == {"quotes"}
+
+
+def test_journal_is_bounded():
+    journal = ChangeJournal()
+    for value in range(ChangeJournal.MAX_ENTRIES + 8):
+        journal.record("board_index", value, value + 1)
+
+    assert len(journal) == ChangeJournal.MAX_ENTRIES
+    assert journal.version == ChangeJournal.MAX_ENTRIES + 8
+    # the earliest changes were dropped, so what changed since then can't be told
+    assert journal.since(7) is None
+    assert journal.fields_since(0) is None
+    assert len(journal.since(8)) == ChangeJournal.MAX_ENTRIES
+    assert journal.since(8)[0].old == 8
+
+
+def test_marked_changes_hide_history():
+    journal = ChangeJournal()
+    journal.record("client", None, "someClient")
+    version = journal.mark()
+
+    assert journal.version == version == 2
+    assert journal.since(0) is None
+    assert journal.since(1) is None
+    assert journal.since(2) == []
+
+    journal.record("client", "someClient", "other")
+    assert [change.new for change in journal.since(2)] == ["other"]
+
+
+def test_fields_since_are_net_changes():
+    journal = ChangeJournal()
+    journal.record("client", "someClient", "other")
+    journal.record("system", None, "SOL")
+    journal.record("client", "other", "someClient")
+
+    assert journal.fields_since(0) == {"system"}
+    assert journal.fields_since(1) == {"system", "client"}
+    assert journal.fields_since(3) == set()
+
+
+@pytest.mark.asyncio
+async def test_render_cache_keeps_renders_across_unrendered_changes(rescue_plain_fx):
+    renders = []
+
+    async def render(rescue, flags):
+        renders.append(rescue)
+        return f"{rescue.client} {rescue.system}"
+
+    cache = RescueRenderCache(render)
+    flags = RescueRenderFlags()
+    await cache.render(rescue_plain_fx, flags)
+
+    rescue_plain_fx.irc_nickname = "someNick"
+    rescue_plain_fx.title = "operation gravy"
+    await cache.render(rescue_plain_fx, flags)
+    assert len(renders) == 1
+
+    rescue_plain_fx.client = "other"
+    assert await cache.render(rescue_plain_fx, flags) == f"other {rescue_plain_fx.system}"
+    assert len(renders) == 2
+
+
+@pytest.mark.asyncio
+async def test_api_pushes_changes_since_last_push(api_wss_fx, api_wss_connection_fx):
+    rescue = Rescue(uuid4(), client="someClient", system="sol", board_index=3)
+
+    def expect(attributes):
+        state = uuid4()
+        api_wss_connection_fx.expect(
+            request=Request(
+                endpoint=["rescues", "update"],
+                body={"data": {"id": rescue.api_id, "type": "rescues", "attributes": attributes}},
+                query={"id": f"{rescue.api_id}", "representing": None},
+                state=state,
+            ),
+            respond_with=Response(state=state, status=200, body={}),
+        )
+
+    # nothing was pushed yet, so every modified field is
+    expect({"status": "open"})
+    await api_wss_fx.update_rescue(rescue, impersonating=None)
+
+    rescue.client = "other"
+    rescue.first_limpet = Rat(uuid4(), "someRat").uuid
+    expect({"client": "other"})
+    await api_wss_fx.update_rescue(rescue, impersonating=None)
+
+    assert not api_wss_connection_fx.expectations
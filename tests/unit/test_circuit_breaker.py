@@ -0,0 +1,188 @@
+"""
+test_circuit_breaker.py - tests for the Systems API circuit breaker.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import asyncio
+
+import aiohttp
+import pytest
+
+from src.packages.galaxy import Galaxy
+from src.packages.galaxy.circuit_breaker import BreakerState, CircuitBreaker, CircuitOpenError
+
+pytestmark = [pytest.mark.unit, pytest.mark.galaxy]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock_fx() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker_fx(clock_fx) -> CircuitBreaker:
+    return CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock_fx)
+
+
+async def _fail(breaker: CircuitBreaker, exception: BaseException):
+    with pytest.raises(type(exception)):
+        async with breaker.attempt():
+            raise exception
+
+
+async def _fail_at(breaker: CircuitBreaker, endpoint: str, exception: BaseException):
+    with pytest.raises(type(exception)):
+        async with breaker.attempt(endpoint):
+            raise exception
+
+
+@pytest.mark.asyncio
+async def test_opens_after_consecutive_failures(breaker_fx):
+    for _ in range(3):
+        assert breaker_fx.state is BreakerState.CLOSED
+        await _fail(breaker_fx, aiohttp.ClientConnectionError())
+    assert breaker_fx.state is BreakerState.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        async with breaker_fx.attempt():
+            pytest.fail("an open breaker must not let requests through")
+
+
+@pytest.mark.asyncio
+async def test_success_resets_failure_count(breaker_fx):
+    await _fail(breaker_fx, asyncio.TimeoutError())
+    await _fail(breaker_fx, asyncio.TimeoutError())
+    async with breaker_fx.attempt():
+        ...
+    await _fail(breaker_fx, asyncio.TimeoutError())
+    assert breaker_fx.state is BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status, counts", ((404, False), (400, False), (500, True), (503, True)))
+async def test_only_server_errors_count(breaker_fx, status: int, counts: bool):
+    error = aiohttp.ClientResponseError(request_info=None, history=(), status=status)
+    for _ in range(3):
+        await _fail(breaker_fx, error)
+    assert (breaker_fx.state is BreakerState.OPEN) is counts
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_closes(breaker_fx, clock_fx):
+    for _ in range(3):
+        await _fail(breaker_fx, aiohttp.ClientConnectionError())
+    clock_fx.now += 30
+    assert breaker_fx.state is BreakerState.HALF_OPEN
+
+    async with breaker_fx.attempt():
+        # only a single probe is allowed in flight
+        with pytest.raises(CircuitOpenError):
+            async with breaker_fx.attempt():
+                ...
+    assert breaker_fx.state is BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_failure_reopens(breaker_fx, clock_fx):
+    for _ in range(3):
+        await _fail(breaker_fx, aiohttp.ClientConnectionError())
+    clock_fx.now += 30
+    await _fail(breaker_fx, aiohttp.ClientConnectionError())
+    assert breaker_fx.state is BreakerState.OPEN
+    clock_fx.now += 29
+    assert breaker_fx.state is BreakerState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_releases_slot(breaker_fx, clock_fx):
+    for _ in range(3):
+        await _fail(breaker_fx, aiohttp.ClientConnectionError())
+    clock_fx.now += 30
+    await _fail(breaker_fx, asyncio.CancelledError())
+    assert breaker_fx.state is BreakerState.HALF_OPEN
+    async with breaker_fx.attempt():
+        ...
+    assert breaker_fx.state is BreakerState.CLOSED
+
+
+def test_adaptive_timeout(clock_fx):
+    breaker = CircuitBreaker(min_timeout=0.5, max_timeout=10, min_samples=10, clock=clock_fx)
+    for _ in range(9):
+        breaker.record_success(0.1)
+    assert breaker.timeout() == 10, "timeout tightened before enough samples were observed"
+
+    breaker.record_success(0.1)
+    assert breaker.timeout() == 0.5, "timeout must respect its lower bound"
+
+    for _ in range(10):
+        breaker.record_success(1.5)
+    assert breaker.timeout() == 3.0
+
+    for _ in range(20):
+        breaker.record_success(60)
+    assert breaker.timeout() == 10, "timeout must respect its upper bound"
+
+
+@pytest.mark.asyncio
+async def test_endpoints_time_out_independently(clock_fx):
+    breaker = CircuitBreaker(failure_threshold=3, min_samples=10, clock=clock_fx)
+    for _ in range(50):
+        breaker.record_success(0.05, "api/systems")
+    for _ in range(10):
+        breaker.record_success(2.0, "landmark")
+    assert breaker.timeout("api/systems") == 0.5
+    assert breaker.timeout("landmark") == 4.0
+    assert breaker.timeout("mecha") == 10, "endpoints without samples use the upper bound"
+
+    # a slow endpoint outgrowing its timeout doesn't open the breaker, it widens the timeout
+    for expected in (8.0, 10):
+        async with breaker.attempt("api/systems") as timeout:
+            assert timeout.total == 0.5
+        await _fail_at(breaker, "landmark", asyncio.TimeoutError())
+        assert breaker.timeout("landmark") == expected
+    assert breaker.timeout("api/systems") == 0.5
+
+    # timing out at the upper bound still counts
+    for _ in range(3):
+        assert breaker.state is BreakerState.CLOSED
+        await _fail_at(breaker, "landmark", asyncio.TimeoutError())
+    assert breaker.state is BreakerState.OPEN
+
+
+@pytest.mark.parametrize("kwargs", ({"failure_threshold": 0}, {"min_timeout": 0},
+                                    {"min_timeout": 11, "max_timeout": 10}))
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        CircuitBreaker(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_galaxy_fails_fast_when_open(mock_system_api_server_fx, clock_fx, monkeypatch,
+                                           async_callable_fx):
+    galaxy = Galaxy(
+        mock_system_api_server_fx.url_for("/"),
+        breaker=CircuitBreaker(failure_threshold=Galaxy.MAX_RETRIES, clock=clock_fx),
+    )
+    monkeypatch.setattr(galaxy, "_retry_delay", async_callable_fx)
+    # an endpoint that always errors server-side
+    mock_system_api_server_fx.expect_request("/brokenendpoint").respond_with_data(status=503)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        await galaxy._call("brokenendpoint")
+    assert galaxy.breaker.state is BreakerState.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        await galaxy._call("api/systems")
@@ -127,3 +127,25 @@ def test_split_hypothesis(data: str):
         assert not any(char.isspace() for char in word)
 
     assert len(words_out) == data.count(" ") + 1, "failed to tokenize words as expected"
+
+
+@pytest.mark.parametrize("payload", ["pink fluffy unicorns", "  my   malformed\tstring ", "", "one"])
+def test_words_eol_is_lazy_suffix_view(payload):
+    words, words_eol = _split_message(payload)
+    expected = [" ".join(words[i:]) for i in range(len(words))]
+
+    assert len(words_eol) == len(words)
+    assert list(words_eol) == expected
+    assert words_eol[1:] == expected[1:]
+    assert words_eol[-1:] == expected[-1:]
+
+
+@pytest.mark.parametrize("field, value", [("user", "unit_test"), ("target", None),
+                                          ("words", ("tuple", "of", "words")),
+                                          ("words_eol", [b"bytes"]), ("prefixed", 1)])
+def test_constructor_validates(bot_fx, user_fx, field, value):
+    kwargs = dict(user=user_fx, target="#unittest", words=["word"], words_eol=["word"],
+                  prefixed=False)
+    kwargs[field] = value
+    with pytest.raises(TypeError):
+        Context(bot_fx, **kwargs)
@@ -0,0 +1,262 @@
+"""
+test_dispatch.py - tests for the inbound message dispatch scheduler
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import asyncio
+
+import pytest
+
+from src.commands import administration, case_management  # pylint: disable=unused-import
+from src.mechaclient import MechaClient
+from src.packages.commands import classify, command, rat_command
+from src.packages.context import Context
+from src.packages.dispatch import DispatchScheduler, Priority
+
+pytestmark = [pytest.mark.unit, pytest.mark.dispatch, pytest.mark.asyncio]
+
+
+class Recorder:
+    """ Records the order jobs ran in, jobs wait until released """
+
+    def __init__(self):
+        self.order = []
+        self._gate = None
+
+    @property
+    def gate(self) -> asyncio.Event:
+        # created on first use, so it binds to the test's event loop
+        if self._gate is None:
+            self._gate = asyncio.Event()
+        return self._gate
+
+    def job(self, name, fail: bool = False):
+        async def run():
+            await self.gate.wait()
+            self.order.append(name)
+            if fail:
+                raise RuntimeError(name)
+
+        return run
+
+
+@pytest.fixture
+def recorder_fx():
+    return Recorder()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_bounded_concurrency(recorder_fx):
+    scheduler = DispatchScheduler(max_concurrency=2)
+    for index in range(5):
+        scheduler.submit(recorder_fx.job(index))
+    await _settle()
+    assert scheduler.running == 2
+    assert len(scheduler) == 3
+
+    recorder_fx.gate.set()
+    await scheduler.join()
+    assert sorted(recorder_fx.order) == [0, 1, 2, 3, 4]
+    assert scheduler.running == 0 and len(scheduler) == 0
+
+
+async def test_priority_order(recorder_fx):
+    scheduler = DispatchScheduler(max_concurrency=1)
+    scheduler.submit(recorder_fx.job("blocker"))
+    for priority in reversed(Priority):
+        scheduler.submit(recorder_fx.job(priority), priority=priority)
+
+    recorder_fx.gate.set()
+    await scheduler.join()
+    assert recorder_fx.order == ["blocker", *Priority]
+
+
+async def test_users_take_turns(recorder_fx):
+    scheduler = DispatchScheduler(max_concurrency=1)
+    scheduler.submit(recorder_fx.job("blocker"))
+    for index in range(3):
+        scheduler.submit(recorder_fx.job(f"spam{index}"), channel="#ratchat", user="Spammer")
+    scheduler.submit(recorder_fx.job("a"), channel="#ratchat", user="some_rat")
+    scheduler.submit(recorder_fx.job("b"), channel="#ratchat", user="some_ov")
+
+    recorder_fx.gate.set()
+    await scheduler.join()
+    assert recorder_fx.order == ["blocker", "spam0", "a", "b", "spam1", "spam2"]
+
+
+async def test_channels_take_turns(recorder_fx):
+    scheduler = DispatchScheduler(max_concurrency=1)
+    scheduler.submit(recorder_fx.job("blocker"))
+    for index in range(3):
+        scheduler.submit(recorder_fx.job(f"busy{index}"), channel="#busy", user=f"user{index}")
+    scheduler.submit(recorder_fx.job("quiet"), channel="#quiet", user="user0")
+
+    recorder_fx.gate.set()
+    await scheduler.join()
+    assert recorder_fx.order == ["blocker", "busy0", "quiet", "busy1", "busy2"]
+
+
+async def test_keyed_jobs_run_in_submission_order(recorder_fx):
+    scheduler = DispatchScheduler(max_concurrency=4)
+    scheduler.submit(recorder_fx.job("chatter", fail=True), priority=Priority.CHATTER, key=3)
+    scheduler.submit(recorder_fx.job("assign"), priority=Priority.CASE, key=3, user="a")
+    scheduler.submit(recorder_fx.job("other case"), priority=Priority.CASE, key=4)
+    await _settle()
+    assert scheduler.running == 2, "only the first job of each key may run"
+
+    recorder_fx.gate.set()
+    await scheduler.join()
+    assert recorder_fx.order.index("chatter") < recorder_fx.order.index("assign")
+    assert not scheduler._serial, "a failed job must still release its key"
+
+
+async def test_queue_depth_metric(recorder_fx):
+    from src.packages.dispatch.scheduler import QUEUE_DEPTH
+
+    depth = QUEUE_DEPTH.labels(priority="case")
+    before = depth._value.get()
+    scheduler = DispatchScheduler(max_concurrency=1)
+    scheduler.submit(recorder_fx.job("blocker"))
+    scheduler.submit(recorder_fx.job("queued"), priority=Priority.CASE)
+    await _settle()
+    assert depth._value.get() == before + 1
+
+    recorder_fx.gate.set()
+    await scheduler.join()
+    assert depth._value.get() == before
+
+
+async def test_busy_user_drops_their_oldest(recorder_fx):
+    from src.packages.dispatch.scheduler import DROPPED
+
+    dropped = DROPPED.labels(reason="user")
+    before = dropped._value.get()
+    scheduler = DispatchScheduler(max_concurrency=1, max_per_user=2)
+    scheduler.submit(recorder_fx.job("blocker"))
+    for index in range(4):
+        scheduler.submit(recorder_fx.job(f"spam{index}"), channel="#ratchat", user="Spammer")
+    scheduler.submit(recorder_fx.job("urgent"), Priority.CASE, channel="#ratchat", user="spammer")
+    scheduler.submit(recorder_fx.job("chatter"), channel="#ratchat", user="spammer")
+    scheduler.submit(recorder_fx.job("a"), channel="#ratchat", user="some_rat")
+    assert len(scheduler) == 3
+    assert dropped._value.get() == before + 4
+
+    recorder_fx.gate.set()
+    await scheduler.join()
+    assert recorder_fx.order == ["blocker", "urgent", "chatter", "a"]
+    assert not scheduler._user_pending and not scheduler._channel_pending
+
+
+async def test_busy_channel_drops_least_urgent(recorder_fx):
+    scheduler = DispatchScheduler(max_concurrency=1, max_per_channel=3)
+    scheduler.submit(recorder_fx.job("blocker"))
+    scheduler.submit(recorder_fx.job("signal"), Priority.ANNOUNCEMENT, channel="#fuelrats")
+    scheduler.submit(recorder_fx.job("a0"), channel="#fuelrats", user="a")
+    scheduler.submit(recorder_fx.job("a1"), channel="#fuelrats", user="a")
+    scheduler.submit(recorder_fx.job("b0"), channel="#fuelrats", user="b")
+    scheduler.submit(recorder_fx.job("c0"), Priority.CASE, channel="#fuelrats", user="c")
+    scheduler.submit(recorder_fx.job("d0"), Priority.CASE, channel="#fuelrats", user="d")
+    scheduler.submit(recorder_fx.job("e0"), Priority.CASE, channel="#fuelrats", user="e")
+
+    recorder_fx.gate.set()
+    await scheduler.join()
+    assert recorder_fx.order == ["blocker", "signal", "d0", "e0"]
+
+
+async def test_dropped_job_releases_its_key(recorder_fx):
+    scheduler = DispatchScheduler(max_concurrency=1, max_per_user=1)
+    scheduler.submit(recorder_fx.job("blocker"))
+    scheduler.submit(recorder_fx.job("first"), Priority.CHATTER, user="a", key=3)
+    scheduler.submit(recorder_fx.job("second"), Priority.CASE, user="b", key=3)
+    scheduler.submit(recorder_fx.job("replacement"), Priority.CASE, user="a")
+
+    recorder_fx.gate.set()
+    await scheduler.join()
+    assert recorder_fx.order == ["blocker", "second", "replacement"]
+    assert not scheduler._serial
+
+
+def test_invalid_concurrency():
+    with pytest.raises(ValueError):
+        DispatchScheduler(max_concurrency=0)
+    with pytest.raises(ValueError):
+        DispatchScheduler(max_per_user=0)
+
+
+@pytest.mark.parametrize(
+    "message, priority",
+    (
+        ("Incoming Client: SomeClient - System: Fuelum - Platform: PC", Priority.ANNOUNCEMENT),
+        ("DRILLSIGNAL pc, fuelum", Priority.ANNOUNCEMENT),
+        ("!assign SomeClient some_rat", Priority.CASE),
+        ("!version", Priority.COMMAND),
+        ("!prep", Priority.CHATTER),
+        ("o7 rats", Priority.CHATTER),
+    ),
+)
+async def test_classify(bot_fx, message, priority):
+    ctx = await Context.from_message(bot_fx, "#unit_test", "some_announcer", message)
+    assert classify(ctx)[0] is priority
+
+
+async def test_announcements_by_others_are_chatter(bot_fx, async_callable_fx, monkeypatch):
+    monkeypatch.setattr(rat_command, "handle_ratmama_announcement", async_callable_fx)
+    ctx = await Context.from_message(
+        bot_fx, "#unit_test", "some_ov", "Incoming Client: SomeClient - System: Sol - Platform: PC"
+    )
+
+    priority, key, rule = classify(ctx)
+    assert (priority, key) == (Priority.CHATTER, None)
+    await rat_command.trigger(ctx, rule)
+    assert not async_callable_fx.was_called
+
+
+async def test_classify_keys_cases_by_id(bot_fx, rescue_sop_fx):
+    await bot_fx.board.append(rescue_sop_fx)
+    by_index = await Context.from_message(
+        bot_fx, "#unit_test", "some_ov", f"!sys {rescue_sop_fx.board_index} Fuelum"
+    )
+    by_name = await Context.from_message(
+        bot_fx, "#unit_test", "some_ov", f"!cmdr {rescue_sop_fx.client.upper()} Bob"
+    )
+    assert classify(by_index)[:2] == classify(by_name)[:2] == (Priority.CASE, rescue_sop_fx.api_id)
+
+
+async def test_on_message_does_not_wait_for_commands(bot_fx, recorder_fx):
+    @command("unit_test_slow_command")
+    async def cmd_slow(ctx):
+        await recorder_fx.job("slow")()
+        await ctx.reply("done")
+
+    await MechaClient.on_message(bot_fx, "#unit_test", "some_ov", "!unit_test_slow_command")
+    await MechaClient.on_message(bot_fx, "#unit_test", "some_ov", "!unit_test_slow_command")
+    await _settle()
+    assert not bot_fx.sent_messages
+    assert bot_fx.dispatcher.running == 2
+
+    recorder_fx.gate.set()
+    await bot_fx.dispatcher.join()
+    assert len(bot_fx.sent_messages) == 2
+
+
+async def test_rules_are_matched_once(bot_fx, monkeypatch):
+    lookups = []
+
+    def get_rule(*args, **kwargs):
+        lookups.append(args)
+        return original(*args, **kwargs)
+
+    original = rat_command.get_rule
+    monkeypatch.setattr(rat_command, "get_rule", get_rule)
+    await MechaClient.on_message(bot_fx, "#unit_test", "some_ov", "DRILLSIGNAL pc, fuelum")
+    await bot_fx.dispatcher.join()
+    assert len(lookups) == 1
@@ -132,3 +132,74 @@ async def test_star_system_distance(galaxy_fx):
     distance_two = second.distance(first)
     assert distance_one == distance_two
     assert distance_one == 14.56
+
+
+class SlowRequest:
+    """ stands in for Galaxy._request, blocking until released """
+
+    def __init__(self, error: BaseException = None):
+        self.calls = []
+        self.release = asyncio.Event()
+        self.error = error
+
+    async def __call__(self, endpoint, params=None):
+        self.calls.append((endpoint, params))
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return {"endpoint": endpoint}
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_are_coalesced(galaxy_fx, monkeypatch):
+    request = SlowRequest()
+    monkeypatch.setattr(galaxy_fx, "_request", request)
+
+    calls = [
+        asyncio.ensure_future(galaxy_fx._call("landmark", {"name": "Fuelum", "limit": 1})),
+        asyncio.ensure_future(galaxy_fx._call("landmark", {"limit": 1, "name": "Fuelum"})),
+        asyncio.ensure_future(galaxy_fx._call("landmark", {"name": "Sol"})),
+    ]
+    await asyncio.sleep(0)
+    request.release.set()
+    first, second, third = await asyncio.gather(*calls)
+
+    assert len(request.calls) == 2, "identical requests were not coalesced"
+    assert first is second
+    assert third is not first
+    assert not galaxy_fx._in_flight
+
+    # once complete, the next identical call goes upstream again.
+    await galaxy_fx._call("landmark", {"name": "Fuelum", "limit": 1})
+    assert len(request.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_coalesced_failure_reaches_every_caller(galaxy_fx, monkeypatch):
+    request = SlowRequest(error=aiohttp.ClientConnectionError())
+    monkeypatch.setattr(galaxy_fx, "_request", request)
+
+    calls = [asyncio.ensure_future(galaxy_fx._call("mecha", {"name": "SOL"})) for _ in range(3)]
+    await asyncio.sleep(0)
+    request.release.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+
+    assert len(request.calls) == 1
+    assert all(isinstance(result, aiohttp.ClientConnectionError) for result in results)
+    assert not galaxy_fx._in_flight
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others(galaxy_fx, monkeypatch):
+    request = SlowRequest()
+    monkeypatch.setattr(galaxy_fx, "_request", request)
+
+    impatient = asyncio.ensure_future(galaxy_fx._call("mecha", {"name": "SOL"}))
+    patient = asyncio.ensure_future(galaxy_fx._call("mecha", {"name": "SOL"}))
+    await asyncio.sleep(0)
+    impatient.cancel()
+    await asyncio.sleep(0)
+    request.release.set()
+
+    assert await patient == {"endpoint": "mecha"}
+    assert impatient.cancelled()
@@ -0,0 +1,204 @@
+"""
+test_galaxy_cache.py - tests for the Galaxy lookup cache.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import asyncio
+
+import pytest
+
+from src.packages.galaxy import StarSystem
+from src.packages.galaxy.galaxy_cache import CACHE_ENTRIES, CACHE_HIT_RATIO, GalaxyCache
+from src.packages.utils import Vector
+
+pytestmark = [pytest.mark.unit, pytest.mark.galaxy]
+
+FUELUM = StarSystem(name="Fuelum", position=Vector(52.0, -52.65625, 49.8125), spectral_class="K")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Fetcher:
+    """ counts calls and returns a configurable result """
+
+    def __init__(self, result=FUELUM):
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+@pytest.fixture
+def clock_fx() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def cache_fx(clock_fx) -> GalaxyCache:
+    return GalaxyCache(ttl=100, negative_ttl=10, stale_ttl=50, max_entries=3, clock=clock_fx)
+
+
+@pytest.mark.asyncio
+async def test_fresh_hit(cache_fx):
+    fetch = Fetcher()
+    assert await cache_fx.get_or_fetch(("name", "Fuelum"), fetch) == FUELUM
+    assert await cache_fx.get_or_fetch(("name", "Fuelum"), fetch) == FUELUM
+    assert fetch.calls == 1
+    assert cache_fx.hit_ratio == 0.5
+
+
+@pytest.mark.asyncio
+async def test_negative_ttl_is_shorter(cache_fx, clock_fx):
+    missing = Fetcher(result=None)
+    found = Fetcher()
+    await cache_fx.get_or_fetch(("name", "Fualun"), missing)
+    await cache_fx.get_or_fetch(("name", "Fuelum"), found)
+
+    # past the negative TTL and its stale window, but well within the positive TTL
+    clock_fx.now += 61
+    await cache_fx.get_or_fetch(("name", "Fualun"), missing)
+    await cache_fx.get_or_fetch(("name", "Fuelum"), found)
+
+    assert missing.calls == 2
+    assert found.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate(cache_fx, clock_fx):
+    fetch = Fetcher()
+    await cache_fx.get_or_fetch(("name", "Fuelum"), fetch)
+    clock_fx.now += 120
+    assert cache_fx.age_past_expiry(("name", "Fuelum")) == 20
+
+    refreshed = StarSystem(name="Fuelum", position=Vector(1, 2, 3))
+    fetch.result = refreshed
+    # the stale value is served immediately...
+    assert await cache_fx.get_or_fetch(("name", "Fuelum"), fetch) == FUELUM
+    # ...while the refresh happens in the background
+    await asyncio.sleep(0)
+    assert fetch.calls == 2
+    assert await cache_fx.get_or_fetch(("name", "Fuelum"), fetch) is refreshed
+    assert cache_fx.age_past_expiry(("name", "Fuelum")) == -100
+
+
+@pytest.mark.asyncio
+async def test_expired_past_stale_window_is_a_miss(cache_fx, clock_fx):
+    fetch = Fetcher()
+    await cache_fx.get_or_fetch(("name", "Fuelum"), fetch)
+    clock_fx.now += 151
+    await cache_fx.get_or_fetch(("name", "Fuelum"), fetch)
+    assert fetch.calls == 2
+    assert cache_fx.hit_ratio == 0
+
+
+def test_lru_eviction(cache_fx):
+    for name in ("a", "b", "c"):
+        cache_fx.put(("name", name), None)
+    cache_fx.put(("name", "d"), None)
+    assert len(cache_fx) == 3
+    assert ("name", "a") not in cache_fx
+    assert ("name", "d") in cache_fx
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        GalaxyCache(max_entries=0)
+
+
+def test_persistence_round_trip(tmp_path, clock_fx):
+    path = tmp_path / "galaxy.json"
+    cache = GalaxyCache(ttl=100, negative_ttl=10, stale_ttl=50, path=path, clock=clock_fx)
+    cache.put(("name", "Fuelum", True), FUELUM)
+    cache.put(("id", 5031721931482), FUELUM)
+    cache.put(("name", "Fualun", False), None)
+    cache.save()
+
+    # the negative entry is too old to be loaded, the positive entries are still fresh.
+    clock_fx.now += 70
+    restored = GalaxyCache(ttl=100, negative_ttl=10, stale_ttl=50, path=path, clock=clock_fx)
+    assert len(restored) == 2
+    assert ("name", "Fualun", False) not in restored
+    assert restored.age_past_expiry(("name", "Fuelum", True)) == -30
+
+
+@pytest.mark.asyncio
+async def test_persisted_entries_are_served(tmp_path, clock_fx):
+    path = tmp_path / "galaxy.json"
+    cache = GalaxyCache(path=path, clock=clock_fx)
+    cache.put(("name", "Fuelum", True), FUELUM)
+    cache.save()
+
+    fetch = Fetcher(result=None)
+    restored = GalaxyCache(path=path, clock=clock_fx)
+    assert await restored.get_or_fetch(("name", "Fuelum", True), fetch) == FUELUM
+    assert not fetch.calls
+
+
+def gauge(metric) -> float:
+    return metric.collect()[0].samples[0].value
+
+
+@pytest.mark.asyncio
+async def test_gauges_cover_every_cache(cache_fx, clock_fx):
+    other = GalaxyCache(clock=clock_fx)
+    entries = gauge(CACHE_ENTRIES)
+
+    await cache_fx.get_or_fetch(("name", "fuelum"), Fetcher())
+    await other.get_or_fetch(("name", "fuelum"), Fetcher())
+    assert gauge(CACHE_ENTRIES) == entries + 2
+
+    del other
+    assert gauge(CACHE_ENTRIES) == entries + 1
+    await cache_fx.get_or_fetch(("name", "fuelum"), Fetcher())
+    assert 0 < gauge(CACHE_HIT_RATIO) <= 1
+
+
+def test_corrupt_file_starts_cold(tmp_path):
+    path = tmp_path / "galaxy.json"
+    path.write_text("{not json")
+    assert len(GalaxyCache(path=path)) == 0
+
+
+@pytest.mark.asyncio
+async def test_galaxy_caches_negative_results(galaxy_fx, monkeypatch):
+    galaxy_fx.cache.clear()
+    calls = []
+    original = galaxy_fx._call
+
+    async def counting_call(endpoint, params=None):
+        calls.append(endpoint)
+        return await original(endpoint, params)
+
+    monkeypatch.setattr(galaxy_fx, "_call", counting_call)
+    assert await galaxy_fx.find_system_by_name("Fualun") is None
+    assert await galaxy_fx.find_system_by_name("Fualun") is None
+    assert calls == ["api/systems"]
+
+
+@pytest.mark.asyncio
+async def test_galaxy_names_are_cached_casefolded(galaxy_fx, monkeypatch):
+    galaxy_fx.cache.clear()
+    calls = []
+    original = galaxy_fx._call
+
+    async def counting_call(endpoint, params=None):
+        calls.append(endpoint)
+        return await original(endpoint, params)
+
+    monkeypatch.setattr(galaxy_fx, "_call", counting_call)
+    found = await galaxy_fx.find_system_by_name("Fuelum")
+    assert await galaxy_fx.find_system_by_name("FUELUM") == found
+    assert calls == ["api/systems"]
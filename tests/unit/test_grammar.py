@@ -0,0 +1,205 @@
+"""
+test_grammar.py - compiled grammar tests
+
+Checks the compiled command grammars parse exactly as the pyparsing grammars they replaced.
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import typing
+
+import pyparsing
+import pytest
+from hypothesis import given, strategies
+
+from src.commands import api_utilities, case_management
+from src.packages.commands import rat_command
+from src.packages.parsing_rules import (
+    api_id,
+    irc_name,
+    platform,
+    rescue_identifier,
+    rest_of_line,
+    suppress_first_word,
+    timer,
+)
+from src.packages.parsing_rules.compiled import Pattern
+from .. import strategies as test_strategies
+
+pytestmark = [pytest.mark.unit, pytest.mark.patterns, pytest.mark.hypothesis]
+
+# The pyparsing grammars the compiled grammars replaced, as they were.
+REFERENCE = {
+    "ASSIGN_PATTERN": suppress_first_word
+    + rescue_identifier.setResultsName("subject")
+    + pyparsing.OneOrMore(irc_name).setResultsName("rats"),
+    "ACTIVE_PATTERN": suppress_first_word
+    + rescue_identifier.setResultsName("subject")
+    + rest_of_line.setResultsName("remainder"),
+    "CLEAR_PATTERN": suppress_first_word
+    + rescue_identifier.setResultsName("subject")
+    + pyparsing.Optional(irc_name).setResultsName("first_limpet"),
+    "CMDR_PATTERN": suppress_first_word
+    + rescue_identifier.setResultsName("subject")
+    + rest_of_line.setResultsName("new_cmdr"),
+    "GRAB_PATTERN": suppress_first_word
+    + rescue_identifier.setResultsName("subject")
+    + pyparsing.Optional(
+        pyparsing.Word(pyparsing.nums).setParseAction(lambda token: int(token[0]))
+        .setResultsName("count")
+        + pyparsing.WordEnd()
+        | pyparsing.QuotedString("/", escChar="\\").setResultsName("pattern")
+    ),
+    "IRC_NICK_PATTERN": suppress_first_word
+    + rescue_identifier.setResultsName("subject")
+    + irc_name.setResultsName("new_nick"),
+    "JUST_RESCUE_PATTERN": suppress_first_word + rescue_identifier.setResultsName("subject"),
+    "SUB_CMD_PATTERN": suppress_first_word
+    + rescue_identifier.setResultsName("subject")
+    + (pyparsing.Word(pyparsing.nums, pyparsing.nums, min=1) + pyparsing.WordEnd())
+    .setParseAction(lambda token: int(token.quote_id[0]))
+    .setResultsName("quote_id")
+    + rest_of_line.setResultsName("remainder"),
+    "SYS_PATTERN": suppress_first_word
+    + rescue_identifier.setResultsName("subject")
+    + rest_of_line.setResultsName("remainder"),
+    "UNASSIGN_PATTERN": suppress_first_word
+    + rescue_identifier.setResultsName("subject")
+    + pyparsing.OneOrMore(irc_name).setResultsName("rats"),
+    "INJECT_PATTERN": suppress_first_word
+    + rescue_identifier.setResultsName("subject")
+    + (
+        pyparsing.Optional(
+            pyparsing.CaselessKeyword("cr") ^ pyparsing.CaselessKeyword("code red")
+        ).setResultsName("code_red")
+        & pyparsing.Optional(timer("timer"))
+        & pyparsing.Optional(platform).setResultsName("platform")
+    )
+    + rest_of_line.setResultsName("remainder"),
+    # since extended to reopen recently closed cases by client name
+    "REOPEN_PATTERN": suppress_first_word + (api_id | irc_name).setResultsName("subject"),
+}
+
+REFERENCE_RATID = suppress_first_word + irc_name.setResultsName("subject")
+
+REFERENCE_FACT = (
+    pyparsing.Word(pyparsing.alphanums).setResultsName("name")
+    + pyparsing.Optional(
+        pyparsing.Suppress("-") + pyparsing.Word(pyparsing.alphas).setResultsName("lang")
+    )
+    + pyparsing.ZeroOrMore(
+        pyparsing.Word(pyparsing.alphanums + "_[]|?.<>{}-=")
+    ).setResultsName("subjects")
+)
+
+FRAGMENTS = [
+    "!inject", "!grab", "!assign", "SomeRat", "Some[Rat]", "a|b", "x-y_z", "Rat\\/Two", "12",
+    "#3", "# 4", "007", "3a", "cr", "CR", "code red", "Code  Red", "codered", "cr1", "pc", "PC",
+    "pcs", "pc!", "ps", "Ps4", "playstation 4", "PlayStation4", "xb", "xb1x", "xbox one",
+    "XboxOne", "12:30", "1:2x", "1 : 2", ":", "-", "/pattern/", "/with \\/ slash/", "//",
+    "/unterminated", "@", "bb0a1dc6-3bc5-4d09-b3cd-b17cd50f3a16",
+    "@bb0a1dc6-3bc5-4d09-b3cd-b17cd50f3a16", "BB0A1DC6 - 3BC5-4d09-b3cd-b17cd50f3a16",
+    "bb0a1dc6-3bc5-4d09-b3cd-b17cd50f3a16x", "é", "名前", "fact-de", "?", "", " ",
+]
+
+SEPARATORS = ["", " ", "  ", "\n"]
+
+
+@strategies.composite
+def command_text(draw) -> str:
+    """ Command lines made of fragments the grammars react to, and arbitrary words """
+    parts = draw(
+        strategies.lists(
+            strategies.one_of(strategies.sampled_from(FRAGMENTS), test_strategies.valid_word()),
+            max_size=8,
+        )
+    )
+    text = ""
+    for part in parts:
+        text += draw(strategies.sampled_from(SEPARATORS)) + part
+    return text
+
+
+def _plain(value: typing.Any) -> typing.Any:
+    return value.asList() if hasattr(value, "asList") else value
+
+
+def reference_parse(pattern: pyparsing.ParserElement, text: str, parse_all: bool = True):
+    """ Named results of the pyparsing `pattern`, as used by commands, or None on a failed parse """
+    try:
+        tokens = pattern.parseString(text, parseAll=parse_all)
+    except pyparsing.ParseException:
+        return None
+    return {name: _plain(value) for name, value in tokens.items()}
+
+
+def compiled_parse(pattern: Pattern, text: str):
+    """ Named results of the compiled `pattern`, or None on a failed parse """
+    tokens = pattern.parse(text)
+    if tokens is None:
+        return None
+    return {name: _plain(value) for name, value in tokens.asDict().items()}
+
+
+@pytest.mark.parametrize("name", sorted(REFERENCE))
+@given(text=command_text())
+def test_case_management_grammars_match_pyparsing(name: str, text: str):
+    """ Verifies the compiled case management grammars parse exactly as pyparsing did """
+    expected = reference_parse(REFERENCE[name], text)
+    assert compiled_parse(getattr(case_management, name), text) == expected
+
+
+@given(text=command_text())
+def test_ratid_grammar_matches_pyparsing(text: str):
+    """ Verifies the compiled `!ratid` grammar parses exactly as pyparsing did """
+    expected = reference_parse(REFERENCE_RATID, text)
+    assert compiled_parse(api_utilities.RATID_PATTERN, text) == expected
+
+
+@given(text=command_text())
+def test_fact_grammar_matches_pyparsing(text: str):
+    """ Verifies the compiled fact grammar parses exactly as pyparsing did """
+    expected = reference_parse(REFERENCE_FACT, text, parse_all=False)
+    assert compiled_parse(rat_command.FACT_PATTERN, text) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("!inject 3 pc cr 1:2 stuck", (["pc"], "cr", ["1", ":", "2"], "stuck")),
+        ("!inject 3 CODE RED ps4", (["ps4"], "code red", "", "")),
+        ("!inject 3 xbox one some words", (["xbox one"], "", "", "some words")),
+        ("!inject 3 pcs are fun", ("", "", "", "pcs are fun")),
+        ("!inject 3 cr cr pc", ("", "cr", "", "cr pc")),
+        ("!inject 3 playstation 4! go", ("", "", "", "playstation 4! go")),
+        ("!inject 3 PlayStation 4x", (["playstation"], "", "", "4x")),
+    ],
+)
+def test_inject_grammar(text: str, expected: tuple):
+    """ Verifies the optional `!inject` arguments parse in any order """
+    tokens = case_management.INJECT_PATTERN.parse(text)
+
+    assert tokens.subject.asList() == [3]
+    platform_, code_red, timer_, remainder = expected
+    assert _plain(tokens.platform) == platform_
+    assert tokens.code_red == code_red
+    assert _plain(tokens.timer) == timer_
+    assert tokens.remainder == remainder
+
+
+def test_missing_results_are_empty():
+    """ Verifies names the grammar didn't match read as the empty string, like pyparsing """
+    tokens = case_management.CLEAR_PATTERN.parse("!clear 3")
+
+    assert tokens.first_limpet == ""
+    assert not tokens.first_limpet
+
+
+def test_parse_string_raises():
+    """ Verifies `parseString` raises like pyparsing on a failed parse """
+    with pytest.raises(pyparsing.ParseException):
+        case_management.ASSIGN_PATTERN.parseString("!assign 3")
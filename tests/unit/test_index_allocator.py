@@ -0,0 +1,157 @@
+"""
+test_index_allocator.py - IndexAllocator tests
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import asyncio
+import typing
+
+import pytest
+from hypothesis import given, settings, strategies
+
+from src.packages.board import IndexAllocator, RatBoard
+
+pytestmark = [pytest.mark.unit, pytest.mark.ratboard]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SlowApi:
+    """ Stands in for the API, answering each creation after a given number of event loop turns """
+
+    def __init__(self):
+        self.delays: typing.List[int] = []
+
+    async def create_rescue(self, rescue, impersonating=None):
+        for _ in range(self.delays.pop(0) if self.delays else 0):
+            await asyncio.sleep(0)
+        return rescue
+
+    async def update_rescue(self, rescue, impersonating=None):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def clock_fx() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def allocator_fx(clock_fx) -> IndexAllocator:
+    return IndexAllocator(cooldown=60, clock=clock_fx)
+
+
+def test_allocates_lowest_free(allocator_fx):
+    assert [allocator_fx.allocate() for _ in range(3)] == [0, 1, 2]
+    allocator_fx.release(1, cool=False)
+    assert allocator_fx.peek() == 1
+    assert allocator_fx.allocate() == 1
+    assert allocator_fx.allocate() == 3
+    assert len(allocator_fx) == 4
+
+
+def test_released_indexes_cool_down(allocator_fx, clock_fx):
+    for _ in range(3):
+        allocator_fx.allocate()
+    allocator_fx.release(0)
+    clock_fx.now = 30
+    allocator_fx.release(1)
+
+    assert allocator_fx.cooling(0)
+    assert allocator_fx.allocate() == 3
+    clock_fx.now = 60
+    assert not allocator_fx.cooling(0)
+    assert allocator_fx.allocate() == 0
+    assert allocator_fx.allocate() == 4
+    clock_fx.now = 90
+    assert allocator_fx.allocate() == 1
+
+
+def test_claim(allocator_fx):
+    allocator_fx.claim(3)
+    assert 3 in allocator_fx
+    # claiming again is harmless
+    allocator_fx.claim(3)
+    assert [allocator_fx.allocate() for _ in range(4)] == [0, 1, 2, 4]
+
+
+def test_claim_ends_cooldown(allocator_fx):
+    allocator_fx.allocate()
+    allocator_fx.release(0)
+    allocator_fx.claim(0)
+    allocator_fx.release(0, cool=False)
+
+    assert not allocator_fx.cooling(0)
+    assert allocator_fx.allocate() == 0
+
+
+def test_release_unknown_index(allocator_fx):
+    allocator_fx.release(5)
+    assert not allocator_fx.cooling(5)
+    assert allocator_fx.allocate() == 0
+
+
+_steps = strategies.lists(
+    strategies.one_of(
+        strategies.tuples(
+            strategies.just("create"),
+            strategies.lists(strategies.integers(0, 5), min_size=1, max_size=6),
+        ),
+        strategies.tuples(strategies.just("remove"), strategies.integers(0, 20)),
+        strategies.tuples(strategies.just("wait"), strategies.integers(0, 90)),
+    ),
+    max_size=25,
+)
+
+
+@pytest.mark.hypothesis
+@pytest.mark.asyncio
+@settings(deadline=None)
+@given(steps=_steps)
+async def test_concurrent_creates(steps):
+    """
+    Creates rescues concurrently, each answered by the API after its own delay, while others
+    leave the board. Every rescue must get the lowest index neither in use nor cooling down.
+    """
+    clock = FakeClock()
+    api = SlowApi()
+    board = RatBoard(indexes=IndexAllocator(cooldown=60, clock=clock))
+    board._handler = api  # pylint: disable=protected-access
+    board._offline = False  # pylint: disable=protected-access
+    released: typing.Dict[int, float] = {}
+
+    for action, argument in steps:
+        if action == "create":
+            api.delays = list(argument)
+            cooling = {index for index, at in released.items() if clock.now - at < 60}
+            in_use = {rescue.board_index for rescue in board.values()}
+            rescues = await asyncio.gather(*(board.create_rescue() for _ in argument))
+            indexes = [rescue.board_index for rescue in rescues]
+            expected = sorted(
+                index for index in range(len(in_use) + len(cooling) + len(argument))
+                if index not in in_use and index not in cooling
+            )[:len(argument)]
+            assert indexes == expected
+        elif action == "remove" and board:
+            rescue = sorted(board.values(), key=lambda case: case.board_index)[
+                argument % len(board)
+            ]
+            await board.remove_rescue(rescue)
+            released[rescue.board_index] = clock.now
+        elif action == "wait":
+            clock.now += argument
+
+        indexes = [rescue.board_index for rescue in board.values()]
+        assert len(set(indexes)) == len(indexes) == len(board)
+        assert all(index in board for index in indexes)
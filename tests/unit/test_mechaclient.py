@@ -175,6 +175,7 @@ async def test_mechaclient_on_message_anti_loop(bot_fx):
 
     assert result is None
     assert not bot_fx.sent_messages
+    assert bot_fx.get_last_message("#pytesting", "Mechasqueak3-tests[BOT]") is None
 
 
 @pytest.mark.parametrize("mechaclient_irc_chatter", ["is this a command?",
@@ -0,0 +1,168 @@
+"""
+test_message_history.py - tests for the bounded message history store.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import sys
+
+import pytest
+
+from src.features.message_history import HistoryStore
+
+pytestmark = [pytest.mark.unit, pytest.mark.message_history]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock_fx() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def history_fx(clock_fx) -> HistoryStore:
+    return HistoryStore(max_age=60, clock=clock_fx)
+
+
+def test_channel_and_global_views(history_fx):
+    history_fx.record("#Ratchat", "SicklyTadpole", "hi")
+    history_fx.record("#fuelrats", "sicklytadpole", "ratsignal")
+
+    assert history_fx.get("#ratchat", "SICKLYTADPOLE") == "hi"
+    assert history_fx.get("#fuelrats", "SicklyTadpole") == "ratsignal"
+    assert history_fx.get(None, "SicklyTadpole") == "ratsignal"
+    assert history_fx.get("#unknown", "SicklyTadpole") is None
+
+    assert dict(history_fx.view("#RATCHAT")) == {"sicklytadpole": "hi"}
+    assert dict(history_fx.view()) == {"sicklytadpole": "ratsignal"}
+
+
+def test_global_view_follows_latest_channel(history_fx):
+    history_fx.record("#fuelrats", "client", "first")
+    history_fx.record("#ratchat", "client", "second")
+    history_fx.record("#fuelrats", "client", "third")
+    assert history_fx.get(None, "client") == "third"
+
+    history_fx.forget("client", "#fuelrats")
+    assert history_fx.get(None, "client") == "second"
+
+
+def test_keys_are_interned(history_fx):
+    nick = "".join(["Sickly", "Tadpole"])
+    history_fx.record("#fuelrats", nick, "hi")
+    stored = next(iter(history_fx.nicks()))
+    assert stored is sys.intern("sicklytadpole")
+
+
+def test_expiry(history_fx, clock_fx):
+    history_fx.record("#fuelrats", "old", "hi")
+    clock_fx.now = 30
+    history_fx.record("#fuelrats", "new", "hi")
+
+    clock_fx.now = 61
+    assert history_fx.get(None, "old") is None
+    assert history_fx.get(None, "new") == "hi"
+
+    # expired entries are also pruned on write
+    clock_fx.now = 120
+    history_fx.record("#fuelrats", "newest", "hi")
+    assert list(history_fx.nicks()) == ["newest"]
+
+
+def test_expiry_after_forgetting_newest(history_fx, clock_fx):
+    history_fx.record("#ratchat", "client", "old")
+    clock_fx.now = 50
+    history_fx.record("#fuelrats", "client", "new")
+    history_fx.forget("client", "#fuelrats")
+
+    clock_fx.now = 61
+    history_fx.record("#fuelrats", "other", "hi")
+    assert list(history_fx.nicks()) == ["other"]
+    assert len(history_fx) == 1
+
+
+def test_memory_budget(clock_fx):
+    history = HistoryStore(max_bytes=2048, clock=clock_fx)
+    for index in range(100):
+        history.record("#fuelrats", f"nick{index}", "x" * 100)
+
+    assert 0 < history.memory <= 2048
+    assert history.get(None, "nick0") is None, "least recently spoken entry was not evicted"
+    assert history.get(None, "nick99") == "x" * 100
+
+
+def test_ring_is_bounded(history_fx):
+    for index in range(10):
+        history_fx.record("#fuelrats", "chatty", f"{index:03}")
+    memory = history_fx.memory
+    for index in range(10, 100):
+        history_fx.record("#fuelrats", "chatty", f"{index:03}")
+
+    assert len(history_fx) == history_fx.depth
+    assert history_fx.memory == memory
+    assert history_fx.search("chatty") == [f"{index:03}" for index in range(90, 100)]
+
+
+def test_search_count(history_fx):
+    for line in ("hi", "i am in fuelum", "on pc"):
+        history_fx.record("#fuelrats", "client", line)
+    assert history_fx.search("client", count=2) == ["i am in fuelum", "on pc"]
+    assert history_fx.search("client", count=20) == ["hi", "i am in fuelum", "on pc"]
+
+
+def test_search_pattern_and_channel(history_fx):
+    history_fx.record("#fuelrats", "client", "I'm in FUELUM")
+    history_fx.record("#ratchat", "client", "fuelum again")
+    history_fx.record("#fuelrats", "client", "on pc")
+
+    assert history_fx.search("client", pattern="fuelum") == ["I'm in FUELUM", "fuelum again"]
+    assert history_fx.search("client", pattern="fuelum", channel="#FuelRats") == ["I'm in FUELUM"]
+    assert history_fx.search("client", pattern="xbox") == []
+    assert history_fx.search("nobody") == []
+
+
+def test_search_age(history_fx, clock_fx):
+    history_fx.record("#fuelrats", "client", "old")
+    clock_fx.now = 20
+    history_fx.record("#fuelrats", "client", "new")
+
+    assert history_fx.search("client", max_age=10) == ["new"]
+    clock_fx.now = 70
+    assert history_fx.search("client") == ["new"], "messages past max_age must not be returned"
+
+
+def test_view_mutation(history_fx):
+    view = history_fx.view()
+    view["Client"] = "help"
+    assert "client" in view
+    assert view["client"] == "help"
+
+    del view["client"]
+    assert "client" not in view
+    with pytest.raises(KeyError):
+        del view["client"]
+
+
+@pytest.mark.parametrize("kwargs", ({"max_bytes": 0}, {"depth": 0}))
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        HistoryStore(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_client_records_sanitized_messages(bot_fx):
+    await bot_fx.on_message("#Fuelrats", "SomeClient", "\x0304i need fuel\x03")
+
+    assert bot_fx.get_last_message("#fuelrats", "someclient") == "i need fuel"
+    assert bot_fx.last_user_message["someclient"] == "i need fuel"
@@ -0,0 +1,196 @@
+"""
+test_outbound.py - tests for the flood-control aware outbound message queue
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import asyncio
+
+import pytest
+
+from src.features import outbound
+from src.features.outbound import OutboundQueue
+from src.packages.dispatch import Priority
+from src.packages.utils import TokenBucket
+
+pytestmark = [pytest.mark.unit, pytest.mark.outbound]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock_fx() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def fake_sleep_fx(clock_fx, monkeypatch):
+    """ Makes the queue's sleeps advance the fake clock instead of taking real time """
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args, **kwargs):
+        clock_fx.now += delay
+        await real_sleep(0)
+
+    monkeypatch.setattr(outbound.asyncio, "sleep", sleep)
+
+
+class Recipient:
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.lines = []
+
+    async def __call__(self, target: str, text: str):
+        self.lines.append((self.clock.now, target, text))
+
+
+@pytest.fixture
+def recipient_fx(clock_fx) -> Recipient:
+    return Recipient(clock_fx)
+
+
+def _queue(recipient, clock, burst=2, rate=0.5, limit=100) -> OutboundQueue:
+    return OutboundQueue(recipient, lambda target: limit, burst=burst, rate=rate, clock=clock)
+
+
+def test_token_bucket(clock_fx):
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock_fx)
+    assert all(bucket.try_acquire() for _ in range(3))
+    assert not bucket.try_acquire()
+    assert bucket.delay() == 0.5
+
+    clock_fx.now += 10
+    assert bucket.tokens == 3, "bucket must not fill beyond its capacity"
+
+    bucket.acquire(5)
+    assert bucket.delay() == 1.5
+
+
+@pytest.mark.parametrize("kwargs", ({"rate": 0, "capacity": 1}, {"rate": 1, "capacity": 0.5}))
+def test_token_bucket_invalid(kwargs):
+    with pytest.raises(ValueError):
+        TokenBucket(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_respects_flood_budget(recipient_fx, clock_fx, fake_sleep_fx):
+    queue = _queue(recipient_fx, clock_fx, limit=0)  # nothing fits together, so nothing packs
+    for index in range(4):
+        queue.put("#unit_test", f"line {index}")
+    await queue.join()
+
+    assert [when for when, *_ in recipient_fx.lines] == [0, 0, 2, 4]
+    assert [text for *_, text in recipient_fx.lines] == [f"line {i}" for i in range(4)]
+
+
+@pytest.mark.asyncio
+async def test_urgent_lines_jump_the_queue(recipient_fx, clock_fx, fake_sleep_fx):
+    queue = _queue(recipient_fx, clock_fx, burst=1, limit=0)
+    queue.put("#ratchat", "No active rescues.\n1\n2\n3", Priority.CHATTER)
+    queue.put("#fuelrats", "RATSIGNAL - CMDR SomeClient", Priority.ANNOUNCEMENT)
+    await queue.join()
+
+    assert recipient_fx.lines[0][2] == "RATSIGNAL - CMDR SomeClient"
+    assert len(recipient_fx.lines) == 5
+
+
+@pytest.mark.asyncio
+async def test_packs_replies_under_pressure(recipient_fx, clock_fx, fake_sleep_fx):
+    queue = _queue(recipient_fx, clock_fx, burst=1, limit=20)
+    for reply in ("one", "two", "three", "four", "five!"):
+        queue.put("#unit_test", reply)
+    queue.put("#elsewhere", "six")
+    await queue.join()
+
+    assert [(target, text) for _, target, text in recipient_fx.lines] == [
+        ("#unit_test", "one | two | three"),
+        ("#unit_test", "four | five!"),
+        ("#elsewhere", "six"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_multiline_messages_keep_their_layout(recipient_fx, clock_fx, fake_sleep_fx):
+    queue = _queue(recipient_fx, clock_fx, burst=1)
+    queue.put("#unit_test", "header\nrow 1\nrow 2")
+    await queue.join()
+
+    assert [text for *_, text in recipient_fx.lines] == ["header", "row 1", "row 2"]
+
+
+@pytest.mark.asyncio
+async def test_does_not_pack_within_budget(recipient_fx, clock_fx, fake_sleep_fx):
+    queue = _queue(recipient_fx, clock_fx, burst=5)
+    queue.put("#unit_test", "one")
+    queue.put("#unit_test", "two")
+    await queue.join()
+
+    assert [text for *_, text in recipient_fx.lines] == ["one", "two"]
+
+
+@pytest.mark.asyncio
+async def test_stale_low_priority_lines_are_summarised(recipient_fx, clock_fx, fake_sleep_fx):
+    queue = _queue(recipient_fx, clock_fx, burst=1, rate=0.01, limit=0)
+    queue.put("#ratchat", "\n".join(f"row {index}" for index in range(5)), Priority.CHATTER)
+    queue.put("#fuelrats", "case update", Priority.CASE)
+    await queue.join()
+
+    assert [text for *_, text in recipient_fx.lines] == [
+        "case update",
+        "(5 older lines dropped)",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unthrottled_without_burst(recipient_fx, clock_fx, fake_sleep_fx):
+    queue = _queue(recipient_fx, clock_fx, burst=0, rate=0.01)
+    queue.put("#ratchat", "\n".join(f"row {index}" for index in range(40)), Priority.CHATTER)
+    for reply in ("one", "two"):
+        queue.put("#ratchat", reply)
+    await queue.join()
+
+    assert all(when == 0 for when, *_ in recipient_fx.lines)
+    # nothing is packed or dropped, and urgent lines still go first
+    assert [text for *_, text in recipient_fx.lines] == (
+        ["one", "two"] + [f"row {index}" for index in range(40)]
+    )
+
+
+@pytest.mark.asyncio
+async def test_send_failures_are_contained(clock_fx, fake_sleep_fx):
+    sent = []
+
+    async def flaky(target, text):
+        if text == "boom":
+            raise ConnectionResetError
+        sent.append(text)
+
+    queue = OutboundQueue(flaky, lambda target: 0, clock=clock_fx)
+    queue.put("#unit_test", "boom")
+    queue.put("#unit_test", "still here")
+    await queue.join()
+    assert sent == ["still here"]
+
+
+@pytest.mark.asyncio
+async def test_context_replies_carry_priority(bot_fx):
+    from src.packages.context import Context
+
+    ctx = await Context.from_message(bot_fx, "#unit_test", "some_announcer", "hello")
+    ctx.priority = Priority.ANNOUNCEMENT
+    await ctx.reply("first")
+    await ctx.reply("second", priority=Priority.CHATTER)
+    assert [sent["priority"] for sent in bot_fx.sent_messages] == [
+        Priority.ANNOUNCEMENT,
+        Priority.CHATTER,
+    ]
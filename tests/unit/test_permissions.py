@@ -15,6 +15,7 @@ This module is built on top of the Pydle system.
 """
 from typing import Set
 
+import attr
 import pytest
 
 import src.packages.commands.rat_command as Commands
@@ -319,3 +320,48 @@ class TestPermissions(object):
     def test_validate_config_bad_data(self, data):
         with pytest.raises(ValueError):
             permissions.validate_config({"permissions": data})
+
+
+@pytest.mark.usefixtures("permission_fx")
+def test_effective_level_is_cached_until_permissions_change(user_fx):
+    user = attr.evolve(user_fx, hostname="testing.fuelrats.com")
+    assert permissions.effective_level(user) == 0
+    table, _ = user.permission_cache
+    assert permissions.effective_level(user) == 0
+    assert user.permission_cache[0] is table, "an unchanged table must not be recompiled"
+
+    Permission(3, {"testing.fuelrats.com"})
+    assert permissions.effective_level(user) == 3
+    assert user.permission_cache[0] is not table
+
+
+def test_rehash_compiles_table(configuration_fx):
+    permissions.rehash_handler(configuration_fx)
+    table = permissions.level_table()
+    assert table["overseer.fuelrats.com"] == permissions.OVERSEER.level
+    assert permissions.level_table() is table
+
+
+def test_compile_guard_without_requirements():
+    assert permissions.compile_guard() is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("channel, user, expected", (
+    ("#unit_test", "some_ov", None),
+    ("some_ov", "some_ov", "channel only"),
+    ("#unit_test", "some_recruit", permissions.OVERSEER.denied_message),
+))
+async def test_compile_guard(bot_fx, channel, user, expected):
+    guard = permissions.compile_guard(
+        permission=permissions.OVERSEER, require_channel=True, channel_message="channel only"
+    )
+    ctx = await Context.from_message(bot_fx, channel, user, "!potato")
+    assert guard(ctx) == expected
+
+
+@pytest.mark.asyncio
+async def test_compile_guard_dm(bot_fx):
+    guard = permissions.compile_guard(require_dm=True, dm_message="dm only")
+    assert guard(await Context.from_message(bot_fx, "#unit_test", "some_ov", "!potato")) == "dm only"
+    assert guard(await Context.from_message(bot_fx, "some_ov", "some_ov", "!potato")) is None
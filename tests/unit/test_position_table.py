@@ -0,0 +1,63 @@
+"""
+test_position_table.py - tests for vectorised star system distances.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import numpy
+import pytest
+from hypothesis import given, strategies
+
+from src.packages.galaxy import PositionTable, StarSystem
+from src.packages.utils import Vector
+
+pytestmark = [pytest.mark.unit, pytest.mark.galaxy]
+
+SOL = StarSystem("Sol")
+FUELUM = StarSystem("Fuelum", Vector(52.0, -52.65625, 49.8125))
+BEAGLE_POINT = StarSystem("Beagle Point", Vector(-1111.5625, -134.21875, 65269.75))
+SAG_A = StarSystem("Sagittarius A*", Vector(25.21875, -20.90625, 25899.96875))
+
+coordinates = strategies.floats(min_value=-70000, max_value=70000, allow_nan=False)
+systems = strategies.builds(
+    StarSystem,
+    name=strategies.just("X"),
+    position=strategies.builds(Vector, coordinates, coordinates, coordinates),
+)
+
+
+def test_positions_are_contiguous():
+    table = PositionTable([SOL, FUELUM, BEAGLE_POINT])
+    assert table.positions.shape == (3, 3)
+    assert table.positions.dtype == numpy.float64
+    assert table.positions.flags["C_CONTIGUOUS"]
+    with pytest.raises(ValueError):
+        table.positions[0, 0] = 1
+
+
+def test_empty_table():
+    table = PositionTable([])
+    assert len(table) == 0
+    assert table.distance_matrix(PositionTable([SOL])).shape == (0, 1)
+    assert table.nearest(SOL) == []
+
+
+@given(strategies.lists(systems, max_size=8), strategies.lists(systems, max_size=8))
+def test_matrix_matches_pairwise(origins, destinations):
+    matrix = PositionTable(origins).distance_matrix(PositionTable(destinations))
+    assert matrix.shape == (len(origins), len(destinations))
+    for i, origin in enumerate(origins):
+        for j, destination in enumerate(destinations):
+            assert matrix[i, j] == pytest.approx(origin.distance(destination), abs=0.01)
+
+
+def test_nearest():
+    table = PositionTable([BEAGLE_POINT, FUELUM, SAG_A, SOL])
+    assert table.nearest(SOL, limit=2) == [(SOL, 0.0), (FUELUM, SOL.distance(FUELUM))]
+    assert [system for system, _ in table.nearest(BEAGLE_POINT.position)] == [
+        BEAGLE_POINT, SAG_A, FUELUM, SOL
+    ]
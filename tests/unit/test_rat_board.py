@@ -1,13 +1,17 @@
 """
 Unittest file for the Rat_Board module.
 """
-import itertools
 from contextlib import suppress
 
 import pendulum
 import pytest
+from aiohttp import ClientError
 
+from src.packages.board import IndexAllocator, RatBoard
 from src.packages.board.board import cycle_at
+from src.packages.galaxy import StarSystem
+from src.packages.rescue import Rescue
+from src.packages.utils import Status, Vector
 
 from datetime import datetime, timezone
 import time
@@ -15,6 +19,14 @@ import time
 pytestmark = [pytest.mark.unit, pytest.mark.ratboard]
 
 
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize("name", ("SicklyTadpole", "xxxRiderxxx", "f1sh_sticks"))
 async def test_create_rescue(rat_board_fx, name):
@@ -84,18 +96,38 @@ def test_getitem_invalid(rat_board_fx):
 
 
 @pytest.mark.asyncio
-async def test_free_case_roll_over_free(rat_board_fx):
+async def test_free_case_recycles_after_cooldown(random_string_fx):
     """
-    Verifies the board resets its counter, and assigns a free index on [0, CYCLE_AT]
-    (as such an index should be free)
+    Verifies the board hands out the lowest free index, but only once a released
+    index has cooled down
     """
+    clock = FakeClock()
+    board = RatBoard(indexes=IndexAllocator(cooldown=60, clock=clock))
+    first = await board.create_rescue(client="first")
+    await board.create_rescue(client="second")
 
-    # create a rescue
-    await rat_board_fx.create_rescue()
-    # hack the counter
-    rat_board_fx._index_counter = itertools.count(cycle_at + 1)
-    # render assertion
-    assert rat_board_fx.free_case_number == 1, "board did not give us the correct board index"
+    await board.remove_rescue(first)
+    assert board.free_case_number == 2, "board recycled an index straight away"
+    clock.now += 60
+    assert board.free_case_number == 0, "board did not give us the correct board index"
+
+
+@pytest.mark.asyncio
+async def test_rejected_rescues_hold_no_index(rat_board_fx):
+    """
+    Verifies rescues refused by the board, as they are on it already, don't reserve an index
+    """
+    existing = await rat_board_fx.create_rescue(client="existing")
+
+    with pytest.raises(ValueError):
+        await rat_board_fx.create_rescue(uuid=existing.api_id, client="duplicate")
+    assert rat_board_fx.free_case_number == 1
+
+    duplicate = Rescue(existing.api_id, client="duplicate")
+    with pytest.raises(ValueError):
+        await rat_board_fx.append(duplicate)
+    assert rat_board_fx.free_case_number == 1
+    assert rat_board_fx[existing.board_index] is existing
 
 
 @pytest.mark.asyncio
@@ -157,3 +189,40 @@ async def test_modify_rescue_datetime_last_case(rat_board_fx, monkeypatch):
     await rat_board_fx.create_rescue()
     assert pre_datetime_last_case < rat_board_fx.last_case_datetime
     assert rat_board_fx.last_case_datetime < pendulum.now() , "The stored value may not be in the future"
+
+
+@pytest.mark.asyncio
+async def test_rescues_by_distance(rat_board_fx):
+    """ Verifies open rescues are ranked by distance, with unlocatable systems trailing """
+
+    systems = {
+        "fuelum": StarSystem("Fuelum", Vector(52.0, -52.65625, 49.8125)),
+        "beagle point": StarSystem("Beagle Point", Vector(-1111.5625, -134.21875, 65269.75)),
+        "sol": StarSystem("Sol"),
+    }
+
+    class FakeGalaxy:
+        async def find_system_by_name(self, name, full_details=False):
+            assert full_details, "ranking needs coordinates"
+            if name == "broken":
+                raise ClientError
+            return systems.get(name.casefold())
+
+    far = await rat_board_fx.create_rescue(client="far", system="beagle point")
+    unknown = await rat_board_fx.create_rescue(client="unknown", system="fualun")
+    near = await rat_board_fx.create_rescue(client="near", system="fuelum")
+    closed = await rat_board_fx.create_rescue(client="closed", system="sol")
+    closed.status = Status.CLOSED
+    no_system = await rat_board_fx.create_rescue(client="nowhere")
+    broken = await rat_board_fx.create_rescue(client="broken", system="broken")
+
+    ranked = await rat_board_fx.rescues_by_distance(FakeGalaxy(), systems["sol"])
+
+    assert closed not in [rescue for rescue, _ in ranked]
+    assert ranked == [
+        (near, 89.21),
+        (far, systems["sol"].distance(systems["beagle point"])),
+        (unknown, None),
+        (no_system, None),
+        (broken, None),
+    ]
@@ -284,3 +284,126 @@ class TestRatCommand(object):
         assert (
             rescue_sop_fx.marked_for_deletion.marked
         ), "SOP rescue did not become marked for deletion"
+
+
+@pytest.fixture
+def registry_fx():
+    """ An empty command registry, and a command recording its invocations """
+    registry = Commands.CommandRegistry()
+    calls = []
+
+    async def underlying(context: Context):
+        calls.append(context.words_eol[0])
+        if context.words[-1] == "boom":
+            raise RuntimeError("boom")
+        return "done"
+
+    registry.register(
+        Commands.Command(underlying=underlying, aliases=("Hooked", "hk")), ["Hooked", "hk"]
+    )
+    return registry, calls
+
+
+@pytest.mark.unit
+@pytest.mark.commands
+@pytest.mark.asyncio
+async def test_registry_lookup_is_casefolded(registry_fx):
+    registry, _ = registry_fx
+    assert registry.get("hooked") is registry["hk"]
+    assert "Hooked" not in registry
+    assert len(registry) == 2
+
+    with pytest.raises(NameCollisionException):
+        registry.register(registry["hk"], ["HK"])
+
+
+@pytest.mark.unit
+@pytest.mark.commands
+@pytest.mark.asyncio
+async def test_registry_pre_hook_rejects(registry_fx, bot_fx):
+    registry, calls = registry_fx
+    seen = []
+
+    def hook(cmd, context):
+        seen.append(cmd.aliases[0])
+        return "not now"
+
+    # hooks added after registration still apply
+    registry.add_pre_hook(hook)
+    ctx = await Context.from_message(bot_fx, "#unittest", "some_recruit", "!hk")
+    assert await registry["hk"](ctx) is None
+
+    assert seen == ["Hooked"]
+    assert calls == []
+    assert bot_fx.sent_messages[-1]["message"] == "not now"
+
+    registry.remove_hook(hook)
+    assert await registry["hk"](ctx) == "done"
+    assert calls == ["hk"]
+
+
+@pytest.mark.unit
+@pytest.mark.commands
+@pytest.mark.asyncio
+async def test_registry_pre_hook_rejects_silently(registry_fx, bot_fx):
+    registry, calls = registry_fx
+    registry.add_pre_hook(lambda cmd, context: "")
+    ctx = await Context.from_message(bot_fx, "#unittest", "some_recruit", "!hk")
+
+    assert await registry["hk"](ctx) is None
+    assert calls == []
+    assert bot_fx.sent_messages == []
+
+
+@pytest.mark.unit
+@pytest.mark.commands
+@pytest.mark.asyncio
+async def test_registry_hooks_scoped_by_alias(registry_fx, bot_fx):
+    registry, calls = registry_fx
+    registry.register(
+        Commands.Command(underlying=registry["hk"].underlying, aliases=("other",)), ["other"]
+    )
+    registry.add_pre_hook(lambda cmd, context: "no", "HOOKED")
+
+    await registry["other"](await Context.from_message(bot_fx, "#unittest", "some_recruit", "!other"))
+    await registry["hk"](await Context.from_message(bot_fx, "#unittest", "some_recruit", "!hk"))
+    assert calls == ["other"]
+
+
+@pytest.mark.unit
+@pytest.mark.commands
+@pytest.mark.asyncio
+async def test_registry_post_hook_sees_errors(registry_fx, bot_fx):
+    registry, _ = registry_fx
+    outcomes = []
+    registry.add_post_hook(lambda cmd, context, error: outcomes.append((context.words[-1], error)))
+
+    await registry["hk"](await Context.from_message(bot_fx, "#unittest", "some_recruit", "!hk fine"))
+    context = await Context.from_message(bot_fx, "#unittest", "some_recruit", "!hk boom")
+    with pytest.raises(RuntimeError):
+        await registry["hk"](context)
+
+    assert outcomes[0] == ("fine", None)
+    assert outcomes[1][0] == "boom"
+    assert isinstance(outcomes[1][1], RuntimeError)
+
+
+@pytest.mark.unit
+@pytest.mark.commands
+@pytest.mark.asyncio
+async def test_guard_runs_before_hooks(registry_fx, bot_fx):
+    registry, calls = registry_fx
+    hooked = []
+    registry.add_pre_hook(lambda cmd, context: hooked.append(cmd))
+
+    async def underlying(context: Context):
+        calls.append("dm")
+
+    registry.register(
+        Commands.Command(underlying=underlying, aliases=("dm",), require_direct_message=True),
+        ["dm"],
+    )
+    await registry["dm"](await Context.from_message(bot_fx, "#unittest", "some_recruit", "!dm"))
+
+    assert hooked == []
+    assert calls == []
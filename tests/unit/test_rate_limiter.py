@@ -0,0 +1,138 @@
+"""
+test_rate_limiter.py - tests for per user, per command rate limiting.
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import attr
+import prometheus_client
+import pytest
+
+import src.packages.commands.rat_command as Commands
+from src.packages.commands import RateLimiter
+from src.packages.context.context import Context
+from src.packages.permissions import OVERSEER, RAT
+
+pytestmark = [pytest.mark.unit, pytest.mark.commands]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock_fx() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter_fx(clock_fx) -> RateLimiter:
+    return RateLimiter(
+        budgets=[(RAT, (3, 1.0)), (OVERSEER, (0, 1.0))],
+        default=(2, 0.5),
+        exempt=["RatMama[Bot]"],
+        clock=clock_fx,
+    )
+
+
+def _rejected(kind: str) -> float:
+    return prometheus_client.REGISTRY.get_sample_value(
+        "commands_rate_limited_total", {"kind": kind}
+    ) or 0
+
+
+def test_burst_then_refill(limiter_fx, clock_fx, bot_fx):
+    user = bot_fx.get_user("unit_test")
+    before = _rejected("command")
+
+    assert [limiter_fx.allow(user, "unit_test", "quiet") for _ in range(3)] == [True, True, False]
+    assert _rejected("command") == before + 1
+
+    clock_fx.now += 2
+    assert limiter_fx.allow(user, "unit_test", "quiet")
+    assert not limiter_fx.allow(user, "unit_test", "quiet")
+
+
+def test_keyed_by_user_and_command(limiter_fx, bot_fx):
+    user = bot_fx.get_user("unit_test")
+    for _ in range(2):
+        limiter_fx.allow(user, "unit_test", "quiet")
+
+    assert not limiter_fx.allow(user, "unit_test", "quiet")
+    assert limiter_fx.allow(user, "unit_test", "list")
+    assert limiter_fx.allow(None, "someone_else", "quiet")
+    # facts are budgeted apart from a command of the same name
+    assert limiter_fx.allow(user, "unit_test", "quiet", kind="fact")
+
+
+def test_account_shared_across_nicks(limiter_fx, bot_fx):
+    user = attr.evolve(bot_fx.get_user("unit_test"), account="Trees")
+    limiter_fx.allow(user, "unit_test", "quiet")
+    limiter_fx.allow(attr.evolve(user, nickname="unit_test|afk"), "unit_test|afk", "quiet")
+
+    assert not limiter_fx.allow(user, "unit_test", "quiet")
+
+
+def test_budget_by_permission(limiter_fx, bot_fx):
+    rat = bot_fx.get_user("some_rat")
+    assert [limiter_fx.allow(rat, "some_rat", "quiet") for _ in range(4)].count(True) == 3
+
+    # overseers are covered by a burst of 0, and so are never limited
+    overseer = bot_fx.get_user("some_ov")
+    assert all(limiter_fx.allow(overseer, "some_ov", "quiet") for _ in range(20))
+
+    # recruits have no budget of their own, and fall back to the default
+    recruit = bot_fx.get_user("some_recruit")
+    assert [limiter_fx.allow(recruit, "some_recruit", "quiet") for _ in range(3)].count(True) == 2
+
+
+def test_exempt_nick(limiter_fx):
+    assert all(limiter_fx.allow(None, "ratmama[BOT]", "ratsignal") for _ in range(20))
+    assert not len(limiter_fx)
+
+
+def test_bucket_eviction(limiter_fx):
+    limiter_fx.max_buckets = 2
+    for _ in range(2):
+        limiter_fx.allow(None, "spammer", "quiet")
+    limiter_fx.allow(None, "a", "quiet")
+    limiter_fx.allow(None, "b", "quiet")
+
+    assert len(limiter_fx) == 2
+    # the spammer's bucket was evicted, and so refilled
+    assert limiter_fx.allow(None, "spammer", "quiet")
+
+
+def test_from_config(configuration_fx):
+    limiter = RateLimiter.from_config(configuration_fx)
+    assert all(limiter.allow(None, nick, "ratsignal")
+               for nick in configuration_fx.ratsignal_parser.announcer_nicks
+               for _ in range(20))
+
+
+@pytest.mark.asyncio
+async def test_trigger_quietly_ignores_limited(bot_fx, monkeypatch):
+    monkeypatch.setattr(Commands, "_registered_commands", Commands.CommandRegistry())
+    monkeypatch.setattr(bot_fx, "_rate_limiter", RateLimiter(default=(2, 0.001)))
+    calls = []
+
+    @Commands.command("spam")
+    async def cmd_spam(context: Context):
+        calls.append(context.sender)
+        await context.reply("spam")
+
+    before = _rejected("command")
+    for _ in range(5):
+        await Commands.trigger(await Context.from_message(bot_fx, "#unit_test", "unit_test", "!SPAM"))
+
+    assert len(calls) == 2
+    assert len(bot_fx.sent_messages) == 2
+    assert _rejected("command") == before + 3
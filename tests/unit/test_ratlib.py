@@ -1,5 +1,9 @@
+import re
+
+import hypothesis
 import pytest
 from datetime import datetime, timedelta
+from hypothesis import strategies
 
 from src.packages.utils import Singleton
 from src.packages.utils import Colors, Formatting, color, bold, underline, italic, reverse
@@ -70,6 +74,33 @@ def test_sanitize(input_message, expected_message):
     assert ratlib.sanitize(input_message) == expected_message
 
 
+def _reference_sanitize(message: str) -> str:
+    """ The original multi-pass sanitizer, which :func:`ratlib.sanitize` must match """
+    control_code_regex = re.compile(
+        r"([\x02\x1D\x1F\x1E\x11\x16\x0F]|"
+        r"(\x03([0-9]{1,2}(,[0-9]{1,2})?)?)|"
+        r"(\x04([0-9a-fA-F]{6}(,[0-9a-fA-F]{6})?)?))"
+    )
+    sanitized_string = control_code_regex.sub("", message)
+    for character in sanitized_string:
+        if character in ratlib.STRIPPED_CHARS:
+            sanitized_string = sanitized_string.replace(character, "")
+    return " ".join(sanitized_string.split())
+
+
+@pytest.mark.hypothesis
+@hypothesis.given(
+    message=strategies.text(
+        alphabet=strategies.one_of(
+            strategies.sampled_from("\x02\x03\x04\x0F\x11\x16\x1D\x1E\x1F\t\n ,0189aFfG"),
+            strategies.characters(),
+        )
+    )
+)
+def test_sanitize_matches_reference(message: str):
+    assert ratlib.sanitize(message) == _reference_sanitize(message)
+
+
 def test_singleton_direct_inheritance():
     """
     Verifies the Singleton class behaves as expected for classes directly inheriting
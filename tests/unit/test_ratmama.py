@@ -10,10 +10,12 @@ Licensed under the BSD 3-Clause License.
 
 See LICENSE.md
 """
+import asyncio
 
 import pytest
 
 import src.packages.ratmama as ratmama
+from src.packages.board import RatBoard
 from src.packages.context.context import Context
 from src.packages.rescue.rat_rescue import Platforms
 
@@ -102,7 +104,7 @@ async def test_announcer_invalid_platform(bot_fx, async_callable_fx, monkeypatch
                                          "some_announcer",
                                          "Incoming Client: SomeClient - System: Fuelum"
                                          " - Platform: NES - O2: OK - Language: English (en-US)")
-    monkeypatch.setattr(context, "reply", async_callable_fx)
+    monkeypatch.setattr(Context, "reply", async_callable_fx)
 
     await ratmama.handle_ratmama_announcement(context)
 
@@ -119,7 +121,9 @@ async def test_announcer_reconnect(bot_fx, async_callable_fx, monkeypatch):
                                          "some_announcer",
                                          "Incoming Client: SomeClient - System: Fuelum"
                                          " - Platform: PC - O2: OK - Language: English (en-US)")
-    monkeypatch.setattr(context, "reply", async_callable_fx)
+    monkeypatch.setattr(Context, "reply", async_callable_fx)
+    # reconnecting after any burst of announcements is over
+    bot_fx.signal_ingest.window = 0
 
     await ratmama.handle_ratmama_announcement(context)
     await ratmama.handle_ratmama_announcement(context)
@@ -146,8 +150,7 @@ async def test_announcer_reconnect_with_changes(bot_fx, async_callable_fx, monke
                                           "some_announcer",
                                           "Incoming Client: SomeClient - System: Sol - "
                                           "Platform: XB - O2: NOT OK - Language: English (en-US)")
-    monkeypatch.setattr(context, "reply", async_callable_fx)
-    monkeypatch.setattr(context2, "reply", async_callable_fx)
+    monkeypatch.setattr(Context, "reply", async_callable_fx)
 
     assert len(bot_fx.board) == 0, "precondition failed."
     await ratmama.handle_ratmama_announcement(context)
@@ -162,6 +165,110 @@ async def test_announcer_reconnect_with_changes(bot_fx, async_callable_fx, monke
     )
 
 
+async def test_announcer_burst_is_deduplicated(bot_fx, async_callable_fx, monkeypatch):
+    """
+    Tests a client announced over and over gets a single case, and dispatch hears of the fields
+    changed on rejoin once, until more change.
+    """
+    announcements = [
+        "Incoming Client: SomeClient - System: Fuelum - Platform: PC - O2: OK"
+        " - Language: English (en-US)",
+        "Incoming Client: SomeClient - System: Sol - Platform: PC - O2: OK"
+        " - Language: English (en-US)",
+        "Incoming Client: SomeClient - System: Sol - Platform: PC - O2: OK"
+        " - Language: English (en-US)",
+        "Incoming Client: SomeClient - System: Sol - Platform: XB - O2: OK"
+        " - Language: English (en-US)",
+        "Incoming Client: SomeClient - System: Fuelum - Platform: XB - O2: OK"
+        " - Language: English (en-US)",
+    ]
+    monkeypatch.setattr(Context, "reply", async_callable_fx)
+
+    for announcement in announcements * 3:
+        context = await Context.from_message(bot_fx, "#unit_test", "some_announcer", announcement)
+        await ratmama.handle_ratmama_announcement(context)
+
+    assert len(bot_fx.board) == 1
+    replies = [call.args[0] for call in async_callable_fx.calls]
+    assert len(replies) == 3
+    assert replies[0].startswith("TESTSIGNAL - CMDR SomeClient")
+    assert replies[1].endswith("please verify:  system")
+    assert replies[2].endswith("please verify:  system, platform")
+
+
+async def test_simultaneous_announcements_create_one_case(bot_fx, async_callable_fx, monkeypatch):
+    """
+    Tests announcements of a client handled at once can't both create a case for them.
+    """
+    announcements = [
+        "Incoming Client: SomeClient - System: Fuelum - Platform: PC - O2: OK"
+        " - Language: English (en-US)",
+        "Incoming Client: SomeClient - System: Sol - Platform: PC - O2: NOT OK"
+        " - Language: English (en-US)",
+    ]
+    monkeypatch.setattr(Context, "reply", async_callable_fx)
+    create_rescue = RatBoard.create_rescue
+
+    async def slow_create_rescue(*args, **kwargs):
+        # let the other announcement run while this one creates the case
+        await asyncio.sleep(0)
+        return await create_rescue(*args, **kwargs)
+
+    monkeypatch.setattr(RatBoard, "create_rescue", slow_create_rescue)
+    contexts = [
+        await Context.from_message(bot_fx, "#unit_test", "some_announcer", announcement)
+        for announcement in announcements
+    ]
+
+    await asyncio.gather(*(ratmama.handle_ratmama_announcement(context) for context in contexts))
+
+    assert len(bot_fx.board) == 1
+
+
+async def test_resignal_after_failed_creation(bot_fx, async_callable_fx, monkeypatch):
+    """
+    Tests a client announced again after their case failed to be created still gets a case.
+    """
+    monkeypatch.setattr(Context, "reply", async_callable_fx)
+    create_rescue = RatBoard.create_rescue
+    failures = [RuntimeError("API unavailable")]
+
+    async def failing_create_rescue(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await create_rescue(*args, **kwargs)
+
+    monkeypatch.setattr(RatBoard, "create_rescue", failing_create_rescue)
+    announcement = ("Incoming Client: SomeClient - System: Fuelum - Platform: PC - O2: OK"
+                    " - Language: English (en-US)")
+
+    context = await Context.from_message(bot_fx, "#unit_test", "some_announcer", announcement)
+    with pytest.raises(RuntimeError):
+        await ratmama.handle_ratmama_announcement(context)
+    assert "SomeClient" not in bot_fx.board
+
+    context = await Context.from_message(bot_fx, "#unit_test", "some_announcer", announcement)
+    await ratmama.handle_ratmama_announcement(context)
+    assert "SomeClient" in bot_fx.board
+
+
+async def test_resignal_after_case_closed(bot_fx, async_callable_fx, monkeypatch):
+    """
+    Tests a client announced again, moments after dispatch closed their case, gets a new case.
+    """
+    monkeypatch.setattr(Context, "reply", async_callable_fx)
+    announcement = ("Incoming Client: SomeClient - System: Fuelum - Platform: PC - O2: OK"
+                    " - Language: English (en-US)")
+
+    context = await Context.from_message(bot_fx, "#unit_test", "some_announcer", announcement)
+    await ratmama.handle_ratmama_announcement(context)
+    await bot_fx.board.remove_rescue(bot_fx.board["SomeClient"])
+
+    context = await Context.from_message(bot_fx, "#unit_test", "some_announcer", announcement)
+    await ratmama.handle_ratmama_announcement(context)
+    assert "SomeClient" in bot_fx.board
+
+
 async def test_announce_from_invalid_user(bot_fx, async_callable_fx, monkeypatch):
     """
     Tests that a valid signal received from an invalid user does not trigger a case creation.
@@ -172,7 +279,7 @@ async def test_announce_from_invalid_user(bot_fx, async_callable_fx, monkeypatch
                                          "some_recruit",
                                          "Incoming Client: SomeClient - System: Fuelum"
                                          " - Platform: PC - O2: OK - Language: English (en-US)")
-    monkeypatch.setattr(context, "reply", async_callable_fx)
+    monkeypatch.setattr(Context, "reply", async_callable_fx)
 
     await ratmama.handle_ratmama_announcement(context)
 
@@ -203,7 +310,7 @@ async def test_manual_signal(bot_fx,
                                          "#unit_test",
                                          "some_recruit",
                                          signal)
-    monkeypatch.setattr(context, "reply", async_callable_fx)
+    monkeypatch.setattr(Context, "reply", async_callable_fx)
 
     await ratmama.handle_ratsignal(context)
 
@@ -240,7 +347,7 @@ async def test_manual_signal_duplicate(bot_fx, async_callable_fx, monkeypatch):
                                          "#unit_test",
                                          "some_recruit",
                                          "ratsignal Sol, PC, O2 OK")
-    monkeypatch.setattr(context, "reply", async_callable_fx)
+    monkeypatch.setattr(Context, "reply", async_callable_fx)
 
     await ratmama.handle_ratsignal(context)
     await ratmama.handle_ratsignal(context)
@@ -0,0 +1,145 @@
+"""
+test_render_cache.py - RescueRenderCache tests
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import itertools
+import typing
+from uuid import uuid4
+
+import pytest
+
+from src.packages.rat import Rat
+from src.packages.rescue import Rescue
+from src.packages.utils import Platforms
+from src.templates import RESCUE_TEMPLATE, RescueRenderFlags, render_rescues
+from src.templates.render_cache import RescueRenderCache
+
+pytestmark = [pytest.mark.unit, pytest.mark.templates, pytest.mark.asyncio]
+
+ALL_FLAGS = [
+    RescueRenderFlags(
+        show_assigned_rats=rats, show_unidentified_rats=unidentified, show_uuids=uuids
+    )
+    for rats, unidentified, uuids in itertools.product((False, True), repeat=3)
+]
+
+
+class CountingRenderer:
+    """ Renders a rescue to a string describing it, counting renders """
+
+    def __init__(self):
+        self.renders: typing.List[typing.Tuple[Rescue, RescueRenderFlags]] = []
+
+    async def __call__(self, rescue: Rescue, flags: RescueRenderFlags) -> str:
+        self.renders.append((rescue, flags))
+        return f"{rescue.client} {rescue.system} {flags.show_uuids}"
+
+
+@pytest.fixture
+def renderer_fx() -> CountingRenderer:
+    return CountingRenderer()
+
+
+@pytest.fixture
+def cache_fx(renderer_fx) -> RescueRenderCache:
+    return RescueRenderCache(renderer_fx, max_rescues=4)
+
+
+async def test_renders_are_cached(cache_fx, renderer_fx, rescue_sop_fx):
+    flags = RescueRenderFlags()
+
+    first = await cache_fx.render(rescue_sop_fx, flags)
+    second = await cache_fx.render(rescue_sop_fx, flags)
+
+    assert first == second
+    assert len(renderer_fx.renders) == 1
+
+
+async def test_renders_are_cached_per_flags(cache_fx, renderer_fx, rescue_sop_fx):
+    plain = await cache_fx.render(rescue_sop_fx, RescueRenderFlags())
+    uuids = await cache_fx.render(rescue_sop_fx, RescueRenderFlags(show_uuids=True))
+
+    assert plain != uuids
+    assert await cache_fx.render(rescue_sop_fx, RescueRenderFlags()) == plain
+    assert len(renderer_fx.renders) == 2
+
+
+async def test_modified_rescue_is_rerendered(cache_fx, renderer_fx, rescue_sop_fx):
+    flags = RescueRenderFlags()
+    await cache_fx.render(rescue_sop_fx, flags)
+
+    rescue_sop_fx.system = "beagle point"
+
+    assert await cache_fx.render(rescue_sop_fx, flags) == f"{rescue_sop_fx.client} BEAGLE POINT False"
+    assert len(renderer_fx.renders) == 2
+
+
+async def test_rescue_modified_on_board_is_rerendered(
+    cache_fx, renderer_fx, rat_board_fx, rescue_sop_fx, rat_good_fx
+):
+    flags = RescueRenderFlags(show_assigned_rats=True)
+    await rat_board_fx.append(rescue_sop_fx)
+    await cache_fx.render(rescue_sop_fx, flags)
+
+    # adding rats isn't tracked by `Rescue.modified`, the board marks the rescue changed anyway
+    async with rat_board_fx.modify_rescue(rescue_sop_fx) as case:
+        case.rats[rat_good_fx.name.casefold()] = rat_good_fx
+    await cache_fx.render(rescue_sop_fx, flags)
+
+    assert len(renderer_fx.renders) == 2
+
+
+async def test_replaced_rescue_is_rerendered(cache_fx, renderer_fx, rescue_plain_fx):
+    flags = RescueRenderFlags()
+    await cache_fx.render(rescue_plain_fx, flags)
+    replacement = Rescue(rescue_plain_fx.api_id, client="other", board_index=42)
+
+    assert await cache_fx.render(replacement, flags) == "other None False"
+
+
+async def test_quotes_are_not_cached(cache_fx, renderer_fx, rescue_plain_fx):
+    flags = RescueRenderFlags(show_quotes=True)
+
+    await cache_fx.render(rescue_plain_fx, flags)
+    await cache_fx.render(rescue_plain_fx, flags)
+
+    assert len(renderer_fx.renders) == 2
+    assert not cache_fx
+
+
+async def test_least_recently_rendered_are_evicted(cache_fx, renderer_fx):
+    flags = RescueRenderFlags()
+    rescues = [Rescue(uuid4(), client=f"client{index}", board_index=index) for index in range(5)]
+    for rescue in rescues:
+        await cache_fx.render(rescue, flags)
+
+    assert len(cache_fx) == 4
+    await cache_fx.render(rescues[0], flags)
+    assert len(renderer_fx.renders) == 6
+
+
+@pytest.mark.parametrize("flags", ALL_FLAGS)
+async def test_render_rescues_lists_rescue_template(flags, rat_good_fx):
+    rescues = [
+        Rescue(uuid4(), client="someClient", system="sol", board_index=1, platform=Platforms.PC),
+        Rescue(uuid4(), client="other", board_index=2, code_red=True, active=False),
+    ]
+    await rescues[0].add_rat(rat_good_fx)
+    await rescues[1].add_rat(Rat(None, "unidentified_rat"))
+    # a line per rescue, rendered afresh
+    expected = ""
+    for rescue in rescues:
+        line = await RESCUE_TEMPLATE.render_async(
+            rescue=rescue, show_id=flags.show_uuids, flags=flags
+        )
+        expected += f"{line}\n"
+
+    assert await render_rescues(rescues, flags) == expected
+    # and again, from the cache
+    assert await render_rescues(rescues, flags) == expected
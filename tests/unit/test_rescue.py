@@ -91,7 +91,7 @@ def test_updated_at_date_exists(rescue_sop_fx):
     """
     Verifies rescue.updated_at is correct
     """
-    rescue_sop_fx._updatedAt = pendulum.datetime(1990, 1, 1, 1, 1, 1)
+    rescue_sop_fx._updated_at = pendulum.datetime(1990, 1, 1, 1, 1, 1)
 
     with rescue_sop_fx.change():
         rescue_sop_fx.system = 'UpdatedSystem'
@@ -104,7 +104,7 @@ def test_updated_at_raises_typeerror(rescue_sop_fx):
     Verify Rescue.updated_at raises TypeError if given incorrect value,
     or is set to a date in the past.
     """
-    rescue_sop_fx._createdAt = pendulum.datetime(1991, 1, 1, 1, 1, 1, )
+    rescue_sop_fx._created_at = pendulum.datetime(1991, 1, 1, 1, 1, 1, )
 
     # Set to a string time
     with pytest.raises(TypeError):
@@ -658,3 +658,74 @@ async def test_unassign_unidentified(rescue_sop_fx, rat_no_id_fx):
     rescue_sop_fx.remove_rat(rat=rat_no_id_fx.name)
 
     assert rescue_sop_fx.unidentified_rats == {}, "failed to remove unidentified rat"
+
+
+def test_public_api_unchanged():
+    """
+    Verifies the slotted layout keeps the public attributes of a Rescue, and which may be set
+    """
+    properties = {
+        name: value.fset is not None
+        for name, value in vars(Rescue).items()
+        if isinstance(value, property)
+    }
+    methods = {
+        name for name, value in vars(Rescue).items()
+        if callable(value) and not name.startswith("_")
+    }
+
+    assert {name for name, settable in properties.items() if settable} == {
+        "active", "board_index", "client", "code_red", "first_limpet", "irc_nickname", "lang_id",
+        "marked_for_deletion", "open", "platform", "quotes", "rats", "status", "system", "title",
+        "unidentified_rats", "updated_at",
+    }
+    assert {name for name, settable in properties.items() if not settable} == {
+        "api_id", "created_at", "epic", "journal", "modified", "outcome", "revision",
+    }
+    assert methods == {
+        "add_quote", "add_rat", "change", "in_place", "mark_changed", "mark_delete", "remove_rat",
+        "unmark_delete",
+    }
+    assert "rat_board" in Rescue.__slots__
+
+
+def test_rescue_is_slotted(rescue_plain_fx):
+    """
+    Verifies rescues and what they hold don't carry an instance dict
+    """
+    rescue_plain_fx.add_quote("out of fuel")
+    rat = Rat(uuid4(), "slottedRat")
+
+    for obj in (rescue_plain_fx, rescue_plain_fx.quotes[0], rat):
+        assert not hasattr(obj, "__dict__")
+
+
+def test_lang_id_interned(rescue_plain_fx):
+    """
+    Verifies language IDs are interned, so rescues share them
+    """
+    rescue_plain_fx.lang_id = "".join(["de", "-", "DE"])
+
+    assert rescue_plain_fx.lang_id is Rescue(uuid4(), lang_id="".join(["de-", "DE"])).lang_id
+
+
+def test_modified_behaves_as_set(rescue_plain_fx):
+    """
+    Verifies the modified fields bitset reads like the set it replaced
+    """
+    rescue_plain_fx.modified.clear()
+    rescue_plain_fx.client = "someone else"
+    rescue_plain_fx.system = "sol"
+    changes = rescue_plain_fx.modified.copy()
+
+    assert rescue_plain_fx.modified == {"client", "system"}
+    assert "client" in rescue_plain_fx.modified and "title" not in rescue_plain_fx.modified
+    assert len(rescue_plain_fx.modified) == 2
+
+    rescue_plain_fx.modified.discard("client")
+    rescue_plain_fx.code_red = True
+
+    assert rescue_plain_fx.modified == {"system", "code_red"}
+    assert changes == {"client", "system"}
+    with pytest.raises(KeyError):
+        rescue_plain_fx.modified.add("not_a_field")
@@ -0,0 +1,128 @@
+"""
+test_signal_ingest.py - SignalIngest tests
+
+Copyright (c) 2020 The Fuel Rat Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE.md
+"""
+import pytest
+
+from src.packages.ratmama import SignalIngest
+from src.packages.ratmama.announcement import parse_announcement
+
+pytestmark = [pytest.mark.unit, pytest.mark.ratsignal_parse]
+
+FUELUM = parse_announcement(
+    "Incoming Client: SomeClient - System: Fuelum - Platform: PC - O2: OK - Language: English (en-US)"
+)
+SOL = parse_announcement(
+    "Incoming Client: SomeClient - System: Sol - Platform: PC - O2: OK - Language: English (en-US)"
+)
+OTHER = parse_announcement(
+    "Incoming Client: OtherClient - System: Sol - Platform: XB - O2: OK - Language: English (en)"
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock_fx() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def ingest_fx(clock_fx) -> SignalIngest:
+    return SignalIngest(window=30, clock=clock_fx)
+
+
+def signal(ingest, burst, announcement, on_board=True) -> bool:
+    """ Admits `announcement` and, if admitted, handles it successfully """
+    admitted = ingest.admit(burst, announcement, on_board)
+    if admitted:
+        ingest.handled(burst, announcement)
+    return admitted
+
+
+def test_repeats_within_window_are_dropped(ingest_fx, clock_fx):
+    burst = ingest_fx.burst("SomeClient")
+
+    assert signal(ingest_fx, burst, FUELUM)
+    assert not burst.repeated
+    clock_fx.now = 20
+    assert not signal(ingest_fx, burst, FUELUM)
+    assert burst.repeated
+    # the window slides with each announcement
+    clock_fx.now = 45
+    assert not signal(ingest_fx, burst, FUELUM)
+
+
+def test_repeats_of_failed_announcements_are_handled(ingest_fx, clock_fx):
+    burst = ingest_fx.burst("SomeClient")
+    assert ingest_fx.admit(burst, FUELUM, on_board=False)
+    # handling it failed, so it was never marked handled
+
+    clock_fx.now = 5
+    assert signal(ingest_fx, burst, FUELUM, on_board=False)
+    clock_fx.now = 10
+    assert not signal(ingest_fx, burst, FUELUM)
+
+
+def test_repeats_of_clients_without_case_are_handled(ingest_fx, clock_fx):
+    burst = ingest_fx.burst("SomeClient")
+    signal(ingest_fx, burst, FUELUM)
+
+    # the case was closed within the window
+    clock_fx.now = 10
+    assert signal(ingest_fx, burst, FUELUM, on_board=False)
+    assert burst.repeated
+
+
+def test_changed_announcements_continue_burst(ingest_fx, clock_fx):
+    burst = ingest_fx.burst("SomeClient")
+    signal(ingest_fx, burst, FUELUM)
+    burst.reported.add("system")
+
+    clock_fx.now = 10
+    assert signal(ingest_fx, burst, SOL)
+    assert burst.repeated
+    assert burst.reported == {"system"}
+
+
+def test_burst_ends_after_window(ingest_fx, clock_fx):
+    burst = ingest_fx.burst("SomeClient")
+    signal(ingest_fx, burst, FUELUM)
+    burst.reported.add("system")
+
+    clock_fx.now = 30
+    assert signal(ingest_fx, ingest_fx.burst("someclient"), FUELUM)
+    assert not burst.repeated
+    assert not burst.reported
+
+
+def test_clients_are_forgotten_after_window(ingest_fx, clock_fx):
+    signal(ingest_fx, ingest_fx.burst("SomeClient"), FUELUM)
+    clock_fx.now = 20
+    signal(ingest_fx, ingest_fx.burst("OtherClient"), OTHER)
+
+    clock_fx.now = 40
+    ingest_fx.burst("ThirdClient")
+    assert len(ingest_fx) == 2
+    assert ingest_fx.burst("SomeClient").announcement is None
+
+
+@pytest.mark.asyncio
+async def test_locked_clients_are_kept(ingest_fx, clock_fx):
+    burst = ingest_fx.burst("SomeClient")
+    async with burst.lock:
+        signal(ingest_fx, burst, FUELUM)
+        clock_fx.now = 60
+        assert ingest_fx.burst("SomeClient") is burst
@@ -0,0 +1,105 @@
+"""
+test_user_cache.py - tests for the client's User cache
+
+Copyright (c) 2020 The Fuel Rats Mischief,
+All rights reserved.
+
+Licensed under the BSD 3-Clause License.
+
+See LICENSE
+"""
+import pytest
+from pydle.features.ircv3.tags import TaggedMessage
+
+from src.packages.context import Context
+
+pytestmark = [pytest.mark.unit, pytest.mark.user, pytest.mark.asyncio]
+
+SOURCE = "unit_test!unit_test@i.see.only.lemon.trees"
+
+
+def raw(command: str, *params: str) -> TaggedMessage:
+    """ Parses an IRC line from the unit_test user, like pydle would """
+    return TaggedMessage.parse(f":{SOURCE} {command} {' '.join(params)}\r\n".encode())
+
+
+@pytest.fixture
+def ircv3_bot_fx(bot_fx):
+    bot_fx._capabilities.update({"account-notify": True, "away-notify": True, "chghost": True})
+    return bot_fx
+
+
+async def test_users_are_cached(bot_fx):
+    user = bot_fx.get_user("Unit_Test")
+    assert user.nickname == "unit_test"
+    assert bot_fx.get_user("unit_test") is user
+
+
+async def test_unknown_user(bot_fx):
+    assert bot_fx.get_user("nobody_here") is None
+
+
+@pytest.mark.parametrize(
+    "command, params, attribute, expected",
+    (
+        ("AWAY", [":gone fishing"], "away_message", "gone fishing"),
+        ("ACCOUNT", ["unit_test"], "account", "unit_test"),
+        ("CHGHOST", ["unit_test", "unit_test.rat.fuelrats.com"], "hostname", "rat.fuelrats.com"),
+    ),
+)
+async def test_ircv3_events_invalidate(ircv3_bot_fx, command, params, attribute, expected):
+    stale = ircv3_bot_fx.get_user("unit_test")
+    await ircv3_bot_fx.on_raw(raw(command, *params))
+
+    fresh = ircv3_bot_fx.get_user("unit_test")
+    assert fresh is not stale
+    assert getattr(fresh, attribute) == expected
+
+
+async def test_nick_change_invalidates(bot_fx):
+    bot_fx.get_user("unit_test")
+    await bot_fx.on_raw(raw("NICK", "unit_test_2"))
+
+    assert bot_fx.get_user("unit_test") is None
+    assert bot_fx.get_user("unit_test_2").nickname == "unit_test_2"
+
+
+@pytest.mark.parametrize(
+    "command, params",
+    (("QUIT", [":bye"]), ("PART", ["#unit_test"]), ("KICK", ["#unit_test", "unit_test"])),
+)
+async def test_leaving_invalidates(bot_fx, monkeypatch, command, params):
+    stale = bot_fx.get_user("unit_test")
+    # pydle keeps the record while it shares other channels with the user
+    monkeypatch.setattr(bot_fx, "_destroy_user", lambda *args, **kwargs: None)
+    await bot_fx.on_raw(raw(command, *params))
+
+    assert bot_fx.get_user("unit_test") is not stale
+
+
+async def test_whois_updates_invalidate(bot_fx):
+    stale = bot_fx.get_user("unit_test")
+    bot_fx._sync_user("unit_test", {"hostname": "i.see.all"})
+    assert bot_fx.get_user("unit_test").hostname == "i.see.all"
+
+    # updates that change nothing keep the cached user
+    current = bot_fx.get_user("unit_test")
+    bot_fx._sync_user("unit_test", {"hostname": "i.see.all"})
+    assert bot_fx.get_user("unit_test") is current is not stale
+
+
+async def test_context_resolves_user_lazily(bot_fx, monkeypatch):
+    calls = []
+    original = bot_fx.get_user
+
+    def counting_get_user(nickname):
+        calls.append(nickname)
+        return original(nickname)
+
+    monkeypatch.setattr(bot_fx, "get_user", counting_get_user)
+    ctx = await Context.from_message(bot_fx, "#unit_test", "unit_test", "just chatting")
+    assert not calls
+
+    assert ctx.user.nickname == "unit_test"
+    assert ctx.user is ctx.user
+    assert calls == ["unit_test"]